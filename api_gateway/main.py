@@ -161,7 +161,7 @@ async def process_query_endpoint(request: QueryRequest):
                 )
         
         # Process the query
-        result = process_query(request.query)
+        result = process_query(request.query, request.session_id)
         
         # Calculate execution time
         execution_time = (datetime.now() - start_time).total_seconds()
@@ -55,8 +55,8 @@ class BoilerAIServer:
         
         return True
     
-    def process_query(self, query: str) -> Dict[str, Any]:
-        """Process query through CLI"""
+    def process_query(self, query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Process query through CLI; memory is kept per session_id"""
         if not self.cli_instance:
             return {
                 "response": "CLI not initialized. Please set up API key first.",
@@ -66,7 +66,7 @@ class BoilerAIServer:
             }
         
         try:
-            result = self.cli_instance.process_query(query)
+            result = self.cli_instance.process_query(query, session_id=session_id)
             return result
         except Exception as e:
             return {
@@ -119,9 +119,9 @@ def initialize_server(api_key: str = None, provider: str = None) -> bool:
     """Initialize the server with API key"""
     return server.initialize_cli(api_key, provider)
 
-def process_query(query: str) -> Dict[str, Any]:
+def process_query(query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
     """Process a query through the server"""
-    return server.process_query(query)
+    return server.process_query(query, session_id)
 
 def get_api_status() -> Dict[str, Any]:
     """Get API status"""
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Adaptive SQL/JSON query routing
+Keeps exponentially decayed latency, success and answer-quality statistics per
+(query type, path) and routes each query to the path with the best expected
+utility. Until a query type has enough samples on both paths the static
+keyword rules decide. A small exploration rate keeps the losing path's
+statistics fresh, and a per-path circuit breaker stops routing to a path that
+keeps failing. Every decision and its outcome can be exported as JSON lines.
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from metrics import get_metrics_registry
+
+PATH_SQL = "sql"
+PATH_JSON = "json"
+PATHS = (PATH_SQL, PATH_JSON)
+
+REASON_ONLY_PATH = "only_path"
+REASON_PRIOR = "prior"
+REASON_EXPLOIT = "exploit"
+REASON_EXPLORE = "explore"
+
+DEFAULT_EXPLORATION_RATE = 0.05
+DEFAULT_HALF_LIFE = 3600.0
+DEFAULT_MIN_SAMPLES = 5.0
+DEFAULT_LATENCY_WEIGHT = 0.1
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_COOLDOWN = 60.0
+DEFAULT_LOG_SIZE = 5000
+
+# Query types and the phrases that identify them, checked in order
+QUERY_TYPES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("prerequisite", ('prerequisite', 'prereq', 'need before', 'required before')),
+    ("failure", ('fail', 'failed', 'what happens if', 'impact of failing')),
+    ("graduation", ('graduate in', 'graduation timeline', 'early graduation')),
+    ("track", ('track courses', 'track requirements', 'courses in', 'machine intelligence',
+               'software engineering')),
+    ("course_info", ('tell me about', 'what is', 'describe', 'info about', 'details about')),
+    ("conversational", ('help me', 'what should i', 'advice', 'recommend', 'suggest',
+                        'confused', 'not sure', 'uncertain', 'complex', 'planning')),
+]
+SQL_PRIOR_TYPES = {"prerequisite", "failure", "graduation", "track", "course_info"}
+
+
+def classify_query_type(query: str) -> str:
+    """Coarse query type used to bucket routing statistics"""
+    query_lower = query.lower().strip()
+    for query_type, phrases in QUERY_TYPES:
+        if any(phrase in query_lower for phrase in phrases):
+            return query_type
+    return "other"
+
+
+def static_route(query_type: str) -> str:
+    """The original keyword rule: structured lookups go to SQL, everything else to JSON + AI"""
+    return PATH_SQL if query_type in SQL_PRIOR_TYPES else PATH_JSON
+
+
+@dataclass
+class DecayedPathStats:
+    """Exponentially time-decayed outcome sums for one (query type, path)"""
+    weight: float = 0.0
+    latency_ms: float = 0.0
+    successes: float = 0.0
+    quality: float = 0.0
+    updated_at: float = 0.0
+
+    def _decay(self, now: float, half_life: float):
+        if self.updated_at and half_life:
+            factor = 0.5 ** ((now - self.updated_at) / half_life)
+            self.weight *= factor
+            self.latency_ms *= factor
+            self.successes *= factor
+            self.quality *= factor
+        self.updated_at = now
+
+    def observe(self, latency_ms: float, success: bool, quality: float, now: float, half_life: float):
+        self._decay(now, half_life)
+        self.weight += 1.0
+        self.latency_ms += latency_ms
+        self.successes += 1.0 if success else 0.0
+        self.quality += quality
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return self.latency_ms / self.weight if self.weight else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.weight if self.weight else 0.0
+
+    @property
+    def mean_quality(self) -> float:
+        return self.quality / self.weight if self.weight else 0.0
+
+
+@dataclass
+class PathBreaker:
+    """Opens after consecutive failures; one trial request is let through after the cooldown"""
+    failures: int = 0
+    open_until: float = 0.0
+    trial_in_flight: bool = False
+
+    def allows(self, now: float, claim: bool = True) -> bool:
+        """Whether the path may be taken; a half-open breaker hands out its trial only when claimed"""
+        if not self.open_until:
+            return True
+        if now < self.open_until or self.trial_in_flight:
+            return False
+        if claim:
+            self.trial_in_flight = True
+        return True
+
+    def record(self, success: bool, now: float, max_failures: int, cooldown: float) -> bool:
+        """Update on an outcome; True when this outcome tripped the breaker"""
+        self.trial_in_flight = False
+        if success:
+            self.failures = 0
+            self.open_until = 0.0
+            return False
+        self.failures += 1
+        if self.failures >= max_failures:
+            tripped = not self.open_until or now >= self.open_until
+            self.open_until = now + cooldown
+            return tripped
+        return False
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self.open_until) and time.time() < self.open_until
+
+
+@dataclass
+class RouteDecision:
+    """Path chosen for one query and why"""
+    decision_id: int
+    query_type: str
+    path: str
+    reason: str
+    utilities: Dict[str, float] = field(default_factory=dict)
+    timestamp: float = 0.0
+
+
+class AdaptiveRouter:
+    """Routes between the SQL and JSON+AI paths on decayed per-query-type statistics"""
+
+    def __init__(self, exploration_rate: float = DEFAULT_EXPLORATION_RATE,
+                 half_life: float = DEFAULT_HALF_LIFE,
+                 min_samples: float = DEFAULT_MIN_SAMPLES,
+                 latency_weight: float = DEFAULT_LATENCY_WEIGHT,
+                 breaker_failures: int = DEFAULT_BREAKER_FAILURES,
+                 breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+                 log_path: Optional[str] = None,
+                 log_size: int = DEFAULT_LOG_SIZE,
+                 seed: Optional[int] = None):
+        self.exploration_rate = exploration_rate
+        self.half_life = half_life
+        self.min_samples = min_samples
+        self.latency_weight = latency_weight
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.log_path = log_path
+        self._stats: Dict[Tuple[str, str], DecayedPathStats] = {}
+        self._breakers: Dict[str, PathBreaker] = {path: PathBreaker() for path in PATHS}
+        self._log: Deque[Dict[str, Any]] = deque(maxlen=log_size)
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _utility(self, stats: DecayedPathStats) -> float:
+        """Expected answer value minus a latency penalty (per second of expected latency)"""
+        return stats.success_rate * stats.mean_quality - self.latency_weight * stats.mean_latency_ms / 1000
+
+    def route(self, query: str, sql_available: bool = True, preview: bool = False) -> RouteDecision:
+        """
+        Decide the path for a query. A preview decides without claiming a breaker
+        trial or counting as routed, for callers that will not record an outcome.
+        """
+        query_type = classify_query_type(query)
+        now = time.time()
+        with self._lock:
+            candidates = [path for path in PATHS
+                          if (path != PATH_SQL or sql_available)
+                          and self._breakers[path].allows(now, claim=not preview)]
+            if not candidates:
+                # Both breakers open: JSON + AI is the path of last resort
+                candidates = [PATH_JSON]
+
+            utilities: Dict[str, float] = {}
+            if len(candidates) == 1:
+                path, reason = candidates[0], REASON_ONLY_PATH
+            else:
+                stats = {path: self._stats.get((query_type, path)) for path in candidates}
+                if any(s is None or s.weight < self.min_samples for s in stats.values()):
+                    path, reason = static_route(query_type), REASON_PRIOR
+                else:
+                    utilities = {path: round(self._utility(s), 4) for path, s in stats.items()}
+                    path, reason = max(utilities, key=utilities.get), REASON_EXPLOIT
+                if self._random.random() < self.exploration_rate:
+                    path, reason = next(p for p in candidates if p != path), REASON_EXPLORE
+            # A breaker trial slot that was not used is handed back
+            if not preview:
+                for other in candidates:
+                    if other != path:
+                        self._breakers[other].trial_in_flight = False
+
+            decision = RouteDecision(0 if preview else next(self._ids), query_type, path, reason, utilities, now)
+
+        if preview:
+            return decision
+        get_metrics_registry().counter("hybrid_route_total", "Adaptive SQL/JSON routing decisions",
+                                       path=path, query_type=query_type, reason=reason).inc()
+        return decision
+
+    def record(self, decision: RouteDecision, latency_ms: float, success: bool, quality: float = 0.0,
+               path: Optional[str] = None):
+        """Outcome of a routed query; path defaults to the decided one"""
+        path = path or decision.path
+        now = time.time()
+        with self._lock:
+            stats = self._stats.setdefault((decision.query_type, path), DecayedPathStats())
+            stats.observe(latency_ms, success, quality, now, self.half_life)
+            tripped = self._breakers[path].record(success, now, self.breaker_failures, self.breaker_cooldown)
+            entry = {
+                **asdict(decision),
+                'executed_path': path,
+                'latency_ms': round(latency_ms, 2),
+                'success': success,
+                'quality': round(quality, 3),
+                'breaker_tripped': tripped
+            }
+            self._log.append(entry)
+            if self.log_path:
+                self._append_log(entry)
+
+        registry = get_metrics_registry()
+        registry.counter("hybrid_route_outcomes_total", "Outcomes of routed queries",
+                         path=path, query_type=decision.query_type,
+                         result="success" if success else "failure").inc()
+        if tripped:
+            registry.counter("hybrid_route_breaker_trips_total", "Per-path circuit breaker trips",
+                             path=path).inc()
+
+    def _append_log(self, entry: Dict[str, Any]):
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Warning: could not write routing log {self.log_path}: {e}")
+            self.log_path = None
+
+    def export_decisions(self, filename: str) -> int:
+        """Write the retained decision/outcome records as JSON lines; returns the count"""
+        with self._lock:
+            entries = list(self._log)
+        with open(filename, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'paths': {
+                    f"{query_type}:{path}": {
+                        'samples': round(stats.weight, 2),
+                        'mean_latency_ms': round(stats.mean_latency_ms, 2),
+                        'success_rate': round(stats.success_rate, 3),
+                        'mean_quality': round(stats.mean_quality, 3),
+                        'utility': round(self._utility(stats), 4)
+                    }
+                    for (query_type, path), stats in self._stats.items()
+                },
+                'breakers': {path: {'open': breaker.is_open, 'consecutive_failures': breaker.failures}
+                             for path, breaker in self._breakers.items()},
+                'logged_decisions': len(self._log)
+            }
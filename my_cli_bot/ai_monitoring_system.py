@@ -14,6 +14,8 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 import os
 
+from metrics import STAGE_LLM, observe_provider_call, observe_stage
+
 @dataclass
 class APIMetrics:
     """Metrics for API calls"""
@@ -55,7 +57,7 @@ class AIMonitoringSystem:
         self.metrics_history: deque = deque(maxlen=10000)  # Keep last 10k metrics
         self.hourly_tokens = defaultdict(int)  # Track tokens per hour
         self.error_patterns = defaultdict(int)  # Track error frequencies
-        self.provider_performance = defaultdict(list)  # Track provider performance
+        self.provider_performance = defaultdict(lambda: deque(maxlen=1000))  # Recent calls per provider
         
         # Thread-safe locks
         self._lock = threading.Lock()
@@ -97,6 +99,9 @@ class AIMonitoringSystem:
     def record_api_call(self, provider: str, model: str, tokens_used: int, 
                        response_time_ms: float, success: bool, error_type: str = None):
         """Record API call metrics"""
+        observe_stage(STAGE_LLM, response_time_ms)
+        observe_provider_call(provider, model, response_time_ms, success)
+        
         if not self.token_monitoring_enabled and not self.performance_logging:
             return
         
@@ -357,11 +362,9 @@ class AIMonitoringSystem:
                     
                     # Clean up provider performance data older than 24 hours
                     cutoff_time = time.time() - 24 * 3600
-                    for provider in self.provider_performance:
-                        self.provider_performance[provider] = [
-                            call for call in self.provider_performance[provider]
-                            if call['timestamp'] > cutoff_time
-                        ]
+                    for provider, calls in self.provider_performance.items():
+                        while calls and calls[0]['timestamp'] <= cutoff_time:
+                            calls.popleft()
         
         cleanup_thread = threading.Thread(target=cleanup_old_data, daemon=True)
         cleanup_thread.start()
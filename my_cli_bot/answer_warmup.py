@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Precomputed answers for the most frequent questions
+A warm-up job renders full answers for a configurable query catalog (year-level
+plans, dual track plans, track comparisons, core prerequisites, CODO) at startup
+and whenever the knowledge graph changes. Answers are stamped with the
+knowledge file hash, persisted so restarts skip the regeneration, and served by
+the fast-path router before any other tier.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from course_code_resolver import DEFAULT_CATALOG_PATH
+
+DEFAULT_STORE_PATH = "data/precomputed_answers.json"
+DEFAULT_WATCH_INTERVAL = 300.0
+
+_CORE_PREREQ_COURSES = ("CS 18000", "CS 18200", "CS 24000", "CS 25000", "CS 25100", "CS 25200")
+
+
+def _prerequisite_questions(code: str) -> List[str]:
+    short = code.split()[1][:3]
+    return [
+        f"prerequisites for {code}", f"{code} prerequisites", f"prereqs for {code}",
+        f"prereqs for cs {short}", f"prereqs for cs{short}", f"cs {short} prereqs",
+        f"what do i need before cs {short}", f"what are the prerequisites for cs {short}",
+    ]
+
+
+# Catalog key -> phrasings; each key needs a producer with the same name
+DEFAULT_QUERY_CATALOG: Dict[str, List[str]] = {
+    "freshman_plan": ["what courses should i take as a freshman", "what should a freshman take",
+                      "freshman course plan", "freshman year courses", "what classes do freshmen take"],
+    "sophomore_plan": ["what courses should i take as a sophomore", "what should a sophomore take",
+                       "sophomore course plan", "sophomore year courses"],
+    "junior_plan": ["what courses should i take as a junior", "junior course plan", "junior year courses"],
+    "senior_plan": ["what courses should i take as a senior", "senior course plan", "senior year courses"],
+    "dual_track_plan": ["can i do both tracks", "dual track plan", "plan for both mi and se tracks",
+                        "can i complete both machine intelligence and software engineering tracks"],
+    "dual_track_early_plan": ["fastest way to finish both tracks", "early graduation with both tracks",
+                              "can i graduate early with a dual track"],
+    "track_comparison": ["whats the difference between mi and se tracks",
+                         "should i choose machine intelligence or software engineering track",
+                         "mi vs se", "compare mi and se tracks", "which track should i choose"],
+    "codo_requirements": ["how do i codo into cs", "codo requirements", "how to change major to cs",
+                          "how do i get into the cs program through codo", "codo into cs"],
+    **{f"prerequisites:{code}": _prerequisite_questions(code) for code in _CORE_PREREQ_COURSES},
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form used as the lookup key"""
+    return " ".join(_PUNCTUATION.sub("", text.lower()).split())
+
+
+def knowledge_hash(knowledge_file: str = DEFAULT_CATALOG_PATH) -> str:
+    """MD5 of the knowledge graph file, or '' when it does not exist"""
+    if not os.path.exists(knowledge_file):
+        return ""
+    hasher = hashlib.md5()
+    with open(knowledge_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_query_catalog(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Default catalog, with keys overridden or added by a JSON {key: [questions]} file"""
+    catalog = dict(DEFAULT_QUERY_CATALOG)
+    path = path or os.getenv("BOILERAI_WARMUP_CATALOG")
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                catalog.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read warm-up catalog {path}: {e}")
+    return catalog
+
+
+class PrecomputedAnswerStore:
+    """Normalized question -> rendered answer, valid for one knowledge hash"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_STORE_PATH,
+                 knowledge_file: Optional[str] = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self.knowledge_file = knowledge_file
+        self.knowledge_hash: Optional[str] = None
+        self._answers: Dict[str, str] = {}
+        self._index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._file_signature = None
+        self._file_hash: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def _current_hash(self) -> str:
+        """Hash of the knowledge file, recomputed only when its size or mtime changes"""
+        try:
+            stat = os.stat(self.knowledge_file)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        with self._lock:
+            if signature == self._file_signature and self._file_hash is not None:
+                return self._file_hash
+        current = knowledge_hash(self.knowledge_file)
+        with self._lock:
+            self._file_signature, self._file_hash = signature, current
+        return current
+
+    def get(self, query: str) -> Optional[str]:
+        """Stored answer, or None when the knowledge file changed since it was rendered"""
+        key = self._index.get(normalize_question(query))
+        if not key:
+            return None
+        if self.knowledge_file and self._current_hash() != self.knowledge_hash:
+            return None
+        return self._answers.get(key)
+
+    def replace(self, knowledge_hash: str, answers: Dict[str, str], catalog: Dict[str, List[str]]):
+        """Swap in a complete answer set in one step"""
+        index = {normalize_question(q): key for key, questions in catalog.items()
+                 if key in answers for q in questions}
+        with self._lock:
+            self.knowledge_hash = knowledge_hash
+            self._answers = answers
+            self._index = index
+
+    def invalidate(self):
+        with self._lock:
+            self.knowledge_hash = None
+            self._answers = {}
+            self._index = {}
+
+    def load(self, catalog: Dict[str, List[str]], expected_hash: Optional[str] = None) -> bool:
+        """Load persisted answers; with expected_hash, only if they were rendered from that knowledge"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if expected_hash is not None and data.get("knowledge_hash") != expected_hash:
+                return False
+            self.replace(data["knowledge_hash"], data["answers"], catalog)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not load precomputed answers from {self.path}: {e}")
+            return False
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "knowledge_hash": self.knowledge_hash,
+                "generated_at": datetime.now().isoformat(),
+                "answers": dict(self._answers)
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: could not save precomputed answers to {self.path}: {e}")
+
+
+class AnswerWarmer:
+    """Renders the catalog answers and re-renders them when the knowledge graph changes"""
+
+    def __init__(self, producers: Dict[str, Callable[[], Optional[str]]],
+                 catalog: Optional[Dict[str, List[str]]] = None,
+                 store: Optional[PrecomputedAnswerStore] = None,
+                 knowledge_file: str = DEFAULT_CATALOG_PATH,
+                 max_entries: Optional[int] = None):
+        self.producers = producers
+        self.catalog = catalog if catalog is not None else load_query_catalog()
+        if max_entries is not None:
+            self.catalog = dict(list(self.catalog.items())[:max_entries])
+        self.store = store if store is not None else PrecomputedAnswerStore(knowledge_file=knowledge_file)
+        self.knowledge_file = knowledge_file
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def warm(self, force: bool = False) -> int:
+        """Render every catalog entry unless the stored answers match the current knowledge hash"""
+        current_hash = knowledge_hash(self.knowledge_file)
+        if not force and (self.store.knowledge_hash == current_hash
+                          or self.store.load(self.catalog, expected_hash=current_hash)):
+            return 0
+
+        # Never serve answers rendered from an older knowledge graph
+        self.store.invalidate()
+        start = time.time()
+        answers = {}
+        for key in self.catalog:
+            producer = self.producers.get(key)
+            if producer is None:
+                continue
+            try:
+                answer = producer()
+            except Exception as e:
+                print(f"Warning: warm-up for '{key}' failed: {e}")
+                continue
+            if answer:
+                answers[key] = answer
+
+        self.store.replace(current_hash, answers, self.catalog)
+        self.store.save()
+        print(f"🔥 Precomputed {len(answers)}/{len(self.catalog)} answers in {time.time() - start:.1f}s")
+        return len(answers)
+
+    def start(self, watch_interval: float = DEFAULT_WATCH_INTERVAL):
+        """Warm in the background, then re-warm whenever the knowledge file hash changes"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(watch_interval,),
+                                        name="answer-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, watch_interval: float):
+        while True:
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Warning: answer warm-up failed: {e}")
+            if self._stop.wait(watch_interval):
+                return
+
+
+_warmer: Optional[AnswerWarmer] = None
+_warmer_lock = threading.Lock()
+
+
+def start_answer_warmup(producers: Dict[str, Callable[[], Optional[str]]],
+                        knowledge_file: str = DEFAULT_CATALOG_PATH) -> AnswerWarmer:
+    """One background warmer per process; later callers share the first one"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = AnswerWarmer(producers, knowledge_file=knowledge_file)
+            _warmer.start()
+        return _warmer
@@ -9,7 +9,7 @@ import time
 from datetime import datetime
 from fastapi import FastAPI, Request, HTTPException, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 import uvicorn
@@ -24,6 +24,7 @@ from .endpoints import sessions
 from .auth import auth_manager, get_current_user
 from .database import get_database_manager
 from .schemas import HealthCheckResponse, ErrorResponse
+from metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
 
 
 # Application metadata
@@ -206,6 +207,12 @@ async def health_check():
         )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of stage, provider and HTTP latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # Authentication endpoints
 @app.post("/auth/register",
           summary="User Registration",
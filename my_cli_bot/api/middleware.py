@@ -15,6 +15,7 @@ from starlette.middleware.base import RequestResponseEndpoint
 import json
 
 from .database import get_database_manager
+from metrics import observe_http_request, route_template
 
 
 # Request context storage
@@ -59,6 +60,7 @@ class RequestTrackingMiddleware(BaseHTTPMiddleware):
             
             # Calculate processing time
             processing_time = (time.time() - start_time) * 1000
+            observe_http_request(method, route_template(request), response.status_code, processing_time)
             
             # Get response size
             response_size = 0
@@ -87,6 +89,7 @@ class RequestTrackingMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Calculate processing time for failed requests
             processing_time = (time.time() - start_time) * 1000
+            observe_http_request(method, route_template(request), 500, processing_time)
             
             # Log failed request
             await self._log_request(
@@ -7,13 +7,17 @@ Separate module that integrates with existing Boiler AI system without affecting
 import json
 import os
 import sqlite3
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 import hashlib
 import random
 
+from course_code_resolver import get_course_resolver
+from mentor_matching import YEAR_ORDER, MentorIndex
+
 @dataclass
 class StudentProfile:
     """Student profile for networking"""
@@ -39,11 +43,22 @@ class NetworkingRequest:
     created_at: datetime
     status: str = "pending"  # pending, matched, closed
 
+MENTOR_COLUMNS = "user_id, year_level, track, completed_courses, career_interests, availability, last_active"
+
+
+def _utc_timestamp() -> str:
+    """Same format SQLite's CURRENT_TIMESTAMP stores"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
 class BoilerNetworking:
     """Main networking system for connecting CS students"""
     
     def __init__(self, db_path: str = "boiler_networking.db"):
         self.db_path = db_path
+        # Built from the database on first ranked search, then kept current by profile writes
+        self._mentor_index: Optional[MentorIndex] = None
+        self._mentor_index_lock = threading.Lock()
         self.init_database()
         
     def init_database(self):
@@ -136,15 +151,41 @@ class BoilerNetworking:
             ''', (mentor_info.get('availability', 'weekends'), user_id))
             
             conn.commit()
-            return cursor.rowcount > 0
+            if cursor.rowcount <= 0:
+                return False
+            
+            # Under the lock a concurrent first load has either already read this commit or finished
+            with self._mentor_index_lock:
+                if self._mentor_index is not None:
+                    cursor.execute(f"SELECT {MENTOR_COLUMNS} FROM student_profiles WHERE user_id = ?", (user_id,))
+                    row = cursor.fetchone()
+                    if row:
+                        self._index_mentor_row(self._mentor_index, row)
+            return True
         except Exception as e:
             print(f"Error registering mentor: {e}")
             return False
         finally:
             conn.close()
     
-    def find_mentors(self, criteria: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
-        """Find available mentors based on criteria"""
+    def find_mentors(self, criteria: Dict[str, Any], limit: int = 5,
+                     exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find available mentors based on criteria. When the criteria name courses or
+        career interests, mentors are ranked by overlap through the matching index;
+        otherwise the most recently active mentors passing the filters are returned.
+        """
+        if criteria.get('courses') or criteria.get('interests'):
+            matches = self.get_mentor_index().match(
+                courses=criteria.get('courses', []),
+                interests=criteria.get('interests', []),
+                k=limit,
+                track=criteria.get('track'),
+                min_year_level=criteria.get('min_year_level'),
+                exclude=exclude or ()
+            )
+            return [match.to_dict() for match in matches]
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -161,11 +202,14 @@ class BoilerNetworking:
             params.append(criteria['track'])
             
         if criteria.get('min_year_level'):
-            year_order = {'freshman': 1, 'sophomore': 2, 'junior': 3, 'senior': 4}
-            min_level = year_order.get(criteria['min_year_level'], 2)
+            min_level = YEAR_ORDER.get(criteria['min_year_level'], 2)
             base_query += ' AND CASE year_level WHEN "freshman" THEN 1 WHEN "sophomore" THEN 2 WHEN "junior" THEN 3 WHEN "senior" THEN 4 END >= ?'
             params.append(min_level)
         
+        if exclude:
+            base_query += f' AND user_id NOT IN ({", ".join("?" for _ in exclude)})'
+            params.extend(exclude)
+        
         base_query += ' ORDER BY last_active DESC LIMIT ?'
         params.append(limit)
         
@@ -224,7 +268,7 @@ class BoilerNetworking:
         try:
             # Get request details
             cursor.execute('''
-                SELECT requester_id, topic, preferred_criteria 
+                SELECT requester_id, topic, description, preferred_criteria 
                 FROM networking_requests 
                 WHERE request_id = ? AND status = 'pending'
             ''', (request_id,))
@@ -233,14 +277,22 @@ class BoilerNetworking:
             if not request_data:
                 return None
             
-            requester_id, topic, criteria_json = request_data
+            requester_id, topic, description, criteria_json = request_data
             criteria = json.loads(criteria_json) if criteria_json else {}
             
+            # Rank on the courses the request mentions and the requester's career interests
+            mentioned = get_course_resolver().extract(f"{topic} {description or ''}")
+            criteria['courses'] = list(criteria.get('courses', [])) + mentioned
+            cursor.execute('SELECT career_interests FROM student_profiles WHERE user_id = ?', (requester_id,))
+            requester = cursor.fetchone()
+            if requester and requester[0]:
+                criteria['interests'] = list(criteria.get('interests', [])) + json.loads(requester[0])
+            
             # Find suitable mentors
-            mentors = self.find_mentors(criteria)
+            mentors = self.find_mentors(criteria, exclude=[requester_id])
             
             if mentors:
-                # Simple matching - pick the most recently active mentor
+                # Best overlap wins; recency breaks ties and fills in when nothing overlaps
                 chosen_mentor = mentors[0]
                 
                 # Update request status
@@ -522,8 +574,41 @@ What specific area would you like help with? The more details you share, the bet
             conn.commit()
         except Exception as e:
             print(f"Error saving profile: {e}")
+            return
         finally:
             conn.close()
+        
+        with self._mentor_index_lock:
+            index = self._mentor_index
+            if index is not None:
+                if profile.is_mentor:
+                    index.upsert(profile.user_id, profile.year_level, profile.track, profile.completed_courses,
+                                 profile.career_interests, profile.availability, _utc_timestamp())
+                else:
+                    index.remove(profile.user_id)
+    
+    def get_mentor_index(self) -> MentorIndex:
+        """Mentor matching index, loaded from the database on first use"""
+        with self._mentor_index_lock:
+            if self._mentor_index is None:
+                index = MentorIndex()
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    rows = conn.execute(
+                        f"SELECT {MENTOR_COLUMNS} FROM student_profiles WHERE is_mentor = TRUE").fetchall()
+                finally:
+                    conn.close()
+                for row in rows:
+                    self._index_mentor_row(index, row)
+                self._mentor_index = index
+            return self._mentor_index
+    
+    def _index_mentor_row(self, index: MentorIndex, row):
+        user_id, year_level, track, completed_courses, career_interests, availability, last_active = row
+        index.upsert(user_id, year_level, track,
+                     json.loads(completed_courses) if completed_courses else [],
+                     json.loads(career_interests) if career_interests else [],
+                     availability, last_active or "")
 
 # Demo/Test functionality
 def demo_networking_system():
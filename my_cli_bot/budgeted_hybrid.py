@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Budgeted hybrid execution of two answer pipelines
+The pipeline with the lower learned token cost runs first and its answer is
+scored. The second pipeline only starts when that answer falls short of the
+acceptance score, the latency and token budgets leave room for it, and it has
+historically beaten the first one often enough for this intent. A pipeline
+that runs past the latency budget is abandoned, but its worker thread cannot be
+interrupted: its expected tokens are charged at once, the real cost is settled
+when it finishes, and a pipeline with too many abandoned runs still in flight is
+not started again. Skipped second runs are counted as tokens saved.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from course_code_resolver import get_course_resolver
+from metrics import get_metrics_registry
+
+DEFAULT_LATENCY_BUDGET = 30.0
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_ACCEPT_SCORE = 0.75
+DEFAULT_MIN_WIN_RATE = 0.2
+DEFAULT_LEARN_AFTER = 20
+DEFAULT_EXPLORE_EVERY = 10
+DEFAULT_MAX_ABANDONED = 2
+
+DECISION_SKIPPED_SCORE = "skipped_score"
+DECISION_SKIPPED_BUDGET = "skipped_budget"
+DECISION_SKIPPED_WIN_RATE = "skipped_win_rate"
+DECISION_RAN = "ran"
+DECISION_CANCELLED = "cancelled"
+
+_FAILURE_PREFIXES = ("no response generated", "i apologize", "i'm unable", "i am unable", "error")
+_WORD = re.compile(r"\S+")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough LLM token count: about 4 characters per token"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def score_response(query: str, response: Optional[str]) -> float:
+    """
+    Answer quality in [0, 1] from substance and coverage of the courses asked about.
+    Pipeline confidences are not used: each pipeline reports its own, incomparable scale.
+    """
+    if not response or not response.strip():
+        return 0.0
+    text = response.strip()
+    if text.lower().startswith(_FAILURE_PREFIXES):
+        return 0.0
+
+    substance = min(1.0, len(_WORD.findall(text)) / 80)
+    resolver = get_course_resolver()
+    asked = resolver.extract(query)
+    if asked:
+        answered = set(resolver.extract(text))
+        coverage = sum(1 for code in asked if code in answered) / len(asked)
+    else:
+        coverage = 1.0
+    return round(0.5 * substance + 0.5 * coverage, 3)
+
+
+@dataclass
+class PipelineCost:
+    """Learned cost of one pipeline (exponentially weighted)"""
+    tokens: float
+    latency: float
+    calls: int = 0
+
+    def observe(self, tokens: int, latency: float, alpha: float = 0.2):
+        self.calls += 1
+        self.tokens += alpha * (tokens - self.tokens)
+        self.latency += alpha * (latency - self.latency)
+
+
+@dataclass
+class IntentRecord:
+    """Head-to-head outcomes per intent, counted only when both pipelines answered"""
+    both_ran: int = 0
+    second_wins: int = 0
+    skipped: int = 0
+
+    @property
+    def second_win_rate(self) -> float:
+        return self.second_wins / self.both_ran if self.both_ran > 0 else 1.0
+
+
+@dataclass
+class HybridOutcome:
+    """Answers and the decision taken for one hybrid query"""
+    first: str
+    second: str
+    results: Dict[str, Any] = field(default_factory=dict)
+    scores: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    winner: Optional[str] = None
+    decision: str = DECISION_RAN
+    tokens_used: int = 0
+    tokens_saved: int = 0
+
+
+# A pipeline runner returns (result, response text, confidence, tokens used); confidence is informational
+PipelineRunner = Callable[[], Awaitable[Tuple[Any, str, float, int]]]
+
+
+class BudgetedHybridExecutor:
+    """Runs the cheaper pipeline first and the other one only when it is worth its cost"""
+
+    def __init__(self, cost_priors: Dict[str, Tuple[float, float]],
+                 latency_budget: float = DEFAULT_LATENCY_BUDGET,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 accept_score: float = DEFAULT_ACCEPT_SCORE,
+                 min_win_rate: float = DEFAULT_MIN_WIN_RATE,
+                 learn_after: int = DEFAULT_LEARN_AFTER,
+                 explore_every: int = DEFAULT_EXPLORE_EVERY,
+                 max_abandoned: int = DEFAULT_MAX_ABANDONED):
+        self.latency_budget = latency_budget
+        self.token_budget = token_budget
+        self.accept_score = accept_score
+        self.min_win_rate = min_win_rate
+        self.learn_after = learn_after
+        self.explore_every = explore_every
+        self.max_abandoned = max_abandoned
+        self._costs = {name: PipelineCost(tokens, latency) for name, (tokens, latency) in cost_priors.items()}
+        self._intents: Dict[Tuple[str, str], IntentRecord] = {}
+        self._decisions: Dict[str, int] = {}
+        self._tokens_saved = 0
+        # Timed-out runs whose worker threads are still spending tokens, per pipeline
+        self._abandoned: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def order(self, names: List[str]) -> List[str]:
+        """Cheapest pipeline first: learned tokens, then latency"""
+        default = PipelineCost(float(self.token_budget), self.latency_budget)
+        return sorted(names, key=lambda name: (self._costs.get(name, default).tokens,
+                                               self._costs.get(name, default).latency))
+
+    async def _run(self, name: str, runner: PipelineRunner, query: str, outcome: HybridOutcome,
+                   timeout: Optional[float]) -> bool:
+        start = time.monotonic()
+        task = asyncio.ensure_future(runner())
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        if not done:
+            # Cancelling would only drop the await; the pipeline thread keeps running.
+            # Charge its expected tokens now and settle the real cost when it finishes.
+            with self._lock:
+                estimate = int(self._costs[name].tokens) if name in self._costs else 0
+                self._abandoned[name] = self._abandoned.get(name, 0) + 1
+            outcome.tokens_used += estimate
+            outcome.errors[name] = "cancelled: latency budget exhausted"
+            task.add_done_callback(lambda finished: self._settle_abandoned(name, finished, start))
+            return False
+        try:
+            result, response, confidence, tokens = task.result()
+        except Exception as e:
+            outcome.errors[name] = f"{type(e).__name__}: {e}"
+            return False
+        outcome.results[name] = result
+        outcome.scores[name] = score_response(query, response)
+        outcome.tokens_used += tokens
+        with self._lock:
+            self._costs.setdefault(name, PipelineCost(tokens, 0.0)).observe(tokens, time.monotonic() - start)
+        return True
+
+    def _settle_abandoned(self, name: str, task: "asyncio.Future", start: float):
+        """Record what an abandoned run actually cost once it completes"""
+        tokens = None
+        if not task.cancelled() and task.exception() is None:
+            tokens = task.result()[3]
+        with self._lock:
+            self._abandoned[name] = max(0, self._abandoned.get(name, 0) - 1)
+            if tokens is not None:
+                self._costs.setdefault(name, PipelineCost(tokens, 0.0)).observe(tokens, time.monotonic() - start)
+        if tokens:
+            get_metrics_registry().counter(
+                "hybrid_tokens_abandoned_total", "Tokens spent by pipeline runs that exceeded the latency budget",
+                pipeline=name).inc(tokens)
+
+    def _saturated(self, name: str) -> bool:
+        with self._lock:
+            return self._abandoned.get(name, 0) >= self.max_abandoned
+
+    def _second_decision(self, intent: str, first: str, second: str, outcome: HybridOutcome,
+                         elapsed: float) -> Optional[str]:
+        """Reason to skip the second pipeline, or None to run it"""
+        first_ok = first in outcome.results
+        if first_ok and outcome.scores[first] >= self.accept_score:
+            return DECISION_SKIPPED_SCORE
+        if self._saturated(second):
+            return DECISION_SKIPPED_BUDGET
+        with self._lock:
+            cost = self._costs.get(second)
+            record = self._intents.get((intent, second))
+        # Budgets hold even when the first pipeline failed: a second run that cannot finish
+        # in the time left would only be cancelled and charged
+        if elapsed >= self.latency_budget:
+            return DECISION_SKIPPED_BUDGET
+        if cost is not None:
+            if outcome.tokens_used + cost.tokens > self.token_budget:
+                return DECISION_SKIPPED_BUDGET
+            if elapsed + cost.latency > self.latency_budget:
+                return DECISION_SKIPPED_BUDGET
+        if first_ok and record and record.both_ran >= self.learn_after and record.second_win_rate < self.min_win_rate:
+            with self._lock:
+                record.skipped += 1
+                # Still run it now and then so a changed win rate can be noticed
+                if record.skipped % self.explore_every:
+                    return DECISION_SKIPPED_WIN_RATE
+        return None
+
+    async def run(self, query: str, runners: Dict[str, PipelineRunner],
+                  intent_of: Callable[[Any], str] = lambda result: "unknown") -> HybridOutcome:
+        """Best available answer within budget; outcome.winner is None when every pipeline failed"""
+        names = self.order(list(runners))
+        if len(names) > 1 and self._saturated(names[0]) and not self._saturated(names[1]):
+            names[0], names[1] = names[1], names[0]
+        first, second = names[0], names[1] if len(names) > 1 else ""
+        outcome = HybridOutcome(first=first, second=second)
+        start = time.monotonic()
+
+        await self._run(first, runners[first], query, outcome, self.latency_budget)
+        intent = intent_of(outcome.results[first]) if first in outcome.results else "unknown"
+
+        if second:
+            elapsed = time.monotonic() - start
+            skip = self._second_decision(intent, first, second, outcome, elapsed)
+            if skip:
+                outcome.decision = skip
+                with self._lock:
+                    saved = int(self._costs[second].tokens) if second in self._costs else 0
+                outcome.tokens_saved = saved
+            else:
+                remaining = self.latency_budget - elapsed
+                ran = await self._run(second, runners[second], query, outcome, remaining)
+                timed_out = outcome.errors.get(second, "").startswith("cancelled")
+                outcome.decision = DECISION_CANCELLED if timed_out else DECISION_RAN
+                if ran and first in outcome.results:
+                    with self._lock:
+                        record = self._intents.setdefault((intent, second), IntentRecord())
+                        record.both_ran += 1
+                        if outcome.scores[second] > outcome.scores[first]:
+                            record.second_wins += 1
+
+        if outcome.scores:
+            outcome.winner = max(outcome.scores, key=lambda name: outcome.scores[name])
+        self._record(intent, outcome)
+        return outcome
+
+    def _record(self, intent: str, outcome: HybridOutcome):
+        with self._lock:
+            self._decisions[outcome.decision] = self._decisions.get(outcome.decision, 0) + 1
+            self._tokens_saved += outcome.tokens_saved
+        registry = get_metrics_registry()
+        registry.counter("hybrid_second_pipeline_total", "Hybrid second-pipeline decisions",
+                         decision=outcome.decision).inc()
+        registry.counter("hybrid_tokens_used_total", "Estimated LLM tokens spent by hybrid mode").inc(
+            outcome.tokens_used)
+        if outcome.tokens_saved:
+            registry.counter("hybrid_tokens_saved_total",
+                             "Estimated LLM tokens saved by skipping the second pipeline").inc(outcome.tokens_saved)
+        if outcome.winner:
+            registry.counter("hybrid_wins_total", "Hybrid answers by winning pipeline",
+                             intent=intent, pipeline=outcome.winner).inc()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'decisions': dict(self._decisions),
+                'tokens_saved': self._tokens_saved,
+                'abandoned_in_flight': dict(self._abandoned),
+                'costs': {name: {'tokens': round(cost.tokens), 'latency_s': round(cost.latency, 3),
+                                 'calls': cost.calls}
+                          for name, cost in self._costs.items()},
+                'second_win_rates': {f"{intent}:{name}": round(record.second_win_rate, 3)
+                                     for (intent, name), record in self._intents.items()}
+            }
@@ -1,56 +1,75 @@
 #!/usr/bin/env python3
 """
-Build vector embeddings using Gemini's text-embedding-3-small model
+Build vector embeddings using Gemini's text embedding model
 """
 
 import json
 import os
 import numpy as np
 import faiss
-from google.generativeai import google.generativeai as genai
 import pickle
 from pathlib import Path
+from embedding_pipeline import BatchEmbeddingBuilder, GeminiEmbedder, DEFAULT_CHECKPOINT_DIR
+from embedding_service import EmbeddingService
+from vector_index import (
+    VectorIndex, build_faiss_index, save_vector_index, load_vector_index,
+    INDEX_AUTO, INDEX_FLAT, METRIC_COSINE, DEFAULT_VECTOR_STORE_DIR
+)
 
 class VectorStore:
-    def __init__(self, api_key=None):
-        self.client = Gemini(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+    def __init__(self, api_key=None, embedder=None, batch_size=64, max_workers=4,
+                 checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        self.api_key = api_key
+        self.embedder = embedder or GeminiEmbedder(api_key=api_key)
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.checkpoint_dir = checkpoint_dir
         self.index = None
+        self.index_type = INDEX_FLAT
+        self.metric = METRIC_COSINE
+        self.vector_index = None
         self.chunks = []
+        self.chunk_ids = []
+        self._id_to_row = None
+        self._query_service = None
         self.embeddings = None
+
+    @property
+    def id_to_row(self):
+        """chunk_id -> row map, built on first use so loading does not walk every id"""
+        if self._id_to_row is None:
+            self._id_to_row = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids)}
+        return self._id_to_row
         
     def embed_text(self, text):
         """Create embedding for a single text"""
         try:
-            response = self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
-            )
-            return response.data[0].embedding
+            return self.embedder.embed_batch([text])[0]
         except Exception as e:
             print(f"Error embedding text: {e}")
             return None
     
     def embed_chunks(self, chunks):
-        """Create embeddings for all chunks"""
+        """Create embeddings for all chunks, row-aligned with the chunk list"""
         print(f"Creating embeddings for {len(chunks)} chunks...")
-        embeddings = []
-        
-        for i, chunk in enumerate(chunks):
-            if i % 10 == 0:
-                print(f"  Processing chunk {i+1}/{len(chunks)}")
-            
-            embedding = self.embed_text(chunk["content"])
-            if embedding:
-                embeddings.append(embedding)
-            else:
-                # Skip failed embeddings
-                print(f"  Skipping chunk {i} due to embedding failure")
-                continue
-        
-        return np.array(embeddings, dtype=np.float32)
+        builder = BatchEmbeddingBuilder(
+            self.embedder,
+            batch_size=self.batch_size,
+            max_workers=self.max_workers,
+            checkpoint_dir=self.checkpoint_dir
+        )
+        result = builder.build(chunks)
+        
+        self.chunk_ids = result.chunk_ids
+        self._id_to_row = result.id_to_row
+        print(f"  Embedded {result.stats.embedded} new texts, "
+              f"reused {result.stats.resumed} in {result.stats.elapsed:.1f}s")
+        
+        return result.embeddings
     
-    def build_index(self, chunks):
-        """Build FAISS index from chunks"""
+    def build_index(self, chunks, index_type=INDEX_AUTO, metric=METRIC_COSINE):
+        """Build FAISS index from chunks (flat, ivfpq, hnsw or auto by corpus size)"""
+        self.close()
         self.chunks = chunks
         
         # Create embeddings
@@ -60,48 +79,38 @@ class VectorStore:
             raise ValueError("No embeddings created")
         
         # Build FAISS index
-        dimension = self.embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(self.embeddings)
-        
-        print(f"Built FAISS index with {self.index.ntotal} vectors")
-        
-    def save_index(self, path="data/vector_store"):
-        """Save the index and metadata"""
-        os.makedirs(path, exist_ok=True)
-        
-        # Save FAISS index
-        faiss.write_index(self.index, f"{path}/faiss_index.idx")
-        
-        # Save metadata
-        metadata = {
-            "chunks": self.chunks,
-            "embeddings_shape": self.embeddings.shape,
-            "total_vectors": self.index.ntotal
-        }
-        
-        with open(f"{path}/metadata.json", "w") as f:
-            json.dump(metadata, f, indent=2)
-        
-        # Save embeddings
-        np.save(f"{path}/embeddings.npy", self.embeddings)
+        self.index, self.index_type = build_faiss_index(self.embeddings, index_type, metric)
+        self.metric = metric
+        
+        print(f"Built {self.index_type} FAISS index with {self.index.ntotal} vectors")
+        
+    def save_index(self, path=DEFAULT_VECTOR_STORE_DIR):
+        """Save the index, embeddings and chunk store"""
+        save_vector_index(
+            path,
+            self.index,
+            self.embeddings,
+            self.chunks,
+            chunk_ids=self.chunk_ids,
+            index_type=self.index_type,
+            metric=self.metric,
+            embedder_name=self.embedder.name
+        )
         
         print(f"Saved vector store to {path}")
     
-    def load_index(self, path="data/vector_store"):
-        """Load the index and metadata"""
-        if not os.path.exists(f"{path}/faiss_index.idx"):
-            raise FileNotFoundError(f"No index found at {path}")
-        
-        # Load FAISS index
-        self.index = faiss.read_index(f"{path}/faiss_index.idx")
-        
-        # Load metadata
-        with open(f"{path}/metadata.json", "r") as f:
-            metadata = json.load(f)
-        
-        self.chunks = metadata["chunks"]
-        self.embeddings = np.load(f"{path}/embeddings.npy")
+    def load_index(self, path=DEFAULT_VECTOR_STORE_DIR):
+        """Load the index; embeddings are memory-mapped and chunks read on demand"""
+        self.close()
+        self.vector_index = load_vector_index(path, embedder=self.embedder)
+        
+        self.index = self.vector_index.index
+        self.chunks = self.vector_index.chunks
+        self.chunk_ids = self.vector_index.chunk_ids
+        self._id_to_row = None
+        self.embeddings = self.vector_index.embeddings
+        self.index_type = self.vector_index.manifest.get("index_type", INDEX_FLAT)
+        self.metric = self.vector_index.metric
         
         print(f"Loaded vector store from {path}")
         
@@ -110,53 +119,78 @@ class VectorStore:
         if not self.index:
             raise ValueError("No index loaded")
         
-        # Embed query
-        query_embedding = self.embed_text(query)
-        if not query_embedding:
+        # Embed query with this store's own embedder, behind the cached query service
+        if self._query_service is None or self._query_service.embedder is not self.embedder:
+            self._query_service = EmbeddingService(self.embedder)
+        try:
+            query_embedding = self._query_service.embed_query(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
             return []
         
-        # Search
-        query_vector = np.array([query_embedding], dtype=np.float32)
-        distances, indices = self.index.search(query_vector, k)
-        
-        # Return results
-        results = []
-        for i, (dist, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.chunks):
-                result = self.chunks[idx].copy()
-                result["distance"] = float(dist)
-                result["rank"] = i + 1
-                results.append(result)
+        if self.vector_index is None:
+            self.vector_index = VectorIndex(
+                self.index, self.chunks, self.chunk_ids,
+                manifest={"index_type": self.index_type, "metric": self.metric}
+            )
         
-        return results
+        return self.vector_index.search_vector(query_embedding, k)
+
+    def close(self):
+        """Close the chunk files of a loaded vector store"""
+        if self.vector_index is not None:
+            self.vector_index.close()
+            self.vector_index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_chunks():
+    """Load normalized chunks from the newer of the JSONL output and the legacy JSON file"""
+    jsonl_path = "data/normalized_chunks.jsonl"
+    json_path = "data/normalized_chunks.json"
+    candidates = [path for path in (jsonl_path, json_path) if os.path.exists(path)]
+    if not candidates:
+        return None
+    
+    path = max(candidates, key=os.path.getmtime)
+    if len(candidates) > 1:
+        other = json_path if path == jsonl_path else jsonl_path
+        print(f"Warning: both {jsonl_path} and {json_path} exist; using newer {path}, ignoring {other}")
+    
+    with open(path, "r", encoding="utf-8") as f:
+        if path == jsonl_path:
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
 
 def main():
     """Build vector store from normalized chunks"""
     
     # Load chunks
-    if not os.path.exists("data/normalized_chunks.json"):
+    chunks = load_chunks()
+    if chunks is None:
         print("Error: No normalized chunks found. Run normalize.py first.")
         return
     
-    with open("data/normalized_chunks.json", "r") as f:
-        chunks = json.load(f)
-    
     if not chunks:
         print("Error: No chunks to process")
         return
     
     # Build vector store
-    vector_store = VectorStore()
-    vector_store.build_index(chunks)
-    vector_store.save_index()
-    
-    print("Vector store built successfully!")
-    
-    # Test search
-    print("\nTesting search...")
-    results = vector_store.search("CS core courses", k=3)
-    for result in results:
-        print(f"  {result['rank']}: {result['content'][:100]}...")
+    with VectorStore() as vector_store:
+        vector_store.build_index(chunks, index_type=os.getenv("VECTOR_INDEX_TYPE", INDEX_AUTO))
+        vector_store.save_index()
+        
+        print("Vector store built successfully!")
+        
+        # Test search
+        print("\nTesting search...")
+        results = vector_store.search("CS core courses", k=3)
+        for result in results:
+            print(f"  {result['rank']}: {result['content'][:100]}...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bulk SQLite ingestion helpers
+Loads run with WAL journaling and synchronous=OFF, commit once per batch of
+executemany() rows, and rebuild secondary indexes after the data is in instead
+of maintaining them row by row. Upserts are idempotent: re-running a load
+updates rows in place rather than duplicating them.
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 5000
+# Negative cache_size is in KiB: 64 MiB page cache while loading
+BULK_CACHE_KIB = 65536
+
+
+@dataclass
+class BulkLoadReport:
+    """Rows written per table during one bulk load"""
+    rows: Dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    seconds: float = 0.0
+
+    def add(self, table: str, count: int, batches: int):
+        self.rows[table] = self.rows.get(table, 0) + count
+        self.batches += batches
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+
+def upsert_sql(table: str, columns: Sequence[str], key: Sequence[str], upsert: bool = True) -> str:
+    """INSERT statement that updates (upsert) or keeps (ignore) the existing row on a key conflict"""
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    updates = [column for column in columns if column not in key]
+    if upsert and updates:
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in updates)
+        return f"{sql} ON CONFLICT({', '.join(key)}) DO UPDATE SET {assignments}"
+    return f"{sql} ON CONFLICT({', '.join(key)}) DO NOTHING"
+
+
+def _batches(rows: Iterable[Sequence[Any]], batch_size: int) -> Iterator[List[Sequence[Any]]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def executemany_batched(conn: sqlite3.Connection, sql: str, rows: Iterable[Sequence[Any]],
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, int]:
+    """executemany() in batches, one transaction (and commit) per batch; returns (rows, batches)"""
+    count = batches = 0
+    for batch in _batches(rows, batch_size):
+        with conn:
+            conn.executemany(sql, batch)
+        count += len(batch)
+        batches += 1
+    return count, batches
+
+
+def _index_definitions(conn: sqlite3.Connection, names: Iterable[str]) -> Dict[str, str]:
+    names = list(names)
+    if not names:
+        return {}
+    placeholders = ", ".join("?" for _ in names)
+    rows = conn.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                        f"AND name IN ({placeholders})", names).fetchall()
+    return {name: sql for name, sql in rows}
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, deferred_indexes: Iterable[str] = (),
+              synchronous_after: str = "NORMAL", report: Optional[BulkLoadReport] = None):
+    """
+    Put a connection in bulk-load mode for the duration of the block.
+    The named secondary indexes are dropped first and recreated once the block
+    finishes (also on error, so the schema is never left without them).
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{BULK_CACHE_KIB}")
+
+    deferred = _index_definitions(conn, deferred_indexes)
+    with conn:
+        for name in deferred:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    start = time.perf_counter()
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        with conn:
+            for sql in deferred.values():
+                conn.execute(sql)
+        if deferred:
+            conn.execute("ANALYZE")
+        conn.execute(f"PRAGMA synchronous={synchronous_after}")
+        if report is not None:
+            report.seconds += time.perf_counter() - start
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Concurrent, conditional HTTP fetch layer for catalog scraping
+Bounded asyncio concurrency over one pooled requests.Session, with ETag and
+Last-Modified revalidation backed by a local cache directory, so nightly
+refreshes only download and reprocess documents that actually changed
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_CACHE_DIR = "data/http_cache"
+USER_AGENT = "BoilerAI-CatalogRefresh/1.0 (+academic advising; conditional requests)"
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL"""
+    url: str
+    content: Optional[bytes]
+    status: int
+    changed: bool
+    from_cache: bool
+    error: Optional[str] = None
+    # New content is only written to the cache by CatalogFetcher.commit(), once processed
+    headers: Dict[str, str] = field(default_factory=dict)
+    pending: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.content is not None
+
+
+class HttpCache:
+    """On-disk cache of response bodies and their validators, one entry per URL"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".meta.json", base + ".body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        except ValueError:
+            return None
+        meta["body_path"] = body_path
+        return meta
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        _, body_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        with open(body_path, "rb") as f:
+            return f.read()
+
+    def put(self, url: str, content: bytes, headers: Dict[str, str]):
+        meta_path, body_path = self._paths(url)
+        tmp_body = body_path + ".tmp"
+        with open(tmp_body, "wb") as f:
+            f.write(content)
+        os.replace(tmp_body, body_path)
+
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_hash": hashlib.sha256(content).hexdigest(),
+            "fetched_at": time.time()
+        }
+        tmp_meta = meta_path + ".tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+
+class CatalogFetcher:
+    """Fetches many URLs concurrently with connection reuse and conditional requests"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_concurrency: int = 4,
+                 timeout: float = 15.0, session: Optional[requests.Session] = None):
+        self.cache = HttpCache(cache_dir)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+
+        # One pooled session shared by all workers keeps TCP/TLS connections alive
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency,
+                              pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+
+    def _fetch_one(self, url: str) -> FetchResult:
+        """Blocking conditional GET, run on a worker thread"""
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached:
+                return FetchResult(url, self.cache.read_body(url), 304, changed=False, from_cache=True)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            # Serve the last good copy when the site is unreachable
+            if cached:
+                return FetchResult(url, self.cache.read_body(url), 0, changed=False,
+                                   from_cache=True, error=str(e))
+            return FetchResult(url, None, 0, changed=False, from_cache=False, error=str(e))
+
+        content = response.content
+        changed = not cached or cached.get("content_hash") != hashlib.sha256(content).hexdigest()
+        headers = dict(response.headers)
+        if not changed:
+            # Same body, possibly fresh validators
+            self.cache.put(url, content, headers)
+        return FetchResult(url, content, response.status_code, changed=changed, from_cache=False,
+                           headers=headers, pending=changed)
+
+    def commit(self, result: FetchResult):
+        """Record a changed document in the cache after the caller has processed it successfully"""
+        if result.pending and result.content is not None:
+            self.cache.put(result.url, result.content, result.headers)
+            result.pending = False
+
+    async def fetch_all_async(self, urls: List[str]) -> Dict[str, FetchResult]:
+        """Fetch all URLs with at most max_concurrency requests in flight"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def bounded(url: str) -> FetchResult:
+            async with semaphore:
+                return await loop.run_in_executor(None, self._fetch_one, url)
+
+        results = await asyncio.gather(*(bounded(url) for url in urls))
+        return {result.url: result for result in results}
+
+    def fetch_all(self, urls: List[str]) -> Dict[str, FetchResult]:
+        """Synchronous entry point for scripts"""
+        return asyncio.run(self.fetch_all_async(list(dict.fromkeys(urls))))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -16,8 +16,9 @@ from course_validator import MITrackValidator
 from se_track_scraper import PurdueSETrackScraper
 from se_course_validator import SETrackValidator
 from friendly_response_generator import FriendlyStudentAdvisor
-import faiss
 import numpy as np
+from vector_index import load_vector_index
+from embedding_service import get_embedding_service
 
 class EnhancedBoilerAI:
     def __init__(self):
@@ -26,6 +27,7 @@ class EnhancedBoilerAI:
         self.thinking_advisor = None
         self.knowledge_graph = None
         self.vector_store = None
+        self.embedding_service = None
         self.chunks = []
         self.history = []
         self.conversation_history = []  # Track full conversation for context
@@ -83,56 +85,46 @@ class EnhancedBoilerAI:
     def load_vector_store(self):
         """Load the vector store if available"""
         try:
-            vector_path = "data/vector_store.faiss"
-            chunks_path = "data/chunks.json"
+            # Shared loader: finds data/vector_store/ or the older data/vector_store.faiss + chunks.json
+            self.vector_store = load_vector_index("data/vector_store")
+            self.chunks = self.vector_store.chunks
             
-            if os.path.exists(vector_path) and os.path.exists(chunks_path):
-                self.vector_store = faiss.read_index(vector_path)
-                
-                with open(chunks_path, 'r') as f:
-                    self.chunks = json.load(f)
-                
-                print(f"✓ Loaded vector store with {len(self.chunks)} vectors")
-            else:
-                print("⚠ Vector store not found, using basic mode")
+            print(f"✓ Loaded vector store with {len(self.vector_store)} vectors")
+        except FileNotFoundError:
+            print("⚠ Vector store not found, using basic mode")
         except Exception as e:
             print(f"⚠ Vector store load error: {e}")
     
     def search_knowledge_base(self, query, k=3):
         """Search the knowledge base for relevant information"""
+        return self.search_knowledge_base_many([query], k)[0]
+    
+    def search_knowledge_base_many(self, queries, k=3):
+        """Search several queries (e.g. parts of a multi-part question) with one embedding call"""
         if not self.vector_store or not self.chunks:
-            return []
+            return [[] for _ in queries]
         
         try:
-            # Get embeddings for query
-            from google.generativeai import google.generativeai as genai
-            client = Gemini(api_key=os.environ.get("GEMINI_API_KEY"))
-            
-            response = client.embeddings.create(
-                input=query,
-                model="text-embedding-3-small"
-            )
-            
-            query_embedding = np.array([response.data[0].embedding], dtype=np.float32)
+            # Cached, long-lived embedding client; repeat queries never leave the process
+            if self.embedding_service is None:
+                self.embedding_service = get_embedding_service(
+                    self.vector_store.manifest.get("embedder", ""),
+                    api_key=os.environ.get("GEMINI_API_KEY")
+                )
+            query_embeddings = self.embedding_service.embed_queries(queries)
             
             # Search vector store
-            scores, indices = self.vector_store.search(query_embedding, k)
-            
-            results = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.chunks):
-                    chunk = self.chunks[idx]
-                    results.append({
-                        'content': chunk.get('content', ''),
-                        'source': chunk.get('source', ''),
-                        'score': float(scores[0][i])
-                    })
+            all_matches = self.vector_store.search_vectors(query_embeddings, k)
             
-            return results
+            return [[{
+                'content': match.get('content', ''),
+                'source': match.get('source', ''),
+                'score': match['score']
+            } for match in matches] for matches in all_matches]
             
         except Exception as e:
             print(f"Search error: {e}")
-            return []
+            return [[] for _ in queries]
     
     def get_enhanced_response(self, user_input):
         """Get enhanced response with NLP analysis and dynamic knowledge retrieval"""
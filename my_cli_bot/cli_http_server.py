@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Concurrent local HTTP server for the BoilerAI frontend
+Serves POST /query from one shared SimpleBoilerAI engine, with conversation
+memory kept per optional session_id. Each HTTP/1.1 keep-alive connection gets
+a cheap thread of its own; only engine calls go through a bounded worker pool,
+each under a per-request timeout so one slow answer cannot hold up other users.
+GET /health reports liveness and GET /ready turns 200 once the engine is loaded,
+which launchers poll instead of sleeping.
+
+Usage:
+    BOILERAI_API_KEY=... python cli_http_server.py --port 8001 --provider gemini
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from metrics import get_metrics_registry
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8001
+DEFAULT_WORKERS = 8
+DEFAULT_BACKLOG = 32
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_REQUEST_TIMEOUT = 60.0
+DEFAULT_KEEPALIVE_TIMEOUT = 15.0
+MAX_BODY_BYTES = 1 << 20
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+}
+
+
+class CLIRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler; connections stay open until idle for keepalive_timeout"""
+    protocol_version = "HTTP/1.1"
+    server: "CLIHTTPServer"
+
+    def setup(self):
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {"status": "alive", **self.server.get_status()})
+        elif self.path == '/ready':
+            status = self.server.get_status()
+            self._send_json(200 if status["ready"] else 503, status)
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/query':
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self._send_json(413, {"error": "Request body too large"})
+                return
+            data = json.loads(self.rfile.read(length).decode('utf-8') or "{}")
+            query = str(data.get('query', '')).strip()
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid request body: {e}"})
+            return
+        if not query:
+            self._send_json(400, {"error": "Missing 'query'"})
+            return
+
+        status, result = self.server.process_query(query, data.get('session_id'))
+        self._send_json(status, result)
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CLIHTTPServer(ThreadingHTTPServer):
+    """Thread-per-connection server sharing one engine behind a bounded worker pool"""
+    daemon_threads = True
+
+    def __init__(self, engine_factory: Callable[[], Any], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 provider: str = "unknown", workers: int = DEFAULT_WORKERS, backlog: int = DEFAULT_BACKLOG,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, max_abandoned: Optional[int] = None):
+        self.request_queue_size = backlog
+        super().__init__((host, port), CLIRequestHandler)
+        self.provider = provider
+        self.workers = workers
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.engine = None
+        self.engine_error: Optional[str] = None
+        self._engine_factory = engine_factory
+        self._ready = threading.Event()
+        # Idle keep-alive connections only cost a parked thread; the cap just bounds file descriptors
+        self._connection_slots = threading.BoundedSemaphore(max_connections)
+        # Engine calls running or queued, released when the call really finishes (not when it times out)
+        self._engine_slots = threading.BoundedSemaphore(workers + backlog)
+        self._engine_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cli-engine")
+        # Timed-out calls still occupying engine workers; past the cap new queries get 503
+        self.max_abandoned = max(1, workers // 2) if max_abandoned is None else max_abandoned
+        self._abandoned = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def load_engine(self):
+        """Build the shared engine; readiness flips once it is usable"""
+        try:
+            self.engine = self._engine_factory()
+        except Exception as e:
+            self.engine_error = f"{type(e).__name__}: {e}"
+            print(f"Warning: CLI engine failed to initialize: {self.engine_error}")
+            return
+        self._ready.set()
+        print("Ready to serve AI requests!")
+
+    def process_request(self, request, client_address):
+        if not self._connection_slots.acquire(blocking=False):
+            self._reject_busy(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except RuntimeError:
+            self._connection_slots.release()
+            self.shutdown_request(request)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connection_slots.release()
+
+    def _reject_busy(self, request):
+        body = b'{"error": "Server busy, retry shortly"}'
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                            b"Retry-After: 1\r\nConnection: close\r\n"
+                            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        except OSError:
+            pass
+        get_metrics_registry().counter("cli_server_requests_total", "CLI server requests by outcome",
+                                       result="busy").inc()
+        self.shutdown_request(request)
+
+    def process_query(self, query: str, session_id: Optional[str] = None):
+        """(HTTP status, response payload) for one query, bounded by request_timeout"""
+        if not self._ready.is_set():
+            return 503, {"success": False, "error": self.engine_error or "Engine is still loading",
+                         "provider": self.provider}
+
+        registry = get_metrics_registry()
+        with self._lock:
+            saturated = self._abandoned >= self.max_abandoned
+        if saturated or not self._engine_slots.acquire(blocking=False):
+            registry.counter("cli_server_requests_total", "CLI server requests by outcome", result="busy").inc()
+            return 503, {"success": False, "error": "Server busy, retry shortly", "provider": self.provider}
+
+        with self._lock:
+            self._in_flight += 1
+        start = time.monotonic()
+        try:
+            try:
+                future = self._engine_pool.submit(self.engine.process_query, query, session_id=session_id)
+            except RuntimeError:
+                self._engine_slots.release()
+                raise
+            future.add_done_callback(lambda _: self._engine_slots.release())
+            result = future.result(timeout=self.request_timeout)
+        except FutureTimeout:
+            # The engine call cannot be interrupted; it keeps its worker until it finishes and is dropped
+            if not future.cancel():
+                with self._lock:
+                    self._abandoned += 1
+                future.add_done_callback(self._settle_abandoned)
+            registry.counter("cli_server_requests_total", "CLI server requests by outcome",
+                             result="timeout").inc()
+            return 504, {"success": False, "error": f"Query timed out after {self.request_timeout:.0f}s",
+                         "response": "This is taking longer than expected. Please try again.",
+                         "provider": self.provider}
+        except Exception as e:
+            registry.counter("cli_server_requests_total", "CLI server requests by outcome", result="error").inc()
+            return 200, {"success": False, "error": str(e), "response": f"CLI processing error: {e}",
+                         "provider": self.provider}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            registry.histogram("cli_server_query_seconds", "CLI server query latency").observe(
+                time.monotonic() - start)
+
+        registry.counter("cli_server_requests_total", "CLI server requests by outcome", result="ok").inc()
+        if not isinstance(result, dict):
+            result = {"response": str(result)}
+        return 200, {
+            "success": True,
+            "response": result.get("response", str(result)),
+            "thinking": result.get("thinking", ""),
+            "sources": result.get("sources", []),
+            "confidence": result.get("confidence", 0.8),
+            "provider": self.provider
+        }
+
+    def _settle_abandoned(self, _future):
+        with self._lock:
+            self._abandoned -= 1
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self._in_flight
+            abandoned = self._abandoned
+        return {
+            "ready": self._ready.is_set(),
+            "error": self.engine_error,
+            "provider": self.provider,
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "abandoned": abandoned
+        }
+
+    def server_close(self):
+        super().server_close()
+        self._engine_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def wait_until_ready(url: str, timeout: float = 120.0, interval: float = 0.25,
+                     alive: Callable[[], bool] = lambda: True) -> bool:
+    """Poll a /ready endpoint until it answers 200, the deadline passes or alive() turns False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not alive():
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=interval * 4) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, socket.timeout, ConnectionError):
+            pass
+        time.sleep(interval)
+    return False
+
+
+def create_cli_server(api_key: Optional[str] = None, provider: str = "unknown", **kwargs) -> CLIHTTPServer:
+    """CLI server backed by SimpleBoilerAI; the engine loads in the background"""
+    def engine_factory():
+        from simple_boiler_ai import SimpleBoilerAI
+        return SimpleBoilerAI(api_key=api_key)
+
+    server = CLIHTTPServer(engine_factory, provider=provider, **kwargs)
+    threading.Thread(target=server.load_engine, name="cli-engine-loader", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoilerAI CLI HTTP server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--provider", default=os.getenv("LLM_PROVIDER", "unknown"))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG)
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT)
+    parser.add_argument("--keepalive-timeout", type=float, default=DEFAULT_KEEPALIVE_TIMEOUT)
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS)
+    args = parser.parse_args()
+
+    # The key comes from the environment so it never shows up in the process list
+    server = create_cli_server(
+        api_key=os.getenv("BOILERAI_API_KEY") or None,
+        provider=args.provider,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        backlog=args.backlog,
+        request_timeout=args.request_timeout,
+        keepalive_timeout=args.keepalive_timeout,
+        max_connections=args.max_connections
+    )
+    print("CLI Server Started!")
+    print(f"Server running on: http://{args.host}:{args.port}")
+    print(f"Provider: {args.provider}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
+from course_code_resolver import get_course_resolver
+
 class Semester(Enum):
     FALL = "Fall"
     SPRING = "Spring"
@@ -64,16 +66,8 @@ class ComprehensiveFailureAnalyzer:
         # Define all failure scenarios
         self.failure_scenarios = self._initialize_failure_scenarios()
         
-        # Course mappings for pattern recognition
-        self.course_mappings = {
-            '180': 'CS 18000', '182': 'CS 18200', '240': 'CS 24000',
-            '250': 'CS 25000', '251': 'CS 25100', '252': 'CS 25200',
-            '161': 'MA 16100', '162': 'MA 16200', '261': 'MA 26100', '265': 'MA 26500',
-            'calc 1': 'MA 16100', 'calc1': 'MA 16100', 'calculus 1': 'MA 16100',
-            'calc 2': 'MA 16200', 'calc2': 'MA 16200', 'calculus 2': 'MA 16200',
-            'calc 3': 'MA 26100', 'calc3': 'MA 26100', 'multivariate': 'MA 26100',
-            'linear algebra': 'MA 26500', 'linear': 'MA 26500'
-        }
+        # Shared resolver for course codes, short codes and names ("calc 2")
+        self.course_resolver = get_course_resolver(knowledge_file)
         
     def _load_knowledge_base(self) -> Dict[str, Any]:
         """Load knowledge base with error handling"""
@@ -291,45 +285,7 @@ class ComprehensiveFailureAnalyzer:
         
     def normalize_course_code(self, query: str) -> List[str]:
         """Enhanced course code extraction for all courses"""
-        normalized_courses = []
-        query_lower = query.lower()
-        
-        # First check for phrase-based mappings
-        for phrase, course_code in self.course_mappings.items():
-            if phrase in query_lower:
-                normalized_courses.append(course_code)
-        
-        # Enhanced patterns for all courses
-        patterns = [
-            r'\bcs\s*(\d{3})\b',         # CS 182, CS 240
-            r'\bcs\s*(\d{5})\b',         # CS 18200, CS 24000  
-            r'\bma\s*(\d{3})\b',         # MA 161, MA 162
-            r'\bma\s*(\d{5})\b',         # MA 16100, MA 16200
-            r'\b(\d{3})\b',              # 182, 240, 161, 162
-            r'\b(\d{5})\b'               # 18200, 24000, 16100
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, query_lower)
-            for match in matches:
-                if match in self.course_mappings:
-                    normalized_courses.append(self.course_mappings[match])
-                elif len(match) == 3:
-                    if match.startswith('1') or match.startswith('2'):
-                        # CS courses
-                        if match.startswith('18') or match.startswith('24') or match.startswith('25'):
-                            normalized_courses.append(f"CS {match}00")
-                        # Math courses  
-                        elif match.startswith('16') or match.startswith('26'):
-                            normalized_courses.append(f"MA {match}00")
-                elif len(match) == 5:
-                    if match.startswith('1') or match.startswith('2'):
-                        if match.startswith('16') or match.startswith('26'):
-                            normalized_courses.append(f"MA {match}")
-                        else:
-                            normalized_courses.append(f"CS {match}")
-                            
-        return list(dict.fromkeys(normalized_courses))  # Remove duplicates
+        return self.course_resolver.extract(query, include_numbers=True)
         
     def determine_failure_semester(self, query: str, course: str) -> str:
         """Determine when the course failure occurred based on context"""
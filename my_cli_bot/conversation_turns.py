@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Append-only conversation turn storage
+One row per turn in conversation_turns(session_id, seq, ...), so recording a turn
+is a single-row insert and "last N turns" is an index range scan, independent of
+how long the session has been running. Old turns are compacted in the background.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP_TURNS = 20
+
+TURN_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS conversation_turns (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        ts TEXT NOT NULL,
+        query TEXT,
+        response TEXT,
+        query_type TEXT,
+        PRIMARY KEY (session_id, seq)
+    ) WITHOUT ROWID
+'''
+
+INSERT_TURN_SQL = '''
+    INSERT INTO conversation_turns (session_id, seq, ts, query, response, query_type)
+    SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ?
+    FROM conversation_turns WHERE session_id = ?
+'''
+
+RECENT_TURNS_SQL = '''
+    SELECT seq, ts, query, response, query_type
+    FROM conversation_turns
+    WHERE session_id = ?
+    ORDER BY seq DESC
+    LIMIT ?
+'''
+
+COMPACT_SESSION_SQL = '''
+    DELETE FROM conversation_turns
+    WHERE session_id = ?
+      AND seq <= (SELECT MAX(seq) FROM conversation_turns WHERE session_id = ?) - ?
+'''
+
+OVERSIZED_SESSIONS_SQL = '''
+    SELECT session_id FROM conversation_turns
+    GROUP BY session_id
+    HAVING COUNT(*) > ?
+'''
+
+ORPHAN_TURNS_SQL = '''
+    DELETE FROM conversation_turns
+    WHERE session_id NOT IN (SELECT session_id FROM session_context)
+'''
+
+
+def ensure_turn_schema(conn: sqlite3.Connection):
+    """Create the turn table and move any legacy conversation_history blobs into it"""
+    conn.execute(TURN_SCHEMA)
+    _migrate_history_blobs(conn)
+    conn.commit()
+
+
+def decode_session_blob(data: str) -> Any:
+    """Decode a session_context column written as hex msgpack (OptimizedSessionManager) or JSON"""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(bytes.fromhex(data), raw=False)
+        except Exception:
+            pass
+    return json.loads(data)
+
+
+LEGACY_HISTORY_WHERE = "conversation_history IS NOT NULL AND conversation_history NOT IN ('', '[]')"
+
+
+def _migrate_history_blobs(conn: sqlite3.Connection) -> int:
+    """One-time migration: rows whose history still lives in session_context; returns sessions moved"""
+    try:
+        rows = conn.execute(
+            f"SELECT session_id, conversation_history FROM session_context WHERE {LEGACY_HISTORY_WHERE}"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return 0  # No session_context table yet
+
+    migrated = 0
+    skipped = set()
+    for session_id, blob in rows:
+        try:
+            history = decode_session_blob(blob)
+        except (TypeError, ValueError) as e:
+            history = e
+        if not isinstance(history, list) or not all(isinstance(turn, dict) for turn in history):
+            logger.warning("Leaving undecodable conversation history of session %s in place: %r",
+                           session_id, history if isinstance(history, Exception) else type(history))
+            skipped.add(session_id)
+            continue
+        conn.executemany(
+            "INSERT OR IGNORE INTO conversation_turns (session_id, seq, ts, query, response, query_type) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(session_id, seq, turn.get('timestamp', ''), turn.get('query', ''),
+              turn.get('response', ''), turn.get('query_type', ''))
+             for seq, turn in enumerate(history, 1)]
+        )
+        conn.execute("UPDATE session_context SET conversation_history = '[]' WHERE session_id = ?",
+                     (session_id,))
+        migrated += 1
+
+    # Every non-empty blob must now be either migrated or one of the logged skips
+    remaining = {row[0] for row in conn.execute(
+        f"SELECT session_id FROM session_context WHERE {LEGACY_HISTORY_WHERE}").fetchall()}
+    if remaining - skipped:
+        logger.error("Conversation history migration missed %d sessions: %s",
+                     len(remaining - skipped), sorted(remaining - skipped)[:10])
+    if migrated:
+        logger.info("Migrated conversation history of %d sessions into conversation_turns", migrated)
+    return migrated
+
+
+def append_turn(conn: sqlite3.Connection, session_id: str, query: str, response: str,
+                query_type: str, timestamp: Optional[str] = None) -> Dict[str, str]:
+    """Insert one turn with the next sequence number; caller commits"""
+    turn = {
+        'timestamp': timestamp or datetime.now().isoformat(),
+        'query': query,
+        'response': response,
+        'query_type': query_type
+    }
+    conn.execute(INSERT_TURN_SQL, (session_id, turn['timestamp'], query, response,
+                                   query_type, session_id))
+    return turn
+
+
+def recent_turns(conn: sqlite3.Connection, session_id: str, limit: int) -> List[Dict[str, str]]:
+    """Last `limit` turns, oldest first"""
+    rows = conn.execute(RECENT_TURNS_SQL, (session_id, limit)).fetchall()
+    return [
+        {'seq': row[0], 'timestamp': row[1], 'query': row[2], 'response': row[3], 'query_type': row[4]}
+        for row in reversed(rows)
+    ]
+
+
+def compact_turns(conn: sqlite3.Connection, keep_last: int = DEFAULT_KEEP_TURNS) -> int:
+    """Trim every session to its last `keep_last` turns and drop turns of deleted sessions"""
+    deleted = 0
+    session_ids = [row[0] for row in conn.execute(OVERSIZED_SESSIONS_SQL, (keep_last,)).fetchall()]
+    for session_id in session_ids:
+        deleted += conn.execute(COMPACT_SESSION_SQL, (session_id, session_id, keep_last)).rowcount
+    try:
+        deleted += conn.execute(ORPHAN_TURNS_SQL).rowcount
+    except sqlite3.OperationalError:
+        pass
+    conn.commit()
+    return deleted
+
+
+class TurnCompactor:
+    """Daemon thread that periodically compacts old turns off the request path"""
+
+    def __init__(self, db_path: str, keep_last: int = DEFAULT_KEEP_TURNS, interval: float = 300.0):
+        self.db_path = db_path
+        self.keep_last = keep_last
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="turn-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> int:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            return compact_turns(conn, self.keep_last)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                print(f"Warning: turn compaction failed: {e}")
+
+
+_compactors: Dict[str, TurnCompactor] = {}
+_compactors_lock = threading.Lock()
+
+
+def start_background_compaction(db_path: str, keep_last: int = DEFAULT_KEEP_TURNS,
+                                interval: float = 300.0) -> TurnCompactor:
+    """One compactor thread per database file, shared by all session managers"""
+    with _compactors_lock:
+        compactor = _compactors.get(db_path)
+        if compactor is None:
+            compactor = TurnCompactor(db_path, keep_last, interval)
+            _compactors[db_path] = compactor
+        compactor.start()
+        return compactor
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Unified course code resolver
+One Aho-Corasick automaton, built from the catalog, over department prefixes,
+course titles and common aliases ("data structures", "calc 2"), so every course
+mention in a query is found in a single pass. Canonical codes are interned and
+results are cached per query string.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CATALOG_PATH = "data/cs_knowledge_graph.json"
+
+# Spellings users type for each department
+DEPARTMENT_ALIASES = {
+    "cs": "CS",
+    "ma": "MA",
+    "math": "MA",
+    "stat": "STAT",
+    "phys": "PHYS",
+    "engr": "ENGR",
+    "com": "COM",
+    "engl": "ENGL",
+}
+
+# Aliases that are not course titles, merged under the catalog titles
+DEFAULT_ALIASES = {
+    "data structures": "CS 25100",
+    "data mining": "CS 37300",
+    "machine learning": "CS 37300",
+    "artificial intelligence": "CS 47100",
+    "web search": "CS 47300",
+    "information search": "CS 47300",
+    "software engineering i": "CS 30700",
+    "software engineering 1": "CS 30700",
+    "operating systems": "CS 35400",
+    "compilers": "CS 35200",
+    "computer networks": "CS 42200",
+    "computer security": "CS 42600",
+    "cloud computing": "CS 35100",
+    "embedded systems": "CS 48900",
+    "distributed systems": "CS 49000-DSO",
+    "software security": "CS 49000-SWS",
+    "database": "CS 44800",
+    "relational database": "CS 44800",
+    "robotics": "CS 45800",
+    "natural language processing": "CS 57700",
+    "nlp": "CS 57700",
+    "statistical machine learning": "CS 57800",
+    "programming languages": "CS 45600",
+    "software testing": "CS 40800",
+    "senior project": "CS 40700",
+    "numerical methods": "CS 31400",
+    "information systems": "CS 34800",
+    "concurrency": "CS 35300",
+    "parallelism": "CS 35300",
+    "data visualization": "CS 43900",
+    "large scale analytics": "CS 44000",
+    "human computer": "CS 47500",
+    "hci": "CS 47500",
+    "theory of computation": "CS 48300",
+    "competitive programming": "CS 31100",
+    "calc 1": "MA 16100", "calc1": "MA 16100", "calculus 1": "MA 16100",
+    "calc 2": "MA 16200", "calc2": "MA 16200", "calculus 2": "MA 16200",
+    "calc 3": "MA 26100", "calc3": "MA 26100", "multivariate": "MA 26100",
+    "linear algebra": "MA 26500",
+    "linear": "MA 26500",
+}
+
+# Words users glue onto a course code ("failedcs182"); the code still counts as a mention
+GLUED_PREFIXES = ("fail", "flunk", "retak")
+
+# Core courses used when no catalog is available, so bare numbers still resolve
+DEFAULT_COURSES = (
+    "CS 18000", "CS 18200", "CS 24000", "CS 25000", "CS 25100", "CS 25200", "CS 38100",
+    "MA 16100", "MA 16200", "MA 26100", "MA 26500",
+)
+
+_KIND_DEPARTMENT = 0
+_KIND_ALIAS = 1
+_KIND_NUMBER = 2
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+def canonical_code(department: str, number: str, suffix: str = "") -> str:
+    """'cs', '180' -> 'CS 18000'; three-digit short numbers get the trailing 00"""
+    if len(number) == 3:
+        number += "00"
+    code = f"{department.upper()} {number}"
+    if suffix:
+        code += "-" + suffix.upper()
+    return sys.intern(code)
+
+
+def _scan_number(text: str, pos: int) -> Optional[Tuple[str, str, int]]:
+    """Read ' 18000', '180' or ' 49000-dso' starting at pos; returns (number, suffix, end)"""
+    i = pos
+    n = len(text)
+    if i < n and text[i] in " -":
+        i += 1
+    start = i
+    while i < n and text[i].isdigit():
+        i += 1
+    number = text[start:i]
+    if len(number) not in (3, 5):
+        return None
+
+    suffix = ""
+    if i + 1 < n and text[i] == "-" and text[i + 1].isalpha():
+        j = i + 1
+        while j < n and text[j].isalpha():
+            j += 1
+        suffix = text[i + 1:j]
+        i = j
+
+    if i < n and _is_word_char(text[i]):
+        return None
+    return number, suffix, i
+
+
+class _Automaton:
+    """Aho-Corasick automaton over lowercase patterns with attached payloads"""
+
+    def __init__(self, patterns: Dict[str, Tuple[int, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int, str]]] = [[]]
+
+        for pattern, (kind, value) in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(pattern), kind, value))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, kind, value) for every pattern occurrence"""
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, kind, value in self._out[state]:
+                yield i + 1 - length, i + 1, kind, value
+
+
+class CourseCodeResolver:
+    """Finds and canonicalizes course codes, short codes and title aliases in free text"""
+
+    def __init__(self, courses: Optional[Iterable[Any]] = None,
+                 aliases: Optional[Dict[str, str]] = None, cache_size: int = 4096):
+        if isinstance(courses, dict):
+            catalog = courses
+        else:
+            catalog = {code: {} for code in (courses or DEFAULT_COURSES)}
+
+        self.courses = frozenset(sys.intern(code) for code in catalog)
+        self.departments = dict(DEPARTMENT_ALIASES)
+        for code in self.courses:
+            department = code.split(" ", 1)[0]
+            self.departments.setdefault(department.lower(), department)
+
+        patterns: Dict[str, Tuple[int, str]] = {}
+        for spelling, department in self.departments.items():
+            patterns[spelling] = (_KIND_DEPARTMENT, department)
+
+        for code, info in catalog.items():
+            title = (info or {}).get("title") if isinstance(info, dict) else None
+            if title:
+                patterns.setdefault(" ".join(title.lower().split()), (_KIND_ALIAS, sys.intern(code)))
+
+            # Bare numbers ("182", "18200") resolve only when a single course owns them
+            number = code.split(" ", 1)[-1]
+            if number.isdigit():
+                for bare in {number, number[:3] if number.endswith("00") else number}:
+                    existing = patterns.get(bare)
+                    if existing is None:
+                        patterns[bare] = (_KIND_NUMBER, sys.intern(code))
+                    elif existing[1] != code:
+                        patterns[bare] = (_KIND_NUMBER, "")
+
+        for alias, code in {**DEFAULT_ALIASES, **(aliases or {})}.items():
+            patterns[alias.lower()] = (_KIND_ALIAS, sys.intern(code))
+
+        self._automaton = _Automaton(patterns)
+        self._extract_cached = lru_cache(maxsize=cache_size)(self._extract)
+
+    def _extract(self, text: str, include_numbers: bool, codes_only: bool = False) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(code for _, _, code in self._spans(text, include_numbers, codes_only)))
+
+    def _spans(self, text: str, include_numbers: bool, codes_only: bool) -> List[Tuple[int, int, str]]:
+        lowered = text.lower()
+        n = len(lowered)
+        candidates = []
+
+        for start, end, kind, value in self._automaton.iter_matches(lowered):
+            if start > 0 and _is_word_char(lowered[start - 1]) and not (
+                    kind == _KIND_DEPARTMENT and self._glued(lowered, start)):
+                continue
+            if kind == _KIND_DEPARTMENT:
+                scanned = _scan_number(lowered, end)
+                if scanned is None:
+                    continue
+                number, suffix, end = scanned
+                candidates.append((start, end, canonical_code(value, number, suffix)))
+            elif end < n and _is_word_char(lowered[end]):
+                continue
+            elif (kind == _KIND_ALIAS and not codes_only) or (kind == _KIND_NUMBER and include_numbers and value):
+                candidates.append((start, end, value))
+
+        # Leftmost-longest, non-overlapping
+        candidates.sort(key=lambda c: (c[0], c[0] - c[1]))
+        found = []
+        position = 0
+        for start, end, code in candidates:
+            if start >= position:
+                found.append((start, end, code))
+                position = end
+        return found
+
+    @staticmethod
+    def _glued(lowered: str, start: int) -> bool:
+        """True when the letters right before start are one GLUED_PREFIXES word"""
+        word_start = start
+        while word_start > 0 and lowered[word_start - 1].isalpha():
+            word_start -= 1
+        if word_start > 0 and _is_word_char(lowered[word_start - 1]):
+            return False
+        return lowered[word_start:start].startswith(GLUED_PREFIXES)
+
+    def extract(self, text: str, include_numbers: bool = False, codes_only: bool = False) -> List[str]:
+        """
+        All courses mentioned in text, in order of appearance, without duplicates.
+        With codes_only, titles and aliases ("data structures") are not counted,
+        only explicit codes such as "CS 251" or "failedcs182".
+        """
+        if not text:
+            return []
+        return list(self._extract_cached(text, include_numbers, codes_only))
+
+    def find(self, text: str, include_numbers: bool = False) -> List[Tuple[int, int, str]]:
+        """(start, end, code) of every course mention in text, leftmost-longest and non-overlapping"""
+        if not text:
+            return []
+        return self._spans(text, include_numbers, False)
+
+    def normalize(self, course_code: str) -> str:
+        """Canonical form of one code ('cs180' -> 'CS 18000'); unknown text is upper-cased"""
+        if not course_code:
+            return ""
+        found = self._extract_cached(course_code, True, False)
+        if found:
+            return found[0]
+
+        # Departments the automaton does not know: letters followed by a number
+        compact = course_code.upper().replace(" ", "")
+        split = 0
+        while split < len(compact) and compact[split].isalpha():
+            split += 1
+        if split:
+            scanned = _scan_number(compact, split)
+            if scanned is not None:
+                number, suffix, _ = scanned
+                return canonical_code(compact[:split], number, suffix)
+        return " ".join(course_code.upper().split())
+
+    def cache_info(self):
+        return self._extract_cached.cache_info()
+
+
+def load_catalog_courses(catalog_path: str = DEFAULT_CATALOG_PATH) -> Optional[Dict[str, Any]]:
+    """Course dict from the knowledge graph file, or None if it is unavailable"""
+    if not os.path.exists(catalog_path):
+        return None
+    try:
+        with open(catalog_path, "r") as f:
+            return json.load(f).get("courses") or None
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read course catalog {catalog_path}: {e}")
+        return None
+
+
+_resolvers: Dict[str, CourseCodeResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_course_resolver(catalog_path: str = DEFAULT_CATALOG_PATH) -> CourseCodeResolver:
+    """Process-wide resolver per catalog file, built once"""
+    with _resolvers_lock:
+        resolver = _resolvers.get(catalog_path)
+        if resolver is None:
+            resolver = CourseCodeResolver(load_catalog_courses(catalog_path))
+            _resolvers[catalog_path] = resolver
+        return resolver
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Bitmask degree audit engine
+Degree requirements (all-of, n-of, credit pools) are compiled once into bitmasks
+over a shared course index. A single student is audited with a handful of integer
+AND/popcount operations; a cohort is audited at once as a boolean
+students x courses NumPy matrix, which backs the advisor dashboard view.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from course_code_resolver import get_course_resolver
+
+KIND_ALL_OF = "all_of"
+KIND_N_OF = "n_of"
+KIND_CREDIT_POOL = "credit_pool"
+
+FOUNDATION_PROGRAM = "foundation"
+DEFAULT_COURSE_CREDITS = 3
+
+
+class CourseIndex:
+    """Stable course code -> bit position mapping; positions are never reused"""
+
+    def __init__(self, courses: Iterable[str] = ()):
+        self._bits: Dict[str, int] = {}
+        self._codes: List[str] = []
+        self._lock = threading.Lock()
+        for code in courses:
+            self.add(code)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._bits
+
+    def add(self, code: str) -> int:
+        bit = self._bits.get(code)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.get(code)
+                if bit is None:
+                    bit = len(self._codes)
+                    self._codes.append(code)
+                    self._bits[code] = bit
+        return bit
+
+    def bit(self, code: str) -> Optional[int]:
+        """Position of a course, trying the canonical spelling when the raw code is unknown"""
+        bit = self._bits.get(code)
+        if bit is None and code:
+            bit = self._bits.get(get_course_resolver().normalize(code))
+        return bit
+
+    def code(self, bit: int) -> str:
+        return self._codes[bit]
+
+    def mask(self, courses: Iterable[str]) -> int:
+        """Bitmask of the indexed courses; courses outside the index are ignored"""
+        mask = 0
+        for code in courses:
+            bit = self.bit(code)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+
+@dataclass
+class Requirement:
+    """One degree requirement over a list of courses"""
+    name: str
+    kind: str
+    courses: Tuple[str, ...]
+    required_count: int = 0
+    required_credits: int = 0
+    credits: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.kind == KIND_ALL_OF:
+            self.required_count = len(self.courses)
+        elif self.kind == KIND_N_OF:
+            self.required_count = self.required_count or 1
+        elif self.kind != KIND_CREDIT_POOL:
+            raise ValueError(f"Unknown requirement kind: {self.kind}")
+
+
+@dataclass
+class RequirementResult:
+    """Audit outcome of one requirement for one student"""
+    name: str
+    kind: str
+    required: Tuple[str, ...]
+    completed: List[str]
+    remaining: List[str]
+    required_count: int
+    completed_count: int
+    required_credits: int = 0
+    completed_credits: int = 0
+
+    @property
+    def satisfied(self) -> bool:
+        if self.kind == KIND_CREDIT_POOL:
+            return self.completed_credits >= self.required_credits
+        return self.completed_count >= self.required_count
+
+    @property
+    def remaining_count(self) -> int:
+        return max(0, self.required_count - self.completed_count)
+
+    @property
+    def status(self) -> str:
+        return 'complete' if self.satisfied else 'in_progress'
+
+
+class _CompiledRequirement:
+    """Requirement resolved against a course index: mask, bit list and matrix columns"""
+
+    __slots__ = ("requirement", "mask", "members", "columns", "credit_vector", "credit_by_bit")
+
+    def __init__(self, requirement: Requirement, index: CourseIndex):
+        self.requirement = requirement
+        self.members = [(index.add(code), code) for code in dict.fromkeys(requirement.courses)]
+        self.mask = 0
+        for bit, _ in self.members:
+            self.mask |= 1 << bit
+        self.columns = np.array([bit for bit, _ in self.members], dtype=np.intp)
+        credits = [requirement.credits.get(code, DEFAULT_COURSE_CREDITS) for _, code in self.members]
+        self.credit_vector = np.array(credits, dtype=np.int32)
+        self.credit_by_bit = {bit: credit for (bit, _), credit in zip(self.members, credits)}
+
+    def audit(self, student_mask: int) -> RequirementResult:
+        requirement = self.requirement
+        done = student_mask & self.mask
+        completed, remaining = [], []
+        for bit, code in self.members:
+            (completed if done >> bit & 1 else remaining).append(code)
+        completed_credits = 0
+        if requirement.kind == KIND_CREDIT_POOL:
+            completed_credits = sum(self.credit_by_bit[bit] for bit, _ in self.members if done >> bit & 1)
+        return RequirementResult(
+            name=requirement.name,
+            kind=requirement.kind,
+            required=requirement.courses,
+            completed=completed,
+            remaining=remaining,
+            required_count=requirement.required_count,
+            completed_count=done.bit_count(),
+            required_credits=requirement.required_credits,
+            completed_credits=completed_credits
+        )
+
+    def satisfied(self, student_mask: int) -> bool:
+        requirement = self.requirement
+        done = student_mask & self.mask
+        if requirement.kind == KIND_ALL_OF:
+            return done == self.mask
+        if requirement.kind == KIND_N_OF:
+            return done.bit_count() >= requirement.required_count
+        return sum(self.credit_by_bit[bit] for bit, _ in self.members
+                   if done >> bit & 1) >= requirement.required_credits
+
+
+@dataclass
+class CohortAudit:
+    """Matrix audit of many students against one program"""
+    program: str
+    student_ids: List[str]
+    requirement_names: List[str]
+    completed_counts: np.ndarray
+    completed_credits: np.ndarray
+    satisfied: np.ndarray
+    required_counts: np.ndarray
+
+    @property
+    def complete(self) -> np.ndarray:
+        """Per-student flag: every requirement satisfied"""
+        return self.satisfied.all(axis=1)
+
+    @property
+    def progress(self) -> np.ndarray:
+        """Per-student share of required courses completed, in [0, 1]"""
+        counted = np.minimum(self.completed_counts, self.required_counts)
+        total = self.required_counts.sum()
+        return counted.sum(axis=1) / total if total else np.ones(len(self.student_ids))
+
+    def summary(self) -> Dict:
+        """Dashboard view: completion rate per requirement plus per-student rows"""
+        count = len(self.student_ids)
+        progress = (self.progress * 100).tolist()
+        complete = self.complete.tolist()
+        remaining = np.maximum(self.required_counts - self.completed_counts, 0).sum(axis=1).tolist()
+        satisfied = self.satisfied.tolist()
+        names = self.requirement_names
+        return {
+            'program': self.program,
+            'students': count,
+            'complete': sum(complete),
+            'average_progress_percentage': sum(progress) / count if count else 0.0,
+            'requirements': {
+                name: {
+                    'satisfied': int(self.satisfied[:, i].sum()),
+                    'satisfied_percentage': float(self.satisfied[:, i].mean() * 100) if count else 0.0
+                }
+                for i, name in enumerate(names)
+            },
+            'student_status': [
+                {
+                    'student_id': student_id,
+                    'progress_percentage': progress[row],
+                    'complete': complete[row],
+                    'remaining_courses': remaining[row],
+                    'unsatisfied': [name for name, done in zip(names, satisfied[row]) if not done]
+                }
+                for row, student_id in enumerate(self.student_ids)
+            ]
+        }
+
+
+class DegreeAuditEngine:
+    """Programs of compiled requirements audited over a shared course index"""
+
+    def __init__(self):
+        self.index = CourseIndex()
+        self._programs: Dict[str, List[_CompiledRequirement]] = {}
+        self._lock = threading.Lock()
+
+    def register_program(self, program: str, requirements: Sequence[Requirement]):
+        compiled = [_CompiledRequirement(requirement, self.index) for requirement in requirements]
+        with self._lock:
+            self._programs[program] = compiled
+
+    def has_program(self, program: str) -> bool:
+        return program in self._programs
+
+    def programs(self) -> List[str]:
+        return list(self._programs)
+
+    def _program(self, program: str) -> List[_CompiledRequirement]:
+        compiled = self._programs.get(program)
+        if compiled is None:
+            raise KeyError(f"Unknown degree program: {program}")
+        return compiled
+
+    def student_mask(self, completed_courses: Iterable[str]) -> int:
+        return self.index.mask(completed_courses)
+
+    def audit(self, completed_courses, program: str) -> Dict[str, RequirementResult]:
+        """Per-requirement results for one student; completed_courses may be a mask"""
+        mask = completed_courses if isinstance(completed_courses, int) else self.student_mask(completed_courses)
+        return {compiled.requirement.name: compiled.audit(mask) for compiled in self._program(program)}
+
+    def is_complete(self, completed_courses, program: str) -> bool:
+        mask = completed_courses if isinstance(completed_courses, int) else self.student_mask(completed_courses)
+        return all(compiled.satisfied(mask) for compiled in self._program(program))
+
+    def missing(self, courses: Sequence[str], completed_courses: Iterable[str]) -> List[str]:
+        """Courses from an ad hoc list that the student has not completed, in list order"""
+        bits = [self.index.add(code) for code in courses]
+        mask = self.student_mask(completed_courses)
+        return [code for code, bit in zip(courses, bits) if not mask >> bit & 1]
+
+    def build_matrix(self, students: Sequence[Iterable[str]]) -> np.ndarray:
+        """Boolean students x courses matrix over the current index"""
+        rows, columns = [], []
+        for row, completed in enumerate(students):
+            for code in completed:
+                bit = self.index.bit(code)
+                if bit is not None:
+                    rows.append(row)
+                    columns.append(bit)
+        matrix = np.zeros((len(students), len(self.index)), dtype=bool)
+        matrix[rows, columns] = True
+        return matrix
+
+    def audit_matrix(self, matrix: np.ndarray, program: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(completed_counts, completed_credits, satisfied), each students x requirements"""
+        compiled = self._program(program)
+        shape = (matrix.shape[0], len(compiled))
+        counts = np.zeros(shape, dtype=np.int32)
+        credits = np.zeros(shape, dtype=np.int32)
+        satisfied = np.zeros(shape, dtype=bool)
+        for i, requirement in enumerate(compiled):
+            taken = matrix[:, requirement.columns]
+            counts[:, i] = taken.sum(axis=1)
+            if requirement.requirement.kind == KIND_CREDIT_POOL:
+                credits[:, i] = taken @ requirement.credit_vector
+                satisfied[:, i] = credits[:, i] >= requirement.requirement.required_credits
+            else:
+                satisfied[:, i] = counts[:, i] >= requirement.requirement.required_count
+        return counts, credits, satisfied
+
+    def audit_cohort(self, students: Mapping[str, Iterable[str]], program: str) -> CohortAudit:
+        """Audit every student (id -> completed courses) against one program in one pass"""
+        student_ids = list(students)
+        compiled = self._program(program)
+        matrix = self.build_matrix([students[student_id] for student_id in student_ids])
+        counts, credits, satisfied = self.audit_matrix(matrix, program)
+        return CohortAudit(
+            program=program,
+            student_ids=student_ids,
+            requirement_names=[c.requirement.name for c in compiled],
+            completed_counts=counts,
+            completed_credits=credits,
+            satisfied=satisfied,
+            required_counts=np.array([c.requirement.required_count for c in compiled], dtype=np.int32)
+        )
+
+
+def requirements_from_track(track_reqs: Dict) -> List[Requirement]:
+    """Requirements from a DegreeTrackDatabase track entry: core as all-of, choices as n-of"""
+    requirements = []
+    for key, spec in track_reqs['requirements'].items():
+        if key == 'core_required':
+            requirements.append(Requirement(
+                key, KIND_ALL_OF, tuple(course['course'] for course in spec),
+                credits={course['course']: course.get('credits', DEFAULT_COURSE_CREDITS) for course in spec}
+            ))
+        elif (key.endswith('_choice') or key == 'electives') and 'options' in spec:
+            options = spec['options']
+            requirements.append(Requirement(
+                key, KIND_N_OF, tuple(course['course'] for course in options),
+                required_count=spec.get('required_count', 1),
+                credits={course['course']: course.get('credits', DEFAULT_COURSE_CREDITS) for course in options}
+            ))
+    return requirements
+
+
+_engine: Optional[DegreeAuditEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_degree_audit_engine() -> DegreeAuditEngine:
+    """Process-wide engine with the foundation and every DegreeTrackDatabase track registered"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from degree_planner import DegreeTrackDatabase
+
+            engine = DegreeAuditEngine()
+            engine.register_program(FOUNDATION_PROGRAM, [
+                Requirement(FOUNDATION_PROGRAM, KIND_ALL_OF, tuple(DegreeTrackDatabase.FOUNDATION_COURSES))
+            ])
+            for track_name, track_reqs in DegreeTrackDatabase.TRACK_REQUIREMENTS.items():
+                engine.register_program(track_name, requirements_from_track(track_reqs))
+            _engine = engine
+        return _engine
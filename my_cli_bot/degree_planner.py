@@ -10,10 +10,16 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 from knowledge_graph import PurdueCSKnowledgeGraph
+from degree_audit import FOUNDATION_PROGRAM, get_degree_audit_engine
 
 class DegreeTrackDatabase:
     """Complete track requirements database with exact course specifications"""
     
+    FOUNDATION_COURSES = [
+        'CS 18000', 'CS 18200', 'CS 24000', 'CS 25000', 'CS 25100', 'CS 25200',
+        'MA 16100', 'MA 16200', 'MA 26100', 'STAT 35000'
+    ]
+    
     TRACK_REQUIREMENTS = {
         'machine_intelligence': {
             'total_courses': 6,
@@ -400,77 +406,97 @@ class StudentProgressTracker:
         if track_name not in DegreeTrackDatabase.TRACK_REQUIREMENTS:
             return {'error': f'Track {track_name} not found'}
         
-        track_reqs = DegreeTrackDatabase.TRACK_REQUIREMENTS[track_name]
-        
         analysis = {
             'student_id': student_id,
             'track': track_name,
             'completed_courses': completed_courses,
             'foundation_status': self._analyze_foundation_requirements(completed_courses),
-            'track_requirements': self._analyze_track_requirements(completed_courses, track_reqs),
+            'track_requirements': self._analyze_track_requirements(completed_courses, track_name),
             'graduation_readiness': {}
         }
         
         # Calculate graduation readiness
         analysis['graduation_readiness'] = self._calculate_graduation_readiness(analysis)
-        
+
         return analysis
-    
+
+    def analyze_cohort(self, student_ids: Optional[List[str]] = None) -> Dict:
+        """Audit many students at once for the advisor dashboard, grouped by track"""
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            if student_ids:
+                placeholders = ",".join("?" * len(student_ids))
+                cursor.execute(f'''
+                    SELECT student_id, track, completed_courses FROM student_progress
+                    WHERE student_id IN ({placeholders})
+                ''', student_ids)
+            else:
+                cursor.execute('SELECT student_id, track, completed_courses FROM student_progress')
+            rows = cursor.fetchall()
+        except Exception as e:
+            self.logger.error(f"Failed to load cohort: {e}")
+            return {'error': str(e)}
+        finally:
+            conn.close()
+
+        engine = get_degree_audit_engine()
+        everyone = {}
+        by_track: Dict[str, Dict[str, List[str]]] = {}
+        no_track = []
+        for student_id, track, completed_json in rows:
+            completed = json.loads(completed_json) if completed_json else []
+            everyone[student_id] = completed
+            if track and engine.has_program(track):
+                by_track.setdefault(track, {})[student_id] = completed
+            else:
+                no_track.append(student_id)
+
+        return {
+            'students': len(everyone),
+            'without_track': no_track,
+            'foundation': engine.audit_cohort(everyone, FOUNDATION_PROGRAM).summary() if everyone else {},
+            'tracks': {track: engine.audit_cohort(students, track).summary()
+                       for track, students in by_track.items()}
+        }
+
     def _analyze_foundation_requirements(self, completed_courses: List[str]) -> Dict:
         """Analyze foundation course completion"""
         
-        foundation_courses = [
-            'CS 18000', 'CS 18200', 'CS 24000', 'CS 25000', 'CS 25100', 'CS 25200',
-            'MA 16100', 'MA 16200', 'MA 26100', 'STAT 35000'
-        ]
-        
-        completed_foundation = [course for course in completed_courses if course in foundation_courses]
-        remaining_foundation = [course for course in foundation_courses if course not in completed_courses]
+        foundation_courses = DegreeTrackDatabase.FOUNDATION_COURSES
+        foundation = get_degree_audit_engine().audit(completed_courses, FOUNDATION_PROGRAM)[FOUNDATION_PROGRAM]
         
         return {
             'required_courses': foundation_courses,
-            'completed': completed_foundation,
-            'remaining': remaining_foundation,
-            'completion_percentage': len(completed_foundation) / len(foundation_courses) * 100,
-            'status': 'complete' if not remaining_foundation else 'in_progress'
+            'completed': foundation.completed,
+            'remaining': foundation.remaining,
+            'completion_percentage': foundation.completed_count / len(foundation_courses) * 100,
+            'status': foundation.status
         }
     
-    def _analyze_track_requirements(self, completed_courses: List[str], track_reqs: Dict) -> Dict:
+    def _analyze_track_requirements(self, completed_courses: List[str], track_name: str) -> Dict:
         """Analyze track-specific requirements completion"""
         
         analysis = {}
-        requirements = track_reqs['requirements']
-        
-        # Analyze core required courses
-        if 'core_required' in requirements:
-            core_courses = [course['course'] for course in requirements['core_required']]
-            completed_core = [course for course in completed_courses if course in core_courses]
-            remaining_core = [course for course in core_courses if course not in completed_courses]
-            
-            analysis['core_required'] = {
-                'required': core_courses,
-                'completed': completed_core,
-                'remaining': remaining_core,
-                'status': 'complete' if not remaining_core else 'in_progress'
-            }
-        
-        # Analyze choice requirements (foundation, stats, systems, etc.)
-        for choice_key in requirements:
-            if choice_key.endswith('_choice') or choice_key == 'electives':
-                choice_req = requirements[choice_key]
-                if 'options' in choice_req:
-                    choice_courses = [course['course'] for course in choice_req['options']]
-                    completed_choice = [course for course in completed_courses if course in choice_courses]
-                    required_count = choice_req.get('required_count', 1)
-                    
-                    analysis[choice_key] = {
-                        'required_count': required_count,
-                        'available_options': choice_courses,
-                        'completed': completed_choice,
-                        'completed_count': len(completed_choice),
-                        'remaining_count': max(0, required_count - len(completed_choice)),
-                        'status': 'complete' if len(completed_choice) >= required_count else 'in_progress'
-                    }
+        for req_key, result in get_degree_audit_engine().audit(completed_courses, track_name).items():
+            if req_key == 'core_required':
+                analysis[req_key] = {
+                    'required': list(result.required),
+                    'completed': result.completed,
+                    'remaining': result.remaining,
+                    'status': result.status
+                }
+            else:
+                # Choice requirements (foundation, stats, systems, electives)
+                analysis[req_key] = {
+                    'required_count': result.required_count,
+                    'available_options': list(result.required),
+                    'completed': result.completed,
+                    'completed_count': result.completed_count,
+                    'remaining_count': result.remaining_count,
+                    'status': result.status
+                }
         
         return analysis
     
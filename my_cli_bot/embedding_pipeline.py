@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Batched, concurrent embedding pipeline for the vector store
+Embeds chunks N at a time with bounded parallelism, retries with backoff and
+checkpoints finished batches to disk so interrupted or refreshed builds resume
+"""
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_EMBEDDING_MODEL = "models/text-embedding-004"
+DEFAULT_CHECKPOINT_DIR = "data/vector_store/.embedding_checkpoint"
+
+
+class EmbeddingError(Exception):
+    """Raised when one or more batches cannot be embedded after all retries"""
+
+    def __init__(self, message: str, failed_ids: Optional[List[str]] = None):
+        super().__init__(message)
+        self.failed_ids = failed_ids or []
+
+
+class Embedder(ABC):
+    """Base class for pluggable embedders - turns a batch of texts into vectors"""
+
+    name = "embedder"
+    dimension = 0
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """One vector per input text, in order"""
+
+
+class GeminiEmbedder(Embedder):
+    """Gemini embedding model; one long-lived client, many inputs per request"""
+
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_EMBEDDING_MODEL,
+                 task_type: str = "retrieval_document", dimension: int = 768):
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is required for GeminiEmbedder")
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model = model
+        self.task_type = task_type
+        self.name = model
+        self.dimension = dimension
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        result = self._genai.embed_content(
+            model=self.model,
+            content=texts,
+            task_type=self.task_type
+        )
+        embeddings = result["embedding"]
+        # A single string input comes back as one flat vector
+        if embeddings and not isinstance(embeddings[0], (list, tuple)):
+            embeddings = [embeddings]
+        if len(embeddings) != len(texts):
+            raise EmbeddingError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic local embedder (feature hashing) for offline builds and tests"""
+
+    _token_pattern = re.compile(r"\w+")
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in self._token_pattern.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+def embedder_from_name(name: str, api_key: Optional[str] = None,
+                       task_type: str = "retrieval_query") -> Embedder:
+    """Recreate the embedder a store was built with (recorded as its name)"""
+    if name.startswith("hashing-"):
+        return HashingEmbedder(int(name.split("-", 1)[1]))
+    return GeminiEmbedder(api_key=api_key, model=name or DEFAULT_EMBEDDING_MODEL, task_type=task_type)
+
+
+def chunk_identifier(chunk: Dict[str, Any]) -> str:
+    """Stable ID for a chunk: its own chunk_id, or source plus a content digest"""
+    if chunk.get("chunk_id"):
+        return str(chunk["chunk_id"])
+    digest = hashlib.sha1(chunk.get("content", "").encode("utf-8")).hexdigest()[:16]
+    return f"{chunk.get('source', 'chunk')}:{digest}"
+
+
+def assign_chunk_ids(chunks: List[Dict[str, Any]]) -> List[str]:
+    """
+    chunk_identifier for every chunk. Derived ids of repeated rows (same source
+    and content, e.g. duplicate CSV lines) get an occurrence suffix ("#2", "#3")
+    instead of aborting the build; duplicate explicit chunk_ids are still an error.
+    """
+    ids: List[str] = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        chunk_id = chunk_identifier(chunk)
+        occurrence = seen.get(chunk_id, 0) + 1
+        seen[chunk_id] = occurrence
+        if occurrence > 1:
+            if chunk.get("chunk_id"):
+                raise ValueError(f"Duplicate chunk id: {chunk_id}")
+            chunk_id = f"{chunk_id}#{occurrence}"
+        ids.append(chunk_id)
+    return ids
+
+
+def content_key(text: str, model_name: str) -> str:
+    """Checkpoint key - an embedding depends only on the model and the text"""
+    return hashlib.sha1(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingBuildStats:
+    """Embedding build statistics"""
+    total_chunks: int = 0
+    unique_texts: int = 0
+    resumed: int = 0
+    embedded: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class EmbeddingResult:
+    """Embeddings aligned row-for-row with the input chunks"""
+    embeddings: np.ndarray
+    chunk_ids: List[str]
+    id_to_row: Dict[str, int]
+    stats: EmbeddingBuildStats = field(default_factory=EmbeddingBuildStats)
+
+
+class EmbeddingCheckpoint:
+    """On-disk store of finished batches, keyed by content hash"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.progress_file = os.path.join(directory, "progress.jsonl")
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._next_batch = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.progress_file):
+            return
+        with open(self.progress_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    rows = np.load(os.path.join(self.directory, entry["file"]))
+                except (ValueError, KeyError, OSError):
+                    # A torn last line or missing shard just means that batch reruns
+                    continue
+                for key, row in zip(entry["keys"], rows):
+                    self._vectors[key] = row
+                self._next_batch += 1
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self._vectors.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def save_batch(self, keys: List[str], vectors: np.ndarray):
+        """Persist one finished batch; the shard is written before the progress line"""
+        filename = f"batch_{self._next_batch:06d}.npy"
+        self._next_batch += 1
+        np.save(os.path.join(self.directory, filename), vectors)
+        with open(self.progress_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"file": filename, "keys": keys}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for key, row in zip(keys, vectors):
+            self._vectors[key] = row
+
+
+class BatchEmbeddingBuilder:
+    """Builds embeddings for many chunks with batching, concurrency, retries and resume"""
+
+    def __init__(self, embedder: Embedder, batch_size: int = 64, max_workers: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0, max_backoff: float = 30.0,
+                 checkpoint_dir: Optional[str] = DEFAULT_CHECKPOINT_DIR):
+        self.embedder = embedder
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.checkpoint = None
+        if checkpoint_dir:
+            model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", embedder.name)
+            self.checkpoint = EmbeddingCheckpoint(os.path.join(checkpoint_dir, model_slug))
+
+    def _embed_with_retry(self, texts: List[str]) -> Tuple[np.ndarray, int]:
+        """Embed one batch, retrying with exponential backoff plus jitter"""
+        attempt = 0
+        while True:
+            try:
+                vectors = np.asarray(self.embedder.embed_batch(texts), dtype=np.float32)
+                return vectors, attempt
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff_base * (2 ** (attempt - 1)))
+                delay += random.uniform(0, self.backoff_base)
+                print(f"  Embedding batch failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def build(self, chunks: List[Dict[str, Any]]) -> EmbeddingResult:
+        """Embed every chunk; row i of the result always belongs to chunks[i]"""
+        start_time = time.time()
+        stats = EmbeddingBuildStats(total_chunks=len(chunks))
+
+        chunk_ids = assign_chunk_ids(chunks)
+        id_to_row = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+
+        # Deduplicate by content so identical text is embedded once
+        model_name = self.embedder.name
+        keys = [content_key(chunk.get("content", ""), model_name) for chunk in chunks]
+        vectors: Dict[str, np.ndarray] = {}
+        pending: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key in vectors or key in pending:
+                continue
+            cached = self.checkpoint.get(key) if self.checkpoint is not None else None
+            if cached is not None:
+                vectors[key] = cached
+                stats.resumed += 1
+            else:
+                pending[key] = chunk.get("content", "")
+        stats.unique_texts = len(vectors) + len(pending)
+
+        pending_keys = list(pending.keys())
+        batches = [pending_keys[i:i + self.batch_size]
+                   for i in range(0, len(pending_keys), self.batch_size)]
+        stats.batches = len(batches)
+        if batches:
+            print(f"Embedding {len(pending_keys)} texts in {len(batches)} batches "
+                  f"({stats.resumed} resumed from checkpoint)")
+
+        failed_keys: List[str] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._embed_with_retry, [pending[key] for key in batch]): batch
+                for batch in batches
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                batch = futures[future]
+                try:
+                    batch_vectors, retries = future.result()
+                except Exception as e:
+                    print(f"  Batch of {len(batch)} texts failed permanently: {e}")
+                    failed_keys.extend(batch)
+                    continue
+                stats.retries += retries
+                stats.embedded += len(batch)
+                if self.checkpoint is not None:
+                    self.checkpoint.save_batch(batch, batch_vectors)
+                for key, row in zip(batch, batch_vectors):
+                    vectors[key] = row
+                if done % 10 == 0 or done == len(batches):
+                    print(f"  Embedded batch {done}/{len(batches)}")
+
+        stats.elapsed = time.time() - start_time
+        if failed_keys:
+            failed = set(failed_keys)
+            failed_ids = [chunk_id for chunk_id, key in zip(chunk_ids, keys) if key in failed]
+            raise EmbeddingError(
+                f"{len(failed_ids)} chunks could not be embedded; rerun to resume from checkpoint",
+                failed_ids
+            )
+
+        if chunks:
+            embeddings = np.vstack([vectors[key] for key in keys]).astype(np.float32, copy=False)
+        else:
+            embeddings = np.zeros((0, self.embedder.dimension), dtype=np.float32)
+
+        return EmbeddingResult(embeddings=embeddings, chunk_ids=chunk_ids,
+                               id_to_row=id_to_row, stats=stats)
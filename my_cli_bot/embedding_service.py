@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Query embedding service with a long-lived client and two-level cache
+Repeat and near-repeat queries (case, whitespace, punctuation) are served from an
+in-process LRU or an on-disk SQLite cache, so searches become local FAISS lookups
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_pipeline import Embedder, embedder_from_name
+
+
+DEFAULT_QUERY_CACHE_PATH = "data/query_embedding_cache.db"
+
+_punctuation = re.compile(r"[^\w\s]")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical query text used as the cache key"""
+    query = _punctuation.sub(" ", query.lower())
+    return _whitespace.sub(" ", query).strip()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Query embedding cache statistics"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    api_calls: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total > 0 else 0.0
+
+
+class EmbeddingService:
+    """Embeds queries through one embedder, caching vectors in memory and on disk"""
+
+    def __init__(self, embedder: Embedder, cache_size: int = 2048,
+                 cache_path: Optional[str] = DEFAULT_QUERY_CACHE_PATH):
+        self.embedder = embedder
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.cache_model = f"{embedder.name}:{getattr(embedder, 'task_type', '')}"
+        self.stats = EmbeddingCacheStats()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        if cache_path:
+            self._init_disk_cache()
+
+    def _init_disk_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+            """)
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: query embedding disk cache disabled: {e}")
+            self._db = None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._db is None or not keys:
+            return {}
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT query, vector FROM query_embeddings WHERE model = ? AND query IN ({placeholders})",
+                [self.cache_model] + batch
+            ).fetchall()
+            for query, blob in rows:
+                found[query] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _save_to_disk(self, vectors: Dict[str, np.ndarray]):
+        if self._db is None or not vectors:
+            return
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                [(self.cache_model, key, vector.astype(np.float32).tobytes())
+                 for key, vector in vectors.items()]
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: failed to persist query embeddings: {e}")
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries; all cache misses go to the embedder in one batch call"""
+        keys = [normalize_query(query) for query in queries]
+        resolved: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in resolved:
+                    continue
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    resolved[key] = vector
+                    self.stats.memory_hits += 1
+                elif key not in missing:
+                    missing.append(key)
+
+            from_disk = self._load_from_disk(missing)
+            for key, vector in from_disk.items():
+                resolved[key] = vector
+                self._remember(key, vector)
+            self.stats.disk_hits += len(from_disk)
+            missing = [key for key in missing if key not in from_disk]
+
+        if missing:
+            vectors = np.asarray(self.embedder.embed_batch(missing), dtype=np.float32)
+            fresh = dict(zip(missing, vectors))
+            with self._lock:
+                self.stats.misses += len(missing)
+                self.stats.api_calls += 1
+                for key, vector in fresh.items():
+                    resolved[key] = vector
+                    self._remember(key, vector)
+                self._save_to_disk(fresh)
+
+        if not keys:
+            return np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        return np.vstack([resolved[key] for key in keys])
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed one query (1-D vector)"""
+        return self.embed_queries([query])[0]
+
+    # Embedder interface, so a VectorIndex can use the service transparently
+    @property
+    def name(self) -> str:
+        return self.embedder.name
+
+    @property
+    def dimension(self) -> int:
+        return self.embedder.dimension
+
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.embed_queries(texts))
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(embedder_name: str = "", api_key: Optional[str] = None) -> EmbeddingService:
+    """Process-wide service per embedding model, so the client and cache are shared"""
+    with _services_lock:
+        service = _services.get(embedder_name)
+        if service is None:
+            service = EmbeddingService(embedder_from_name(embedder_name, api_key=api_key))
+            _services[embedder_name] = service
+        return service
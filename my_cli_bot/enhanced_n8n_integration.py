@@ -11,7 +11,7 @@ import asyncio
 import aiohttp
 import logging
 from typing import Dict, List, Any, Optional, Union, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime, timedelta
 from enum import Enum
 import sqlite3
@@ -25,6 +25,9 @@ from smart_ai_engine import SmartAIEngine, QueryIntent
 from simple_nlp_solver import SimpleNLPSolver, SemanticQuery
 from comprehensive_failure_analyzer import ComprehensiveFailureAnalyzer
 from n8n_style_pipeline import N8NStylePipeline
+from knowledge_sync import KnowledgeDiff, KnowledgeSourceTracker, diff_knowledge
+from metrics import get_metrics_registry
+from result_cache import get_result_cache
 
 class PipelineStatus(Enum):
     IDLE = "idle"
@@ -62,11 +65,13 @@ class EnhancedN8NIntegration:
     
     def __init__(self, 
                  n8n_webhook_url: str = "http://localhost:5678/webhook/boilerai",
-                 knowledge_sync_interval: int = 300):
+                 knowledge_sync_interval: int = 300,
+                 knowledge_poll_interval: float = 1.0):
         
         self.logger = self._setup_logging()
         self.n8n_webhook_url = n8n_webhook_url
         self.knowledge_sync_interval = knowledge_sync_interval
+        self.knowledge_poll_interval = knowledge_poll_interval
         
         # Initialize unified components
         self.smart_ai_engine = SmartAIEngine()
@@ -74,8 +79,8 @@ class EnhancedN8NIntegration:
         self.failure_analyzer = ComprehensiveFailureAnalyzer()
         self.n8n_pipeline = N8NStylePipeline()
         
-        # Enhanced caching and synchronization
-        self.query_cache = {}
+        # Enhanced caching and synchronization (shared with other workers and the unified orchestrator)
+        self.query_cache = get_result_cache()
         self.knowledge_cache = {}
         self.last_sync_time = datetime.now()
         self.cache_ttl = timedelta(minutes=15)
@@ -83,12 +88,13 @@ class EnhancedN8NIntegration:
         # Thread pool for parallel processing
         self.executor = ThreadPoolExecutor(max_workers=4)
         
-        # Knowledge base synchronization
+        # Knowledge base synchronization (conversation logs are session data, not knowledge)
         self.knowledge_sources = {
             "cs_knowledge_graph": "data/cs_knowledge_graph.json",
-            "comprehensive_data": "data/comprehensive_purdue_cs_data.json",
-            "conversation_contexts": "conversation_contexts.json"
+            "comprehensive_data": "data/comprehensive_purdue_cs_data.json"
         }
+        self.source_tracker = KnowledgeSourceTracker(self.knowledge_sources)
+        self._sync_lock = threading.Lock()
         
         # Initialize unified knowledge base
         self._initialize_unified_knowledge_base()
@@ -115,6 +121,17 @@ class EnhancedN8NIntegration:
         """Initialize unified knowledge base from all sources"""
         self.logger.info("Initializing unified knowledge base...")
         
+        unified_data = self._build_unified_data(self.source_tracker.load_all())
+        
+        # Build unified knowledge graph for NLP solver
+        self.nlp_solver.build_knowledge_graph(unified_data)
+        
+        # Publish unified data
+        self._publish_knowledge(unified_data)
+        self.logger.info(f"Unified knowledge base initialized with {len(unified_data.get('courses', {}))} courses")
+    
+    def _build_unified_data(self, sources: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Merge the loaded knowledge sources into a fresh unified snapshot"""
         unified_data = {
             "courses": {},
             "tracks": {},
@@ -123,27 +140,22 @@ class EnhancedN8NIntegration:
             "last_updated": datetime.now().isoformat()
         }
         
-        # Load and merge all knowledge sources
         for source_name, source_path in self.knowledge_sources.items():
+            source_data = sources.get(source_name)
+            if source_data is None:
+                self.logger.warning(f"Knowledge source not found: {source_path}")
+                continue
             try:
-                if os.path.exists(source_path):
-                    with open(source_path, 'r', encoding='utf-8') as f:
-                        source_data = json.load(f)
-                    
-                    # Merge data intelligently
-                    self._merge_knowledge_source(unified_data, source_data, source_name)
-                    self.logger.info(f"Loaded knowledge source: {source_name}")
-                else:
-                    self.logger.warning(f"Knowledge source not found: {source_path}")
+                # Merge data intelligently
+                self._merge_knowledge_source(unified_data, source_data, source_name)
             except Exception as e:
-                self.logger.error(f"Error loading {source_name}: {e}")
-        
-        # Build unified knowledge graph for NLP solver
-        self.nlp_solver.build_knowledge_graph(unified_data)
-        
-        # Cache unified data
-        self.knowledge_cache["unified"] = unified_data
-        self.logger.info(f"Unified knowledge base initialized with {len(unified_data.get('courses', {}))} courses")
+                self.logger.error(f"Error merging {source_name}: {e}")
+        return unified_data
+    
+    def _publish_knowledge(self, unified_data: Dict[str, Any]):
+        """Swap in a new knowledge snapshot and its version in one assignment"""
+        self.knowledge_cache = {"unified": unified_data, "version": self.source_tracker.version()}
+        self.last_sync_time = datetime.now()
     
     def _merge_knowledge_source(self, unified_data: Dict, source_data: Dict, source_name: str):
         """Intelligently merge knowledge source into unified data"""
@@ -166,67 +178,61 @@ class EnhancedN8NIntegration:
                 unified_data["degree_requirements"].update(source_data["degree_requirements"])
         
         elif source_name == "comprehensive_data":
-            # Merge comprehensive course data
+            # Merge comprehensive course data (into a copy: source dicts are reused by later merges)
             if "courses" in source_data:
                 for course_id, course_data in source_data["courses"].items():
                     if course_id in unified_data["courses"]:
-                        # Merge course data
-                        unified_data["courses"][course_id].update(course_data)
+                        unified_data["courses"][course_id] = {**unified_data["courses"][course_id], **course_data}
                     else:
                         unified_data["courses"][course_id] = course_data
-        
-        elif source_name == "conversation_contexts":
-            # Add conversation history for context
-            unified_data["conversation_history"] = source_data
+    
+    def _sync_knowledge(self) -> Optional[KnowledgeDiff]:
+        """Re-merge only when a source changed, then patch the NLP graph from the entity diff"""
+        changed = self.source_tracker.changed()
+        if not changed:
+            return None
+        
+        with self._sync_lock:
+            start = time.perf_counter()
+            previous = self.knowledge_cache.get("unified", {})
+            unified_data = self._build_unified_data(self.source_tracker.data)
+            diff = diff_knowledge(previous, unified_data)
+            if not diff.is_empty:
+                self.nlp_solver.apply_knowledge_diff(diff, unified_data)
+            # Cached answers are keyed by the published version, so they turn over with it
+            self._publish_knowledge(unified_data)
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        get_metrics_registry().counter("knowledge_sync_total", "Incremental knowledge syncs by outcome",
+                                       result="patched" if not diff.is_empty else "unchanged").inc()
+        self.logger.info(f"Knowledge sync from {', '.join(changed)} in {elapsed_ms:.1f}ms: {diff.summary()}")
+        return diff
     
     def _background_sync(self):
         """Background thread for knowledge base synchronization"""
+        last_housekeeping = time.monotonic()
         while True:
             try:
-                time.sleep(self.knowledge_sync_interval)
+                # Polling is a few stat calls; sources are only re-read when their content changed
+                time.sleep(self.knowledge_poll_interval)
+                self._sync_knowledge()
                 
-                # Check if knowledge sources have been updated
-                if self._should_sync_knowledge():
-                    self.logger.info("Starting background knowledge synchronization...")
-                    self._initialize_unified_knowledge_base()
+                if time.monotonic() - last_housekeeping >= self.knowledge_sync_interval:
                     self._clear_expired_cache()
-                    self.last_sync_time = datetime.now()
-                    self.logger.info("Background synchronization completed")
+                    last_housekeeping = time.monotonic()
                 
             except Exception as e:
                 self.logger.error(f"Background sync error: {e}")
     
-    def _should_sync_knowledge(self) -> bool:
-        """Check if knowledge base should be synchronized"""
-        try:
-            for source_path in self.knowledge_sources.values():
-                if os.path.exists(source_path):
-                    file_mtime = datetime.fromtimestamp(os.path.getmtime(source_path))
-                    if file_mtime > self.last_sync_time:
-                        return True
-            return False
-        except Exception:
-            return True  # Sync on error to be safe
-    
     def _clear_expired_cache(self):
         """Clear expired cache entries"""
-        current_time = datetime.now()
-        expired_keys = []
-        
-        for key, (data, timestamp) in self.query_cache.items():
-            if current_time - timestamp > self.cache_ttl:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.query_cache[key]
-        
-        if expired_keys:
-            self.logger.info(f"Cleared {len(expired_keys)} expired cache entries")
+        expired = self.query_cache.purge_expired()
+        if expired:
+            self.logger.info(f"Cleared {expired} expired cache entries")
     
-    def _generate_cache_key(self, query: str, context: Dict[str, Any] = None) -> str:
-        """Generate cache key for query"""
-        cache_input = f"{query}_{json.dumps(context, sort_keys=True) if context else ''}"
-        return hashlib.md5(cache_input.encode()).hexdigest()
+    def _knowledge_version(self) -> str:
+        """Content version of the published knowledge snapshot cached answers depend on"""
+        return self.knowledge_cache.get("version", "")
     
     async def process_query_enhanced(self, 
                                    query: str, 
@@ -237,17 +243,31 @@ class EnhancedN8NIntegration:
         
         start_time = time.time()
         session_id = session_id or f"session_{int(time.time())}"
-        cache_key = self._generate_cache_key(query, context)
+        version = self._knowledge_version()
+        cache_key = self.query_cache.make_key("n8n_enhanced", query, context, version)
         
         self.logger.info(f"Processing enhanced query: {query[:50]}...")
         
-        # Check cache first
-        if cache_key in self.query_cache:
-            cached_data, timestamp = self.query_cache[cache_key]
-            if datetime.now() - timestamp < self.cache_ttl:
-                self.logger.info("Returning cached result")
-                return cached_data
-        
+        async def build_shared() -> EnhancedQueryContext:
+            built = await self._build_enhanced_context(query, session_id, user_id, context, cache_key, start_time)
+            # Entries are shared by every caller of the same query: keep no session or user identity
+            return replace(built, session_id="", user_id=None)
+        
+        # Canonical-query cache; concurrent identical queries wait for one computation
+        enhanced_context, from_cache = await self.query_cache.aget_or_compute(
+            "n8n_enhanced", query, build_shared,
+            context=context,
+            version=version,
+            ttl=self.cache_ttl.total_seconds()
+        )
+        if from_cache:
+            self.logger.info("Returning cached result")
+        return replace(enhanced_context, session_id=session_id, user_id=user_id)
+    
+    async def _build_enhanced_context(self, query: str, session_id: str, user_id: Optional[str],
+                                      context: Optional[Dict[str, Any]], cache_key: str,
+                                      start_time: float) -> EnhancedQueryContext:
+        """Uncached multi-engine analysis behind process_query_enhanced"""
         try:
             # Step 1: Multi-engine query understanding
             query_analysis = await self._analyze_query_multi_engine(query, context)
@@ -274,9 +294,6 @@ class EnhancedN8NIntegration:
                 cache_key=cache_key
             )
             
-            # Cache the result
-            self.query_cache[cache_key] = (enhanced_context, datetime.now())
-            
             # Trigger N8N workflow for advanced processing
             await self._trigger_n8n_workflow(enhanced_context, response)
             
@@ -521,12 +538,14 @@ class EnhancedN8NIntegration:
             "status": "operational",
             "knowledge_base": {
                 "last_sync": self.last_sync_time.isoformat(),
+                "version": self._knowledge_version(),
                 "sources": len(self.knowledge_sources),
                 "courses": len(self.knowledge_cache.get("unified", {}).get("courses", {})),
                 "tracks": len(self.knowledge_cache.get("unified", {}).get("tracks", {}))
             },
             "cache": {
                 "query_cache_size": len(self.query_cache),
+                "query_cache_stats": self.query_cache.get_stats(),
                 "knowledge_cache_size": len(self.knowledge_cache)
             },
             "n8n_integration": {
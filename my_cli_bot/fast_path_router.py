@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Fast-path query router
+Answers deterministic questions ("prereqs of CS 25200", "credits for CS 38100",
+"CODO GPA") without an LLM call. Tiers run cheapest first: precomputed answers
+for the most frequent questions, compiled patterns over the knowledge cache and
+lookup tables, then SQL-backed structured lookups rendered from templates, and
+only then the LLM pipeline. Each tier has its own confidence threshold and hit
+counters.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from course_code_resolver import DEFAULT_CATALOG_PATH, get_course_resolver
+from metrics import get_metrics_registry
+
+TIER_PRECOMPUTED = "precomputed"
+TIER_PATTERN = "pattern"
+TIER_LOOKUP = "lookup"
+TIER_LLM = "llm"
+
+DEFAULT_SQL_DB_PATH = "data/purdue_cs_advisor.db"
+DEFAULT_PATTERN_THRESHOLD = 0.9
+DEFAULT_LOOKUP_THRESHOLD = 0.8
+
+# Intent patterns for the first tier, checked in order
+_INTENT_PATTERNS = (
+    ("prerequisites", re.compile(
+        r"\b(?:prereq(?:uisite)?s?|pre-req(?:uisite)?s?|what do i need (?:before|for)|"
+        r"what comes before|required before|needed (?:before|for))\b")),
+    ("credits", re.compile(r"\b(?:credits?|credit hours?|how many hours)\b")),
+    ("course_info", re.compile(
+        r"\b(?:what is|what's|tell me about|describe|description|info(?:rmation)? (?:on|about|for))\b")),
+    ("codo", re.compile(
+        r"\b(?:codo|change (?:my )?major to (?:cs|computer science)|"
+        r"(?:switch|transfer)(?:ing)? (?:in)?to (?:cs|computer science))\b")),
+    ("track", re.compile(
+        r"\b(?:machine intelligence|software engineering|mi|se) track\b")),
+    ("policy", re.compile(
+        r"\b(?:good standing|dean'?s list|graduation honors|credits? (?:to|needed to|required to) graduate|"
+        r"course load limit)\b")),
+)
+
+# Queries about the student's own situation need the full pipeline
+_PERSONAL = re.compile(
+    r"\b(?:should i|can i|if i|i (?:have |'ve )?(?:failed|took|taken|completed|finished|passed)|"
+    r"my (?:gpa|grades?|schedule|plan|courses)|plan|schedule|semester|"
+    r"freshman|sophomore|junior|senior|both|dual|compare|vs\.?|versus|or)\b")
+
+# "what courses need CS 25100 as a prereq" asks what CS 25100 unlocks, not what it requires
+_REVERSE_DEPENDENCY = re.compile(
+    r"\b(?:need|needs|require|requires|requiring|use|uses)\b.*\bas (?:a |an )?(?:prereq|pre-req|prerequisite)s?\b|"
+    r"\b(?:what|which)(?: courses?| classes?)? (?:need|needs|require|requires)\b|"
+    r"\b(?:unlock|unlocks|lead to|leads to|depend on|depends on|after taking)\b")
+
+# Words a templated answer accounts for once course mentions and the intent phrase are removed;
+# anything else ("hardest", "professor", "per week") is a question the templates do not answer
+_ANSWERED_WORDS = frozenset("""
+    a an the of for to in on into about at is are am be it its me i please
+    what what's whats which how many much tell describe description details info information show list give
+    do does did can get have has any there need needed take taking before comes required requirement requirements
+    change switch transfer process application
+    course courses class classes cs computer science major program purdue
+    credit credits hour hours gpa minimum min grade grades apply
+    track tracks mi se machine intelligence software engineering
+""".split())
+_WORD = re.compile(r"[a-z']+")
+
+_TRACK_KEYS = (
+    ("machine_intelligence", re.compile(r"\b(?:machine intelligence|mi)\b")),
+    ("software_engineering", re.compile(r"\b(?:software engineering|se)\b")),
+)
+
+# Confidence per SQLQueryHandler query type; loosely anchored patterns stay below threshold
+_SQL_TYPE_CONFIDENCE = {
+    "prerequisite_chain": 0.9,
+    "course_info": 0.9,
+    "codo_requirements": 0.85,
+}
+
+TEMPLATES = {
+    "credits": "{code} ({title}) is {credits} credit hours.",
+    "course_info": "{code} - {title}\n\nCredits: {credits}\nDescription: {description}",
+    "difficulty": "Difficulty Rating: {rating}/5.0",
+    "no_prereqs": "{code} ({title}) has no prerequisites listed.",
+    "prereqs": "Prerequisites for {code} ({title}):\n{items}",
+    "prereq_chain": "Prerequisite chain for {code}:\n{items}\n\nThen you can take {code}.",
+    "codo_gpa": "The minimum GPA to CODO into Computer Science is {minimum_gpa}.",
+    "codo": ("CODO into Computer Science Requirements\n\n"
+             "Minimum GPA: {minimum_gpa}\n\nRequired Courses:\n{courses}\n\n"
+             "Math Requirement: {math_requirement}\n\nOther Requirements:\n{other}\n\n"
+             "Application Terms: {terms}\nContact: {contact}"),
+    "codo_rows": "CODO into Computer Science Requirements\n\n{items}",
+    "track": ("{name}\n\nDescription: {description}\n\nRequired Courses:\n{courses}\n\n"
+              "Total Credits: {total_credits}\n\nCareer Paths:\n{careers}"),
+    "good_standing": "Good academic standing requires a GPA of at least {value}.",
+    "deans_list": "The Dean's List requires a semester GPA of at least {value}.",
+    "graduation_honors": "Graduation honors require a GPA of at least {value}.",
+    "graduation_credits": "You need {total_graduation} credit hours to graduate, including "
+                          "{cs_core} in the CS core and {track_requirements} in your track.",
+    "course_load": ("Course load limits: up to {freshman_cs} CS courses per semester as a freshman, "
+                    "{sophomore_plus_cs} from sophomore year on, {summer_cs} in summer, "
+                    "and {maximum_total} credits total."),
+}
+
+
+def _bullets(items: List[str]) -> str:
+    return "\n".join(f"• {item}" for item in items)
+
+
+@dataclass
+class FastPathAnswer:
+    """A response produced without the LLM pipeline"""
+    response: str
+    tier: str
+    intent: str
+    confidence: float
+    elapsed_ms: float
+
+
+@dataclass
+class FastPathStats:
+    """Per-tier routing counters"""
+    precomputed_hits: int = 0
+    pattern_hits: int = 0
+    lookup_hits: int = 0
+    llm_fallbacks: int = 0
+    below_threshold: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        fast = self.precomputed_hits + self.pattern_hits + self.lookup_hits
+        total = fast + self.llm_fallbacks
+        return fast / total if total > 0 else 0.0
+
+
+class FastPathRouter:
+    """Tiered router: compiled patterns -> structured lookup -> LLM (signalled by None)"""
+
+    def __init__(self, knowledge_file: str = DEFAULT_CATALOG_PATH,
+                 lookup_tables: Optional[Dict[str, Any]] = None,
+                 sql_handler: Any = None, sql_db_path: str = DEFAULT_SQL_DB_PATH,
+                 pattern_threshold: float = DEFAULT_PATTERN_THRESHOLD,
+                 lookup_threshold: float = DEFAULT_LOOKUP_THRESHOLD):
+        self.knowledge_file = knowledge_file
+        self.pattern_threshold = pattern_threshold
+        self.lookup_threshold = lookup_threshold
+        self.stats = FastPathStats()
+        self._lock = threading.Lock()
+
+        self.resolver = get_course_resolver(knowledge_file)
+        self.knowledge_cache = self._load_knowledge_cache(knowledge_file)
+        self.lookup_tables = lookup_tables if lookup_tables is not None else self._load_lookup_tables()
+        self.sql_handler = sql_handler if sql_handler is not None else self._load_sql_handler(sql_db_path)
+        self.precomputed = None
+
+        self._pattern_handlers: Dict[str, Callable[[str, List[str]], Optional[str]]] = {
+            "prerequisites": self._answer_prerequisites,
+            "credits": self._answer_credits,
+            "course_info": self._answer_course_info,
+            "codo": self._answer_codo,
+            "track": self._answer_track,
+            "policy": self._answer_policy,
+        }
+        self._sql_renderers: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {
+            "prerequisite_chain": self._render_sql_prerequisites,
+            "course_info": self._render_sql_course_info,
+            "codo_requirements": self._render_sql_codo,
+        }
+
+        registry = get_metrics_registry()
+        self._tier_counters = {
+            tier: registry.counter("fast_path_routed_total", "Queries answered per router tier", tier=tier)
+            for tier in (TIER_PRECOMPUTED, TIER_PATTERN, TIER_LOOKUP, TIER_LLM)
+        }
+
+    def _load_knowledge_cache(self, knowledge_file: str):
+        if not os.path.exists(knowledge_file):
+            return None
+        try:
+            from performance.knowledge_cache import get_knowledge_cache
+            return get_knowledge_cache(knowledge_file)
+        except ImportError:
+            return None
+
+    def _load_lookup_tables(self) -> Dict[str, Any]:
+        try:
+            from hybrid_ai_system import build_lookup_tables
+        except ImportError:
+            return {}
+        knowledge_base = {}
+        if self.knowledge_cache is not None:
+            knowledge_base = self.knowledge_cache.get_raw_knowledge_base()
+        elif os.path.exists(self.knowledge_file):
+            try:
+                with open(self.knowledge_file, 'r', encoding='utf-8') as f:
+                    knowledge_base = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: fast path could not read {self.knowledge_file}: {e}")
+        return build_lookup_tables(knowledge_base)
+
+    def _load_sql_handler(self, db_path: str):
+        # sqlite3.connect would create an empty file, so only use an existing database
+        if not os.path.exists(db_path):
+            return None
+        try:
+            from sql_query_handler import SQLQueryHandler
+            return SQLQueryHandler(db_path)
+        except ImportError:
+            return None
+
+    def attach_precomputed(self, store):
+        """Serve warmed answers (answer_warmup.PrecomputedAnswerStore) ahead of every other tier"""
+        self.precomputed = store
+
+    def route(self, query: str, personalized: bool = False) -> Optional[FastPathAnswer]:
+        """
+        Answer from the cheapest confident tier, or None to send the query to the LLM tier.
+        Personalized sessions (known year, courses, track...) skip the generic precomputed answers.
+        """
+        start = time.perf_counter()
+        text = " ".join(query.lower().split())
+
+        answer = None
+        if self.precomputed is not None and not personalized:
+            response = self.precomputed.get(text)
+            if response is not None:
+                answer = TIER_PRECOMPUTED, "precomputed", 1.0, response
+        if answer is None:
+            answer = self._pattern_tier(text)
+        if answer is None:
+            answer = self._lookup_tier(query, text)
+
+        if answer is None:
+            self._record(TIER_LLM)
+            return None
+
+        tier, intent, confidence, response = answer
+        self._record(tier)
+        return FastPathAnswer(response, tier, intent, confidence, (time.perf_counter() - start) * 1000)
+
+    def _record(self, tier: str, below_threshold: bool = False):
+        with self._lock:
+            if below_threshold:
+                self.stats.below_threshold += 1
+            elif tier == TIER_PRECOMPUTED:
+                self.stats.precomputed_hits += 1
+            elif tier == TIER_PATTERN:
+                self.stats.pattern_hits += 1
+            elif tier == TIER_LOOKUP:
+                self.stats.lookup_hits += 1
+            else:
+                self.stats.llm_fallbacks += 1
+        if not below_threshold:
+            self._tier_counters[tier].inc()
+
+    def _unanswered(self, text: str, patterns) -> bool:
+        """True when the query asks something beyond the matched intent (extra content words)"""
+        if _REVERSE_DEPENDENCY.search(text):
+            return True
+        remaining = list(text)
+        for start, end, _ in self.resolver.find(text, include_numbers=True):
+            remaining[start:end] = " " * (end - start)
+        remaining = "".join(remaining)
+        for pattern in patterns:
+            remaining = pattern.sub(" ", remaining)
+        return any(word not in _ANSWERED_WORDS for word in _WORD.findall(remaining))
+
+    def _pattern_tier(self, text: str):
+        matched = [(intent, pattern) for intent, pattern in _INTENT_PATTERNS if pattern.search(text)]
+        if not matched:
+            return None
+        intents = [intent for intent, _ in matched]
+
+        courses = self.resolver.extract(text, include_numbers=True)
+        confidence = 0.95
+        if _PERSONAL.search(text):
+            confidence -= 0.3
+        if len(courses) > 1:
+            confidence -= 0.3
+        if self._unanswered(text, [pattern for _, pattern in matched]):
+            confidence -= 0.3
+        if confidence < self.pattern_threshold:
+            self._record(TIER_PATTERN, below_threshold=True)
+            return None
+
+        # "what is the se track" matches course_info first but only the track handler answers it
+        for intent in intents:
+            response = self._pattern_handlers[intent](text, courses)
+            if response is not None:
+                return TIER_PATTERN, intent, confidence, response
+        return None
+
+    def _lookup_tier(self, query: str, text: str):
+        if self.sql_handler is None:
+            return None
+        query_type, _ = self.sql_handler.classify_query(query)
+        confidence = _SQL_TYPE_CONFIDENCE.get(query_type, 0.0)
+        if confidence and self._unanswered(text, [pattern for _, pattern in _INTENT_PATTERNS]):
+            confidence -= 0.3
+        if confidence < self.lookup_threshold:
+            if query_type != "unknown":
+                self._record(TIER_LOOKUP, below_threshold=True)
+            return None
+
+        result = self.sql_handler.process_query(query)
+        if not result.get("success") or not result.get("count"):
+            return None
+        response = self._sql_renderers[query_type](result)
+        if response is None:
+            return None
+        return TIER_LOOKUP, query_type, confidence, response
+
+    # Course data, preferring the knowledge cache over the lookup tables
+
+    def _course(self, code: str) -> Optional[Dict[str, Any]]:
+        info = self.knowledge_cache.get_course_info(code) if self.knowledge_cache is not None else None
+        if info is None:
+            info = self.lookup_tables.get("course_info", {}).get(code)
+        return info
+
+    def _prerequisites(self, code: str) -> List[str]:
+        if self.knowledge_cache is not None:
+            prereqs = self.knowledge_cache.get_prerequisites(code)
+            if prereqs:
+                return list(prereqs)
+        info = self.lookup_tables.get("course_info", {}).get(code) or {}
+        return list(info.get("prerequisites") or self.lookup_tables.get("prerequisite_chains", {}).get(code, []))
+
+    def render_prerequisites(self, course_code: str) -> Optional[str]:
+        """Prerequisite answer for one course, without routing or touching the tier stats"""
+        return self._answer_prerequisites("", [self.resolver.normalize(course_code)])
+
+    # Pattern tier answers; None means the tier cannot answer confidently
+
+    def _answer_prerequisites(self, text: str, courses: List[str]) -> Optional[str]:
+        if not courses:
+            return None
+        code = courses[0]
+        info = self._course(code)
+        if info is None:
+            return None
+        prereqs = self._prerequisites(code)
+        title = info.get("title", "")
+        if not prereqs:
+            return TEMPLATES["no_prereqs"].format(code=code, title=title)
+        return TEMPLATES["prereqs"].format(code=code, title=title, items=_bullets(prereqs))
+
+    def _answer_credits(self, text: str, courses: List[str]) -> Optional[str]:
+        if not courses:
+            return self._answer_policy(text, courses)
+        info = self._course(courses[0])
+        if info is None or not info.get("credits"):
+            return None
+        return TEMPLATES["credits"].format(code=courses[0], title=info.get("title", ""), credits=info["credits"])
+
+    def _answer_course_info(self, text: str, courses: List[str]) -> Optional[str]:
+        if not courses:
+            return None
+        code = courses[0]
+        info = self._course(code)
+        if info is None or not info.get("description"):
+            return None
+        response = TEMPLATES["course_info"].format(
+            code=code, title=info.get("title", ""), credits=info.get("credits", 0),
+            description=info["description"])
+        if info.get("difficulty_rating"):
+            response += "\n" + TEMPLATES["difficulty"].format(rating=info["difficulty_rating"])
+        return response
+
+    def _answer_codo(self, text: str, courses: List[str]) -> Optional[str]:
+        data = self.lookup_tables.get("codo_requirements")
+        if not data:
+            return None
+        if "gpa" in text:
+            return TEMPLATES["codo_gpa"].format(minimum_gpa=data["minimum_gpa"])
+        return TEMPLATES["codo"].format(
+            minimum_gpa=data["minimum_gpa"],
+            courses=_bullets(f"{code}: {req['grade']} or better - {req['description']}"
+                             for code, req in data["required_courses"].items()),
+            math_requirement=data["math_requirement"],
+            other=_bullets(data["other_requirements"]),
+            terms=", ".join(data["application_terms"]),
+            contact=data["contact"])
+
+    def _answer_track(self, text: str, courses: List[str]) -> Optional[str]:
+        tracks = self.lookup_tables.get("track_requirements", {})
+        for key, pattern in _TRACK_KEYS:
+            if pattern.search(text) and key in tracks:
+                data = tracks[key]
+                return TEMPLATES["track"].format(
+                    name=data["name"], description=data["description"],
+                    courses=_bullets(data["required_courses"]), total_credits=data["total_credits"],
+                    careers=_bullets(data["career_paths"]))
+        return None
+
+    def _answer_policy(self, text: str, courses: List[str]) -> Optional[str]:
+        policies = self.lookup_tables.get("academic_policies")
+        if not policies:
+            return None
+        gpa = policies["gpa_requirements"]
+        if "good standing" in text:
+            return TEMPLATES["good_standing"].format(value=gpa["good_standing"])
+        if "dean" in text:
+            return TEMPLATES["deans_list"].format(value=gpa["deans_list"])
+        if "honors" in text:
+            return TEMPLATES["graduation_honors"].format(value=gpa["graduation_honors"])
+        if "course load" in text:
+            return TEMPLATES["course_load"].format(**policies["course_load_limits"])
+        if "graduate" in text:
+            return TEMPLATES["graduation_credits"].format(**policies["credit_requirements"])
+        return None
+
+    # Lookup tier renderers over SQLQueryHandler result rows
+
+    def _render_sql_prerequisites(self, result: Dict[str, Any]) -> Optional[str]:
+        rows = result["data"]
+        code = self.resolver.normalize(result.get("query_param") or rows[0].get("course_code", ""))
+        items = [f"{'  ' * (row.get('level', 1) - 1)}{row['prerequisite_code']} - {row.get('prerequisite_title', '')}"
+                 for row in rows]
+        return TEMPLATES["prereq_chain"].format(code=code, items=_bullets(items))
+
+    def _render_sql_course_info(self, result: Dict[str, Any]) -> Optional[str]:
+        row = result["data"][0]
+        if not row.get("description"):
+            return None
+        return TEMPLATES["course_info"].format(
+            code=row.get("code", ""), title=row.get("title", ""), credits=row.get("credits", 0),
+            description=row["description"])
+
+    def _render_sql_codo(self, result: Dict[str, Any]) -> Optional[str]:
+        items = [f"{row.get('requirement_key', '')}: {row.get('requirement_value', '')}"
+                 + (f" - {row['description']}" if row.get("description") else "")
+                 for row in result["data"]]
+        return TEMPLATES["codo_rows"].format(items=_bullets(items))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**asdict(self.stats), 'hit_ratio': self.stats.hit_ratio}
+
+
+_router: Optional[FastPathRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_fast_path_router(knowledge_file: str = DEFAULT_CATALOG_PATH) -> FastPathRouter:
+    """Process-wide router, built once"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = FastPathRouter(knowledge_file)
+        return _router
@@ -6,6 +6,7 @@ Provides REST API endpoints for the Boiler AI academic advisor
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
 import uvicorn
@@ -16,6 +17,9 @@ from datetime import datetime
 
 # Import the enhanced pipeline
 from langchain_advisor_pipeline import EnhancedLangChainPipeline
+from metrics import (
+    PROMETHEUS_CONTENT_TYPE, STAGE_SERIALIZATION, record_request_latency, render_metrics, stage_timer
+)
 
 # Pydantic models for API
 class ChatRequest(BaseModel):
@@ -63,6 +67,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(record_request_latency)
+
 # Global pipeline instance
 pipeline: Optional[EnhancedLangChainPipeline] = None
 
@@ -164,21 +170,27 @@ async def chat(request: ChatRequest):
         
         processing_time = (datetime.now() - start_time).total_seconds() * 1000
         
-        return ChatResponse(
-            intent=result.get("intent", "unknown"),
-            entities=result.get("entities", {}),
-            response=result.get("response", ""),
-            method=result.get("method", "unknown"),
-            context=result.get("context") if request.include_context else None,
-            session_id=request.session_id or "default",
-            timestamp=datetime.now().isoformat(),
-            processing_time_ms=processing_time
-        )
+        with stage_timer(STAGE_SERIALIZATION):
+            return ChatResponse(
+                intent=result.get("intent", "unknown"),
+                entities=result.get("entities", {}),
+                response=result.get("response", ""),
+                method=result.get("method", "unknown"),
+                context=result.get("context") if request.include_context else None,
+                session_id=request.session_id or "default",
+                timestamp=datetime.now().isoformat(),
+                processing_time_ms=processing_time
+            )
         
     except Exception as e:
         logger.error(f"Error processing chat request: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of stage, provider and HTTP latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/tools", response_model=List[ToolDefinition])
 async def get_tools():
     """Get available function calling tools"""
@@ -11,6 +11,8 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
+from plan_cache import get_plan_cache, knowledge_version
+
 @dataclass
 class CourseSchedule:
     semester: str
@@ -32,6 +34,7 @@ class AdvancedGraduationPlanner:
     def __init__(self, knowledge_file: str, db_file: str):
         with open(knowledge_file, 'r') as f:
             self.knowledge = json.load(f)
+        self.knowledge_file = knowledge_file
         self.db_file = db_file
         
         # Foundation courses that cause delays if failed
@@ -251,6 +254,25 @@ class AdvancedGraduationPlanner:
         """
         Generates comprehensive graduation plan based on student profile
         """
+        plan_fields = {
+            "track": student_profile.get("track", "Machine Intelligence"),
+            "current_semester": student_profile.get("current_semester", 1),
+            "failed_courses": list(student_profile.get("failed_courses", [])),
+            "early_graduation": student_profile.get("early_graduation", False),
+            "skip_cs180": student_profile.get("skip_cs180", False)
+        }
+        plan = get_plan_cache().get_or_compute(
+            "comprehensive_plan", plan_fields, (),
+            lambda: self._build_comprehensive_plan(student_profile),
+            knowledge_version=knowledge_version(self.knowledge_file)
+        )
+        # Shared plans carry the asking student's own profile and time
+        plan["student_profile"] = student_profile
+        plan["timestamp"] = datetime.now().isoformat()
+        return plan
+
+    def _build_comprehensive_plan(self, student_profile: Dict) -> Dict:
+        """Plan from scratch; generate_comprehensive_plan serves repeats from the plan cache"""
         track = student_profile.get("track", "Machine Intelligence")
         current_semester = student_profile.get("current_semester", 1)
         failed_courses = student_profile.get("failed_courses", [])
@@ -14,6 +14,8 @@ from datetime import datetime
 import google.generativeai as genai
 from enum import Enum
 
+from course_code_resolver import get_course_resolver
+
 class QueryType(Enum):
     LOOKUP_TABLE = "lookup_table"
     RULE_BASED = "rule_based"
@@ -29,6 +31,110 @@ class QueryClassification:
     should_use_llm: bool
     lookup_result: Optional[Dict] = None
 
+
+def build_lookup_tables(knowledge_base: Dict[str, Any]) -> Dict[str, Any]:
+    """Lookup tables for instant official answers, built from the knowledge base"""
+    lookup_tables: Dict[str, Any] = {}
+    resolver = get_course_resolver()
+    
+    # Course information lookup table
+    lookup_tables["course_info"] = {}
+    for course_id, course_data in knowledge_base.get("courses", {}).items():
+        # Normalize course ID patterns
+        normalized_id = resolver.normalize(course_id)
+        lookup_tables["course_info"][normalized_id] = {
+            "title": course_data.get("title", ""),
+            "credits": course_data.get("credits", 0),
+            "description": course_data.get("description", ""),
+            "prerequisites": course_data.get("prerequisites", []),
+            "difficulty_rating": course_data.get("difficulty_rating", 0),
+            "course_type": course_data.get("course_type", ""),
+            "semester": course_data.get("semester", "Any")
+        }
+    
+    # Track requirements lookup table
+    lookup_tables["track_requirements"] = {
+        "machine_intelligence": {
+            "name": "Machine Intelligence (MI)",
+            "description": "Focus on AI, Machine Learning, and Data Science",
+            "required_courses": [
+                "CS 37300 - Data Mining and Machine Learning",
+                "CS 48300 - Fundamentals of Artificial Intelligence", 
+                "CS 57300 - Neural Networks",
+                "CS 54401 - Numerical Methods",
+                "STAT 51100 - Statistical Methods"
+            ],
+            "career_paths": ["AI Engineer", "Data Scientist", "ML Engineer", "Research Scientist"],
+            "total_credits": 15
+        },
+        "software_engineering": {
+            "name": "Software Engineering (SE)",
+            "description": "Focus on large-scale software development and engineering practices",
+            "required_courses": [
+                "CS 30700 - Software Engineering I", 
+                "CS 40800 - Software Engineering II",
+                "CS 41000 - Numerical Computing",
+                "CS 42200 - Computer Networks",
+                "CS 34800 - Information Systems"
+            ],
+            "career_paths": ["Software Engineer", "DevOps Engineer", "System Architect", "Technical Lead"],
+            "total_credits": 15
+        }
+    }
+    
+    # CODO requirements lookup table
+    lookup_tables["codo_requirements"] = {
+        "minimum_gpa": 2.75,
+        "required_courses": {
+            "CS 18000": {"grade": "B", "description": "Problem Solving and Object-Oriented Programming"},
+        },
+        "math_requirement": "B or better in ONE of: MA 16100, MA 16200, MA 26100, MA 26500",
+        "other_requirements": [
+            "Minimum 1 semester at Purdue",
+            "Minimum 12 credit hours at Purdue main campus",
+            "Good academic standing (not on academic notice)",
+            "Space available basis only"
+        ],
+        "application_terms": ["Fall", "Spring", "Summer"],
+        "contact": "csug@purdue.edu"
+    }
+    
+    # Academic policies lookup table
+    lookup_tables["academic_policies"] = {
+        "gpa_requirements": {
+            "good_standing": 2.0,
+            "codo_cs": 2.75,
+            "deans_list": 3.5,
+            "graduation_honors": 3.5
+        },
+        "credit_requirements": {
+            "total_graduation": 120,
+            "cs_core": 45,
+            "track_requirements": 15,
+            "math_science": 30,
+            "general_education": 30
+        },
+        "course_load_limits": {
+            "freshman_cs": 2,
+            "sophomore_plus_cs": 3,
+            "summer_cs": 2,
+            "maximum_total": 18
+        }
+    }
+    
+    # Prerequisite chains lookup table
+    lookup_tables["prerequisite_chains"] = {
+        "CS 25000": ["CS 18000", "CS 18200", "CS 24000"],
+        "CS 25100": ["CS 18000", "CS 18200", "CS 24000"],
+        "CS 25200": ["CS 25000", "CS 25100"],
+        "CS 30700": ["CS 25200"],
+        "CS 37300": ["CS 25200", "STAT 51100"],
+        "CS 48300": ["CS 25200"]
+    }
+    
+    return lookup_tables
+
+
 class HybridAISystem:
     """
     Hybrid AI System that routes queries through:
@@ -96,102 +202,7 @@ class HybridAISystem:
     
     def build_lookup_tables(self):
         """Build lookup tables for instant official answers"""
-        
-        # Course information lookup table
-        self.lookup_tables["course_info"] = {}
-        for course_id, course_data in self.knowledge_base.get("courses", {}).items():
-            # Normalize course ID patterns
-            normalized_id = self.normalize_course_id(course_id)
-            self.lookup_tables["course_info"][normalized_id] = {
-                "title": course_data.get("title", ""),
-                "credits": course_data.get("credits", 0),
-                "description": course_data.get("description", ""),
-                "prerequisites": course_data.get("prerequisites", []),
-                "difficulty_rating": course_data.get("difficulty_rating", 0),
-                "course_type": course_data.get("course_type", ""),
-                "semester": course_data.get("semester", "Any")
-            }
-        
-        # Track requirements lookup table
-        self.lookup_tables["track_requirements"] = {
-            "machine_intelligence": {
-                "name": "Machine Intelligence (MI)",
-                "description": "Focus on AI, Machine Learning, and Data Science",
-                "required_courses": [
-                    "CS 37300 - Data Mining and Machine Learning",
-                    "CS 48300 - Fundamentals of Artificial Intelligence", 
-                    "CS 57300 - Neural Networks",
-                    "CS 54401 - Numerical Methods",
-                    "STAT 51100 - Statistical Methods"
-                ],
-                "career_paths": ["AI Engineer", "Data Scientist", "ML Engineer", "Research Scientist"],
-                "total_credits": 15
-            },
-            "software_engineering": {
-                "name": "Software Engineering (SE)",
-                "description": "Focus on large-scale software development and engineering practices",
-                "required_courses": [
-                    "CS 30700 - Software Engineering I", 
-                    "CS 40800 - Software Engineering II",
-                    "CS 41000 - Numerical Computing",
-                    "CS 42200 - Computer Networks",
-                    "CS 34800 - Information Systems"
-                ],
-                "career_paths": ["Software Engineer", "DevOps Engineer", "System Architect", "Technical Lead"],
-                "total_credits": 15
-            }
-        }
-        
-        # CODO requirements lookup table
-        self.lookup_tables["codo_requirements"] = {
-            "minimum_gpa": 2.75,
-            "required_courses": {
-                "CS 18000": {"grade": "B", "description": "Problem Solving and Object-Oriented Programming"},
-            },
-            "math_requirement": "B or better in ONE of: MA 16100, MA 16200, MA 26100, MA 26500",
-            "other_requirements": [
-                "Minimum 1 semester at Purdue",
-                "Minimum 12 credit hours at Purdue main campus",
-                "Good academic standing (not on academic notice)",
-                "Space available basis only"
-            ],
-            "application_terms": ["Fall", "Spring", "Summer"],
-            "contact": "csug@purdue.edu"
-        }
-        
-        # Academic policies lookup table
-        self.lookup_tables["academic_policies"] = {
-            "gpa_requirements": {
-                "good_standing": 2.0,
-                "codo_cs": 2.75,
-                "deans_list": 3.5,
-                "graduation_honors": 3.5
-            },
-            "credit_requirements": {
-                "total_graduation": 120,
-                "cs_core": 45,
-                "track_requirements": 15,
-                "math_science": 30,
-                "general_education": 30
-            },
-            "course_load_limits": {
-                "freshman_cs": 2,
-                "sophomore_plus_cs": 3,
-                "summer_cs": 2,
-                "maximum_total": 18
-            }
-        }
-        
-        # Prerequisite chains lookup table
-        self.lookup_tables["prerequisite_chains"] = {
-            "CS 25000": ["CS 18000", "CS 18200", "CS 24000"],
-            "CS 25100": ["CS 18000", "CS 18200", "CS 24000"],
-            "CS 25200": ["CS 25000", "CS 25100"],
-            "CS 30700": ["CS 25200"],
-            "CS 37300": ["CS 25200", "STAT 51100"],
-            "CS 48300": ["CS 25200"]
-        }
-        
+        self.lookup_tables = build_lookup_tables(self.knowledge_base)
         print(f"✓ Built {len(self.lookup_tables)} lookup tables")
     
     def define_rule_patterns(self):
@@ -277,19 +288,11 @@ class HybridAISystem:
     
     def normalize_course_id(self, course_id: str) -> str:
         """Normalize course ID for consistent lookup"""
-        # Remove spaces and convert to uppercase
-        normalized = re.sub(r'\s+', ' ', course_id.upper().strip())
-        # Ensure format like "CS 18000"
-        match = re.match(r'([A-Z]+)\s*(\d{3,5})', normalized)
-        if match:
-            return f"{match.group(1)} {match.group(2)}"
-        return normalized
+        return get_course_resolver().normalize(course_id)
     
     def extract_course_entities(self, query: str) -> List[str]:
         """Extract course codes from query"""
-        course_pattern = re.compile(r'(cs|math|stat|phys|engr)\s*(\d{5}|\d{3})', re.IGNORECASE)
-        matches = course_pattern.findall(query)
-        return [self.normalize_course_id(f"{match[0]} {match[1]}") for match in matches]
+        return get_course_resolver().extract(query)
     
     def classify_query(self, query: str) -> QueryClassification:
         """
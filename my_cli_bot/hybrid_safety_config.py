@@ -10,6 +10,8 @@ import time
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 
+from adaptive_router import AdaptiveRouter, RouteDecision
+
 @dataclass
 class HybridSafetyConfig:
     """Configuration class for hybrid SQL safety mechanisms"""
@@ -38,6 +40,14 @@ class HybridSafetyConfig:
     validate_sql_results: bool = False  # Compare SQL vs JSON results
     validation_sample_rate: float = 0.1  # Validate 10% of queries
     
+    # Adaptive routing
+    enable_adaptive_routing: bool = True
+    routing_exploration_rate: float = 0.05  # Share of queries sent down the other path
+    routing_half_life_seconds: float = 3600.0  # Age at which an outcome counts half
+    routing_breaker_failures: int = 5  # Consecutive failures that open a path's breaker
+    routing_breaker_cooldown_seconds: float = 60.0
+    routing_log_path: Optional[str] = None  # JSON lines of decisions and outcomes
+    
     @classmethod
     def from_environment(cls) -> 'HybridSafetyConfig':
         """Create configuration from environment variables"""
@@ -59,7 +69,14 @@ class HybridSafetyConfig:
             failure_rate_threshold=float(os.getenv("FAILURE_RATE_THRESHOLD", "0.3")),
             
             validate_sql_results=os.getenv("VALIDATE_SQL_RESULTS", "false").lower() == "true",
-            validation_sample_rate=float(os.getenv("VALIDATION_SAMPLE_RATE", "0.1"))
+            validation_sample_rate=float(os.getenv("VALIDATION_SAMPLE_RATE", "0.1")),
+            
+            enable_adaptive_routing=os.getenv("ENABLE_ADAPTIVE_ROUTING", "true").lower() == "true",
+            routing_exploration_rate=float(os.getenv("ROUTING_EXPLORATION_RATE", "0.05")),
+            routing_half_life_seconds=float(os.getenv("ROUTING_HALF_LIFE_SECONDS", "3600")),
+            routing_breaker_failures=int(os.getenv("ROUTING_BREAKER_FAILURES", "5")),
+            routing_breaker_cooldown_seconds=float(os.getenv("ROUTING_BREAKER_COOLDOWN_SECONDS", "60")),
+            routing_log_path=os.getenv("ROUTING_LOG_PATH") or None
         )
 
 class HybridSafetyManager:
@@ -85,6 +102,16 @@ class HybridSafetyManager:
         
         # Circuit breaker state
         self.sql_disabled_until = None
+        
+        # Adaptive SQL/JSON routing on live latency and answer quality
+        self.router = AdaptiveRouter(
+            exploration_rate=self.config.routing_exploration_rate if self.config.enable_adaptive_routing else 0.0,
+            half_life=self.config.routing_half_life_seconds,
+            min_samples=5.0 if self.config.enable_adaptive_routing else float("inf"),
+            breaker_failures=self.config.routing_breaker_failures,
+            breaker_cooldown=self.config.routing_breaker_cooldown_seconds,
+            log_path=self.config.routing_log_path
+        )
     
     def should_use_sql(self, query: str) -> bool:
         """Determine if SQL should be used based on safety checks"""
@@ -114,6 +141,16 @@ class HybridSafetyManager:
         
         return True
     
+    def route_query(self, query: str, sql_available: bool = True, preview: bool = False) -> RouteDecision:
+        """Pick the SQL or JSON+AI path; the safety checks above can veto SQL outright"""
+        return self.router.route(query, sql_available=sql_available and self.should_use_sql(query),
+                                 preview=preview)
+    
+    def record_route_outcome(self, decision: RouteDecision, latency_ms: float, success: bool,
+                             quality: float = 0.0):
+        """Feed the end-to-end outcome of a routed query back to the router"""
+        self.router.record(decision, latency_ms, success, quality)
+    
     def record_sql_success(self, query: str, execution_time_ms: float, result_count: int = 0):
         """Record a successful SQL query"""
         self.query_stats['total_queries'] += 1
@@ -216,6 +253,7 @@ class HybridSafetyManager:
                 'average_sql_time_ms': round(self.query_stats['average_sql_time_ms'], 2),
                 'consecutive_failures': self.query_stats['consecutive_failures']
             },
+            'routing': self.router.get_stats(),
             'config': {
                 'max_sql_query_time_ms': self.config.max_sql_query_time_ms,
                 'max_consecutive_failures': self.config.max_consecutive_failures,
@@ -238,6 +276,10 @@ class HybridSafetyManager:
         with open(filename, 'w') as f:
             json.dump(self.query_log, f, indent=2)
         # Export confirmation handled by AI system - no hardcoded messages
+    
+    def export_routing_log(self, filename: str = "hybrid_routing_log.jsonl") -> int:
+        """Export routing decisions and their outcomes (JSON lines) for offline analysis"""
+        return self.router.export_decisions(filename)
 
 # Global safety manager instance
 safety_manager = HybridSafetyManager()
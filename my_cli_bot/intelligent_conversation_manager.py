@@ -21,6 +21,11 @@ from smart_ai_engine import SmartAIEngine, QueryIntent
 from ai_training_prompts import get_comprehensive_system_prompt
 # Import resilient Gemini client
 from simple_boiler_ai import ResilientGeminiClient
+from course_code_resolver import get_course_resolver
+from tracing import enable_console_tracing, get_tracer
+from metrics import STAGE_CONTEXT, STAGE_INTENT, STAGE_PLANNER, stage_timer
+from fast_path_router import get_fast_path_router
+from answer_warmup import start_answer_warmup
 
 @dataclass
 class StudentProfile:
@@ -67,10 +72,14 @@ class IntelligentConversationManager:
         # Universal query tracker mode
         self.tracker_mode = tracker_mode
         self.tracking_data = []
+        self.tracer = enable_console_tracing() if tracker_mode else get_tracer()
         
         # Initialize smart AI engine
         self.smart_ai_engine = SmartAIEngine()
         
+        # Deterministic questions are answered here before any LLM call
+        self.fast_path = get_fast_path_router("data/cs_knowledge_graph.json")
+        
         # Load conversation contexts
         self.conversation_contexts = {}
         self.context_persistence_file = "conversation_contexts.json"
@@ -183,6 +192,37 @@ class IntelligentConversationManager:
         # Personalized response templates
         self.response_templates = self._initialize_response_templates()
         
+        # Render the most frequent answers in the background; the fast path serves them
+        self.answer_warmer = start_answer_warmup(self._warmup_producers(), "data/cs_knowledge_graph.json")
+        self.fast_path.attach_precomputed(self.answer_warmer.store)
+        
+    def _warmup_producers(self) -> Dict[str, Any]:
+        """Answer producers for the warm-up query catalog, keyed like answer_warmup.DEFAULT_QUERY_CATALOG"""
+        def dual_track(early_graduation: bool) -> str:
+            from dual_track_planner import DualTrackGraduationPlanner
+            planner = DualTrackGraduationPlanner()
+            return planner.format_plan_for_display(planner.generate_dual_track_plan("freshman", early_graduation))
+        
+        def prerequisites(course_code: str) -> Optional[str]:
+            return self.fast_path.render_prerequisites(course_code)
+        
+        warmup_context = ConversationContext(session_id="answer_warmup")
+        producers = {
+            "freshman_plan": self._get_freshman_course_plan,
+            "sophomore_plan": self._get_sophomore_course_plan,
+            "junior_plan": self._get_junior_course_plan,
+            "senior_plan": self._get_senior_course_plan,
+            "dual_track_plan": lambda: dual_track(False),
+            "dual_track_early_plan": lambda: dual_track(True),
+            # Must not contain a dual-track indicator, or the dual track answer is rendered instead
+            "track_comparison": lambda: self._handle_track_selection(
+                "which track should i choose", warmup_context, {}),
+            "codo_requirements": lambda: self._handle_codo_advice("codo requirements", warmup_context, {}),
+        }
+        for course_code in ("CS 18000", "CS 18200", "CS 24000", "CS 25000", "CS 25100", "CS 25200"):
+            producers[f"prerequisites:{course_code}"] = lambda code=course_code: prerequisites(code)
+        return producers
+        
     def refresh_career_networking(self):
         """Refresh career networking based on current feature flag state"""
         try:
@@ -306,24 +346,13 @@ class IntelligentConversationManager:
         return "\n".join(response_parts)
     
     def _track_query(self, stage: str, data: Any, description: str = ""):
-        """Track query processing when tracker mode is enabled"""
-        if self.tracker_mode:
-            print(f"\n🔍 [TRACKER] {stage.upper()}")
-            print(f"    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            if description:
-                print(f"    📋 {description}")
-            
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, (list, dict)) and len(str(value)) > 100:
-                        print(f"    📊 {key}: {type(value).__name__} with {len(value)} items")
-                    else:
-                        print(f"    📊 {key}: {value}")
-            elif isinstance(data, str):
-                print(f"    📝 {data}")
-            else:
-                print(f"    📊 {type(data).__name__}: {data}")
-            print(f"    ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        """Record a processing stage as an event on the active trace span"""
+        if not self.tracer.enabled:
+            return
+        attrs = dict(data) if isinstance(data, dict) else {"data": data}
+        if description:
+            attrs.setdefault("description", description)
+        self.tracer.event(stage.lower(), **attrs)
 
     def _get_emergency_ai_response(self, prompt: str) -> str:
         """Emergency AI response when all else fails - no hardcoded text"""
@@ -408,42 +437,7 @@ class IntelligentConversationManager:
 
     def _normalize_course_code(self, course_code: str) -> str:
         """Normalize course codes to standard format"""
-        if not course_code:
-            return ""
-        
-        # Handle common formats: CS 180 -> CS 18000, CS180 -> CS 18000
-        course_code = course_code.upper().replace(" ", "")
-        
-        # Extract department and number
-        import re
-        match = re.match(r"([A-Z]+)(\d+)", course_code)
-        if not match:
-            return course_code
-        
-        dept, num = match.groups()
-        
-        # Normalize CS course numbers
-        if dept == "CS" and len(num) == 3:
-            # Handle 3-digit course codes: 180 -> 18000, 182 -> 18200, 240 -> 24000
-            if num.startswith("18") or num.startswith("24") or num.startswith("25"):
-                return f"{dept} {num}00"
-            # Handle other 3-digit codes
-            elif num.startswith("31") or num.startswith("34") or num.startswith("35"):
-                return f"{dept} {num}00"
-            elif num.startswith("37") or num.startswith("38") or num.startswith("39"):
-                return f"{dept} {num}00"
-            elif num.startswith("41") or num.startswith("44") or num.startswith("45"):
-                return f"{dept} {num}00"
-            elif num.startswith("47") or num.startswith("48") or num.startswith("49"):
-                return f"{dept} {num}00"
-        elif dept == "MA" and len(num) == 3:
-            if num.startswith("16") or num.startswith("26"):
-                return f"{dept} {num}00"
-        elif dept == "STAT" and len(num) == 3:
-            if num.startswith("35") or num.startswith("41") or num.startswith("51"):
-                return f"{dept} {num}00"
-        
-        return f"{dept} {num}"
+        return get_course_resolver().normalize(course_code)
 
     def _is_greeting(self, query: str) -> bool:
         """Universal greeting detection that adapts to ANY greeting pattern"""
@@ -676,6 +670,11 @@ class IntelligentConversationManager:
 
     def process_query(self, session_id: str, user_query: str) -> str:
         """Main method to process user queries with smart AI integration"""
+        with self.tracer.span("conversation.process_query", session_id=session_id):
+            return self._process_query(session_id, user_query)
+
+    def _process_query(self, session_id: str, user_query: str) -> str:
+        """Process one query inside the request's trace span"""
         
         try:
             # Refresh career networking state based on feature flags
@@ -701,7 +700,8 @@ class IntelligentConversationManager:
             })
             
             # Update context from query
-            self._update_context_from_query(context, user_query)
+            with stage_timer(STAGE_CONTEXT):
+                self._update_context_from_query(context, user_query)
             
             # Check for career networking queries first
             if self._is_career_networking_query(user_query) and (self.clado_ai_client or self.career_networking):
@@ -768,21 +768,32 @@ class IntelligentConversationManager:
                     self.logger.error(f"Career networking error: {e}")
                     # Fall through to smart AI engine if career networking fails
             
-            # Use smart AI engine for primary processing
-            self.logger.info(f"Processing query with smart AI engine: {user_query[:50]}...")
-            
-            # Convert context to format expected by smart AI engine
-            ai_context = {
-                "current_year": context.extracted_context.get("current_year"),
-                "target_track": context.extracted_context.get("target_track"),
-                "completed_courses": context.extracted_context.get("completed_courses", []),
-                "last_queries": context.last_queries[-3:] if context.last_queries else [],
-                "graduation_timeline_goals": context.extracted_context.get("graduation_timeline_goals"),
-                "session_id": session_id
-            }
+            # Pattern and structured lookup tiers first; only misses reach the LLM tier
+            with self.tracer.span("fast_path") as span:
+                personalized = any(context.extracted_context.values())
+                fast_answer = self.fast_path.route(user_query, personalized=personalized)
+                span.set(tier=fast_answer.tier if fast_answer else "llm")
             
-            # Process with smart AI engine
-            response = self.smart_ai_engine.process_query(user_query, ai_context)
+            if fast_answer is not None:
+                response = fast_answer.response
+                method = f"fast_path_{fast_answer.tier}"
+            else:
+                # Use smart AI engine for primary processing
+                self.logger.info(f"Processing query with smart AI engine: {user_query[:50]}...")
+                
+                # Convert context to format expected by smart AI engine
+                ai_context = {
+                    "current_year": context.extracted_context.get("current_year"),
+                    "target_track": context.extracted_context.get("target_track"),
+                    "completed_courses": context.extracted_context.get("completed_courses", []),
+                    "last_queries": context.last_queries[-3:] if context.last_queries else [],
+                    "graduation_timeline_goals": context.extracted_context.get("graduation_timeline_goals"),
+                    "session_id": session_id
+                }
+                
+                # Process with smart AI engine
+                response = self.smart_ai_engine.process_query(user_query, ai_context)
+                method = "smart_ai_engine"
             
             # Update conversation history with response
             if context.conversation_history:
@@ -800,8 +811,8 @@ class IntelligentConversationManager:
                 "session_id": session_id,
                 "query_length": len(user_query),
                 "response_length": len(response),
-                "method": "smart_ai_engine"
-            }, "Query processed successfully with smart AI engine")
+                "method": method
+            }, f"Query processed successfully with {method}")
             
             return response
             
@@ -847,7 +858,9 @@ Don't mention technical errors - focus on helping them get their academic inform
             return self._handle_greeting(context)
         
         # Analyze intent using original method
-        intent_analysis = self._analyze_intent(user_query, context)
+        with self.tracer.span("intent_analysis") as span, stage_timer(STAGE_INTENT):
+            intent_analysis = self._analyze_intent(user_query, context)
+            span.set(intent=intent_analysis.get("primary_intent"))
         
         # Generate clarification if needed
         if intent_analysis.get("requires_clarification", False):
@@ -1020,14 +1033,6 @@ I need more specific information to help them effectively. Please provide a conv
         # Extract course information with failure context
         import re
         
-        # Enhanced course patterns to catch more variations
-        course_patterns = [
-            r"cs\s*(\d{3})",  # CS 180, CS 182, CS 240
-            r"cs\s*(\d{5})",  # CS 18000, CS 18200
-            r"math?\s*(\d{3})",  # MATH 161, MA 161
-            r"ma\s*(\d{5})",  # MA 16100
-        ]
-        
         completed_courses = context.extracted_context.get("completed_courses", [])
         failed_courses = context.extracted_context.get("failed_courses", [])
         
@@ -1053,42 +1058,9 @@ I need more specific information to help them effectively. Please provide a conv
                 is_failure_context = True
                 break
         
-        # Look for course mentions with enhanced patterns
-        extracted_courses = []
-        
-        # Pattern 1: Standard course patterns
-        for pattern in course_patterns:
-            matches = re.findall(pattern, query_lower)
-            for match in matches:
-                normalized = self._normalize_course_code(f"CS{match}" if "cs" in pattern else f"MA{match}")
-                if normalized:
-                    extracted_courses.append(normalized)
-        
-        # Pattern 2: Specific course mentions (handle concatenated words like "failedcs182")
-        course_mentions = [
-            (r"cs\s*180|cs180", "CS 18000"),
-            (r"cs\s*182|cs182", "CS 18200"), 
-            (r"cs\s*240|cs240", "CS 24000"),
-            (r"cs\s*250|cs250", "CS 25000"),
-            (r"cs\s*251|cs251", "CS 25100"),
-            (r"cs\s*252|cs252", "CS 25200"),
-            (r"ma\s*161|ma161", "MA 16100"),
-            (r"ma\s*162|ma162", "MA 16200"),
-            (r"ma\s*261|ma261", "MA 26100"),
-            (r"ma\s*265|ma265", "MA 26500")
-        ]
-        
-        for pattern, course_code in course_mentions:
-            if re.search(pattern, query_lower):
-                extracted_courses.append(course_code)
-        
-        # Pattern 3: Handle concatenated failure mentions like "failedcs182"
-        concatenated_failures = re.findall(r"fail[a-z]*cs\s*(\d{3})", query_lower)
-        for match in concatenated_failures:
-            normalized = self._normalize_course_code(f"CS{match}")
-            if normalized:
-                extracted_courses.append(normalized)
-                is_failure_context = True
+        # Only explicit codes (including glued forms like "failedcs182") change the student's course
+        # history; a topic mentioned in passing ("should I take linear algebra?") must not
+        extracted_courses = get_course_resolver().extract(query, codes_only=True)
         
         # Add courses to appropriate lists based on context
         for course in extracted_courses:
@@ -1430,7 +1402,8 @@ I need more specific information to help them effectively. Please provide a conv
         # Route to appropriate specialized handler
         if primary_intent == "graduation_planning":
             self._track_query("GRADUATION_PLANNING_HANDLER", {"extracted_context": context.extracted_context}, "Processing graduation planning query")
-            return self._handle_graduation_planning(query, context, intent)
+            with self.tracer.span("planner.graduation_planning"), stage_timer(STAGE_PLANNER):
+                return self._handle_graduation_planning(query, context, intent)
         elif primary_intent == "track_selection":
             self._track_query("TRACK_SELECTION_HANDLER", {"extracted_context": context.extracted_context}, "Processing track selection query")
             return self._handle_track_selection(query, context, intent)
@@ -2403,23 +2376,8 @@ I need more specific information to help them effectively. Please provide a conv
         current_year = extracted.get("current_year", "freshman")
         
         # Extract specific course mentioned
-        import re
-        course_patterns = [
-            r"cs\s*180", r"cs\s*18000", r"cs\s*182", r"cs\s*18200",
-            r"cs\s*240", r"cs\s*24000", r"cs\s*250", r"cs\s*25000",
-            r"cs\s*251", r"cs\s*25100", r"cs\s*252", r"cs\s*25200"
-        ]
-        
-        mentioned_course = None
-        for pattern in course_patterns:
-            matches = re.findall(pattern, query.lower())
-            if matches:
-                # Normalize to full course code
-                course_num = matches[0].replace("cs", "").replace(" ", "")
-                if len(course_num) == 3:
-                    course_num += "00"
-                mentioned_course = f"CS {course_num}"
-                break
+        mentioned_courses = get_course_resolver().extract(query)
+        mentioned_course = mentioned_courses[0] if mentioned_courses else None
         
         # If no specific course mentioned, provide general difficulty overview
         if not mentioned_course:
@@ -2586,41 +2544,7 @@ I need more specific information to help them effectively. Please provide a conv
         
         # Enhanced course extraction from query if not already in context
         if not failed_courses:
-            import re
-            
-            # Try multiple patterns to extract failed courses
-            patterns = [
-                r"(CS\s?\d{5}|MA\s?\d{5}|STAT\s?\d{5})",  # Full format
-                r"cs\s*(\d{3})",  # 3-digit format
-                r"fail[a-z]*cs\s*(\d{3})",  # Concatenated failures
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, query.lower())
-                for match in matches:
-                    if len(match) == 3:  # 3-digit format
-                        normalized = self._normalize_course_code(f"CS{match}")
-                    else:  # Full format
-                        normalized = match.upper().replace(" ", " ")
-                    
-                    if normalized and normalized not in failed_courses:
-                        failed_courses.append(normalized)
-        
-        # Check for specific course mentions in the query text  
-        query_lower = query.lower()
-        if not failed_courses:
-            if "cs 182" in query_lower or "cs182" in query_lower or "failedcs182" in query_lower:
-                failed_courses.append("CS 18200")
-            elif "cs 180" in query_lower or "cs180" in query_lower:
-                failed_courses.append("CS 18000")
-            elif "cs 240" in query_lower or "cs240" in query_lower:
-                failed_courses.append("CS 24000")
-            elif "cs 250" in query_lower or "cs250" in query_lower:
-                failed_courses.append("CS 25000")
-            elif "cs 251" in query_lower or "cs251" in query_lower:
-                failed_courses.append("CS 25100")
-            elif "cs 252" in query_lower or "cs252" in query_lower:
-                failed_courses.append("CS 25200")
+            failed_courses = get_course_resolver().extract(query)
         
         response = ""
         
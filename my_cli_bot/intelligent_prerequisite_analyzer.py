@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass
 from datetime import datetime
 
+from course_code_resolver import get_course_resolver
+
 @dataclass
 class CourseImpact:
     """Detailed impact analysis for a course failure"""
@@ -41,24 +43,8 @@ class IntelligentPrerequisiteAnalyzer:
         self.knowledge_file = knowledge_file
         self.knowledge_base = self._load_knowledge_base()
         
-        # Course number pattern mappings (CS 182 -> CS 18200, etc.)
-        self.course_mappings = {
-            '180': 'CS 18000',
-            '182': 'CS 18200', 
-            '240': 'CS 24000',
-            '250': 'CS 25000',
-            '251': 'CS 25100',
-            '252': 'CS 25200',
-            '381': 'CS 38100'
-        }
-        
-        # Enhanced patterns for course recognition
-        self.course_patterns = [
-            r'\bcs\s*(\d{3})\b',     # CS 182, CS 240
-            r'\bcs\s*(\d{5})\b',     # CS 18200, CS 24000  
-            r'\b(\d{3})\b',          # 182, 240
-            r'\b(\d{5})\b'           # 18200, 24000
-        ]
+        # Shared resolver for course codes, short codes (182 -> CS 18200) and names
+        self.course_resolver = get_course_resolver(knowledge_file)
         
         # Failure scenario templates from knowledge base
         self.failure_scenarios = self.knowledge_base.get("failure_recovery_scenarios", {})
@@ -76,30 +62,7 @@ class IntelligentPrerequisiteAnalyzer:
         Extract and normalize course codes from query using intelligent pattern matching
         Handles: CS 182, CS 18200, 182, 240, etc.
         """
-        normalized_courses = []
-        query_lower = query.lower()
-        
-        # Try all course patterns
-        for pattern in self.course_patterns:
-            matches = re.findall(pattern, query_lower)
-            for match in matches:
-                # Handle 3-digit patterns (182 -> CS 18200)
-                if len(match) == 3:
-                    if match in self.course_mappings:
-                        normalized_courses.append(self.course_mappings[match])
-                    else:
-                        # Try to construct course code
-                        if match.startswith('1') or match.startswith('2'):
-                            normalized_courses.append(f"CS {match}00")
-                        else:
-                            normalized_courses.append(f"CS {match}")
-                            
-                # Handle 5-digit patterns (18200 -> CS 18200)
-                elif len(match) == 5:
-                    normalized_courses.append(f"CS {match}")
-                    
-        # Remove duplicates while preserving order
-        return list(dict.fromkeys(normalized_courses))
+        return self.course_resolver.extract(query, include_numbers=True)
     
     def get_prerequisite_chain(self, course_code: str) -> List[str]:
         """
@@ -1,14 +1,19 @@
 import json
+import threading
 import uuid
+from collections import defaultdict
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import requests
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from flask import Flask, request, jsonify
 import networkx as nx
 import sqlite3
 import os
 
+from bulk_ingest import DEFAULT_BATCH_SIZE, BulkLoadReport, bulk_load, executemany_batched, upsert_sql
+
 @dataclass
 class Course:
     code: str
@@ -46,10 +51,160 @@ class TrainingData:
     source_data: Dict
     created_at: str
 
+# (source, target, relationship, properties)
+Edge = Tuple[str, str, str, Dict]
+
+COURSE_COLUMNS = ("code", "title", "credits", "track", "requirement_type", "group_id", "prerequisites",
+                  "description")
+TRACK_COLUMNS = ("code", "name", "required_courses", "elective_courses", "mandatory_courses", "choice_groups",
+                 "elective_options", "special_rules", "last_updated")
+EDGE_COLUMNS = ("id", "source_node", "target_node", "relationship", "properties")
+EDGE_KEY = ("source_node", "target_node", "relationship")
+EDGE_KEY_INDEX = "idx_knowledge_edges_key"
+# Lookup indexes; bulk loads drop them and build them once at the end
+SECONDARY_INDEXES = {
+    "idx_knowledge_edges_source": "CREATE INDEX IF NOT EXISTS idx_knowledge_edges_source "
+                                  "ON knowledge_edges(source_node, relationship)",
+    "idx_knowledge_edges_target": "CREATE INDEX IF NOT EXISTS idx_knowledge_edges_target "
+                                  "ON knowledge_edges(target_node, relationship)",
+    "idx_courses_track": "CREATE INDEX IF NOT EXISTS idx_courses_track ON courses(track)",
+}
+_EDGE_NAMESPACE = uuid.UUID("6f1c3a52-9d0e-4b8a-8f3e-2a7d5c1e9b40")
+
+
+def edge_id(source: str, target: str, relationship: str) -> str:
+    """Deterministic id, so re-adding an edge hits the same row"""
+    return str(uuid.uuid5(_EDGE_NAMESPACE, f"{source}\x1f{target}\x1f{relationship}"))
+
+
+def course_edges(course: Course) -> List[Edge]:
+    return [(prereq, course.code, "prerequisite", {}) for prereq in course.prerequisites]
+
+
+def track_edges(track: Track) -> List[Edge]:
+    node = f"track_{track.code}"
+    return ([(node, code, "requires", {"type": "mandatory"}) for code in track.mandatory_courses] +
+            [(node, code, "allows", {"type": "elective"}) for code in track.elective_options])
+
+
+COURSE_GROUPS = ("mandatory", "choice", "elective")
+
+# One indexed round trip for every relationship type of a course
+RELATIONSHIPS_SQL = '''
+    SELECT 'prerequisites', source_node FROM knowledge_edges
+    WHERE target_node = :code AND relationship = 'prerequisite'
+    UNION ALL
+    SELECT 'dependent_courses', target_node FROM knowledge_edges
+    WHERE source_node = :code AND relationship = 'prerequisite'
+    UNION ALL
+    SELECT 'tracks_requiring', source_node FROM knowledge_edges
+    WHERE target_node = :code AND relationship = 'requires'
+    UNION ALL
+    SELECT 'tracks_allowing', source_node FROM knowledge_edges
+    WHERE target_node = :code AND relationship = 'allows'
+'''
+
+
+def _course_from_row(row) -> Course:
+    return Course(code=row[0], title=row[1], credits=row[2], track=row[3], requirement_type=row[4],
+                  group_id=row[5], prerequisites=json.loads(row[6]) if row[6] else [], description=row[7])
+
+
+def _track_from_row(row) -> Track:
+    return Track(code=row[0], name=row[1], required_courses=row[2], elective_courses=row[3],
+                 mandatory_courses=json.loads(row[4]), choice_groups=json.loads(row[5]),
+                 elective_options=json.loads(row[6]), special_rules=json.loads(row[7]),
+                 last_updated=row[8])
+
+
+def _merge_adjacency(adjacency: Dict[str, Dict[str, Tuple[str, ...]]],
+                     additions: Dict[str, Dict[str, List[str]]]) -> Dict[str, Dict[str, Tuple[str, ...]]]:
+    """Copy of adjacency with new neighbours appended; only touched nodes are copied"""
+    merged = dict(adjacency)
+    for node, by_relationship in additions.items():
+        lists = dict(merged.get(node, {}))
+        for relationship, neighbours in by_relationship.items():
+            existing = lists.get(relationship, ())
+            seen = set(existing)
+            fresh = tuple(n for n in dict.fromkeys(neighbours) if n not in seen)
+            if fresh:
+                lists[relationship] = existing + fresh
+        merged[node] = lists
+    return merged
+
+
+@dataclass(frozen=True)
+class RelationshipSnapshot:
+    """
+    Immutable in-memory view of courses, tracks and typed edge lists.
+    Writers build a new snapshot with updated() and swap it in, so readers never
+    lock and never see a half-applied write. Returned objects are shared; treat
+    them as read-only.
+    """
+    courses: Dict[str, Course] = field(default_factory=dict)
+    tracks: Dict[str, Track] = field(default_factory=dict)
+    track_courses: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    incoming: Dict[str, Dict[str, Tuple[str, ...]]] = field(default_factory=dict)
+    outgoing: Dict[str, Dict[str, Tuple[str, ...]]] = field(default_factory=dict)
+
+    def updated(self, courses: Iterable[Course] = (), tracks: Iterable[Track] = (),
+                edges: Iterable[Edge] = (), upsert: bool = True) -> "RelationshipSnapshot":
+        """Snapshot with the rows applied the way the database applied them"""
+        course_map = dict(self.courses)
+        track_members: Dict[str, List[str]] = {}
+        for course in courses:
+            old = course_map.get(course.code)
+            if old is not None and not upsert:
+                continue
+            course_map[course.code] = Course(**asdict(course))
+            if old is not None and old.track == course.track:
+                continue
+            if old is not None:
+                members = track_members.setdefault(old.track, list(self.track_courses.get(old.track, ())))
+                members.remove(course.code)
+            track_members.setdefault(course.track, list(self.track_courses.get(course.track, ()))).append(course.code)
+
+        track_map = dict(self.tracks)
+        for track in tracks:
+            if upsert or track.code not in track_map:
+                track_map[track.code] = Track(**asdict(track))
+
+        incoming: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        outgoing: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        for source, target, relationship, *_ in edges:
+            incoming[target][relationship].append(source)
+            outgoing[source][relationship].append(target)
+
+        track_courses = dict(self.track_courses)
+        track_courses.update((code, tuple(members)) for code, members in track_members.items())
+        return RelationshipSnapshot(course_map, track_map, track_courses,
+                                    _merge_adjacency(self.incoming, incoming),
+                                    _merge_adjacency(self.outgoing, outgoing))
+
+    def relationships(self, course_code: str) -> Dict[str, List[str]]:
+        incoming = self.incoming.get(course_code, {})
+        return {
+            "prerequisites": list(incoming.get("prerequisite", ())),
+            "dependent_courses": list(self.outgoing.get(course_code, {}).get("prerequisite", ())),
+            "tracks_requiring": list(incoming.get("requires", ())),
+            "tracks_allowing": list(incoming.get("allows", ()))
+        }
+
+    def courses_by_track(self, track_code: str) -> Dict[str, List[Course]]:
+        courses = {group: [] for group in COURSE_GROUPS}
+        for code in self.track_courses.get(track_code, ()):
+            course = self.courses[code]
+            courses.setdefault(course.requirement_type, []).append(course)
+        return courses
+
+
 class KnowledgeGraph:
     def __init__(self, db_path: str = "purdue_cs_knowledge.db"):
         self.db_path = db_path
         self.graph = nx.DiGraph()
+        # Serves relationship and track lookups; None until load_graph succeeds (SQLite is used then)
+        self.snapshot: Optional[RelationshipSnapshot] = None
+        self._write_lock = threading.Lock()
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else '.', exist_ok=True)
         self.init_database()
@@ -118,36 +273,44 @@ class KnowledgeGraph:
             )
         ''')
         
+        # Edges are keyed by (source, target, relationship). Older databases got a random id per
+        # insert and may hold duplicates, which have to go before the key can be made unique.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (EDGE_KEY_INDEX,))
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                DELETE FROM knowledge_edges WHERE rowid NOT IN (
+                    SELECT MIN(rowid) FROM knowledge_edges GROUP BY source_node, target_node, relationship
+                )
+            ''')
+            cursor.execute(f"CREATE UNIQUE INDEX {EDGE_KEY_INDEX} ON knowledge_edges({', '.join(EDGE_KEY)})")
+        for index_sql in SECONDARY_INDEXES.values():
+            cursor.execute(index_sql)
+        
         conn.commit()
         conn.close()
     
     def load_graph(self):
-        """Load existing data from database into graph"""
+        """Load existing data from database into graph and the relationship snapshot"""
         try:
             conn = sqlite3.connect(self.db_path, timeout=60)
             cursor = conn.cursor()
             
             # Load courses
-            cursor.execute("SELECT * FROM courses")
-            for row in cursor.fetchall():
-                course_data = {
-                    'code': row[0],
-                    'title': row[1],
-                    'credits': row[2],
-                    'track': row[3],
-                    'requirement_type': row[4],
-                    'group_id': row[5],
-                    'prerequisites': json.loads(row[6]) if row[6] else [],
-                    'description': row[7]
-                }
-                self.graph.add_node(row[0], **course_data)
+            cursor.execute(f"SELECT {', '.join(COURSE_COLUMNS)} FROM courses ORDER BY rowid")
+            courses = [_course_from_row(row) for row in cursor.fetchall()]
+            self.graph.add_nodes_from((course.code, asdict(course)) for course in courses)
+            
+            cursor.execute(f"SELECT {', '.join(TRACK_COLUMNS)} FROM tracks")
+            tracks = [_track_from_row(row) for row in cursor.fetchall()]
             
             # Load knowledge edges
-            cursor.execute("SELECT source_node, target_node, relationship FROM knowledge_edges")
-            for row in cursor.fetchall():
-                self.graph.add_edge(row[0], row[1], relationship=row[2])
+            cursor.execute("SELECT source_node, target_node, relationship FROM knowledge_edges ORDER BY rowid")
+            edges = cursor.fetchall()
+            self.graph.add_edges_from((source, target, {"relationship": relationship})
+                                      for source, target, relationship in edges)
             
             conn.close()
+            self.snapshot = RelationshipSnapshot().updated(courses, tracks, edges)
             print(f"✅ Loaded {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges from database")
             
         except Exception as e:
@@ -157,31 +320,8 @@ class KnowledgeGraph:
     def add_course(self, course: Course) -> bool:
         """Add course to knowledge graph and database"""
         try:
-            conn = sqlite3.connect(self.db_path, timeout=60)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO courses 
-                (code, title, credits, track, requirement_type, group_id, prerequisites, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                course.code, course.title, course.credits, course.track,
-                course.requirement_type, course.group_id, 
-                json.dumps(course.prerequisites), course.description
-            ))
-            
-            # Add to graph
-            self.graph.add_node(course.code, **asdict(course))
-            
-            # Add prerequisite edges
-            for prereq in course.prerequisites:
-                self.graph.add_edge(prereq, course.code, relationship="prerequisite")
-                self._add_knowledge_edge_safe(conn, prereq, course.code, "prerequisite", {})
-            
-            conn.commit()
-            conn.close()
+            self._ingest([course], [], [], upsert=True, batch_size=DEFAULT_BATCH_SIZE, bulk=False)
             return True
-            
         except Exception as e:
             print(f"Error adding course {course.code}: {e}")
             return False
@@ -189,120 +329,121 @@ class KnowledgeGraph:
     def add_track(self, track: Track) -> bool:
         """Add track to knowledge graph and database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO tracks 
-                (code, name, required_courses, elective_courses, mandatory_courses, 
-                 choice_groups, elective_options, special_rules)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                track.code, track.name, track.required_courses, track.elective_courses,
-                json.dumps(track.mandatory_courses), json.dumps(track.choice_groups),
-                json.dumps(track.elective_options), json.dumps(track.special_rules)
-            ))
-            
-            # Add to graph
-            self.graph.add_node(f"track_{track.code}", **asdict(track))
-            
-            # Connect track to courses
-            for course_code in track.mandatory_courses:
-                self.graph.add_edge(f"track_{track.code}", course_code, relationship="requires")
-                self._add_knowledge_edge(f"track_{track.code}", course_code, "requires", {"type": "mandatory"})
-            
-            for course_code in track.elective_options:
-                self.graph.add_edge(f"track_{track.code}", course_code, relationship="allows")
-                self._add_knowledge_edge(f"track_{track.code}", course_code, "allows", {"type": "elective"})
-            
-            conn.commit()
-            conn.close()
+            self._ingest([], [track], [], upsert=True, batch_size=DEFAULT_BATCH_SIZE, bulk=False)
             return True
-            
         except Exception as e:
             print(f"Error adding track {track.code}: {e}")
             return False
     
-    def _add_knowledge_edge_safe(self, conn, source: str, target: str, relationship: str, properties: Dict):
-        """Add edge to knowledge graph database using existing connection"""
-        cursor = conn.cursor()
-        
-        edge_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT OR IGNORE INTO knowledge_edges (id, source_node, target_node, relationship, properties)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (edge_id, source, target, relationship, json.dumps(properties)))
+    def bulk_ingest(self, courses: Iterable[Course] = (), tracks: Iterable[Track] = (),
+                    edges: Iterable[Edge] = (), upsert: bool = True,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> BulkLoadReport:
+        """
+        Load many courses, tracks and extra edges in batched transactions.
+        Prerequisite and track edges are derived as in add_course/add_track. With
+        upsert existing rows are updated, otherwise they are kept; either way a
+        repeated load leaves the database unchanged. Raises sqlite3.Error on failure.
+        """
+        return self._ingest(list(courses), list(tracks), list(edges), upsert, batch_size, bulk=True)
     
-    def _add_knowledge_edge(self, source: str, target: str, relationship: str, properties: Dict):
-        """Add edge to knowledge graph database"""
-        conn = sqlite3.connect(self.db_path, timeout=30)
-        cursor = conn.cursor()
-        
-        edge_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT OR IGNORE INTO knowledge_edges (id, source_node, target_node, relationship, properties)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (edge_id, source, target, relationship, json.dumps(properties)))
-        
-        conn.commit()
-        conn.close()
+    def _ingest(self, courses: List[Course], tracks: List[Track], edges: List[Edge],
+                upsert: bool, batch_size: int, bulk: bool) -> BulkLoadReport:
+        edges = edges + [edge for course in courses for edge in course_edges(course)]
+        edges += [edge for track in tracks for edge in track_edges(track)]
+        report = BulkLoadReport()
+        
+        # Writers are serialized so the snapshot is swapped in the same order the rows were committed
+        with self._write_lock:
+            conn = sqlite3.connect(self.db_path, timeout=60)
+            try:
+                with bulk_load(conn, SECONDARY_INDEXES, report=report) if bulk else nullcontext(conn):
+                    self._write_rows(conn, courses, tracks, edges, upsert, batch_size, report)
+            finally:
+                conn.close()
+            
+            self._add_to_graph(courses, tracks, edges, upsert)
+            if self.snapshot is not None:
+                self.snapshot = self.snapshot.updated(courses, tracks, edges, upsert)
+        return report
+    
+    def _write_rows(self, conn, courses: List[Course], tracks: List[Track], edges: List[Edge],
+                    upsert: bool, batch_size: int, report: BulkLoadReport):
+        course_rows = ((course.code, course.title, course.credits, course.track, course.requirement_type,
+                        course.group_id, json.dumps(course.prerequisites), course.description)
+                       for course in courses)
+        track_rows = ((track.code, track.name, track.required_courses, track.elective_courses,
+                       json.dumps(track.mandatory_courses), json.dumps(track.choice_groups),
+                       json.dumps(track.elective_options), json.dumps(track.special_rules),
+                       track.last_updated or datetime.now().isoformat())
+                      for track in tracks)
+        edge_rows = ((edge_id(source, target, relationship), source, target, relationship, json.dumps(properties))
+                     for source, target, relationship, properties in edges)
+        
+        for table, columns, key, rows in (
+            ("courses", COURSE_COLUMNS, ("code",), course_rows),
+            ("tracks", TRACK_COLUMNS, ("code",), track_rows),
+            ("knowledge_edges", EDGE_COLUMNS, EDGE_KEY, edge_rows),
+        ):
+            count, batches = executemany_batched(conn, upsert_sql(table, columns, key, upsert), rows, batch_size)
+            report.add(table, count, batches)
+    
+    def _add_to_graph(self, courses: List[Course], tracks: List[Track], edges: List[Edge], upsert: bool):
+        self.graph.add_nodes_from((course.code, asdict(course)) for course in courses
+                                  if upsert or course.code not in self.graph)
+        self.graph.add_nodes_from((f"track_{track.code}", asdict(track)) for track in tracks
+                                  if upsert or f"track_{track.code}" not in self.graph)
+        self.graph.add_edges_from((source, target, {"relationship": relationship})
+                                  for source, target, relationship, _ in edges)
     
     def query_courses_by_track(self, track_code: str) -> Dict[str, List[Course]]:
         """Query all courses for a specific track"""
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot.courses_by_track(track_code)
+        
         conn = sqlite3.connect(self.db_path, timeout=30)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT code, title, credits, track, requirement_type, group_id, prerequisites, description
+        cursor.execute(f'''
+            SELECT {', '.join(COURSE_COLUMNS)}
             FROM courses WHERE track = ?
         ''', (track_code,))
         
         rows = cursor.fetchall()
         conn.close()
         
-        courses = {
-            "mandatory": [],
-            "choice": [],
-            "elective": []
-        }
-        
+        courses = {group: [] for group in COURSE_GROUPS}
         for row in rows:
-            prereqs = json.loads(row[6]) if row[6] else []
-            course = Course(
-                code=row[0], title=row[1], credits=row[2], track=row[3],
-                requirement_type=row[4], group_id=row[5], 
-                prerequisites=prereqs, description=row[7]
-            )
-            courses[course.requirement_type].append(course)
+            course = _course_from_row(row)
+            courses.setdefault(course.requirement_type, []).append(course)
         
         return courses
     
     def get_track_info(self, track_code: str) -> Optional[Track]:
         """Get complete track information"""
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot.tracks.get(track_code)
+        
         conn = sqlite3.connect(self.db_path, timeout=30)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT code, name, required_courses, elective_courses, mandatory_courses,
-                   choice_groups, elective_options, special_rules, last_updated
+        cursor.execute(f'''
+            SELECT {', '.join(TRACK_COLUMNS)}
             FROM tracks WHERE code = ?
         ''', (track_code,))
         
         row = cursor.fetchone()
         conn.close()
         
-        if not row:
-            return None
-        
-        return Track(
-            code=row[0], name=row[1], required_courses=row[2], elective_courses=row[3],
-            mandatory_courses=json.loads(row[4]), choice_groups=json.loads(row[5]),
-            elective_options=json.loads(row[6]), special_rules=json.loads(row[7]),
-            last_updated=row[8]
-        )
+        return _track_from_row(row) if row else None
     
     def find_course_relationships(self, course_code: str) -> Dict[str, List[str]]:
         """Find all relationships for a course"""
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot.relationships(course_code)
+        
         relationships = {
             "prerequisites": [],
             "dependent_courses": [],
@@ -311,36 +452,8 @@ class KnowledgeGraph:
         }
         
         conn = sqlite3.connect(self.db_path, timeout=30)
-        cursor = conn.cursor()
-        
-        # Find prerequisites
-        cursor.execute('''
-            SELECT source_node FROM knowledge_edges 
-            WHERE target_node = ? AND relationship = "prerequisite"
-        ''', (course_code,))
-        relationships["prerequisites"] = [row[0] for row in cursor.fetchall()]
-        
-        # Find dependent courses
-        cursor.execute('''
-            SELECT target_node FROM knowledge_edges 
-            WHERE source_node = ? AND relationship = "prerequisite"
-        ''', (course_code,))
-        relationships["dependent_courses"] = [row[0] for row in cursor.fetchall()]
-        
-        # Find tracks requiring this course
-        cursor.execute('''
-            SELECT source_node FROM knowledge_edges 
-            WHERE target_node = ? AND relationship = "requires"
-        ''', (course_code,))
-        relationships["tracks_requiring"] = [row[0] for row in cursor.fetchall()]
-        
-        # Find tracks allowing this course as elective
-        cursor.execute('''
-            SELECT source_node FROM knowledge_edges 
-            WHERE target_node = ? AND relationship = "allows"
-        ''', (course_code,))
-        relationships["tracks_allowing"] = [row[0] for row in cursor.fetchall()]
-        
+        for kind, node in conn.execute(RELATIONSHIPS_SQL, {"code": course_code}):
+            relationships[kind].append(node)
         conn.close()
         return relationships
 
@@ -391,9 +504,7 @@ class PurdueDataLoader:
                 last_updated=datetime.now().isoformat()
             )
             
-            self.kg.add_track(mi_track)
-            
-            # Add courses
+            # Add the track and its courses in one batch
             courses_to_add = [
                 Course("CS 37300", "Data Mining and Machine Learning", 3, "MI", "mandatory"),
                 Course("CS 38100", "Introduction to the Analysis of Algorithms", 3, "MI", "mandatory"),
@@ -418,8 +529,7 @@ class PurdueDataLoader:
                 Course("CS 57800", "Statistical Machine Learning", 3, "MI", "elective")
             ]
             
-            for course in courses_to_add:
-                self.kg.add_course(course)
+            self.kg.bulk_ingest(courses=courses_to_add, tracks=[mi_track])
             
             return True
             
@@ -467,9 +577,7 @@ class PurdueDataLoader:
                 last_updated=datetime.now().isoformat()
             )
             
-            self.kg.add_track(se_track)
-            
-            # Add courses
+            # Add the track and its courses in one batch
             courses_to_add = [
                 Course("CS 30700", "Software Engineering I", 3, "SE", "mandatory"),
                 Course("CS 38100", "Introduction to the Analysis of Algorithms", 3, "SE", "mandatory"),
@@ -496,8 +604,7 @@ class PurdueDataLoader:
                 Course("CS 59000-SRS", "Software Reliability and Security", 3, "SE", "elective")
             ]
             
-            for course in courses_to_add:
-                self.kg.add_course(course)
+            self.kg.bulk_ingest(courses=courses_to_add, tracks=[se_track])
             
             return True
             
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Incremental knowledge base synchronization
+Knowledge sources are tracked by stat signature and content hash so only files
+that really changed are re-read. The merged knowledge is diffed per entity
+(courses, tracks, prerequisites, degree requirements) and consumers patch
+themselves from the diff instead of rebuilding everything.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_SECTIONS = ("courses", "tracks", "prerequisites", "degree_requirements")
+
+
+@dataclass
+class SectionDiff:
+    """Entities added, removed or changed in one knowledge section"""
+    added: Dict[str, Any] = field(default_factory=dict)
+    removed: Set[str] = field(default_factory=set)
+    changed: Dict[str, Any] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def touched(self) -> Set[str]:
+        return set(self.added) | self.removed | set(self.changed)
+
+
+@dataclass
+class KnowledgeDiff:
+    """Per-section entity diff between two merged knowledge snapshots"""
+    sections: Dict[str, SectionDiff] = field(default_factory=dict)
+
+    def section(self, name: str) -> SectionDiff:
+        return self.sections.get(name) or SectionDiff()
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self.sections.values())
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        return {name: {'added': len(diff.added), 'removed': len(diff.removed), 'changed': len(diff.changed)}
+                for name, diff in self.sections.items() if diff}
+
+
+def diff_section(old: Dict[str, Any], new: Dict[str, Any]) -> SectionDiff:
+    """Entity diff of one section; unchanged entities are compared by value"""
+    diff = SectionDiff()
+    for key, value in new.items():
+        if key not in old:
+            diff.added[key] = value
+        elif old[key] is not value and old[key] != value:
+            diff.changed[key] = value
+    diff.removed = {key for key in old if key not in new}
+    return diff
+
+
+def diff_knowledge(old: Dict[str, Any], new: Dict[str, Any],
+                   sections: Iterable[str] = KNOWLEDGE_SECTIONS) -> KnowledgeDiff:
+    """Per-entity diff of the given sections of two knowledge snapshots"""
+    return KnowledgeDiff({name: diff_section(old.get(name) or {}, new.get(name) or {}) for name in sections})
+
+
+@dataclass
+class SourceState:
+    """Last seen signature of one knowledge source file"""
+    mtime_ns: int = 0
+    size: int = -1
+    digest: str = ""
+
+
+class KnowledgeSourceTracker:
+    """Re-reads a JSON source only when its stat changes and its content hash differs"""
+
+    def __init__(self, sources: Dict[str, str]):
+        self.sources = dict(sources)
+        self._states: Dict[str, SourceState] = {name: SourceState() for name in self.sources}
+        self._data: Dict[str, Optional[Dict[str, Any]]] = {name: None for name in self.sources}
+        self._lock = threading.Lock()
+
+    def _stat(self, path: str) -> Tuple[int, int]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 0, -1
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self, name: str, signature: Tuple[int, int]) -> bool:
+        """Reload one source; True when its content differs from what was loaded before"""
+        state = self._states[name]
+        if signature[1] < 0:
+            digest, data = "", None
+        else:
+            try:
+                with open(self.sources[name], 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.md5(raw).hexdigest()
+                data = json.loads(raw) if digest != state.digest else self._data[name]
+            except (OSError, ValueError) as e:
+                # Keep serving the last good copy; remember the signature so the same
+                # broken file is not re-read and re-reported on every poll
+                state.mtime_ns, state.size = signature
+                logger.warning("Could not read knowledge source %s: %s", name, e)
+                return False
+        state.mtime_ns, state.size = signature
+        if digest == state.digest:
+            return False
+        state.digest = digest
+        self._data[name] = data
+        return True
+
+    def load_all(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Read every source; missing files load as None"""
+        with self._lock:
+            for name, path in self.sources.items():
+                self._read(name, self._stat(path))
+            return dict(self._data)
+
+    def changed(self) -> List[str]:
+        """Sources whose content changed since the last check (cheap stat when nothing did)"""
+        with self._lock:
+            changed = []
+            for name, path in self.sources.items():
+                signature = self._stat(path)
+                state = self._states[name]
+                if signature == (state.mtime_ns, state.size):
+                    continue
+                if self._read(name, signature):
+                    changed.append(name)
+            return changed
+
+    @property
+    def data(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        with self._lock:
+            return dict(self._data)
+
+    def version(self) -> str:
+        """Combined content version of all sources as last loaded"""
+        with self._lock:
+            return "-".join(self._states[name].digest for name in self.sources)
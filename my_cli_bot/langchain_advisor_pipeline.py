@@ -27,6 +27,8 @@ from langchain.memory import ConversationBufferWindowMemory
 # Import existing components
 from intelligent_conversation_manager import IntelligentConversationManager
 from smart_ai_engine import SmartAIEngine, QueryIntent
+from vector_index import load_vector_index, DEFAULT_VECTOR_STORE_DIR
+from embedding_service import get_embedding_service
 
 @dataclass
 class ToolDefinition:
@@ -36,6 +38,21 @@ class ToolDefinition:
     parameters: Dict[str, Any]
     required: List[str]
 
+class SharedVectorStoreAdapter:
+    """Exposes the shared on-disk vector index through LangChain's similarity_search"""
+    
+    def __init__(self, vector_index):
+        self.vector_index = vector_index
+        self.index = vector_index.index
+    
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        matches = self.vector_index.search(query, k)
+        documents = []
+        for match in matches:
+            content = match.pop("content", "")
+            documents.append(Document(page_content=content, metadata=match))
+        return documents
+
 class EnhancedLangChainPipeline:
     """
     Enhanced academic advisor pipeline using LangChain with existing Boiler AI integration
@@ -75,6 +92,20 @@ class EnhancedLangChainPipeline:
     
     def _initialize_vector_store(self):
         """Initialize FAISS vector store with existing knowledge base"""
+        # Prefer the prebuilt store from build_vector.py; fall back to embedding the knowledge graph
+        try:
+            vector_index = load_vector_index(DEFAULT_VECTOR_STORE_DIR)
+            vector_index.embedder = get_embedding_service(
+                vector_index.manifest.get("embedder", ""), api_key=self.GEMINI_API_KEY
+            )
+            self.vector_store = SharedVectorStoreAdapter(vector_index)
+            self.logger.info(f"Loaded shared vector store with {len(vector_index)} vectors")
+            return
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Shared vector store unavailable, rebuilding in memory: {e}")
+        
         try:
             # Load existing knowledge base
             with open("data/cs_knowledge_graph.json", "r") as f:
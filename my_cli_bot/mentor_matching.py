@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Mentor matching index for Boiler AI networking
+Inverted indexes map each completed course and career interest to the mentors
+who have it. A request is scored by IDF-weighted overlap with a mild BM25-style
+profile length normalization, so listing everything does not win on its own
+but experienced mentors are not punished, and the top k are picked with a heap.
+Terms held by most mentors only re-score candidates found through rarer terms,
+so a query that mentions CS 18000 does not touch every profile, unless an upper
+bound on a common-terms-only score says such a mentor could still make the top k.
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from metrics import get_metrics_registry
+
+YEAR_ORDER = {'freshman': 1, 'sophomore': 2, 'junior': 3, 'senior': 4}
+DEFAULT_MIN_YEAR_RANK = YEAR_ORDER['sophomore']
+
+TERM_COURSE = "course"
+TERM_INTEREST = "interest"
+DEFAULT_COURSE_WEIGHT = 1.5
+DEFAULT_INTEREST_WEIGHT = 1.0
+# BM25 b: 0 ignores profile length, 1 divides by it relative to the average profile
+DEFAULT_LENGTH_NORM = 0.25
+# Terms held by more than this share of mentors do not generate candidates on their own
+DEFAULT_COMMON_TERM_RATIO = 0.5
+
+Term = Tuple[str, str]
+
+
+def normalize_interest(interest: str) -> str:
+    return " ".join(str(interest).lower().split())
+
+
+def year_rank(year_level: Optional[str]) -> int:
+    return YEAR_ORDER.get(year_level or "", 0)
+
+
+@dataclass(frozen=True)
+class MentorEntry:
+    """Indexed view of one mentor profile"""
+    user_id: str
+    year_level: str
+    track: Optional[str]
+    completed_courses: Tuple[str, ...]
+    career_interests: Tuple[str, ...]
+    availability: str
+    last_active: str = ""
+    courses: FrozenSet[str] = frozenset()
+    interests: FrozenSet[str] = frozenset()
+    # Precomputed for the ranking loop: indexed term count and year_rank(year_level)
+    length: int = 0
+    rank: int = 0
+
+    @property
+    def terms(self) -> Set[Term]:
+        return {(TERM_COURSE, c) for c in self.courses} | {(TERM_INTEREST, i) for i in self.interests}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'user_id': self.user_id,
+            'year_level': self.year_level,
+            'track': self.track,
+            'completed_courses': list(self.completed_courses),
+            'career_interests': list(self.career_interests),
+            'availability': self.availability
+        }
+
+
+@dataclass
+class MentorMatch:
+    """One ranked mentor and the request terms it matched"""
+    mentor: MentorEntry
+    score: float
+    matched_courses: List[str] = field(default_factory=list)
+    matched_interests: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.mentor.to_dict(),
+            'match_score': round(self.score, 4),
+            'matched_courses': self.matched_courses,
+            'matched_interests': self.matched_interests
+        }
+
+
+class MentorIndex:
+    """Incrementally maintained course/interest -> mentor inverted indexes"""
+
+    def __init__(self, normalize_course: Optional[Callable[[str], str]] = None,
+                 course_weight: float = DEFAULT_COURSE_WEIGHT,
+                 interest_weight: float = DEFAULT_INTEREST_WEIGHT,
+                 length_norm: float = DEFAULT_LENGTH_NORM,
+                 common_term_ratio: float = DEFAULT_COMMON_TERM_RATIO):
+        if normalize_course is None:
+            from course_code_resolver import get_course_resolver
+            normalize_course = get_course_resolver().normalize
+        self.normalize_course = normalize_course
+        self.weights = {TERM_COURSE: course_weight, TERM_INTEREST: interest_weight}
+        self.length_norm = length_norm
+        self.common_term_ratio = common_term_ratio
+        self._total_terms = 0
+        self._entries: Dict[str, MentorEntry] = {}
+        self._postings: Dict[Term, Set[str]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._queries = 0
+        self._candidates_scored = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._entries
+
+    def upsert(self, user_id: str, year_level: str, track: Optional[str],
+               completed_courses: Iterable[str], career_interests: Iterable[str],
+               availability: str = "", last_active: str = "") -> MentorEntry:
+        """Add or replace a mentor; only the postings of changed terms are touched"""
+        completed_courses = tuple(completed_courses or ())
+        career_interests = tuple(career_interests or ())
+        courses = frozenset(filter(None, map(self.normalize_course, completed_courses)))
+        interests = frozenset(filter(None, map(normalize_interest, career_interests)))
+        entry = MentorEntry(
+            user_id=user_id, year_level=year_level, track=track,
+            completed_courses=completed_courses, career_interests=career_interests,
+            availability=availability, last_active=last_active or "",
+            courses=courses, interests=interests,
+            length=len(courses) + len(interests), rank=year_rank(year_level)
+        )
+        with self._lock:
+            old = self._entries.get(user_id)
+            old_terms = old.terms if old is not None else set()
+            new_terms = entry.terms
+            for term in old_terms - new_terms:
+                self._discard_posting(term, user_id)
+            for term in new_terms - old_terms:
+                self._postings[term].add(user_id)
+            self._total_terms += len(new_terms) - len(old_terms)
+            self._entries[user_id] = entry
+        return entry
+
+    def remove(self, user_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is None:
+                return False
+            for term in entry.terms:
+                self._discard_posting(term, user_id)
+            self._total_terms -= entry.length
+            return True
+
+    def _discard_posting(self, term: Term, user_id: str):
+        postings = self._postings.get(term)
+        if postings is not None:
+            postings.discard(user_id)
+            if not postings:
+                del self._postings[term]
+
+    def _query_terms(self, courses: Iterable[str], interests: Iterable[str]) -> Set[Term]:
+        terms = {(TERM_COURSE, self.normalize_course(c)) for c in courses or ()}
+        terms |= {(TERM_INTEREST, normalize_interest(i)) for i in interests or ()}
+        return {term for term in terms if term[1]}
+
+    def match(self, courses: Iterable[str] = (), interests: Iterable[str] = (), k: int = 5,
+              track: Optional[str] = None, min_year_level: Optional[str] = None,
+              exclude: Iterable[str] = (), fill: bool = True) -> List[MentorMatch]:
+        """
+        Top k mentors for the requested courses and interests after the track and
+        year filters. With fill, slots no mentor overlaps on are filled with the
+        most recently active mentors that pass the filters (score 0).
+        """
+        start = time.perf_counter()
+        query_terms = self._query_terms(courses, interests)
+        exclude = set(exclude or ())
+        min_rank = YEAR_ORDER.get(min_year_level, DEFAULT_MIN_YEAR_RANK) if min_year_level else 0
+
+        def eligible(entry: MentorEntry) -> bool:
+            return (entry.user_id not in exclude and (not track or entry.track == track)
+                    and entry.rank >= min_rank)
+
+        with self._lock:
+            total = len(self._entries)
+            weighted = []
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if postings:
+                    weighted.append((self.weights[term[0]] * math.log(1 + total / len(postings)), postings))
+
+            # Rare terms generate candidates; common ones only add to candidates already found
+            rare, common = [], []
+            for weight, postings in weighted:
+                (rare if len(postings) <= self.common_term_ratio * total else common).append((weight, postings))
+            if not rare:
+                rare, common = common, []
+            scores: Dict[str, float] = defaultdict(float)
+            for weight, postings in rare:
+                for user_id in postings:
+                    scores[user_id] += weight
+            for weight, postings in common:
+                for user_id in scores:
+                    if user_id in postings:
+                        scores[user_id] += weight
+
+            entries = self._entries
+            # raw / (1 - b + b * length / average_length)
+            base = 1 - self.length_norm
+            per_term = self.length_norm * total / self._total_terms if self._total_terms else 0.0
+            filtered = bool(exclude or track or min_rank)
+
+            def normalized() -> List[Tuple[float, str, str]]:
+                return [(raw / (base + per_term * entries[user_id].length), entries[user_id].last_active, user_id)
+                        for user_id, raw in scores.items() if not filtered or eligible(entries[user_id])]
+
+            candidates = normalized()
+            ranked = heapq.nlargest(k, candidates)
+            if common:
+                # WAND-style bound: a mentor holding every common term and nothing else (length >= 1)
+                # is the best a common-only mentor can do; score them when that could still place
+                bound = sum(weight for weight, _ in common) / (base + per_term)
+                if len(ranked) < k or bound >= ranked[-1][0]:
+                    found = set(scores)
+                    for weight, postings in common:
+                        for user_id in postings:
+                            if user_id not in found:
+                                scores[user_id] += weight
+                    ranked = heapq.nlargest(k, normalized())
+            matches = [self._describe(entries[user_id], score, query_terms) for score, _, user_id in ranked]
+
+            if fill and len(matches) < k:
+                recent = heapq.nlargest(k - len(matches), (
+                    (entry.last_active, user_id) for user_id, entry in entries.items()
+                    if user_id not in scores and eligible(entry)
+                ))
+                matches.extend(MentorMatch(entries[user_id], 0.0) for _, user_id in recent)
+
+            self._queries += 1
+            self._candidates_scored += len(scores)
+
+        get_metrics_registry().histogram("mentor_match_seconds", "Mentor ranking latency").observe(
+            time.perf_counter() - start)
+        return matches
+
+    def _describe(self, entry: MentorEntry, score: float, query_terms: Set[Term]) -> MentorMatch:
+        return MentorMatch(
+            entry, score,
+            matched_courses=sorted(c for kind, c in query_terms if kind == TERM_COURSE and c in entry.courses),
+            matched_interests=sorted(i for kind, i in query_terms if kind == TERM_INTEREST and i in entry.interests)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'mentors': len(self._entries),
+                'terms': len(self._postings),
+                'queries': self._queries,
+                'avg_candidates': round(self._candidates_scored / self._queries, 1) if self._queries else 0.0
+            }
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency histograms and counters with Prometheus text exposition
+Each observing thread writes to its own bucket array, so the hot path takes no
+lock; scrapes merge the shards. Stages: intent, context_extraction, sql,
+planner, llm, serialization, plus per-provider LLM latency.
+"""
+
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "boilerai_"
+
+STAGE_INTENT = "intent"
+STAGE_CONTEXT = "context_extraction"
+STAGE_SQL = "sql"
+STAGE_PLANNER = "planner"
+STAGE_LLM = "llm"
+STAGE_SERIALIZATION = "serialization"
+
+# Upper bounds in milliseconds; roughly 2.5x apart from 50us to 60s
+DEFAULT_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _ShardOwner:
+    """Lives in the thread-local next to a shard; its finalizer runs when the thread exits"""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded:
+    """Per-thread slot arrays; only the owning thread writes its shard"""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._shards: Dict[int, List[float]] = {}
+        # Totals folded in from shards of threads that have exited
+        self._base: List[float] = [0] * width
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> List[float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0] * self._width
+            owner = _ShardOwner()
+            self._local.shard = shard
+            self._local.owner = owner
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: List[float]):
+        """Fold a dead thread's shard into the base totals and stop tracking it"""
+        with self._shards_lock:
+            if self._shards.pop(id(shard), None) is not None:
+                for i, value in enumerate(shard):
+                    self._base[i] += value
+
+    def _merged(self) -> List[float]:
+        with self._shards_lock:
+            shards = list(self._shards.values())
+            totals = list(self._base)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class Counter(_Sharded):
+    """Monotonic counter"""
+
+    def __init__(self, name: str, help_text: str = "", labels: Labels = ()):
+        super().__init__(1)
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+
+    def inc(self, amount: float = 1):
+        try:
+            self._local.shard[0] += amount
+        except AttributeError:
+            self._shard()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._merged()[0]
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket latency histogram; slots are bucket counts followed by the sum"""
+
+    def __init__(self, name: str, help_text: str = "", labels: Labels = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        super().__init__(len(buckets) + 2)
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.bounds = tuple(buckets)
+        self._sum_slot = len(buckets) + 1
+
+    def observe(self, value: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[self._sum_slot] += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the elapsed milliseconds"""
+        return _Timer(self)
+
+    def snapshot(self) -> Dict[str, float]:
+        merged = self._merged()
+        counts = merged[:self._sum_slot]
+        total = sum(counts)
+        return {
+            "count": total,
+            "sum_ms": merged[self._sum_slot],
+            "p50_ms": self._quantile(counts, total, 0.50),
+            "p95_ms": self._quantile(counts, total, 0.95),
+            "p99_ms": self._quantile(counts, total, 0.99),
+        }
+
+    def _quantile(self, counts: List[float], total: float, q: float) -> float:
+        """Linear interpolation inside the bucket holding the q-th observation"""
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+    def buckets(self) -> Tuple[List[Tuple[str, float]], float, float]:
+        """Cumulative (le, count) pairs, sum and count for exposition"""
+        merged = self._merged()
+        cumulative = 0
+        pairs = []
+        for bound, count in zip(self.bounds, merged):
+            cumulative += count
+            pairs.append((_format_number(bound), cumulative))
+        cumulative += merged[len(self.bounds)]
+        pairs.append(("+Inf", cumulative))
+        return pairs, merged[self._sum_slot], cumulative
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Get-or-create metrics by name and labels; renders the Prometheus text format"""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self._metrics: Dict[Tuple[str, Labels], object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Dict[str, str], **kwargs):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, help_text, key[1], **kwargs)
+                    self._metrics[key] = metric
+        return metric
+
+    def histogram(self, name: str, help_text: str = "", **labels) -> Histogram:
+        return self._get(Histogram, name, help_text, labels)
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._metrics.items(), key=lambda item: item[0])
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 per histogram and value per counter, keyed by name{labels}"""
+        result = {}
+        for (name, labels), metric in self._items():
+            key = name + _format_labels(labels)
+            result[key] = metric.snapshot() if isinstance(metric, Histogram) else {"value": metric.value}
+        return result
+
+    def render_prometheus(self) -> str:
+        families: Dict[str, List[object]] = {}
+        for (name, _), metric in self._items():
+            families.setdefault(name, []).append(metric)
+
+        lines = []
+        for name, metrics in families.items():
+            full_name = self.prefix + name
+            first = metrics[0]
+            kind = "histogram" if isinstance(first, Histogram) else "counter"
+            if first.help_text:
+                lines.append(f"# HELP {full_name} {first.help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for metric in metrics:
+                if isinstance(metric, Histogram):
+                    pairs, total, count = metric.buckets()
+                    for le, cumulative in pairs:
+                        lines.append(f"{full_name}_bucket{_format_labels(metric.labels, ('le', le))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(metric.labels)} {total}")
+                    lines.append(f"{full_name}_count{_format_labels(metric.labels)} {count}")
+                else:
+                    lines.append(f"{full_name}{_format_labels(metric.labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+_stage_histograms: Dict[str, Histogram] = {}
+
+
+def stage_histogram(stage: str) -> Histogram:
+    """Histogram for one pipeline stage (cached so the hot path skips the registry)"""
+    histogram = _stage_histograms.get(stage)
+    if histogram is None:
+        histogram = _registry.histogram("stage_latency_ms", "Pipeline stage latency in milliseconds",
+                                        stage=stage)
+        _stage_histograms[stage] = histogram
+    return histogram
+
+
+def stage_timer(stage: str) -> _Timer:
+    """with stage_timer(STAGE_SQL): ...  observes the block's latency for that stage"""
+    return _Timer(stage_histogram(stage))
+
+
+def observe_stage(stage: str, elapsed_ms: float):
+    stage_histogram(stage).observe(elapsed_ms)
+
+
+def observe_provider_call(provider: str, model: str, elapsed_ms: float, success: bool):
+    """LLM latency per provider/model plus call and failure counters"""
+    _registry.histogram("llm_latency_ms", "LLM call latency in milliseconds",
+                        provider=provider, model=model).observe(elapsed_ms)
+    _registry.counter("llm_calls_total", "LLM calls", provider=provider).inc()
+    if not success:
+        _registry.counter("llm_failures_total", "Failed LLM calls", provider=provider).inc()
+
+
+def render_metrics() -> str:
+    """Text exposition body for a /metrics endpoint"""
+    return _registry.render_prometheus()
+
+
+def observe_http_request(method: str, route: str, status: int, elapsed_ms: float):
+    """Request latency per route template plus a status-labelled counter"""
+    _registry.histogram("http_request_duration_ms", "HTTP request latency in milliseconds",
+                        method=method, route=route).observe(elapsed_ms)
+    _registry.counter("http_requests_total", "HTTP requests", route=route, status=status).inc()
+
+
+def route_template(request) -> str:
+    """Route path such as /courses/{course_code}, so labels stay low-cardinality"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def record_request_latency(request, call_next):
+    """ASGI HTTP middleware: per-route latency histogram for /metrics"""
+    start = time.perf_counter()
+    status_code = 500  # Recorded as a server error if the handler raises
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        observe_http_request(request.method, route_template(request), status_code,
+                             (time.perf_counter() - start) * 1000)
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 """
 Normalize and chunk text data for vector embeddings
+Inputs are chunked in a process pool and skipped when their content hash is
+unchanged; each input streams its chunks to its own JSONL shard, and the shards
+are concatenated into data/normalized_chunks.jsonl
 """
 
+import hashlib
 import json
+import math
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import sent_tokenize
 
 # Download required NLTK data
 try:
@@ -17,101 +23,242 @@ try:
 except LookupError:
     nltk.download('punkt')
 
-def chunk_text(text, ):
-    """Chunk text into smaller pieces for embeddings"""
-    sentences = sent_tokenize(text)
-    chunks = []
-    current_chunk = ""
-    current_tokens = 0
-    
-    for sentence in sentences:
-        sentence_tokens = len(word_tokenize(sentence))
-        
-        if current_tokens + sentence_tokens > max_tokens and current_chunk:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence
-            current_tokens = sentence_tokens
-        else:
-            current_chunk += " " + sentence
-            current_tokens += sentence_tokens
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+NORMALIZED_DIR = "data/normalized"
+MANIFEST_PATH = os.path.join(NORMALIZED_DIR, "manifest.json")
+OUTPUT_PATH = "data/normalized_chunks.jsonl"
+HTML_CSV_PATH = "data/courses_html.csv"
+PDF_DIR = "data/pdf"
 
-def normalize_html_data():
-    """Normalize HTML scraped course data"""
-    chunks = []
-    
-    if os.path.exists("data/courses_html.csv"):
-        df = pd.read_csv("data/courses_html.csv")
-        
-        for _, row in df.iterrows():
-            content = f"Course: {row['code']} - {row['title']}"
-            if row['credits']:
-                content += f" ({row['credits']} credits)"
-            
-            chunks.append({
-                "content": content,
-                "source": row['source'],
-                "type": "course_info",
-                "course_code": row['code']
-            })
-    
-    return chunks
+DEFAULT_MAX_TOKENS = 500
+DEFAULT_OVERLAP_TOKENS = 50
+HTML_ROWS_PER_TASK = 2000
+
+# Word pieces and single punctuation marks, like the embedding model's SentencePiece
+# vocabulary; long words are split into ~6-character subwords
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SUBWORD_CHARS = 6
+
+
+def count_tokens(text):
+    """Fast token count approximating the embedding model's tokenizer"""
+    return sum(math.ceil(len(piece) / _SUBWORD_CHARS) for piece in _TOKEN_PATTERN.findall(text))
 
-def normalize_pdf_data():
-    """Normalize PDF text data"""
+
+def chunk_text(text, max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Chunk text into smaller pieces for embeddings, with sliding sentence overlap"""
+    sentences = [(sentence, count_tokens(sentence)) for sentence in sent_tokenize(text)]
     chunks = []
-    pdf_dir = Path("data/pdf")
-    
-    for txt_file in pdf_dir.glob("*.txt"):
-        try:
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                text = f.read()
-            
-            # Clean up text
-            text = re.sub(r'\n+', '\n', text)
-            text = re.sub(r'\s+', ' ', text)
-            
-            # Chunk the text
-            text_chunks = chunk_text(text)
-            
-            for i, chunk in enumerate(text_chunks):
-                chunks.append({
-                    "content": chunk,
-                    "source": f"pdf/{txt_file.name}",
-                    "type": "degree_guide",
-                    "chunk_id": f"{txt_file.stem}_chunk_{i}"
-                })
-        
-        except Exception as e:
-            print(f"Error processing {txt_file}: {e}")
-    
+    window = []
+    window_tokens = 0
+
+    for sentence, sentence_tokens in sentences:
+        if window_tokens + sentence_tokens > max_tokens and window:
+            chunks.append(" ".join(s for s, _ in window).strip())
+
+            # Carry the trailing sentences that fit in the overlap into the next chunk
+            carried = []
+            carried_tokens = 0
+            for previous, previous_tokens in reversed(window):
+                if carried_tokens + previous_tokens > overlap_tokens:
+                    break
+                carried.insert(0, (previous, previous_tokens))
+                carried_tokens += previous_tokens
+            window = carried
+            window_tokens = carried_tokens
+
+        window.append((sentence, sentence_tokens))
+        window_tokens += sentence_tokens
+
+    if window:
+        chunks.append(" ".join(s for s, _ in window).strip())
+
     return chunks
 
+
+def file_hash(path):
+    """Content hash used to skip unchanged inputs"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _shard_path(key):
+    return os.path.join(NORMALIZED_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "_", key) + ".jsonl")
+
+
+def _write_jsonl(path, chunks):
+    """Stream chunks to a shard; written under a temp name so a crash never leaves a partial shard"""
+    tmp_path = path + ".tmp"
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def _normalize_pdf_file(txt_path, shard, max_tokens, overlap_tokens):
+    """Worker: chunk one extracted PDF text file into its shard"""
+    txt_file = Path(txt_path)
+    with open(txt_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    # Clean up text
+    text = re.sub(r'\s+', ' ', text)
+
+    def generate():
+        for i, chunk in enumerate(chunk_text(text, max_tokens, overlap_tokens)):
+            yield {
+                "content": chunk,
+                "source": f"pdf/{txt_file.name}",
+                "type": "degree_guide",
+                "chunk_id": f"{txt_file.stem}_chunk_{i}"
+            }
+
+    return _write_jsonl(shard, generate())
+
+
+def _normalize_html_rows(rows, shard):
+    """Worker: render one batch of scraped course rows into its shard"""
+    df = pd.DataFrame.from_records(rows)
+    credits = df['credits'].fillna("").astype(str).str.strip()
+    content = "Course: " + df['code'].astype(str) + " - " + df['title'].fillna("").astype(str)
+    content = content.where(credits == "", content + " (" + credits + " credits)")
+
+    records = pd.DataFrame({
+        "content": content,
+        "source": df['source'],
+        "type": "course_info",
+        "course_code": df['code']
+    }).to_dict('records')
+
+    return _write_jsonl(shard, records)
+
+
+def _load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def collect_inputs(max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Map each input key to (content hash, kind, path) for everything normalization reads"""
+    settings = f"{max_tokens}:{overlap_tokens}"
+    inputs = {}
+
+    if os.path.exists(HTML_CSV_PATH):
+        inputs["html/courses_html.csv"] = (file_hash(HTML_CSV_PATH), "html", HTML_CSV_PATH)
+
+    for txt_file in sorted(Path(PDF_DIR).glob("*.txt")):
+        # Chunking settings are part of the hash so changing them re-chunks PDFs
+        digest = hashlib.sha256((file_hash(txt_file) + settings).encode()).hexdigest()
+        inputs[f"pdf/{txt_file.name}"] = (digest, "pdf", str(txt_file))
+
+    return inputs
+
+
+def normalize_incremental(max_tokens=DEFAULT_MAX_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS,
+                          max_workers=None):
+    """Re-chunk only new or changed inputs in a process pool; returns the keys that changed"""
+    os.makedirs(NORMALIZED_DIR, exist_ok=True)
+    manifest = _load_manifest()
+    inputs = collect_inputs(max_tokens, overlap_tokens)
+
+    # Forget inputs that disappeared
+    for key in set(manifest) - set(inputs):
+        for shard in manifest[key].get("shards", []):
+            if os.path.exists(shard):
+                os.remove(shard)
+        del manifest[key]
+
+    changed = [key for key, (digest, _, _) in inputs.items()
+               if manifest.get(key, {}).get("hash") != digest]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        jobs = {}
+        for key in changed:
+            digest, kind, path = inputs[key]
+            for shard in manifest.get(key, {}).get("shards", []):
+                if os.path.exists(shard):
+                    os.remove(shard)
+
+            if kind == "pdf":
+                shard = _shard_path(key)
+                jobs[key] = [(shard, executor.submit(_normalize_pdf_file, path, shard,
+                                                     max_tokens, overlap_tokens))]
+            else:
+                records = pd.read_csv(path, dtype=str).to_dict('records')
+                jobs[key] = []
+                for start in range(0, len(records), HTML_ROWS_PER_TASK):
+                    shard = _shard_path(f"{key}.{start // HTML_ROWS_PER_TASK:04d}")
+                    rows = records[start:start + HTML_ROWS_PER_TASK]
+                    jobs[key].append((shard, executor.submit(_normalize_html_rows, rows, shard)))
+
+        for key, shard_jobs in jobs.items():
+            try:
+                counts = [future.result() for _, future in shard_jobs]
+            except Exception as e:
+                print(f"Error processing {key}: {e}")
+                manifest.pop(key, None)
+                continue
+            manifest[key] = {
+                "hash": inputs[key][0],
+                "shards": [shard for shard, _ in shard_jobs],
+                "chunks": sum(counts)
+            }
+
+    _save_manifest(manifest)
+    return changed
+
+
+def write_combined_output(output_path=OUTPUT_PATH):
+    """Concatenate all shards into one JSONL file without loading chunks into memory"""
+    manifest = _load_manifest()
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'wb') as out:
+        for key in sorted(manifest):
+            for shard in manifest[key]["shards"]:
+                with open(shard, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        out.write(block)
+    os.replace(tmp_path, output_path)
+    return manifest
+
+
 def main():
     """Main normalization function"""
-    print("Normalizing HTML data...")
-    html_chunks = normalize_html_data()
-    
-    print("Normalizing PDF data...")
-    pdf_chunks = normalize_pdf_data()
-    
-    # Combine all chunks
-    all_chunks = html_chunks + pdf_chunks
-    
-    # Save to JSON
-    os.makedirs("data", exist_ok=True)
-    with open("data/normalized_chunks.json", "w") as f:
-        json.dump(all_chunks, f, indent=2)
-    
-    print(f"Created {len(all_chunks)} normalized chunks")
-    print(f"  - HTML chunks: {len(html_chunks)}")
-    print(f"  - PDF chunks: {len(pdf_chunks)}")
-    
-    return all_chunks
+    print("Normalizing HTML and PDF data...")
+    changed = normalize_incremental()
+    if changed:
+        print(f"Re-chunked {len(changed)} changed inputs: {', '.join(changed)}")
+    else:
+        print("All inputs unchanged, reusing existing chunks")
+
+    manifest = write_combined_output()
+
+    html_chunks = sum(entry["chunks"] for key, entry in manifest.items() if key.startswith("html/"))
+    pdf_chunks = sum(entry["chunks"] for key, entry in manifest.items() if key.startswith("pdf/"))
+
+    print(f"Created {html_chunks + pdf_chunks} normalized chunks in {OUTPUT_PATH}")
+    print(f"  - HTML chunks: {html_chunks}")
+    print(f"  - PDF chunks: {pdf_chunks}")
+
+    return changed
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
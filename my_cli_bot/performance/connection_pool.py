@@ -12,6 +12,48 @@ from typing import Dict, List, Optional, Any
 from queue import Queue, Empty
 from dataclasses import dataclass
 
+from .ttl_cache import TTLCache
+
+
+STATEMENT_READ = "read"
+STATEMENT_WRITE = "write"
+STATEMENT_OTHER = "other"  # PRAGMA, transaction control, volatile functions: neither cached nor invalidating
+
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                 getattr(sqlite3, "SQLITE_RECURSIVE", 33)}
+_WRITE_ACTIONS = {getattr(sqlite3, name) for name in dir(sqlite3) if name.startswith((
+    "SQLITE_INSERT", "SQLITE_UPDATE", "SQLITE_DELETE", "SQLITE_CREATE_", "SQLITE_DROP_",
+    "SQLITE_ALTER_TABLE", "SQLITE_ATTACH", "SQLITE_DETACH", "SQLITE_REINDEX", "SQLITE_ANALYZE"
+))}
+_VOLATILE_FUNCTIONS = {"random", "randomblob", "changes", "total_changes", "last_insert_rowid",
+                       "date", "time", "datetime", "julianday", "unixepoch", "strftime"}
+
+
+def classify_statement(connection: sqlite3.Connection, query: str) -> str:
+    """Read, write or other, from the actions SQLite's authorizer sees while compiling the statement"""
+    actions = []
+
+    def authorizer(action, arg1, arg2, db_name, source):
+        actions.append((action, arg1, arg2))
+        return sqlite3.SQLITE_OK
+
+    connection.set_authorizer(authorizer)
+    try:
+        connection.execute("EXPLAIN QUERY PLAN " + query).fetchall()
+    except sqlite3.Error:
+        # Not explainable here (e.g. multiple statements); assume it may write
+        return STATEMENT_WRITE
+    finally:
+        connection.set_authorizer(None)
+
+    if any(action in _WRITE_ACTIONS for action, _, _ in actions):
+        return STATEMENT_WRITE
+    if actions and all(action in _READ_ACTIONS for action, _, _ in actions) and not any(
+            action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in _VOLATILE_FUNCTIONS
+            for action, _, arg2 in actions):
+        return STATEMENT_READ
+    return STATEMENT_OTHER
+
 
 @dataclass
 class PoolStats:
@@ -28,7 +70,7 @@ class PoolStats:
 class OptimizedConnection:
     """Wrapper for SQLite connection with prepared statements and query caching"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, result_cache: Optional[TTLCache] = None):
         self.connection = sqlite3.connect(db_path, check_same_thread=False)
         self.connection.row_factory = sqlite3.Row  # Enable column access by name
         self.connection.execute("PRAGMA journal_mode=WAL")  # Better concurrency
@@ -38,38 +80,45 @@ class OptimizedConnection:
         
         # Prepared statements cache
         self.prepared_statements: Dict[str, sqlite3.Cursor] = {}
-        self.query_cache: Dict[str, Any] = {}
+        self.statement_kinds: Dict[str, str] = {}
+        # SELECT result cache, shared by every connection in the pool
+        self.query_cache = result_cache if result_cache is not None else TTLCache(
+            max_entries=500, default_ttl=30.0
+        )
         self.last_accessed = time.time()
         
     def get_prepared_cursor(self, query: str) -> sqlite3.Cursor:
         """Get or create a prepared statement cursor"""
         if query not in self.prepared_statements:
-            cursor = self.connection.cursor()
-            # Pre-compile the query
-            cursor.execute("EXPLAIN QUERY PLAN " + query, ())
-            cursor.close()
+            # Pre-compile the query, classifying it as read/write on the way
+            self.statement_kinds[query] = classify_statement(self.connection, query)
             self.prepared_statements[query] = self.connection.cursor()
         return self.prepared_statements[query]
     
-    def execute_cached(self, query: str, params: tuple = ()) -> Any:
-        """Execute query with result caching for SELECT statements"""
-        cache_key = f"{query}:{params}"
+    def execute_cached(self, query: str, params: tuple = (), tags: tuple = (),
+                       ttl: Optional[float] = 30.0) -> Any:
+        """
+        Execute query with result caching for SELECT statements.
+        Tags (e.g. a session_id) let writers invalidate exactly the rows they change;
+        any write issued through here drops the whole result cache. ttl=0 skips caching.
+        """
+        cursor = self.get_prepared_cursor(query)
+        kind = self.statement_kinds[query]
+        cacheable = kind == STATEMENT_READ and ttl != 0
+        cache_key = (query, params)
         
-        # Check cache for SELECT queries
-        if query.strip().upper().startswith('SELECT') and cache_key in self.query_cache:
-            return self.query_cache[cache_key]
+        # Check cache for read-only queries
+        if cacheable:
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        cursor = self.get_prepared_cursor(query)
         result = cursor.execute(query, params).fetchall()
         
-        # Cache SELECT results for 30 seconds
-        if query.strip().upper().startswith('SELECT'):
-            self.query_cache[cache_key] = result
-            # Simple cache eviction - remove entries older than 30 seconds
-            current_time = time.time()
-            if len(self.query_cache) > 100:  # Limit cache size
-                self.query_cache = {k: v for k, v in self.query_cache.items() 
-                                  if current_time - self.last_accessed < 30}
+        if cacheable:
+            self.query_cache.set(cache_key, result, ttl=ttl, tags=tags)
+        elif kind == STATEMENT_WRITE:
+            self.query_cache.clear()
         
         return result
     
@@ -91,10 +140,13 @@ class DatabaseConnectionPool:
         self.overflow_connections = 0
         self.stats = PoolStats()
         self._lock = threading.Lock()
+        self.query_cache = TTLCache(
+            max_entries=2000, default_ttl=30.0, max_bytes=16 * 1024 * 1024, name='sql_result_cache'
+        )
         
         # Pre-create connections
         for _ in range(pool_size):
-            conn = OptimizedConnection(db_path)
+            conn = OptimizedConnection(db_path, self.query_cache)
             self.pool.put(conn)
             self.stats.total_connections += 1
     
@@ -117,7 +169,7 @@ class DatabaseConnectionPool:
             except Empty:
                 # Create overflow connection if allowed
                 if self.overflow_connections < self.max_overflow:
-                    connection = OptimizedConnection(self.db_path)
+                    connection = OptimizedConnection(self.db_path, self.query_cache)
                     with self._lock:
                         self.overflow_connections += 1
                         self.stats.total_connections += 1
@@ -158,8 +210,18 @@ class DatabaseConnectionPool:
     
     def get_stats(self) -> PoolStats:
         """Get current pool statistics"""
+        self.stats.cache_hits = self.query_cache.stats.hits
+        self.stats.cache_misses = self.query_cache.stats.misses
         return self.stats
     
+    def invalidate_query_cache(self, tag=None) -> int:
+        """Drop cached SELECT results for one tag, or all of them"""
+        if tag is None:
+            count = len(self.query_cache)
+            self.query_cache.clear()
+            return count
+        return self.query_cache.invalidate_tag(tag)
+    
     def close_all(self):
         """Close all connections in pool"""
         while not self.pool.empty():
@@ -189,6 +251,13 @@ def get_connection():
     return _connection_pool.get_connection()
 
 
+def invalidate_query_cache(tag=None) -> int:
+    """Invalidate cached SELECT results in the global pool"""
+    if _connection_pool is None:
+        return 0
+    return _connection_pool.invalidate_query_cache(tag)
+
+
 def get_pool_stats() -> PoolStats:
     """Get current pool statistics"""
     if _connection_pool is None:
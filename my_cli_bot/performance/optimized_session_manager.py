@@ -14,7 +14,12 @@ from functools import lru_cache
 from dataclasses import dataclass, asdict
 import msgpack  # Much faster than JSON for serialization
 
-from .connection_pool import get_connection, initialize_pool
+from .connection_pool import get_connection, initialize_pool, invalidate_query_cache
+from .ttl_cache import TTLCache
+from conversation_turns import (
+    ensure_turn_schema, append_turn, recent_turns, start_background_compaction, DEFAULT_KEEP_TURNS,
+    decode_session_blob
+)
 
 
 @dataclass
@@ -34,16 +39,26 @@ class SessionData:
 class OptimizedSessionManager:
     """High-performance session manager with connection pooling and caching"""
     
-    def __init__(self, db_path: str = "purdue_cs_knowledge.db", cache_size: int = 1000):
+    def __init__(self, db_path: str = "purdue_cs_knowledge.db", cache_size: int = 1000,
+                 max_history_turns: int = DEFAULT_KEEP_TURNS):
         self.db_path = db_path
         self.cache_size = cache_size
+        self.max_history_turns = max_history_turns
         
         # Initialize connection pool
         initialize_pool(db_path, pool_size=10)
         
+        # Turns live in their own append-only table; trimming runs in the background
+        with get_connection() as conn:
+            ensure_turn_schema(conn.connection)
+        start_background_compaction(db_path, keep_last=max_history_turns)
+        
         # LRU cache for frequently accessed sessions
-        self._session_cache: Dict[str, Tuple[SessionData, float]] = {}
         self._cache_ttl = 300  # 5 minutes TTL
+        self._session_cache = TTLCache(
+            max_entries=cache_size, default_ttl=self._cache_ttl,
+            max_bytes=64 * 1024 * 1024, name='session_cache'
+        )
         
         # Performance tracking
         self.stats = {
@@ -62,13 +77,12 @@ class OptimizedSessionManager:
                 VALUES (?, ?, ?, ?, ?, ?)
             ''',
             'get_session': '''
-                SELECT session_id, student_id, current_topic, conversation_history, 
-                       extracted_context, last_activity
+                SELECT session_id, student_id, current_topic, extracted_context, last_activity
                 FROM session_context WHERE session_id = ?
             ''',
             'update_session': '''
                 UPDATE session_context 
-                SET conversation_history = ?, extracted_context = ?, last_activity = ?, current_topic = ?
+                SET extracted_context = ?, last_activity = ?, current_topic = ?
                 WHERE session_id = ?
             ''',
             'get_recent_sessions': '''
@@ -124,7 +138,13 @@ class OptimizedSessionManager:
         start_time = time.time()
         
         with get_connection() as conn:
-            result = conn.execute_cached(self.sql_statements['get_session'], (session_id,))
+            result = conn.execute_cached(
+                self.sql_statements['get_session'], (session_id,), tags=(session_id,)
+            )
+            # Range scan over (session_id, seq) for the recent window only
+            conversation_history = (
+                recent_turns(conn.connection, session_id, self.max_history_turns) if result else []
+            )
         
         self._update_query_stats(time.time() - start_time)
         
@@ -133,12 +153,10 @@ class OptimizedSessionManager:
             
             # Fast deserialization using msgpack if available, fallback to JSON
             try:
-                conversation_history = self._fast_deserialize(row[3]) if row[3] else []
-                extracted_context = self._fast_deserialize(row[4]) if row[4] else {}
+                extracted_context = self._fast_deserialize(row[3]) if row[3] else {}
             except (json.JSONDecodeError, msgpack.exceptions.ExtraData):
                 # Fallback to JSON if msgpack fails
-                conversation_history = json.loads(row[3]) if row[3] else []
-                extracted_context = json.loads(row[4]) if row[4] else {}
+                extracted_context = json.loads(row[3]) if row[3] else {}
             
             session_data = SessionData(
                 session_id=row[0],
@@ -146,7 +164,7 @@ class OptimizedSessionManager:
                 current_topic=row[2],
                 conversation_history=conversation_history,
                 extracted_context=extracted_context,
-                last_activity=row[5]
+                last_activity=row[4]
             )
             
             # Cache the session
@@ -157,23 +175,13 @@ class OptimizedSessionManager:
     
     def update_session(self, session_id: str, query: str, response: str, 
                       context: Dict = None, topic: str = None) -> bool:
-        """Update session with batch operations and optimized serialization"""
+        """Append one conversation turn; cost does not grow with session length"""
         session = self.get_session(session_id)
         if not session:
             return False
         
         start_serialize = time.time()
         
-        # Add to conversation history
-        conversation_turn = {
-            'timestamp': datetime.now().isoformat(),
-            'query': query,
-            'response': response,
-            'query_type': self._classify_query_type_cached(query)
-        }
-        
-        session.conversation_history.append(conversation_turn)
-        
         # Update extracted context
         if context:
             session.extracted_context.update(context)
@@ -185,7 +193,6 @@ class OptimizedSessionManager:
         session.last_activity = datetime.now().isoformat()
         
         # Fast serialization
-        serialized_history = self._fast_serialize(session.conversation_history)
         serialized_context = self._fast_serialize(session.extracted_context)
         
         self.stats['serialization_time'] += time.time() - start_serialize
@@ -193,9 +200,12 @@ class OptimizedSessionManager:
         start_time = time.time()
         
         with get_connection() as conn:
+            conversation_turn = append_turn(
+                conn.connection, session_id, query, response,
+                self._classify_query_type_cached(query), session.last_activity
+            )
             cursor = conn.connection.cursor()
             cursor.execute(self.sql_statements['update_session'], (
-                serialized_history,
                 serialized_context,
                 session.last_activity,
                 session.current_topic,
@@ -205,10 +215,23 @@ class OptimizedSessionManager:
         
         self._update_query_stats(time.time() - start_time)
         
+        # Write-through: cached SQL rows for this session are now stale
+        invalidate_query_cache(session_id)
+        
+        # Keep the cached window in step with the table
+        session.conversation_history.append(conversation_turn)
+        if len(session.conversation_history) > self.max_history_turns:
+            del session.conversation_history[:-self.max_history_turns]
+        
         # Update cache
         self._cache_session(session)
         return True
     
+    def get_recent_turns(self, session_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Last `limit` turns of a session, oldest first"""
+        with get_connection() as conn:
+            return recent_turns(conn.connection, session_id, limit)
+    
     def get_recent_sessions(self, limit: int = 50, hours_back: int = 24) -> List[Dict[str, str]]:
         """Get recent sessions with optimized query"""
         cutoff_time = (datetime.now() - timedelta(hours=hours_back)).isoformat()
@@ -239,11 +262,16 @@ class OptimizedSessionManager:
         with get_connection() as conn:
             cursor = conn.connection.cursor()
             cursor.execute(self.sql_statements['cleanup_old_sessions'], (cutoff_time,))
-            conn.connection.commit()
             rows_deleted = cursor.rowcount
+            cursor.execute(
+                'DELETE FROM conversation_turns WHERE session_id NOT IN (SELECT session_id FROM session_context)'
+            )
+            conn.connection.commit()
         
-        # Clear cache of deleted sessions
-        self._clear_expired_cache()
+        # Deleted sessions may still be cached
+        if rows_deleted:
+            self._session_cache.clear()
+            invalidate_query_cache()
         
         return rows_deleted
     
@@ -276,47 +304,19 @@ class OptimizedSessionManager:
     
     def _fast_deserialize(self, data: str) -> Any:
         """Fast deserialization using msgpack if available, fallback to JSON"""
-        try:
-            # Try msgpack first (hex encoded)
-            return msgpack.unpackb(bytes.fromhex(data), raw=False)
-        except:
-            # Fallback to JSON
-            return json.loads(data)
+        return decode_session_blob(data)
     
     def _cache_session(self, session: SessionData):
         """Cache session with TTL"""
-        current_time = time.time()
-        
-        # Remove expired entries if cache is full
-        if len(self._session_cache) >= self.cache_size:
-            self._clear_expired_cache()
-        
-        self._session_cache[session.session_id] = (session, current_time)
+        self._session_cache.set(session.session_id, session, tags=(session.session_id,))
     
     def _get_cached_session(self, session_id: str) -> Optional[SessionData]:
         """Get session from cache with TTL check"""
-        if session_id in self._session_cache:
-            session, cached_time = self._session_cache[session_id]
-            
-            # Check TTL
-            if time.time() - cached_time < self._cache_ttl:
-                return session
-            else:
-                # Remove expired entry
-                del self._session_cache[session_id]
-        
-        return None
+        return self._session_cache.get(session_id)
     
     def _clear_expired_cache(self):
         """Remove expired cache entries"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, cached_time) in self._session_cache.items()
-            if current_time - cached_time >= self._cache_ttl
-        ]
-        
-        for key in expired_keys:
-            del self._session_cache[key]
+        self._session_cache.purge_expired()
     
     def _update_query_stats(self, query_time: float):
         """Update query performance statistics"""
@@ -342,6 +342,8 @@ class OptimizedSessionManager:
         return {
             'cache_hit_ratio': cache_hit_ratio,
             'cache_size': len(self._session_cache),
+            'cache_evictions': self._session_cache.stats.evictions,
+            'cache_bytes': self._session_cache.total_bytes,
             'total_queries': self.stats['queries_executed'],
             'avg_query_time_ms': self.stats['avg_query_time'] * 1000,
             'avg_serialization_time_ms': self.stats['serialization_time'] * 1000,
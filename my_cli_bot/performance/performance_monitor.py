@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 from collections import deque, defaultdict
 import asyncio
 
+from metrics import get_metrics_registry
+
 
 @dataclass
 class SystemMetrics:
@@ -58,6 +60,8 @@ class PerformanceMonitor:
         
         # Real-time tracking
         self.request_times: deque = deque(maxlen=1000)
+        self.request_latency = get_metrics_registry().histogram(
+            "request_latency_ms", "End-to-end request latency in milliseconds")
         self.error_count = 0
         self.total_requests = 0
         self.active_requests = 0
@@ -65,6 +69,9 @@ class PerformanceMonitor:
         # System process
         self.process = psutil.Process()
         
+        # Prime the CPU counter so later non-blocking samples measure the interval between them
+        psutil.cpu_percent(interval=None)
+        
         # Alert thresholds
         self.alert_thresholds = {
             'cpu_percent': 80.0,
@@ -133,7 +140,7 @@ class PerformanceMonitor:
         """Collect system-level performance metrics"""
         
         # CPU and memory
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         
         # Process-specific metrics
@@ -204,34 +211,37 @@ class PerformanceMonitor:
     
     def _get_cache_hit_ratio(self) -> float:
         """Get overall cache hit ratio from all components"""
+        total_hits = 0
+        total_requests = 0
+        
+        # Session and SQL result caches (every registered TTLCache)
+        try:
+            from .ttl_cache import get_registered_cache_stats
+            for cache_stats in get_registered_cache_stats().values():
+                total_hits += cache_stats['hits']
+                total_requests += cache_stats['hits'] + cache_stats['misses']
+        except Exception:
+            pass
+        
+        # Knowledge cache
         try:
-            from .optimized_session_manager import get_pool_stats
             from .knowledge_cache import get_knowledge_cache
-            from .ai_service_optimizer import get_ai_optimizer
-            
-            # Combine cache stats
-            total_hits = 0
-            total_requests = 0
-            
-            # Session manager cache
-            session_stats = get_pool_stats()
-            
-            # Knowledge cache
-            knowledge_cache = get_knowledge_cache()
-            knowledge_stats = knowledge_cache.get_performance_stats()
+            knowledge_stats = get_knowledge_cache().get_performance_stats()
             total_hits += knowledge_stats.get('total_hits', 0)
             total_requests += knowledge_stats.get('total_hits', 0) + knowledge_stats.get('total_misses', 0)
-            
-            # AI service cache
-            ai_optimizer = get_ai_optimizer()
-            ai_stats = ai_optimizer.get_performance_stats()
+        except Exception:
+            pass
+        
+        # AI service cache
+        try:
+            from .ai_service_optimizer import get_ai_optimizer
+            ai_stats = get_ai_optimizer().get_performance_stats()
             total_hits += ai_stats.get('cache_hits', 0)
             total_requests += ai_stats.get('cache_hits', 0) + ai_stats.get('cache_misses', 0)
-            
-            return total_hits / total_requests if total_requests > 0 else 0.0
-            
         except Exception:
-            return 0.0
+            pass
+        
+        return total_hits / total_requests if total_requests > 0 else 0.0
     
     def _get_database_connections(self) -> int:
         """Get active database connections"""
@@ -302,6 +312,7 @@ class PerformanceMonitor:
         """Track a request for performance monitoring"""
         self.total_requests += 1
         self.request_times.append(response_time)
+        self.request_latency.observe(response_time * 1000)
         
         if not success:
             self.error_count += 1
@@ -309,7 +320,7 @@ class PerformanceMonitor:
     def start_request(self) -> str:
         """Start tracking a request"""
         self.active_requests += 1
-        return str(time.time())
+        return str(time.perf_counter())
     
     def end_request(self, request_id: str, success: bool = True):
         """End tracking a request"""
@@ -317,7 +328,7 @@ class PerformanceMonitor:
         
         try:
             start_time = float(request_id)
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
             self.track_request(response_time, success)
         except ValueError:
             pass
@@ -388,7 +399,8 @@ class PerformanceMonitor:
                 'active': self.active_requests,
                 'total': self.total_requests,
                 'errors': self.error_count,
-                'recent_response_times': list(self.request_times)[-10:]
+                'recent_response_times': list(self.request_times)[-10:],
+                'latency_ms': self.request_latency.snapshot()
             }
         }
 
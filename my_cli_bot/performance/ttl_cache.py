@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Bounded LRU Cache with Per-Entry TTL
+O(1) get/set/evict, entry-count and byte bounds, tag-based write-through
+invalidation and hit/miss/eviction counters shared with the performance monitor
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+import types
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+_MISSING = object()
+
+
+@dataclass
+class TTLCacheStats:
+    """Cache performance counters"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+_ATOMIC_TYPES = (str, bytes, bytearray, int, float, complex, bool, type(None))
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _default_sizeof(value: Any) -> int:
+    """
+    Deep size estimate: follows containers, sqlite3 rows and object attributes
+    (dataclasses, __slots__), counting each shared object once
+    """
+    size = 0
+    seen: Set[int] = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, _ATOMIC_TYPES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, sqlite3.Row):
+            stack.extend(tuple(obj))
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if isinstance(slot, str) and slot not in ("__dict__", "__weakref__"):
+                        attribute = getattr(obj, slot, _MISSING)
+                        if attribute is not _MISSING:
+                            stack.append(attribute)
+    return size
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL, size/byte limits and tag invalidation"""
+
+    def __init__(self, max_entries: int = 1000, default_ttl: Optional[float] = 300.0,
+                 max_bytes: Optional[int] = None, sizeof: Callable[[Any], int] = _default_sizeof,
+                 name: Optional[str] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self.stats = TTLCacheStats()
+        self._lock = threading.RLock()
+
+        # key -> (value, expires_at, size, tags); order is least -> most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int, Tuple[Hashable, ...]]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+
+        if name:
+            register_cache(name, self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, key: Hashable):
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count:
+                    self.stats.misses += 1
+                return default
+
+            value, expires_at, _, _ = entry
+            if expires_at and expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                if count:
+                    self.stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            if count:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = _MISSING,
+            tags: Iterable[Hashable] = ()):
+        """Insert or replace an entry; ttl=None means no expiry, ttl<=0 means do not cache"""
+        ttl = self.default_ttl if ttl is _MISSING else ttl
+        if ttl is not None and ttl <= 0:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+            return
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        size = self._sizeof(value) if self.max_bytes else 0
+        tags = tuple(tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.stats.invalidations += 1
+                return True
+            return False
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Drop every entry stored with this tag (e.g. all rows for one session_id)"""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.stats.invalidations += len(keys)
+            return len(keys)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            expired = [key for key, (_, expires_at, _, _) in self._entries.items()
+                       if expires_at and expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.stats.expirations += len(expired)
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            'hit_ratio': self.stats.hit_ratio,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+
+# Registry so monitoring can report real numbers for every live cache
+_registry: "weakref.WeakValueDictionary[str, TTLCache]" = weakref.WeakValueDictionary()
+
+
+def register_cache(name: str, cache: TTLCache):
+    _registry[name] = cache
+
+
+def get_registered_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.get_stats() for name, cache in list(_registry.items())}
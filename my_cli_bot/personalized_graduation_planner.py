@@ -11,6 +11,10 @@ from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
 from copy import deepcopy
 
+from course_code_resolver import get_course_resolver
+from degree_audit import get_degree_audit_engine
+from plan_cache import get_plan_cache, knowledge_version
+
 @dataclass
 class PersonalizedCourseSchedule:
     semester: str
@@ -46,6 +50,7 @@ class PersonalizedGraduationPlanner:
     def __init__(self, knowledge_file: str, db_file: str):
         with open(knowledge_file, 'r') as f:
             self.knowledge = json.load(f)
+        self.knowledge_file = knowledge_file
         self.db_file = db_file
         
         # Course prerequisites and dependencies
@@ -63,6 +68,30 @@ class PersonalizedGraduationPlanner:
         """
         Create a fully personalized graduation plan based on student's specific situation
         """
+        plan_fields = {
+            "major": student_profile.get("major", "Computer Science"),
+            "track": student_profile.get("track", "Machine Intelligence"),
+            "current_semester": student_profile.get("current_semester", "Fall"),
+            "current_year": student_profile.get("current_year", 1),
+            "summer_courses": student_profile.get("summer_courses", True),
+            "credit_load": student_profile.get("credit_load", "standard"),
+            "graduation_goal": student_profile.get("graduation_goal", "4_year"),
+            "selected_choices": selected_choices or {}
+        }
+        completed_courses = self._validate_completed_courses(student_profile.get("completed_courses", []))
+        
+        plan = get_plan_cache().get_or_compute(
+            "personalized_plan", plan_fields, completed_courses,
+            lambda: self._build_personalized_plan(student_profile, selected_choices),
+            knowledge_version=knowledge_version(self.knowledge_file),
+            derive=lambda parent, course: self._derive_plan_for_completed_course(parent, course, student_profile)
+        )
+        if selected_choices:
+            student_profile.update(selected_choices)
+        return plan
+
+    def _build_personalized_plan(self, student_profile: Dict, selected_choices: Dict = None) -> PersonalizedGraduationPlan:
+        """Plan from scratch; create_personalized_plan serves repeats from the plan cache"""
         major = student_profile.get("major", "Computer Science")
         track = student_profile.get("track", "Machine Intelligence")
         completed_courses = student_profile.get("completed_courses", [])
@@ -129,6 +158,39 @@ class PersonalizedGraduationPlanner:
             customization_notes=customization_notes
         )
 
+    def _derive_plan_for_completed_course(self, parent: PersonalizedGraduationPlan, course: str,
+                                          student_profile: Dict) -> Optional[PersonalizedGraduationPlan]:
+        """Cached parent plan with one more completed course: drop it from the schedule and requirements"""
+        if parent.choice_request or course in parent.completed_courses:
+            return None
+        
+        for schedule in parent.schedules:
+            kept = [c for c in schedule.courses if c.get("code") != course]
+            if len(kept) < len(schedule.courses):
+                credits = sum(c.get("credits", 3) for c in schedule.courses if c.get("code") == course)
+                schedule.total_credits -= credits
+                if course.startswith("CS"):
+                    schedule.cs_credits -= credits
+                schedule.courses = kept
+        while parent.schedules and not parent.schedules[-1].courses:
+            parent.schedules.pop()
+        
+        parent.completed_courses = parent.completed_courses + [course]
+        parent.remaining_requirements = {
+            req_type: [c for c in courses if c != course] if isinstance(courses, list) else courses
+            for req_type, courses in parent.remaining_requirements.items()
+        }
+        parent.total_semesters = len(parent.schedules)
+        parent.graduation_date = self._calculate_graduation_date(parent.schedules)
+        parent.success_probability, parent.warnings, parent.recommendations = self._analyze_plan_feasibility(
+            parent.schedules, student_profile.get("graduation_goal", "4_year"),
+            student_profile.get("credit_load", "standard")
+        )
+        parent.customization_notes = self._generate_customization_notes(
+            student_profile, parent.completed_courses, parent.schedules
+        )
+        return parent
+
     def _generate_personalized_schedules(self, major: str, track: str, completed_courses: List[str],
                                        remaining_requirements: Dict, current_semester: str,
                                        current_year: int, summer_availability: bool,
@@ -737,12 +799,13 @@ class PersonalizedGraduationPlanner:
         science_required = ["PHYS 17200", "PHYS 27200"]
         
         # Calculate remaining
+        missing = get_degree_audit_engine().missing
         remaining = {
-            "core_foundation": [c for c in core_foundation if c not in completed_courses],
-            "core_intermediate": [c for c in core_intermediate if c not in completed_courses],
-            "math": [c for c in math_required if c not in completed_courses],
-            "track_specific": [c for c in track_requirements if c not in completed_courses],
-            "science": [c for c in science_required if c not in completed_courses],
+            "core_foundation": missing(core_foundation, completed_courses),
+            "core_intermediate": missing(core_intermediate, completed_courses),
+            "math": missing(math_required, completed_courses),
+            "track_specific": missing(track_requirements, completed_courses),
+            "science": missing(science_required, completed_courses),
             "general_education": self._calculate_gen_ed_remaining(completed_courses),
             "free_electives": self._calculate_free_electives_remaining(completed_courses)
         }
@@ -783,13 +846,14 @@ class PersonalizedGraduationPlanner:
         science_courses = [c for c in all_required_courses if c.startswith("PHYS") or c.startswith("CHEM") or c.startswith("BIOL")]
         other_courses = [c for c in all_required_courses if not any(c.startswith(prefix) for prefix in ["CS", "MA", "STAT", "PHYS", "CHEM", "BIOL"])]
         
+        missing = get_degree_audit_engine().missing
         remaining = {
-            "cs_foundation": [c for c in cs_courses if c not in completed_courses and (c.startswith("CS 1") or c.startswith("CS 2"))],
-            "cs_advanced": [c for c in cs_courses if c not in completed_courses and (c.startswith("CS 3") or c.startswith("CS 4"))],
-            "math": [c for c in math_courses if c not in completed_courses],
-            "statistics": [c for c in stat_courses if c not in completed_courses],
-            "science": [c for c in science_courses if c not in completed_courses],
-            "other_requirements": [c for c in other_courses if c not in completed_courses],
+            "cs_foundation": missing([c for c in cs_courses if c.startswith("CS 1") or c.startswith("CS 2")], completed_courses),
+            "cs_advanced": missing([c for c in cs_courses if c.startswith("CS 3") or c.startswith("CS 4")], completed_courses),
+            "math": missing(math_courses, completed_courses),
+            "statistics": missing(stat_courses, completed_courses),
+            "science": missing(science_courses, completed_courses),
+            "other_requirements": missing(other_courses, completed_courses),
             "general_education": self._calculate_gen_ed_remaining(completed_courses),
             "electives": []  # Data Science typically has fewer free electives
         }
@@ -833,14 +897,15 @@ class PersonalizedGraduationPlanner:
         phil_courses = [c for c in all_required_courses if c.startswith("PHIL")]
         other_courses = [c for c in all_required_courses if not any(c.startswith(prefix) for prefix in ["CS", "MA", "STAT", "PSY", "PHIL"])]
         
+        missing = get_degree_audit_engine().missing
         remaining = {
-            "cs_foundation": [c for c in cs_courses if c not in completed_courses and (c.startswith("CS 1") or c.startswith("CS 2"))],
-            "cs_advanced": [c for c in cs_courses if c not in completed_courses and (c.startswith("CS 3") or c.startswith("CS 4"))],
-            "math": [c for c in math_courses if c not in completed_courses],
-            "statistics": [c for c in stat_courses if c not in completed_courses],
-            "psychology": [c for c in psych_courses if c not in completed_courses],
-            "philosophy": [c for c in phil_courses if c not in completed_courses],
-            "other_requirements": [c for c in other_courses if c not in completed_courses],
+            "cs_foundation": missing([c for c in cs_courses if c.startswith("CS 1") or c.startswith("CS 2")], completed_courses),
+            "cs_advanced": missing([c for c in cs_courses if c.startswith("CS 3") or c.startswith("CS 4")], completed_courses),
+            "math": missing(math_courses, completed_courses),
+            "statistics": missing(stat_courses, completed_courses),
+            "psychology": missing(psych_courses, completed_courses),
+            "philosophy": missing(phil_courses, completed_courses),
+            "other_requirements": missing(other_courses, completed_courses),
             "cs_selectives": self._calculate_ai_cs_selectives_remaining(completed_courses, selected_choices),
             "science_core": self._calculate_ai_science_core_remaining(completed_courses),
             "electives": self._calculate_ai_electives_remaining(completed_courses)
@@ -1108,27 +1173,7 @@ class PersonalizedGraduationPlanner:
 
     def _normalize_course_code(self, course_code: str) -> str:
         """Normalize course code to standard format"""
-        if not course_code:
-            return ""
-        
-        # Handle common formats: CS 180 -> CS 18000, CS180 -> CS 18000
-        course_code = course_code.upper().replace(" ", "")
-        
-        # Extract department and number
-        import re
-        match = re.match(r"([A-Z]+)(\d+)", course_code)
-        if not match:
-            return course_code
-        
-        dept, num = match.groups()
-        
-        # Normalize CS course numbers
-        if dept == "CS" and len(num) == 3:
-            return f"{dept} {num}00"
-        elif dept in ["MA", "STAT"] and len(num) == 3:
-            return f"{dept} {num}00"
-        
-        return f"{dept} {num}"
+        return get_course_resolver().normalize(course_code)
 
     def _flatten_requirements(self, requirements: Dict[str, List[str]]) -> List[str]:
         """Flatten requirements dictionary into a single list"""
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Memoized graduation plans keyed by canonical student profile
+Planners hash only the profile fields that shape a plan (major, track, completed
+set, term, goal, ...) together with the knowledge file version, so repeat asks
+and students with identical situations share one plan. L1 is an in-process LRU;
+an optional SQLite file is the second level shared across restarts. A profile
+that adds one completed course to a cached profile can be derived from that
+parent plan instead of being planned from scratch.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from answer_warmup import knowledge_hash
+from metrics import get_metrics_registry
+from performance.ttl_cache import TTLCache
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_L2_MAX_ROWS = 50000
+
+# derive(parent_plan, newly_completed_course) -> child plan, or None when it cannot be derived
+DeriveFn = Callable[[Any, str], Optional[Any]]
+
+
+@dataclass
+class PlanCacheStats:
+    """Plan cache counters"""
+    l1_hits: int = 0
+    l2_hits: int = 0
+    derived: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.l1_hits + self.l2_hits + self.derived
+        total = hits + self.misses
+        return hits / total if total > 0 else 0.0
+
+
+_versions: Dict[str, Tuple[int, int, str]] = {}
+_versions_lock = threading.Lock()
+
+
+def knowledge_version(knowledge_file: Optional[str]) -> str:
+    """Content hash of a knowledge file, re-hashed only when its mtime or size changes"""
+    if not knowledge_file:
+        return ""
+    try:
+        stat = os.stat(knowledge_file)
+    except OSError:
+        return ""
+    with _versions_lock:
+        cached = _versions.get(knowledge_file)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+    version = knowledge_hash(knowledge_file)
+    with _versions_lock:
+        _versions[knowledge_file] = (stat.st_mtime_ns, stat.st_size, version)
+    return version
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(",", ":"),
+                                   default=str).encode("utf-8")).hexdigest()
+
+
+class _SQLitePlanStore:
+    """Second-level plan store: pickled plans in one SQLite table"""
+
+    def __init__(self, db_path: str, max_rows: int = DEFAULT_L2_MAX_ROWS):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS plan_cache (
+                cache_key TEXT PRIMARY KEY,
+                namespace TEXT,
+                knowledge_version TEXT,
+                plan BLOB,
+                last_used REAL
+            )
+        ''')
+        self._conn.commit()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute('SELECT plan FROM plan_cache WHERE cache_key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE plan_cache SET last_used = ? WHERE cache_key = ?', (time.time(), key))
+            self._conn.commit()
+        return pickle.loads(row[0])
+
+    def set(self, key: str, namespace: str, version: str, plan: Any):
+        blob = pickle.dumps(plan, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO plan_cache (cache_key, namespace, knowledge_version, plan, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, namespace, version, blob, time.time()))
+            self._writes += 1
+            if self._writes % 100 == 0:
+                # Keep only the most recently used rows
+                self._conn.execute('''
+                    DELETE FROM plan_cache WHERE cache_key NOT IN (
+                        SELECT cache_key FROM plan_cache ORDER BY last_used DESC LIMIT ?
+                    )
+                ''', (self.max_rows,))
+            self._conn.commit()
+
+    def drop_stale(self, namespace: str, version: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM plan_cache WHERE namespace = ? AND knowledge_version != ?', (namespace, version))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PlanCache:
+    """Two-level plan cache with knowledge-version invalidation and one-course parent reuse"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, db_path: Optional[str] = None):
+        self.stats = PlanCacheStats()
+        self._l1 = TTLCache(max_entries=max_entries, default_ttl=None, name="plan_cache")
+        self._l2: Optional[_SQLitePlanStore] = None
+        if db_path:
+            try:
+                self._l2 = _SQLitePlanStore(db_path)
+            except sqlite3.Error as e:
+                print(f"Warning: plan cache L2 disabled ({db_path}): {e}")
+        # base key (profile without completed set) -> completed set -> full key
+        self._parents: Dict[str, Dict[FrozenSet[str], str]] = {}
+        self._namespace_versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self, namespace: str, version: str):
+        """Drop plans built from an older knowledge version the first time a new one is seen"""
+        previous = self._namespace_versions.get(namespace)
+        if previous == version:
+            return
+        with self._lock:
+            previous = self._namespace_versions.get(namespace)
+            if previous == version:
+                return
+            self._namespace_versions[namespace] = version
+            if previous is not None:
+                self._l1.invalidate_tag((namespace, previous))
+                self._parents.clear()
+        if self._l2 is not None:
+            self._l2.drop_stale(namespace, version)
+
+    def _count(self, namespace: str, result: str):
+        get_metrics_registry().counter("plan_cache_requests_total", "Plan cache lookups by outcome",
+                                       namespace=namespace, result=result).inc()
+
+    def get_or_compute(self, namespace: str, profile: Dict[str, Any], completed: Iterable[str],
+                       compute: Callable[[], Any], knowledge_version: str = "",
+                       derive: Optional[DeriveFn] = None) -> Any:
+        """Cached plan for (profile fields, completed set); the caller gets a private copy"""
+        self._check_version(namespace, knowledge_version)
+        completed_set = frozenset(completed)
+        base_key = _digest([namespace, knowledge_version, profile])
+        key = _digest([base_key, sorted(completed_set)])
+        tags = ((namespace, knowledge_version),)
+
+        plan = self._l1.get(key)
+        if plan is not None:
+            self.stats.l1_hits += 1
+            self._count(namespace, "l1_hit")
+            return copy.deepcopy(plan)
+
+        if self._l2 is not None:
+            try:
+                plan = self._l2.get(key)
+            except (sqlite3.Error, pickle.UnpicklingError, AttributeError, EOFError) as e:
+                print(f"Warning: plan cache L2 read failed: {e}")
+                plan = None
+            if plan is not None:
+                self.stats.l2_hits += 1
+                self._count(namespace, "l2_hit")
+                self._store_l1(key, base_key, completed_set, plan, tags)
+                return copy.deepcopy(plan)
+
+        if derive is not None:
+            plan = self._derive(base_key, completed_set, derive)
+            if plan is not None:
+                self.stats.derived += 1
+                self._count(namespace, "derived")
+                self._store(key, base_key, completed_set, plan, namespace, knowledge_version, tags)
+                return copy.deepcopy(plan)
+
+        self.stats.misses += 1
+        self._count(namespace, "miss")
+        plan = compute()
+        self._store(key, base_key, completed_set, copy.deepcopy(plan), namespace, knowledge_version, tags)
+        return plan
+
+    def _derive(self, base_key: str, completed_set: FrozenSet[str], derive: DeriveFn) -> Any:
+        """Child plan from a cached parent whose completed set lacks exactly one of ours"""
+        with self._lock:
+            siblings = dict(self._parents.get(base_key, {}))
+        if not siblings:
+            return None
+        for course in completed_set:
+            parent_key = siblings.get(completed_set - {course})
+            if parent_key is None:
+                continue
+            parent = self._l1.get(parent_key, count=False)
+            if parent is None:
+                continue
+            child = derive(copy.deepcopy(parent), course)
+            if child is not None:
+                return child
+        return None
+
+    def _store_l1(self, key: str, base_key: str, completed_set: FrozenSet[str], plan: Any, tags):
+        self._l1.set(key, plan, tags=tags)
+        with self._lock:
+            self._parents.setdefault(base_key, {})[completed_set] = key
+            if sum(len(siblings) for siblings in self._parents.values()) > 2 * self._l1.max_entries:
+                # Forget parents the LRU has already evicted
+                self._parents = {
+                    base: live for base, live in (
+                        (base, {s: k for s, k in siblings.items() if k in self._l1})
+                        for base, siblings in self._parents.items()
+                    ) if live
+                }
+
+    def _store(self, key: str, base_key: str, completed_set: FrozenSet[str], plan: Any,
+               namespace: str, version: str, tags):
+        self._store_l1(key, base_key, completed_set, plan, tags)
+        if self._l2 is not None:
+            try:
+                self._l2.set(key, namespace, version, plan)
+            except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+                print(f"Warning: plan cache L2 write failed: {e}")
+
+    def clear(self):
+        self._l1.clear()
+        with self._lock:
+            self._parents.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            'hit_ratio': self.stats.hit_ratio,
+            'entries': len(self._l1),
+            'l2_enabled': self._l2 is not None
+        }
+
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache:
+    """Process-wide plan cache; BOILERAI_PLAN_CACHE_DB enables the SQLite second level"""
+    global _plan_cache
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = PlanCache(
+                max_entries=int(os.getenv("BOILERAI_PLAN_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+                db_path=os.getenv("BOILERAI_PLAN_CACHE_DB") or None
+            )
+        return _plan_cache
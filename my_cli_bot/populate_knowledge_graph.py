@@ -10,6 +10,12 @@ import sqlite3
 from datetime import datetime
 import logging
 from knowledge_graph import PurdueCSKnowledgeGraph
+from bulk_ingest import bulk_load, executemany_batched, upsert_sql
+
+COMPREHENSIVE_COURSE_COLUMNS = (
+    'course_id', 'title', 'credits', 'description', 'typical_semester', 'offered_semesters', 'difficulty',
+    'workload_hours', 'required', 'course_type', 'prerequisites', 'corequisites'
+)
 
 class PurdueCSKnowledgeGraphBuilder:
     def __init__(self):
@@ -442,15 +448,9 @@ class PurdueCSKnowledgeGraphBuilder:
                 )
             ''')
             
-            # Insert course data
-            for course_id in kg.graph.nodes():
-                course_data = kg.graph.nodes[course_id]
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO comprehensive_courses VALUES (
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                    )
-                ''', (
+            # Insert course data: one executemany per batch with the load pragmas on
+            rows = (
+                (
                     course_id,
                     course_data.get('title', ''),
                     course_data.get('credits', 3),
@@ -463,12 +463,15 @@ class PurdueCSKnowledgeGraphBuilder:
                     course_data.get('course_type', ''),
                     json.dumps(list(kg.graph.predecessors(course_id))),
                     json.dumps(course_data.get('corequisites', []))
-                ))
-            
-            conn.commit()
+                )
+                for course_id, course_data in kg.graph.nodes(data=True)
+            )
+            with bulk_load(conn):
+                count, _ = executemany_batched(
+                    conn, upsert_sql('comprehensive_courses', COMPREHENSIVE_COURSE_COLUMNS, ('course_id',)), rows)
             conn.close()
             
-            self.logger.info("✅ POPULATED: Database with comprehensive course data")
+            self.logger.info(f"✅ POPULATED: Database with {count} comprehensive courses")
             
         except Exception as e:
             self.logger.error(f"❌ DATABASE ERROR: {e}")
@@ -198,10 +198,11 @@ class ProductionIntegration:
                 }
                 normalized_chunks.append(chunk)
             
-            # Save normalized chunks
-            chunks_path = self.data_dir / "normalized_chunks.json"
-            with open(chunks_path, 'w') as f:
-                json.dump(normalized_chunks, f, indent=2)
+            # Save normalized chunks as JSONL, the format normalize.py and build_vector.py use
+            chunks_path = self.data_dir / "normalized_chunks.jsonl"
+            with open(chunks_path, 'w', encoding='utf-8') as f:
+                for chunk in normalized_chunks:
+                    f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
             
             print("✅ Vector store updated")
             
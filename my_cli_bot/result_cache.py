@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Shared two-level query result cache
+Results are keyed by the canonical form of the query (case, whitespace and
+trailing ?!. folded; symbols such as + and # kept, so "c++" is not "c") plus any context and the knowledge version they were built
+from. L1 is a bounded in-process LRU with TTL; L2 is a SQLite file in WAL mode
+that every worker process shares. Concurrent misses for one key are coalesced:
+inside a process followers wait for the leader's result, and across processes a
+short lease row makes other workers poll L2 instead of recomputing.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from metrics import get_metrics_registry
+from performance.ttl_cache import TTLCache
+
+# Suggested L2 location, anchored to this package rather than the working directory
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "result_cache.db")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 900.0
+DEFAULT_L2_MAX_ROWS = 100000
+DEFAULT_LEASE_SECONDS = 30.0
+DEFAULT_POLL_INTERVAL = 0.1
+
+_MISSING = object()
+
+
+@dataclass
+class ResultCacheStats:
+    """Shared result cache counters"""
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    l2_errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.l1_hits + self.l2_hits + self.coalesced
+        total = hits + self.misses
+        return hits / total if total > 0 else 0.0
+
+
+def canonical_query(query: str) -> str:
+    """Queries differing only in case, whitespace or trailing ?!. share one key"""
+    return " ".join((query or "").lower().split()).rstrip("?!. ")
+
+
+class _SQLiteResultStore:
+    """L2: pickled results with wall-clock expiry, plus compute leases, in one SQLite file"""
+
+    def __init__(self, db_path: str, max_rows: int = DEFAULT_L2_MAX_ROWS):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                cache_key TEXT PRIMARY KEY,
+                namespace TEXT,
+                knowledge_version TEXT,
+                value BLOB,
+                expires_at REAL
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache_leases (
+                cache_key TEXT PRIMARY KEY,
+                expires_at REAL
+            )
+        ''')
+        self._conn.commit()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute('SELECT value, expires_at FROM result_cache WHERE cache_key = ?',
+                                     (key,)).fetchone()
+        if row is None or (row[1] and row[1] <= time.time()):
+            return _MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key: str, namespace: str, version: str, value: Any, ttl: Optional[float]):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + ttl if ttl else 0.0
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO result_cache (cache_key, namespace, knowledge_version, value, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, namespace, version, blob, expires_at))
+            self._writes += 1
+            if self._writes % 200 == 0:
+                now = time.time()
+                self._conn.execute('DELETE FROM result_cache WHERE expires_at > 0 AND expires_at <= ?', (now,))
+                self._conn.execute('''
+                    DELETE FROM result_cache WHERE cache_key NOT IN (
+                        SELECT cache_key FROM result_cache ORDER BY expires_at DESC LIMIT ?
+                    )
+                ''', (self.max_rows,))
+                self._conn.execute('DELETE FROM result_cache_leases WHERE expires_at <= ?', (now,))
+            self._conn.commit()
+
+    def acquire_lease(self, key: str, seconds: float) -> bool:
+        """True if this process may compute the key; False while another worker holds the lease"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('DELETE FROM result_cache_leases WHERE cache_key = ? AND expires_at <= ?',
+                               (key, now))
+            cursor = self._conn.execute('INSERT OR IGNORE INTO result_cache_leases (cache_key, expires_at) '
+                                        'VALUES (?, ?)', (key, now + seconds))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def lease_active(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT expires_at FROM result_cache_leases WHERE cache_key = ?',
+                                     (key,)).fetchone()
+        return bool(row) and row[0] > time.time()
+
+    def release_lease(self, key: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM result_cache_leases WHERE cache_key = ?', (key,))
+            self._conn.commit()
+
+    def drop_stale(self, namespace: str, version: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM result_cache WHERE namespace = ? AND knowledge_version != ?', (namespace, version))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute('DELETE FROM result_cache')
+            else:
+                self._conn.execute('DELETE FROM result_cache WHERE namespace = ?', (namespace,))
+            self._conn.commit()
+
+
+class SharedResultCache:
+    """Canonical-key result cache: bounded LRU over a shared SQLite store, with single-flight misses"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 default_ttl: float = DEFAULT_TTL, db_path: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.default_ttl = default_ttl
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.stats = ResultCacheStats()
+        self._l1 = TTLCache(max_entries=max_entries, default_ttl=default_ttl, max_bytes=max_bytes,
+                            name="shared_result_cache")
+        self._l2: Optional[_SQLiteResultStore] = None
+        if db_path:
+            try:
+                self._l2 = _SQLiteResultStore(db_path)
+            except sqlite3.Error as e:
+                print(f"Warning: shared result cache L2 disabled ({db_path}): {e}")
+        self._inflight: Dict[str, Future] = {}
+        self._namespace_versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, query: str, context: Optional[Dict[str, Any]] = None,
+                 version: str = "") -> str:
+        payload = json.dumps([namespace, version, canonical_query(query), context or {}],
+                             sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _check_version(self, namespace: str, version: str):
+        """The first time a new knowledge version is seen, drop what was built from the old one"""
+        if self._namespace_versions.get(namespace) == version:
+            return
+        with self._lock:
+            previous = self._namespace_versions.get(namespace)
+            if previous == version:
+                return
+            self._namespace_versions[namespace] = version
+            if previous is not None:
+                self._l1.invalidate_tag((namespace, previous))
+        if self._l2 is not None:
+            try:
+                self._l2.drop_stale(namespace, version)
+            except sqlite3.Error:
+                self.stats.l2_errors += 1
+
+    def _count(self, namespace: str, result: str):
+        get_metrics_registry().counter("result_cache_requests_total", "Shared result cache lookups by outcome",
+                                       namespace=namespace, result=result).inc()
+
+    def _l2_get(self, key: str) -> Any:
+        if self._l2 is None:
+            return _MISSING
+        try:
+            return self._l2.get(key)
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, EOFError):
+            self.stats.l2_errors += 1
+            return _MISSING
+
+    def _lookup(self, namespace: str, key: str, version: str) -> Any:
+        value = self._l1.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats.l1_hits += 1
+            self._count(namespace, "l1_hit")
+            return value
+        value = self._l2_get(key)
+        if value is not _MISSING:
+            self.stats.l2_hits += 1
+            self._count(namespace, "l2_hit")
+            self._l1.set(key, value, tags=((namespace, version),))
+        return value
+
+    def _store(self, namespace: str, key: str, version: str, value: Any, ttl: Optional[float]):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._l1.set(key, value, ttl=ttl, tags=((namespace, version),))
+        if self._l2 is not None:
+            try:
+                self._l2.set(key, namespace, version, value, ttl)
+            except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError):
+                self.stats.l2_errors += 1
+
+    def _lead_or_follow(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _finish(self, key: str, leased: bool):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if leased and self._l2 is not None:
+            try:
+                self._l2.release_lease(key)
+            except sqlite3.Error:
+                self.stats.l2_errors += 1
+
+    def _try_lease(self, key: str) -> bool:
+        if self._l2 is None:
+            return True
+        try:
+            return self._l2.acquire_lease(key, self.lease_seconds)
+        except sqlite3.Error:
+            self.stats.l2_errors += 1
+            return True
+
+    def _other_worker_computing(self, key: str) -> bool:
+        try:
+            return self._l2 is not None and self._l2.lease_active(key)
+        except sqlite3.Error:
+            return False
+
+    def get(self, namespace: str, query: str, context: Optional[Dict[str, Any]] = None,
+            version: str = "") -> Optional[Any]:
+        self._check_version(namespace, version)
+        value = self._lookup(namespace, self.make_key(namespace, query, context, version), version)
+        return None if value is _MISSING else value
+
+    def set(self, namespace: str, query: str, value: Any, context: Optional[Dict[str, Any]] = None,
+            version: str = "", ttl: Optional[float] = None):
+        self._check_version(namespace, version)
+        self._store(namespace, self.make_key(namespace, query, context, version), version, value, ttl)
+
+    def get_or_compute(self, namespace: str, query: str, compute: Callable[[], Any],
+                       context: Optional[Dict[str, Any]] = None, version: str = "",
+                       ttl: Optional[float] = None,
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """(value, from_cache) for blocking callers"""
+        self._check_version(namespace, version)
+        key = self.make_key(namespace, query, context, version)
+        value = self._lookup(namespace, key, version)
+        if value is not _MISSING:
+            return value, True
+
+        future, leader = self._lead_or_follow(key)
+        if not leader:
+            self.stats.coalesced += 1
+            self._count(namespace, "coalesced")
+            return future.result(), True
+
+        leased = False
+        try:
+            leased = self._try_lease(key)
+            if not leased:
+                deadline = time.monotonic() + self.lease_seconds
+                while time.monotonic() < deadline and self._other_worker_computing(key):
+                    time.sleep(self.poll_interval)
+                value = self._lookup(namespace, key, version)
+                if value is not _MISSING:
+                    future.set_result(value)
+                    return value, True
+            self.stats.misses += 1
+            self._count(namespace, "miss")
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self._store(namespace, key, version, value, ttl)
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._finish(key, leased)
+
+    async def aget_or_compute(self, namespace: str, query: str, compute: Callable[[], Awaitable[Any]],
+                              context: Optional[Dict[str, Any]] = None, version: str = "",
+                              ttl: Optional[float] = None,
+                              cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        (value, from_cache) for coroutines; followers on any event loop await the leader.
+        Only L1 is touched on the event loop; every SQLite call runs in a worker thread.
+        """
+        if self._namespace_versions.get(namespace) != version:
+            await asyncio.to_thread(self._check_version, namespace, version)
+        key = self.make_key(namespace, query, context, version)
+        value = self._l1.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats.l1_hits += 1
+            self._count(namespace, "l1_hit")
+            return value, True
+        if self._l2 is not None:
+            value = await asyncio.to_thread(self._lookup, namespace, key, version)
+            if value is not _MISSING:
+                return value, True
+
+        future, leader = self._lead_or_follow(key)
+        if not leader:
+            self.stats.coalesced += 1
+            self._count(namespace, "coalesced")
+            return await asyncio.wrap_future(future), True
+
+        leased = False
+        try:
+            leased = self._l2 is None or await asyncio.to_thread(self._try_lease, key)
+            if not leased:
+                deadline = time.monotonic() + self.lease_seconds
+                while (time.monotonic() < deadline
+                       and await asyncio.to_thread(self._other_worker_computing, key)):
+                    await asyncio.sleep(self.poll_interval)
+                value = await asyncio.to_thread(self._lookup, namespace, key, version)
+                if value is not _MISSING:
+                    future.set_result(value)
+                    return value, True
+            self.stats.misses += 1
+            self._count(namespace, "miss")
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                if self._l2 is None:
+                    self._store(namespace, key, version, value, ttl)
+                else:
+                    await asyncio.to_thread(self._store, namespace, key, version, value, ttl)
+            future.set_result(value)
+            return value, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._l2 is None:
+                self._finish(key, leased)
+            else:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                if leased:
+                    await asyncio.to_thread(self._finish, key, leased)
+
+    def purge_expired(self) -> int:
+        return self._l1.purge_expired()
+
+    def clear(self, namespace: Optional[str] = None):
+        if namespace is None:
+            self._l1.clear()
+        else:
+            self._l1.invalidate_tag((namespace, self._namespace_versions.get(namespace)))
+        if self._l2 is not None:
+            self._l2.clear(namespace)
+
+    def __len__(self) -> int:
+        return len(self._l1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            'hit_ratio': self.stats.hit_ratio,
+            'entries': len(self._l1),
+            'bytes': self._l1.total_bytes,
+            'l2_path': self._l2.db_path if self._l2 else None
+        }
+
+
+_result_cache: Optional[SharedResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> SharedResultCache:
+    """Process-wide cache; the shared L2 file is opt-in through BOILERAI_RESULT_CACHE_DB"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = SharedResultCache(
+                max_entries=int(os.getenv("BOILERAI_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+                db_path=os.getenv("BOILERAI_RESULT_CACHE_DB") or None
+            )
+        return _result_cache
@@ -3,11 +3,10 @@
 HTML scraping script for Purdue CS course data
 """
 
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
-import time
 import os
+from catalog_fetcher import CatalogFetcher
 
 # Purdue CS data sources
 URLS = [
@@ -18,59 +17,80 @@ URLS = [
     "https://www.cs.purdue.edu/academic-programs/courses/2024_spring_courses.html",  # Spring 2024
 ]
 
-def scrape_course_data():
-    """Scrape course information from Purdue CS website"""
+def parse_course_rows(html, url):
+    """Extract course rows from one catalog page"""
     rows = []
+    soup = BeautifulSoup(html, "html.parser")
     
-    for url in URLS:
-        try:
-            print(f"Scraping: {url}")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Look for course tables
-            for tr in soup.select("tr"):
-                cols = [td.get_text(" ", strip=True) for td in tr.find_all("td")]
-                if len(cols) >= 2 and cols[0].startswith("CS"):
-                    rows.append({
-                        "code": cols[0],
-                        "title": cols[1],
-                        "credits": cols[2] if len(cols) > 2 else "",
-                        "source": url
-                    })
-            
-            # Also look for course information in other formats
-            for element in soup.select("p, div, li"):
-                text = element.get_text(strip=True)
-                if text.startswith("CS ") and "–" in text:
-                    parts = text.split("–", 1)
-                    if len(parts) == 2:
-                        code_part = parts[0].strip()
-                        title_part = parts[1].strip()
-                        rows.append({
-                            "code": code_part,
-                            "title": title_part,
-                            "credits": "",
-                            "source": url
-                        })
-            
-            time.sleep(1)  # Be respectful to the server
-            
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
+    # Look for course tables
+    for tr in soup.select("tr"):
+        cols = [td.get_text(" ", strip=True) for td in tr.find_all("td")]
+        if len(cols) >= 2 and cols[0].startswith("CS"):
+            rows.append({
+                "code": cols[0],
+                "title": cols[1],
+                "credits": cols[2] if len(cols) > 2 else "",
+                "source": url
+            })
     
-    # Create output directory
-    os.makedirs("data", exist_ok=True)
+    # Also look for course information in other formats
+    for element in soup.select("p, div, li"):
+        text = element.get_text(strip=True)
+        if text.startswith("CS ") and "–" in text:
+            parts = text.split("–", 1)
+            if len(parts) == 2:
+                code_part = parts[0].strip()
+                title_part = parts[1].strip()
+                rows.append({
+                    "code": code_part,
+                    "title": title_part,
+                    "credits": "",
+                    "source": url
+                })
     
-    # Save to CSV
-    df = pd.DataFrame(rows)
-    df = df.drop_duplicates(subset=["code", "title"])
-    df.to_csv("data/courses_html.csv", index=False)
+    return rows
+
+def scrape_course_data(urls=None, fetcher=None, output_path="data/courses_html.csv"):
+    """Scrape course information from Purdue CS website"""
+    urls = urls or URLS
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or CatalogFetcher()
     
-    print(f"Scraped {len(df)} course entries")
-    return df
+    try:
+        print(f"Scraping {len(urls)} pages...")
+        results = fetcher.fetch_all(urls)
+        
+        for url in urls:
+            if not results[url].ok:
+                print(f"Error scraping {url}: {results[url].error}")
+        
+        # Nothing changed upstream: keep the existing CSV (and its hash) untouched
+        if os.path.exists(output_path) and not any(result.changed for result in results.values()):
+            print("No catalog pages changed since last scrape")
+            return pd.read_csv(output_path, dtype=str)
+        
+        rows = []
+        for url in urls:
+            if results[url].ok:
+                rows.extend(parse_course_rows(results[url].content, url))
+        
+        # Create output directory
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        
+        # Save to CSV
+        df = pd.DataFrame(rows, columns=["code", "title", "credits", "source"])
+        df = df.drop_duplicates(subset=["code", "title"])
+        df.to_csv(output_path, index=False)
+        
+        # Pages count as seen only once the CSV built from them is written
+        for result in results.values():
+            fetcher.commit(result)
+        
+        print(f"Scraped {len(df)} course entries")
+        return df
+    finally:
+        if owns_fetcher:
+            fetcher.close()
 
 if __name__ == "__main__":
     scrape_course_data()
\ No newline at end of file
@@ -3,12 +3,13 @@
 PDF scraping script for Purdue CS degree progression guides
 """
 
-import requests
 import pathlib
 import subprocess
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pdfminer.high_level import extract_text
+from catalog_fetcher import CatalogFetcher
 
 # Purdue CS PDF sources
 PDFS = {
@@ -18,49 +19,73 @@ PDFS = {
     "2023_dpg": "https://www.purdue.edu/science/Current_Students/docs/majors/fall2023/Computer%20Science%20F23%20DPG.pdf",
 }
 
-def download_and_extract_pdfs():
-    """Download PDFs and extract text content"""
+def _extract_pdf_text(pdf_path, txt_path):
+    """Worker: extract one PDF's text with pdfminer and save it"""
+    text = extract_text(pdf_path)
+    pathlib.Path(txt_path).write_text(text, encoding='utf-8')
+    return text
+
+def download_and_extract_pdfs(pdfs=None, fetcher=None, max_workers=None):
+    """Download changed PDFs concurrently and extract their text in a process pool"""
+    pdfs = pdfs or PDFS
+    owns_fetcher = fetcher is None
+    fetcher = fetcher or CatalogFetcher()
     
     # Create directories
     pdf_dir = pathlib.Path("data/pdf")
     pdf_dir.mkdir(parents=True, exist_ok=True)
     
     extracted_texts = {}
+    unchanged = []
     
-    for name, url in PDFS.items():
-        try:
-            print(f"Downloading: {name}")
-            pdf_path = pdf_dir / f"{name}.pdf"
-            
-            # Download PDF
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            pdf_path.write_bytes(response.content)
-            
-            print(f"Extracting text from: {name}")
-            # Extract text using pdfminer
-            text = extract_text(str(pdf_path))
-            
-            # Save extracted text
-            txt_path = pdf_dir / f"{name}.txt"
-            txt_path.write_text(text, encoding='utf-8')
-            
-            extracted_texts[name] = text
+    try:
+        print(f"Checking {len(pdfs)} PDFs for updates...")
+        results = fetcher.fetch_all(list(pdfs.values()))
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            jobs = {}
+            for name, url in pdfs.items():
+                result = results[url]
+                if not result.ok:
+                    print(f"Error processing {name}: {result.error}")
+                    continue
+                
+                pdf_path = pdf_dir / f"{name}.pdf"
+                txt_path = pdf_dir / f"{name}.txt"
+                
+                # Unchanged documents keep their text file untouched, so normalize.py skips them
+                if not result.changed and txt_path.exists():
+                    unchanged.append(name)
+                    continue
+                
+                pdf_path.write_bytes(result.content)
+                print(f"Extracting text from: {name}")
+                jobs[name] = executor.submit(_extract_pdf_text, str(pdf_path), str(txt_path))
             
-        except Exception as e:
-            print(f"Error processing {name}: {e}")
+            for name, future in jobs.items():
+                try:
+                    extracted_texts[name] = future.result()
+                except Exception as e:
+                    # Not committed: the next run sees the document as changed and retries
+                    print(f"Error processing {name}: {e}")
+                    continue
+                fetcher.commit(results[pdfs[name]])
+    finally:
+        if owns_fetcher:
+            fetcher.close()
     
     # Save metadata
     metadata = {
-        "sources": PDFS,
+        "sources": pdfs,
         "extracted_count": len(extracted_texts),
-        "files": list(extracted_texts.keys())
+        "files": list(extracted_texts.keys()),
+        "unchanged": unchanged
     }
     
     with open("data/pdf_metadata.json", "w") as f:
         json.dump(metadata, f, indent=2)
     
-    print(f"Extracted text from {len(extracted_texts)} PDFs")
+    print(f"Extracted text from {len(extracted_texts)} PDFs ({len(unchanged)} unchanged)")
     return extracted_texts
 
 if __name__ == "__main__":
@@ -9,11 +9,24 @@ import json
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+from conversation_turns import (
+    ensure_turn_schema, append_turn, recent_turns, start_background_compaction, DEFAULT_KEEP_TURNS
+)
 
 class SessionManager:
-    def __init__(self, db_path="purdue_cs_knowledge.db"):
+    def __init__(self, db_path="purdue_cs_knowledge.db", max_history_turns=DEFAULT_KEEP_TURNS):
         self.db_path = db_path
         self.current_session_id = None
+        self.max_history_turns = max_history_turns
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_turn_schema(conn)
+        finally:
+            conn.close()
+        
+        # Trimming history happens in the background, not on every update
+        start_background_compaction(self.db_path, keep_last=max_history_turns)
         
     def create_session(self, student_id: str = None) -> str:
         """Create a new conversation session"""
@@ -42,11 +55,12 @@ class SessionManager:
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT session_id, student_id, current_topic, conversation_history, extracted_context, last_activity
+            SELECT session_id, student_id, current_topic, extracted_context, last_activity
             FROM session_context WHERE session_id = ?
         ''', (session_id,))
         
         result = cursor.fetchone()
+        history = recent_turns(conn, session_id, self.max_history_turns) if result else []
         conn.close()
         
         if result:
@@ -54,74 +68,73 @@ class SessionManager:
                 'session_id': result[0],
                 'student_id': result[1],
                 'current_topic': result[2],
-                'conversation_history': json.loads(result[3]) if result[3] else [],
-                'extracted_context': json.loads(result[4]) if result[4] else {},
-                'last_activity': result[5]
+                'conversation_history': history,
+                'extracted_context': json.loads(result[3]) if result[3] else {},
+                'last_activity': result[4]
             }
         return None
     
     def update_session(self, session_id: str, query: str, response: str, context: Dict = None):
-        """Update session with new conversation turn"""
-        session = self.get_session(session_id)
-        if not session:
-            return False
-        
-        # Add to conversation history
-        conversation_turn = {
-            'timestamp': datetime.now().isoformat(),
-            'query': query,
-            'response': response,
-            'query_type': self._classify_query_type(query)
-        }
-        
-        session['conversation_history'].append(conversation_turn)
-        
-        # Update extracted context
-        if context:
-            session['extracted_context'].update(context)
-        
-        # Update current topic
-        session['current_topic'] = self._extract_current_topic(session['conversation_history'])
-        
-        # Keep only last 20 conversation turns for performance
-        if len(session['conversation_history']) > 20:
-            session['conversation_history'] = session['conversation_history'][-20:]
-        
-        # Save to database
+        """Update session with new conversation turn (a single-row insert)"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE session_context 
-            SET current_topic = ?, conversation_history = ?, extracted_context = ?, last_activity = ?
-            WHERE session_id = ?
-        ''', (
-            session['current_topic'],
-            json.dumps(session['conversation_history']),
-            json.dumps(session['extracted_context']),
-            datetime.now().isoformat(),
-            session_id
-        ))
-        
-        conn.commit()
-        conn.close()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT extracted_context FROM session_context WHERE session_id = ?', (session_id,))
+            row = cursor.fetchone()
+            if not row:
+                return False
+            
+            # Append the turn; earlier turns are never rewritten
+            append_turn(conn, session_id, query, response, self._classify_query_type(query))
+            
+            # Update current topic from the last few turns
+            current_topic = self._extract_current_topic(recent_turns(conn, session_id, 3))
+            
+            if context:
+                extracted_context = json.loads(row[0]) if row[0] else {}
+                extracted_context.update(context)
+                cursor.execute('''
+                    UPDATE session_context 
+                    SET current_topic = ?, extracted_context = ?, last_activity = ?
+                    WHERE session_id = ?
+                ''', (current_topic, json.dumps(extracted_context), datetime.now().isoformat(), session_id))
+            else:
+                cursor.execute('''
+                    UPDATE session_context 
+                    SET current_topic = ?, last_activity = ?
+                    WHERE session_id = ?
+                ''', (current_topic, datetime.now().isoformat(), session_id))
+            
+            conn.commit()
+        finally:
+            conn.close()
         
         return True
     
     def get_conversation_context(self, session_id: str) -> str:
         """Get conversation context for AI prompt"""
-        session = self.get_session(session_id)
-        if not session:
-            return ""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(
+                'SELECT current_topic, extracted_context FROM session_context WHERE session_id = ?',
+                (session_id,)
+            ).fetchone()
+            if not row:
+                return ""
+            recent_history = recent_turns(conn, session_id, 5)  # Last 5 turns
+        finally:
+            conn.close()
+        
+        current_topic = row[0]
+        extracted_context = json.loads(row[1]) if row[1] else {}
         
         context_parts = []
         
         # Add current topic
-        if session['current_topic']:
-            context_parts.append(f"Current conversation topic: {session['current_topic']}")
+        if current_topic:
+            context_parts.append(f"Current conversation topic: {current_topic}")
         
         # Add recent conversation history
-        recent_history = session['conversation_history'][-5:]  # Last 5 turns
         if recent_history:
             context_parts.append("Recent conversation:")
             for turn in recent_history:
@@ -129,9 +142,9 @@ class SessionManager:
                 context_parts.append(f"  BoilerAI: {turn['response'][:100]}...")
         
         # Add extracted context
-        if session['extracted_context']:
+        if extracted_context:
             context_parts.append("Extracted context:")
-            for key, value in session['extracted_context'].items():
+            for key, value in extracted_context.items():
                 context_parts.append(f"  {key}: {value}")
         
         return "\n".join(context_parts)
@@ -232,6 +245,7 @@ class SessionManager:
         ''', (cutoff_date.isoformat(),))
         
         deleted_count = cursor.rowcount
+        cursor.execute('DELETE FROM conversation_turns WHERE session_id NOT IN (SELECT session_id FROM session_context)')
         conn.commit()
         conn.close()
         
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Per-session conversation memory for a shared SimpleBoilerAI engine
+Each session id gets its own bounded profile (year, semester, course sets, GPA,
+track) so concurrent users never see each other's context. Sessions live in an
+LRU with an idle timeout; an optional SQLite file keeps them across restarts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set
+
+from performance.ttl_cache import TTLCache
+
+DEFAULT_SESSION_ID = "default"
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_TTL = 6 * 3600.0
+DEFAULT_MAX_PROMPT_COURSES = 12
+
+
+@dataclass
+class SessionMemory:
+    """What one student has told the advisor so far"""
+    user_year: Optional[str] = None
+    user_semester: Optional[str] = None  # 'fall' or 'spring'
+    completed_courses: Set[str] = field(default_factory=set)
+    failed_courses: Set[str] = field(default_factory=set)
+    gpa: Optional[float] = None
+    track_preference: Optional[str] = None
+
+    def update(self, context: Dict[str, Any]):
+        """Fold newly extracted context in; a course passed later is no longer failed"""
+        for key in ('user_year', 'user_semester', 'gpa', 'track_preference'):
+            if key in context:
+                setattr(self, key, context[key])
+        if 'failed_courses' in context:
+            self.failed_courses.update(context['failed_courses'])
+        if 'passed_courses' in context:
+            passed = set(context['passed_courses'])
+            self.completed_courses |= passed
+            self.failed_courses -= passed
+
+    def context_string(self, max_courses: int = DEFAULT_MAX_PROMPT_COURSES) -> str:
+        """Prompt context of bounded size: course lists are capped at max_courses each"""
+        context_parts = []
+        if self.user_year:
+            year_semester = self.user_year
+            if self.user_semester:
+                year_semester += f" {self.user_semester}"
+            context_parts.append(f"User is a {year_semester}")
+        if self.completed_courses:
+            context_parts.append(f"Completed courses: {_course_list(self.completed_courses, max_courses)}")
+        if self.failed_courses:
+            context_parts.append(f"Failed courses: {_course_list(self.failed_courses, max_courses)}")
+        if self.gpa:
+            context_parts.append(f"GPA: {self.gpa}")
+        if self.track_preference:
+            context_parts.append(f"Track preference: {self.track_preference}")
+        return " | ".join(context_parts) if context_parts else "No previous context"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'user_year': self.user_year,
+            'user_semester': self.user_semester,
+            'completed_courses': sorted(self.completed_courses),
+            'failed_courses': sorted(self.failed_courses),
+            'gpa': self.gpa,
+            'track_preference': self.track_preference
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionMemory":
+        return cls(
+            user_year=data.get('user_year'),
+            user_semester=data.get('user_semester'),
+            completed_courses=set(data.get('completed_courses') or ()),
+            failed_courses=set(data.get('failed_courses') or ()),
+            gpa=data.get('gpa'),
+            track_preference=data.get('track_preference')
+        )
+
+
+def _course_list(courses: Iterable[str], limit: int) -> str:
+    ordered = sorted(courses)
+    if len(ordered) <= limit:
+        return ', '.join(ordered)
+    return f"{', '.join(ordered[:limit])} (+{len(ordered) - limit} more)"
+
+
+class _SQLiteSessionStore:
+    """Write-through persistence of session memory, one JSON row per session"""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS session_memory (
+                session_id TEXT PRIMARY KEY,
+                memory TEXT,
+                last_active REAL
+            )
+        ''')
+        self._conn.commit()
+
+    def load(self, session_id: str) -> Optional[SessionMemory]:
+        with self._lock:
+            row = self._conn.execute('SELECT memory FROM session_memory WHERE session_id = ?',
+                                     (session_id,)).fetchone()
+        return SessionMemory.from_dict(json.loads(row[0])) if row else None
+
+    def save(self, session_id: str, memory: SessionMemory):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO session_memory (session_id, memory, last_active) '
+                               'VALUES (?, ?, ?)', (session_id, json.dumps(memory.to_dict()), time.time()))
+            self._conn.commit()
+
+    def delete_idle(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM session_memory WHERE last_active < ?', (older_than,))
+            self._conn.commit()
+            return cursor.rowcount
+
+
+class SessionMemoryStore:
+    """LRU of per-session memories with idle expiry and optional SQLite persistence"""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, idle_ttl: Optional[float] = DEFAULT_IDLE_TTL,
+                 db_path: Optional[str] = None):
+        self.idle_ttl = idle_ttl
+        self._sessions = TTLCache(max_entries=max_sessions, default_ttl=idle_ttl, name="session_memory")
+        self._persistent: Optional[_SQLiteSessionStore] = None
+        if db_path:
+            try:
+                self._persistent = _SQLiteSessionStore(db_path)
+            except sqlite3.Error as e:
+                print(f"Warning: session memory persistence disabled ({db_path}): {e}")
+        self._lock = threading.RLock()
+
+    def get(self, session_id: str) -> SessionMemory:
+        """Memory of one session, created (or reloaded) on first use; access keeps it alive"""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None and self._persistent is not None:
+                try:
+                    memory = self._persistent.load(session_id)
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"Warning: could not load session memory {session_id}: {e}")
+            if memory is None:
+                memory = SessionMemory()
+            # Re-inserting refreshes both the LRU position and the idle deadline
+            self._sessions.set(session_id, memory)
+            return memory
+
+    def update(self, session_id: str, context: Dict[str, Any]) -> SessionMemory:
+        with self._lock:
+            memory = self.get(session_id)
+            memory.update(context)
+            if self._persistent is not None and context:
+                try:
+                    self._persistent.save(session_id, memory)
+                except sqlite3.Error as e:
+                    print(f"Warning: could not save session memory {session_id}: {e}")
+            return memory
+
+    def context_string(self, session_id: str) -> str:
+        with self._lock:
+            return self.get(session_id).context_string()
+
+    def forget(self, session_id: str):
+        self._sessions.delete(session_id)
+
+    def purge_idle(self) -> int:
+        """Drop idle sessions from memory and from the persistent store"""
+        purged = self._sessions.purge_expired()
+        if self._persistent is not None and self.idle_ttl:
+            try:
+                self._persistent.delete_idle(time.time() - self.idle_ttl)
+            except sqlite3.Error as e:
+                print(f"Warning: could not purge session memory: {e}")
+        return purged
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._sessions.get_stats(), 'persistent': self._persistent is not None}
@@ -26,7 +26,14 @@ import os
 import logging
 import time
 import random
-from typing import Dict, Any, Optional
+import threading
+import contextvars
+from typing import Dict, Any, Optional, Tuple
+
+from budgeted_hybrid import score_response
+from course_code_resolver import get_course_resolver
+from session_memory import DEFAULT_MAX_SESSIONS, DEFAULT_SESSION_ID, SessionMemory, SessionMemoryStore
+from tracing import traced
 
 # Import Google Generative AI
 import google.generativeai as genai
@@ -47,11 +54,17 @@ from failure_recovery_system import FailureRecoverySystem, generate_failure_reco
 try:
     from sql_query_handler import SQLQueryHandler
     from hybrid_safety_config import HybridSafetyManager, get_safety_manager
+    from adaptive_router import RouteDecision
 except ImportError:
     SQLQueryHandler = None
     HybridSafetyManager = None
+    RouteDecision = None
     get_safety_manager = lambda: None
 
+# Session whose memory the current query reads and updates
+_current_session: "contextvars.ContextVar[str]" = contextvars.ContextVar("boilerai_session",
+                                                                          default=DEFAULT_SESSION_ID)
+
 # Disable all logging
 logging.getLogger().setLevel(logging.CRITICAL)
 logging.getLogger('httpx').setLevel(logging.CRITICAL)
@@ -90,9 +103,15 @@ class ResilientGeminiClient:
         self.min_interval = 2.0  # Increased to 2 seconds for better rate limiting
         self.request_count = 0
         self.daily_limit = 100  # Daily request limit
+        # One engine may serve several server workers; throttling state is shared
+        self._throttle_lock = threading.Lock()
         
     def _wait_if_needed(self):
         """Implement enhanced request throttling"""
+        with self._throttle_lock:
+            self._throttle()
+    
+    def _throttle(self):
         current_time = time.time()
         time_since_last = current_time - self.last_request_time
         
@@ -114,6 +133,7 @@ class ResilientGeminiClient:
         jitter = random.uniform(0, 2)  # Add more randomness
         return base_delay + jitter
     
+    @traced("llm.chat_completion")
     def chat_completion_with_retry(self, messages=None, system_prompt=None, **kwargs) -> Optional[str]:
         """Make chat completion with automatic retry for overload errors and monitoring"""
         
@@ -332,19 +352,15 @@ class SimpleBoilerAI:
         # Initialize resilient Gemini client
         self.ai_client = ResilientGeminiClient(api_key=api_key)
         
-        # Conversation memory for context tracking
-        self.conversation_memory = {
-            'user_year': None,
-            'user_semester': None,  # 'fall' or 'spring'
-            'completed_courses': [],
-            'failed_courses': [],
-            'gpa': None,
-            'track_preference': None,
-            'conversation_history': []
-        }
+        # Conversation memory for context tracking, one bounded profile per session
+        self.session_memory = SessionMemoryStore(
+            max_sessions=int(os.getenv("BOILERAI_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)),
+            db_path=os.getenv("BOILERAI_SESSION_DB") or None
+        )
         
         # Load knowledge base quietly
         self.knowledge_base = self.load_knowledge_base()
+        self.course_resolver = get_course_resolver()
         if self.knowledge_base:
             courses_count = len(self.knowledge_base.get('courses', {}))
             tracks_count = len(self.knowledge_base.get('tracks', {}))
@@ -562,54 +578,24 @@ class SimpleBoilerAI:
             }
         }
     
+    @property
+    def conversation_memory(self) -> SessionMemory:
+        """Memory of the session the current query belongs to"""
+        return self.session_memory.get(_current_session.get())
+    
     def update_memory(self, context: Dict[str, Any]):
         """Update conversation memory with new context"""
-        if 'user_year' in context:
-            self.conversation_memory['user_year'] = context['user_year']
-        
-        if 'user_semester' in context:
-            self.conversation_memory['user_semester'] = context['user_semester']
-        
-        if 'passed_courses' in context:
-            self.conversation_memory['completed_courses'].extend(context['passed_courses'])
-        
-        if 'failed_courses' in context:
-            self.conversation_memory['failed_courses'].extend(context['failed_courses'])
-        
-        if 'gpa' in context:
-            self.conversation_memory['gpa'] = context['gpa']
-        
-        if 'track_preference' in context:
-            self.conversation_memory['track_preference'] = context['track_preference']
+        self.session_memory.update(_current_session.get(), context)
     
     def get_memory_context(self) -> str:
         """Generate context string from memory for AI prompts"""
-        context_parts = []
-        
-        if self.conversation_memory['user_year']:
-            year_semester = self.conversation_memory['user_year']
-            if self.conversation_memory['user_semester']:
-                year_semester += f" {self.conversation_memory['user_semester']}"
-            context_parts.append(f"User is a {year_semester}")
-        
-        if self.conversation_memory['completed_courses']:
-            context_parts.append(f"Completed courses: {', '.join(self.conversation_memory['completed_courses'])}")
-        
-        if self.conversation_memory['failed_courses']:
-            context_parts.append(f"Failed courses: {', '.join(self.conversation_memory['failed_courses'])}")
-        
-        if self.conversation_memory['gpa']:
-            context_parts.append(f"GPA: {self.conversation_memory['gpa']}")
-        
-        if self.conversation_memory['track_preference']:
-            context_parts.append(f"Track preference: {self.conversation_memory['track_preference']}")
-        
-        return " | ".join(context_parts) if context_parts else "No previous context"
+        return self.session_memory.context_string(_current_session.get())
     
     def should_ask_about_tracks(self) -> bool:
         """Determine if it's appropriate to ask about track selection"""
-        year = self.conversation_memory.get('user_year')
-        semester = self.conversation_memory.get('user_semester')
+        memory = self.conversation_memory
+        year = memory.user_year
+        semester = memory.user_semester
         
         # Only ask about tracks if user is in sophomore spring or later
         if year == 'sophomore' and semester == 'spring':
@@ -622,9 +608,10 @@ class SimpleBoilerAI:
     def analyze_course_requirements(self, query: str) -> str:
         """Analyze course requirements based on context and provide comprehensive information"""
         query_lower = query.lower()
-        track_pref = self.conversation_memory.get('track_preference')
-        year = self.conversation_memory.get('user_year')
-        semester = self.conversation_memory.get('user_semester')
+        memory = self.conversation_memory
+        track_pref = memory.track_preference
+        year = memory.user_year
+        semester = memory.user_semester
         
         # STAT course requirements
         if 'stat' in query_lower or 'statistics' in query_lower:
@@ -678,8 +665,9 @@ class SimpleBoilerAI:
             return context
         
         # Otherwise, provide general guidance based on user's year
-        year = self.conversation_memory.get('user_year')
-        semester = self.conversation_memory.get('user_semester')
+        memory = self.conversation_memory
+        year = memory.user_year
+        semester = memory.user_semester
         
         if year == 'freshman':
             if semester == 'fall':
@@ -701,82 +689,8 @@ class SimpleBoilerAI:
         query_lower = query.lower()
         relevant_data = {}
         
-        # Extract course codes mentioned in query
-        import re
-        # Enhanced pattern to catch special formats like CS 49000-DSO
-        course_pattern = r'(cs|math|ma|stat|phys|engr|com|engl)\s*(\d{3,5}(?:-[a-z]+)?)'
-        course_matches = re.findall(course_pattern, query_lower)
-        mentioned_courses = []
-        
-        for match in course_matches:
-            dept = match[0].upper()
-            num = match[1]
-            
-            # Normalize common course code variations
-            if dept == "CS":
-                if num == "182":  # CS 182 → CS 18200
-                    mentioned_courses.append("CS 18200")
-                elif num == "180":  # CS 180 → CS 18000
-                    mentioned_courses.append("CS 18000")
-                elif num == "240":  # CS 240 → CS 24000
-                    mentioned_courses.append("CS 24000")
-                elif num == "250":  # CS 250 → CS 25000
-                    mentioned_courses.append("CS 25000")
-                elif num == "251":  # CS 251 → CS 25100
-                    mentioned_courses.append("CS 25100")
-                elif num == "252":  # CS 252 → CS 25200
-                    mentioned_courses.append("CS 25200")
-                elif len(num) == 3:  # Add 00 to 3-digit numbers
-                    mentioned_courses.append(f"{dept} {num}00")
-                else:
-                    mentioned_courses.append(f"{dept} {num}")
-            else:
-                # For non-CS courses, add as-is
-                mentioned_courses.append(f"{dept} {num}")
-                if len(num) == 3:  # Also try with 00 suffix
-                    mentioned_courses.append(f"{dept} {num}00")
-        
-        # Also check for specific course names mentioned in query
-        course_name_mappings = {
-            "data mining": "CS 37300",
-            "machine learning": "CS 37300", 
-            "artificial intelligence": "CS 47100",
-            "web search": "CS 47300",
-            "information search": "CS 47300",
-            "software engineering i": "CS 30700",
-            "software engineering 1": "CS 30700",
-            "operating systems": "CS 35400",
-            "compilers": "CS 35200",
-            "computer networks": "CS 42200",
-            "computer security": "CS 42600",
-            "cloud computing": "CS 35100",
-            "embedded systems": "CS 48900",
-            "distributed systems": "CS 49000-DSO",
-            "software security": "CS 49000-SWS",
-            "database": "CS 44800",
-            "relational database": "CS 44800",
-            "robotics": "CS 45800",
-            "natural language processing": "CS 57700",
-            "nlp": "CS 57700",
-            "statistical machine learning": "CS 57800",
-            "programming languages": "CS 45600",
-            "software testing": "CS 40800",
-            "senior project": "CS 40700",
-            "numerical methods": "CS 31400",
-            "information systems": "CS 34800",
-            "concurrency": "CS 35300",
-            "parallelism": "CS 35300",
-            "data visualization": "CS 43900",
-            "large scale analytics": "CS 44000",
-            "human computer": "CS 47500",
-            "hci": "CS 47500",
-            "theory of computation": "CS 48300",
-            "competitive programming": "CS 31100"
-        }
-        
-        for name, course_code in course_name_mappings.items():
-            if name in query_lower:
-                mentioned_courses.append(course_code)
+        # Course codes, short codes ("CS 180") and course names, in one pass
+        mentioned_courses = self.course_resolver.extract(query)
         
         # Add specific courses mentioned
         if mentioned_courses:
@@ -1202,53 +1116,23 @@ RESPONSE RULES:
         Classify query to determine if it should use SQL (fast) or JSON (complex) approach
         Returns: 'sql' for SQL-optimized queries, 'json' for complex/conversational queries
         """
-        # Check safety conditions first
-        if not self.sql_handler:
-            return 'json'  # Always use JSON if SQL handler not available
-
-        if self.safety_manager and not self.safety_manager.should_use_sql(query):
-            return 'json'  # Safety manager says no to SQL
-
-        query_lower = query.lower().strip()
-
-        # SQL-optimized query patterns (fast structured data retrieval)
-        sql_indicators = [
-            # Prerequisite queries
-            'prerequisite', 'prereq', 'need before', 'required before',
-
-            # Course information queries
-            'tell me about', 'what is', 'describe', 'info about', 'details about',
-
-            # Track queries
-            'track courses', 'track requirements', 'courses in', 'machine intelligence', 'software engineering',
-
-            # Graduation timeline queries
-            'graduate in', 'graduation timeline', 'early graduation',
-
-            # Failure impact queries
-            'fail', 'failed', 'what happens if', 'impact of failing',
-        ]
-
-        # Check for SQL indicators
-        for indicator in sql_indicators:
-            if indicator in query_lower:
-                return 'sql'
-
-        # Conversational patterns that need AI (use JSON approach)
-        conversational_indicators = [
-            'help me', 'what should i', 'advice', 'recommend', 'suggest',
-            'confused', 'not sure', 'uncertain', 'complex', 'planning'
-        ]
+        # Classification only: no outcome is recorded, so no breaker trial may be claimed
+        decision = self.route_query(query, preview=True)
+        return decision.path if decision else 'json'
 
-        for indicator in conversational_indicators:
-            if indicator in query_lower:
-                return 'json'
-
-        # Default to JSON for safety (AI handles edge cases better)
-        return 'json'
+    def route_query(self, query: str, preview: bool = False) -> Optional[RouteDecision]:
+        """Adaptive SQL/JSON routing decision, or None when there is no safety manager to learn from"""
+        if not self.safety_manager:
+            return None
+        return self.safety_manager.route_query(query, sql_available=self.sql_handler is not None,
+                                               preview=preview)
 
     def process_query_with_sql(self, query: str) -> str:
         """Process query using SQL handler with AI enhancement and safety monitoring"""
+        return self._process_query_with_sql(query)[0]
+
+    def _process_query_with_sql(self, query: str) -> Tuple[str, bool]:
+        """(response, whether SQL itself answered) - AI fallbacks count as SQL failures"""
         sql_start_time = time.time()
 
         try:
@@ -1276,13 +1160,13 @@ Context from our system: {error_context.get('suggestion', 'No specific data foun
 
 Please provide a helpful response based on your knowledge of Purdue Computer Science courses and degree requirements.
 """
-                        return self.get_ai_response(ai_prompt)
+                        return self.get_ai_response(ai_prompt), False
                     else:
                         # Old string format - use directly
-                        return error_context
+                        return error_context, False
                 else:
                     # No user-friendly error - fall back to AI
-                    return self.get_ai_response(query)
+                    return self.get_ai_response(query), False
 
             # Record successful SQL query for monitoring
             if self.safety_manager:
@@ -1295,9 +1179,9 @@ Please provide a helpful response based on your knowledge of Purdue Computer Sci
             if isinstance(sql_data, (list, dict)):
                 # This means SQL returned raw data instead of formatted text
                 # Fall back to AI processing for better user experience
-                return self.get_ai_response(query)
+                return self.get_ai_response(query), False
             else:
-                return sql_data
+                return sql_data, True
 
         except Exception as e:
             # Log the SQL error and fall back to AI
@@ -1306,7 +1190,7 @@ Please provide a helpful response based on your knowledge of Purdue Computer Sci
                 self.safety_manager.record_json_fallback(query, f"SQL exception: {str(e)}")
 
             print(f"[ERROR] SQL query failed: {e}")
-            return self.get_ai_response(query)
+            return self.get_ai_response(query), False
 
     def _is_career_networking_query(self, query: str) -> bool:
         """Use AI to intelligently detect if query is about career networking/finding people"""
@@ -1382,16 +1266,24 @@ Keep the response conversational and helpful.
 """
             return self.get_ai_response(fallback_prompt)
 
-    def process_query(self, query: str) -> dict:
+    def process_query(self, query: str, session_id: Optional[str] = None) -> dict:
         """
         Main processing method - REQUIRED for BoilerAI integration
 
         Args:
             query: User's question
+            session_id: Conversation the query belongs to; memory is kept per session
 
         Returns:
             dict: Standardized response with response, thinking, sources, confidence
         """
+        token = _current_session.set(session_id or DEFAULT_SESSION_ID)
+        try:
+            return self._process_query(query)
+        finally:
+            _current_session.reset(token)
+
+    def _process_query(self, query: str) -> dict:
         try:
             # Check for career networking queries first
             try:
@@ -1410,28 +1302,40 @@ Keep the response conversational and helpful.
                 pass  # Career networking not available
 
             # Determine which approach to use for academic queries
-            routing_decision = self.classify_query_for_hybrid_routing(query)
-
-            if routing_decision == 'sql' and self.sql_handler:
-                # Use SQL approach for structured queries (7-10x faster)
-                response = self.process_query_with_sql(query)
-                return {
-                    "response": response,
-                    "thinking": "Processed using SQL database for fast structured data retrieval",
-                    "sources": ["Purdue CS knowledge database", "Course information system"],
-                    "confidence": 0.9
-                }
-            else:
-                # Use traditional JSON + AI approach for complex/conversational queries
-                if self.safety_manager:
-                    self.safety_manager.record_json_fallback(query, "Complex/conversational query")
-                response = self.get_ai_response(query)
-                return {
-                    "response": response,
-                    "thinking": "Processed using AI with comprehensive knowledge base",
-                    "sources": ["Purdue CS knowledge graph", "Academic advising database"],
-                    "confidence": 0.85
-                }
+            decision = self.route_query(query)
+            routing_decision = decision.path if decision else 'json'
+            start = time.perf_counter()
+            response, answered, confidence = None, False, 0.0
+            try:
+                if routing_decision == 'sql' and self.sql_handler:
+                    # Use SQL approach for structured queries (7-10x faster)
+                    response, answered = self._process_query_with_sql(query)
+                    confidence = 0.9
+                    return {
+                        "response": response,
+                        "thinking": "Processed using SQL database for fast structured data retrieval",
+                        "sources": ["Purdue CS knowledge database", "Course information system"],
+                        "confidence": confidence
+                    }
+                else:
+                    # Use traditional JSON + AI approach for complex/conversational queries
+                    if self.safety_manager:
+                        self.safety_manager.record_json_fallback(query, "Complex/conversational query")
+                    response = self.get_ai_response(query)
+                    answered = bool(response)
+                    confidence = 0.85
+                    return {
+                        "response": response,
+                        "thinking": "Processed using AI with comprehensive knowledge base",
+                        "sources": ["Purdue CS knowledge graph", "Academic advising database"],
+                        "confidence": confidence
+                    }
+            finally:
+                if decision:
+                    # End-to-end latency and answer quality teach the router which path suits this query type
+                    quality = confidence * score_response(query, response) if answered else 0.0
+                    self.safety_manager.record_route_outcome(decision, (time.perf_counter() - start) * 1000,
+                                                             answered and quality > 0, quality)
 
         except Exception as e:
             return {
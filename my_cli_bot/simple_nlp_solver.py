@@ -36,11 +36,6 @@ class SimpleNLPSolver:
         self.course_nodes = {}
         self.track_nodes = {}
         self.concept_nodes = {}
-        self.query_logger = None  # Will be set externally
-        
-    def set_query_logger(self, query_logger):
-        """Set the query logger for detailed logging"""
-        self.query_logger = query_logger
     
     def build_knowledge_graph(self, data: Dict[str, Any]):
         """Build knowledge graph from data"""
@@ -57,12 +52,9 @@ class SimpleNLPSolver:
             )
             self.course_nodes[course_code] = node
             self.knowledge_graph[course_code] = node
-            
-            if self.query_logger:
-                self.query_logger.log_knowledge_node_access("system", course_code, "course", "create", course_data)
         
         # Add track nodes
-        tracks = data.get("track_requirements", {})
+        tracks = self._track_section(data)
         for track_name, track_data in tracks.items():
             node = KnowledgeNode(
                 id=track_name,
@@ -72,9 +64,6 @@ class SimpleNLPSolver:
             )
             self.track_nodes[track_name] = node
             self.knowledge_graph[track_name] = node
-            
-            if self.query_logger:
-                self.query_logger.log_knowledge_node_access("system", track_name, "track", "create", track_data)
         
         # Add concept nodes
         concepts = {
@@ -94,24 +83,72 @@ class SimpleNLPSolver:
             )
             self.concept_nodes[concept_name] = node
             self.knowledge_graph[concept_name] = node
-            
-            if self.query_logger:
-                self.query_logger.log_knowledge_node_access("system", concept_name, "concept", "create", 
-                    {"related_items": related_items})
         
         # Add prerequisite relationships
         prerequisites = data.get("prerequisites", {})
         for course, prereqs in prerequisites.items():
             if course in self.course_nodes:
                 self.course_nodes[course].connections.extend(prereqs)
-                
-                # Log graph traversal for prerequisites
-                if self.query_logger:
-                    for prereq in prereqs:
-                        self.query_logger.log_graph_traversal("system", prereq, course, [prereq, course], "prerequisite")
         
         self.logger.info(f"Knowledge graph built with {len(self.knowledge_graph)} nodes")
-    
+
+    @staticmethod
+    def _track_section(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Track definitions: the merged knowledge's tracks section, or track_requirements in older files"""
+        return data.get("tracks") or data.get("track_requirements") or {}
+
+    def apply_knowledge_diff(self, diff, data: Dict[str, Any]):
+        """Patch course/track nodes and prerequisite edges from a knowledge_sync.KnowledgeDiff"""
+        # Patch copies and swap them in, so concurrent readers never see a half-applied diff
+        course_nodes = dict(self.course_nodes)
+        track_nodes = dict(self.track_nodes)
+        knowledge_graph = dict(self.knowledge_graph)
+
+        courses = data.get("courses", {})
+        prerequisites = data.get("prerequisites", {})
+        course_diff = diff.section("courses")
+        for course_code in course_diff.removed:
+            course_nodes.pop(course_code, None)
+            if course_code in knowledge_graph and knowledge_graph[course_code].type == "course":
+                del knowledge_graph[course_code]
+
+        # A course node carries its prerequisites as connections, so either change rebuilds it
+        touched = set(course_diff.added) | set(course_diff.changed) | diff.section("prerequisites").touched
+        for course_code in touched:
+            if course_code not in courses:
+                continue
+            node = KnowledgeNode(
+                id=course_code,
+                type="course",
+                content=courses[course_code],
+                connections=list(prerequisites.get(course_code, []))
+            )
+            course_nodes[course_code] = node
+            knowledge_graph[course_code] = node
+
+        tracks = self._track_section(data)
+        track_diff = diff.section("tracks")
+        for track_name in track_diff.removed:
+            track_nodes.pop(track_name, None)
+            if track_name in knowledge_graph and knowledge_graph[track_name].type == "track":
+                del knowledge_graph[track_name]
+        for track_name in set(track_diff.added) | set(track_diff.changed):
+            node = KnowledgeNode(id=track_name, type="track", content=tracks[track_name], connections=[])
+            track_nodes[track_name] = node
+            knowledge_graph[track_name] = node
+
+        # An edited section this method does not read would silently never reach the graph
+        unapplied = [name for name, section in diff.sections.items()
+                     if section and name not in ("courses", "prerequisites", "tracks", "degree_requirements")]
+        if unapplied:
+            self.logger.warning(f"Knowledge diff sections not applied to the graph: {unapplied}")
+
+        self.course_nodes = course_nodes
+        self.track_nodes = track_nodes
+        self.knowledge_graph = knowledge_graph
+        self.logger.info(f"Knowledge graph patched: {len(touched)} course nodes, "
+                         f"{len(track_diff.touched)} track nodes")
+
     def understand_query_semantically(self, query: str) -> SemanticQuery:
         """Understand query using semantic analysis"""
         self.logger.info(f"Performing semantic analysis: {query}")
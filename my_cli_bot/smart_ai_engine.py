@@ -14,6 +14,8 @@ import logging
 
 # Import comprehensive failure analyzer (includes all prerequisite analysis)
 from comprehensive_failure_analyzer import ComprehensiveFailureAnalyzer
+from tracing import get_tracer
+from metrics import STAGE_INTENT, STAGE_PLANNER, stage_timer
 
 @dataclass
 class QueryIntent:
@@ -41,14 +43,8 @@ class SmartAIEngine:
         self.logger = logging.getLogger(__name__)
         self.setup_logging()
         
-        # Initialize advanced query logger
-        try:
-            from advanced_query_logger import AdvancedQueryLogger
-            self.query_logger = AdvancedQueryLogger("boilerai_queries.log")
-            self.logger.info("Advanced query logger initialized")
-        except ImportError:
-            self.query_logger = None
-            self.logger.warning("Advanced query logger not available")
+        # Span tracing (sampled, written off the request path)
+        self.tracer = get_tracer()
         
         self.data_sources = []
         self.intent_patterns = {}
@@ -631,8 +627,6 @@ class SmartAIEngine:
             # Initialize NLP solver if not already done
             if not hasattr(self, 'nlp_solver'):
                 self.nlp_solver = SimpleNLPSolver()
-                if self.query_logger:
-                    self.nlp_solver.set_query_logger(self.query_logger)
                 self.nlp_solver.build_knowledge_graph(data)
             
             # Understand query semantically
@@ -778,83 +772,34 @@ class SmartAIEngine:
         return "I'm here to help with Purdue CS academic advising. What specific question do you have about courses, requirements, or planning?"
 
     def process_query(self, query: str, context: Dict[str, Any] = None) -> str:
-        """Main method to process a query and return accurate response with advanced logging"""
+        """Main method to process a query and return accurate response with span tracing"""
         
-        # Start query session logging
-        session_id = None
-        if self.query_logger:
-            session_id = self.query_logger.start_session(query)
-        
-        try:
-            # Step 1: Understand the query
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "query_understanding", 
-                    {"query": query, "context": context}, {})
-            
-            intent = self.understand_query(query, context)
-            
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "intent_detection", 
-                    {"query": query}, {"intent": intent.primary_intent, "confidence": intent.confidence})
+        with self.tracer.span("smart_ai.process_query", query_length=len(query)) as root:
+            try:
+                # Step 1: Understand the query
+                with self.tracer.span("intent_analysis") as span, stage_timer(STAGE_INTENT):
+                    intent = self.understand_query(query, context)
+                    span.set(intent=intent.primary_intent, confidence=round(intent.confidence, 3),
+                             entities=intent.entities)
                 
-                # Log NLP processing
-                self.query_logger.log_nlp_processing(session_id, "intent_analysis", 
-                    intent.entities, intent.context_clues, intent.primary_intent)
-            
-            # Step 2: Fetch relevant data
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "data_fetching", 
-                    {"intent": intent.primary_intent}, {})
-            
-            data = self.fetch_relevant_data(intent)
-            
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "data_retrieved", 
-                    {"intent": intent.primary_intent}, {"data_sources": len(data)})
+                # Step 2: Fetch relevant data
+                with self.tracer.span("knowledge_lookup", intent=intent.primary_intent) as span:
+                    data = self.fetch_relevant_data(intent)
+                    span.set(data_sources=sorted(data))
                 
-                # Log knowledge node access
-                for source_name, source_data in data.items():
-                    if isinstance(source_data, dict) and source_data:
-                        self.query_logger.log_knowledge_node_access(session_id, source_name, 
-                            "data_source", "fetch", {"items": len(source_data)})
-            
-            # Step 3: Generate accurate response
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "response_generation", 
-                    {"intent": intent.primary_intent, "data_sources": len(data)}, {})
-            
-            response = self.generate_accurate_response(query, intent, data, context)
-            
-            if self.query_logger:
-                self.query_logger.log_step(session_id, "response_completed", 
-                    {"intent": intent.primary_intent}, {"response_length": len(response)})
+                # Step 3: Generate accurate response
+                with self.tracer.span("response_generation", intent=intent.primary_intent) as span:
+                    response = self.generate_accurate_response(query, intent, data, context)
+                    span.set(response_length=len(response))
                 
-                # Log AI method used
-                self.query_logger.log_ai_method_used(session_id, "smart_ai_engine", {
-                    "method": "nlp_knowledge_solver",
-                    "intent": intent.primary_intent,
-                    "entities": intent.entities,
-                    "concepts": intent.context_clues
-                })
-            
-            self.logger.info(f"Successfully processed query: {query[:50]}...")
-            
-            # End session logging
-            if self.query_logger:
-                self.query_logger.end_session(session_id, response)
-            
-            return response
-            
-        except Exception as e:
-            self.logger.error(f"Error processing query: {e}")
-            
-            # Log error in session
-            if self.query_logger and session_id:
-                self.query_logger.log_step(session_id, "error_handling", 
-                    {"query": query}, {"error": str(e)}, success=False, error_message=str(e))
-                self.query_logger.end_session(session_id, f"Error: {str(e)}")
-            
-            return f"I encountered an error while processing your query. Please try rephrasing your question or contact support if the issue persists. Error: {str(e)}"
+                self.logger.info(f"Successfully processed query: {query[:50]}...")
+                return response
+                
+            except Exception as e:
+                self.logger.error(f"Error processing query: {e}")
+                root.set(error=str(e))
+                
+                return f"I encountered an error while processing your query. Please try rephrasing your question or contact support if the issue persists. Error: {str(e)}"
     
     def _should_use_prerequisite_analyzer(self, query: str) -> bool:
         """Determine if query should be handled by intelligent prerequisite analyzer"""
@@ -969,15 +914,9 @@ class SmartAIEngine:
             self.logger.info(f"Using comprehensive failure analyzer for: {query[:50]}...")
             
             # Analyze the query using the comprehensive failure analyzer
-            response = self.prerequisite_analyzer.analyze_failure_query(query)
-            
-            # Log the method used
-            if self.query_logger:
-                self.query_logger.log_ai_method_used("current_session", "comprehensive_failure_analyzer", {
-                    "query": query[:100],
-                    "response_length": len(response),
-                    "analysis_type": "comprehensive_failure_analysis"
-                })
+            with self.tracer.span("planner.failure_analysis") as span, stage_timer(STAGE_PLANNER):
+                response = self.prerequisite_analyzer.analyze_failure_query(query)
+                span.set(response_length=len(response))
             
             self.logger.info(f"Generated comprehensive failure analysis response: {len(response)} characters")
             return response
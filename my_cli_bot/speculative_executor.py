@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Speculative execution of alternative answer paths
+Cheap deterministic paths (SQL lookups, knowledge-graph solver) run concurrently
+with the primary (LLM) path. The first deterministic answer at or above the win
+threshold is returned at once and the other paths are cancelled; otherwise the
+primary answer is used. Wins are recorded per intent, and intents that
+deterministic paths keep winning get the primary path hedged (started late).
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from metrics import get_metrics_registry
+
+# A path receives a cancellation event and returns (response, confidence) or None
+PathFn = Callable[[threading.Event], Optional[Tuple[str, float]]]
+
+DEFAULT_WIN_THRESHOLD = 0.85
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_HEDGE_DELAY = 0.25
+
+
+@dataclass
+class PathResult:
+    """Outcome of one path"""
+    path: str
+    response: Optional[str] = None
+    confidence: float = 0.0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+    deterministic: bool = True
+
+
+@dataclass
+class IntentWins:
+    """Which path answered, per intent"""
+    total: int = 0
+    deterministic: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def deterministic_ratio(self) -> float:
+        return self.deterministic / self.total if self.total > 0 else 0.0
+
+
+class SpeculativeExecutor:
+    """Races deterministic paths against a primary path on a shared thread pool"""
+
+    def __init__(self, max_workers: int = 8, win_threshold: float = DEFAULT_WIN_THRESHOLD,
+                 timeout: float = DEFAULT_TIMEOUT, hedge_delay: float = DEFAULT_HEDGE_DELAY,
+                 learn_after: int = 20, hedge_ratio: float = 0.9):
+        self.win_threshold = win_threshold
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.learn_after = learn_after
+        self.hedge_ratio = hedge_ratio
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._wins: Dict[str, IntentWins] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str, fn: PathFn, cancel: threading.Event, deterministic: bool) -> PathResult:
+        start = time.perf_counter()
+        result = PathResult(name, deterministic=deterministic)
+        if cancel.is_set():
+            return result
+        try:
+            answer = fn(cancel)
+            if answer:
+                result.response, result.confidence = answer
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def prefers_deterministic(self, intent: str) -> bool:
+        """True once deterministic paths win nearly every query of this intent"""
+        with self._lock:
+            wins = self._wins.get(intent)
+            return bool(wins) and wins.total >= self.learn_after and wins.deterministic_ratio >= self.hedge_ratio
+
+    def run(self, intent: str, deterministic: Dict[str, PathFn],
+            primary: Optional[Tuple[str, PathFn]] = None) -> PathResult:
+        """
+        Best answer across paths. When every path failed, PathResult.response is None
+        and its error lists each path's error ("path: error; ...").
+        """
+        cancel = threading.Event()
+        futures: Dict[Future, str] = {
+            self._pool.submit(self._call, name, fn, cancel, True): name
+            for name, fn in deterministic.items()
+        }
+        primary_future: Optional[Future] = None
+
+        def launch_primary():
+            nonlocal primary_future
+            primary_future = self._pool.submit(self._call, primary[0], primary[1], cancel, False)
+            futures[primary_future] = primary[0]
+            pending.add(primary_future)
+
+        pending = set(futures)
+        hedge_until = time.monotonic() + self.hedge_delay if self.prefers_deterministic(intent) else 0.0
+        if primary and (not hedge_until or not pending):
+            launch_primary()
+
+        deadline = time.monotonic() + self.timeout
+        winner: Optional[PathResult] = None
+        fallback: Optional[PathResult] = None
+        errors: Dict[str, str] = {}
+
+        while pending and winner is None:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_for = deadline - now
+            if primary and primary_future is None:
+                wait_for = max(0.0, min(wait_for, hedge_until - now))
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if not result.response:
+                    errors[result.path] = result.error or "no answer"
+                    continue
+                if not result.deterministic or result.confidence >= self.win_threshold:
+                    winner = result
+                    break
+                if fallback is None or result.confidence > fallback.confidence:
+                    fallback = result
+
+            # Start the hedged primary once its delay passes or the cheap paths came up short
+            if winner is None and primary and primary_future is None and (
+                    not pending or time.monotonic() >= hedge_until):
+                launch_primary()
+
+        cancel.set()
+        for future in pending:
+            future.cancel()
+
+        for future in pending:
+            errors.setdefault(futures[future], f"timed out after {self.timeout:g}s")
+        winner = winner or fallback or PathResult(
+            "none", deterministic=False, error="; ".join(f"{path}: {error}" for path, error in errors.items()))
+        self._record(intent, winner)
+        return winner
+
+    def _record(self, intent: str, winner: PathResult):
+        with self._lock:
+            wins = self._wins.setdefault(intent, IntentWins())
+            wins.total += 1
+            if winner.deterministic and winner.response:
+                wins.deterministic += 1
+            wins.by_path[winner.path] = wins.by_path.get(winner.path, 0) + 1
+        get_metrics_registry().counter("speculative_wins_total", "Speculative execution winners",
+                                       intent=intent, path=winner.path).inc()
+
+    def get_win_stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                intent: {'total': wins.total, 'deterministic_ratio': wins.deterministic_ratio,
+                         'by_path': dict(wins.by_path)}
+                for intent, wins in self._wins.items()
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+_executor: Optional[SpeculativeExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_speculative_executor() -> SpeculativeExecutor:
+    """Process-wide executor so win statistics accumulate across engines"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = SpeculativeExecutor()
+        return _executor
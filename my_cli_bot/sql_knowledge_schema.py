@@ -10,6 +10,25 @@ import os
 from typing import Dict, List, Any, Optional
 from contextlib import contextmanager
 
+from bulk_ingest import bulk_load
+
+# Secondary indexes by name; migrations drop them and rebuild them after the load
+INDEXES = {
+    "idx_courses_code": "CREATE INDEX IF NOT EXISTS idx_courses_code ON courses(code);",
+    "idx_courses_type": "CREATE INDEX IF NOT EXISTS idx_courses_type ON courses(course_type);",
+    "idx_courses_critical": "CREATE INDEX IF NOT EXISTS idx_courses_critical ON courses(is_critical);",
+    "idx_prerequisites_course": "CREATE INDEX IF NOT EXISTS idx_prerequisites_course ON prerequisites(course_code);",
+    "idx_prerequisites_prereq":
+        "CREATE INDEX IF NOT EXISTS idx_prerequisites_prereq ON prerequisites(prerequisite_code);",
+    "idx_track_requirements_track":
+        "CREATE INDEX IF NOT EXISTS idx_track_requirements_track ON track_requirements(track_code);",
+    "idx_track_requirements_course":
+        "CREATE INDEX IF NOT EXISTS idx_track_requirements_course ON track_requirements(course_code);",
+    "idx_failure_recovery_course":
+        "CREATE INDEX IF NOT EXISTS idx_failure_recovery_course ON failure_recovery(failed_course_code);",
+}
+
+
 class SQLKnowledgeSchema:
     """
     Manages the SQL schema for the academic knowledge base
@@ -203,18 +222,7 @@ class SQLKnowledgeSchema:
     
     def _create_indexes(self, cursor):
         """Create performance indexes"""
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_courses_code ON courses(code);",
-            "CREATE INDEX IF NOT EXISTS idx_courses_type ON courses(course_type);",
-            "CREATE INDEX IF NOT EXISTS idx_courses_critical ON courses(is_critical);",
-            "CREATE INDEX IF NOT EXISTS idx_prerequisites_course ON prerequisites(course_code);",
-            "CREATE INDEX IF NOT EXISTS idx_prerequisites_prereq ON prerequisites(prerequisite_code);",
-            "CREATE INDEX IF NOT EXISTS idx_track_requirements_track ON track_requirements(track_code);",
-            "CREATE INDEX IF NOT EXISTS idx_track_requirements_course ON track_requirements(course_code);",
-            "CREATE INDEX IF NOT EXISTS idx_failure_recovery_course ON failure_recovery(failed_course_code);",
-        ]
-        
-        for index in indexes:
+        for index in INDEXES.values():
             cursor.execute(index)
     
     def migrate_from_json(self, json_path: str = "data/cs_knowledge_graph.json"):
@@ -224,7 +232,8 @@ class SQLKnowledgeSchema:
         with open(json_path, 'r') as f:
             data = json.load(f)
         
-        with self.get_connection() as conn:
+        # Clear and reload in one transaction, with the indexes rebuilt once at the end
+        with self.get_connection() as conn, bulk_load(conn, INDEXES):
             cursor = conn.cursor()
             
             # Clear existing data
@@ -269,14 +278,14 @@ class SQLKnowledgeSchema:
         """Migrate courses data"""
         print("  📚 Migrating courses...")
         
-        for course_code, course_info in courses_data.items():
-            cursor.execute("""
-                INSERT OR REPLACE INTO courses (
-                    code, title, credits, description, course_type, semester,
-                    is_critical, difficulty_level, difficulty_rating,
-                    time_commitment, prerequisite_knowledge
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        cursor.executemany("""
+            INSERT OR REPLACE INTO courses (
+                code, title, credits, description, course_type, semester,
+                is_critical, difficulty_level, difficulty_rating,
+                time_commitment, prerequisite_knowledge
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (
                 course_code,
                 course_info.get('title', ''),
                 course_info.get('credits', 0),
@@ -288,40 +297,34 @@ class SQLKnowledgeSchema:
                 course_info.get('difficulty_rating', 0.0),
                 course_info.get('time_commitment', ''),
                 course_info.get('prerequisite_knowledge', '')
-            ))
-            
-            # Migrate difficulty factors
-            for factor in course_info.get('difficulty_factors', []):
-                cursor.execute("""
-                    INSERT INTO course_difficulty_factors (course_code, factor_description)
-                    VALUES (?, ?)
-                """, (course_code, factor))
-            
-            # Migrate success tips
-            for tip in course_info.get('success_tips', []):
-                cursor.execute("""
-                    INSERT INTO course_success_tips (course_code, tip_description)
-                    VALUES (?, ?)
-                """, (course_code, tip))
-            
-            # Migrate common struggles
-            for struggle in course_info.get('common_struggles', []):
-                cursor.execute("""
-                    INSERT INTO course_struggles (course_code, struggle_description)
-                    VALUES (?, ?)
-                """, (course_code, struggle))
+            )
+            for course_code, course_info in courses_data.items()
+        ))
+        
+        # Migrate difficulty factors, success tips and common struggles
+        for table, column, key in (
+            ('course_difficulty_factors', 'factor_description', 'difficulty_factors'),
+            ('course_success_tips', 'tip_description', 'success_tips'),
+            ('course_struggles', 'struggle_description', 'common_struggles'),
+        ):
+            cursor.executemany(
+                f"INSERT INTO {table} (course_code, {column}) VALUES (?, ?)",
+                ((course_code, item)
+                 for course_code, course_info in courses_data.items()
+                 for item in course_info.get(key, []))
+            )
     
     def _migrate_tracks(self, cursor, tracks_data):
         """Migrate tracks data"""
         print("  🎯 Migrating tracks...")
         
-        for track_code, track_info in tracks_data.items():
-            cursor.execute("""
-                INSERT OR REPLACE INTO tracks (
-                    code, name, description, career_focus,
-                    difficulty_rating, job_market_rating, research_oriented
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+        cursor.executemany("""
+            INSERT OR REPLACE INTO tracks (
+                code, name, description, career_focus,
+                difficulty_rating, job_market_rating, research_oriented
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (
                 track_code,
                 track_info.get('name', ''),
                 track_info.get('description', ''),
@@ -329,66 +332,78 @@ class SQLKnowledgeSchema:
                 track_info.get('difficulty_rating', 0.0),
                 track_info.get('job_market_rating', 0.0),
                 track_info.get('research_oriented', False)
-            ))
-            
-            # Migrate track requirements
-            for req_type, courses in track_info.get('requirements', {}).items():
-                for course_code in courses:
-                    cursor.execute("""
-                        INSERT INTO track_requirements (track_code, course_code, requirement_type)
-                        VALUES (?, ?, ?)
-                    """, (track_code, course_code, req_type))
+            )
+            for track_code, track_info in tracks_data.items()
+        ))
+        
+        # Migrate track requirements
+        cursor.executemany("""
+            INSERT INTO track_requirements (track_code, course_code, requirement_type)
+            VALUES (?, ?, ?)
+        """, (
+            (track_code, course_code, req_type)
+            for track_code, track_info in tracks_data.items()
+            for req_type, courses in track_info.get('requirements', {}).items()
+            for course_code in courses
+        ))
     
     def _migrate_prerequisites(self, cursor, prerequisites_data):
         """Migrate prerequisites data"""
         print("  🔗 Migrating prerequisites...")
         
-        for course_code, prereq_list in prerequisites_data.items():
-            if isinstance(prereq_list, list):
-                for prereq in prereq_list:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO prerequisites (course_code, prerequisite_code)
-                        VALUES (?, ?)
-                    """, (course_code, prereq))
+        cursor.executemany("""
+            INSERT OR REPLACE INTO prerequisites (course_code, prerequisite_code)
+            VALUES (?, ?)
+        """, (
+            (course_code, prereq)
+            for course_code, prereq_list in prerequisites_data.items()
+            if isinstance(prereq_list, list)
+            for prereq in prereq_list
+        ))
     
     def _migrate_academic_policies(self, cursor, policies_data):
         """Migrate academic policies data"""
         print("  📋 Migrating academic policies...")
         
-        for policy_name, policy_info in policies_data.items():
-            cursor.execute("""
-                INSERT OR REPLACE INTO academic_policies (
-                    policy_name, policy_type, description, requirements
-                ) VALUES (?, ?, ?, ?)
-            """, (
+        cursor.executemany("""
+            INSERT OR REPLACE INTO academic_policies (
+                policy_name, policy_type, description, requirements
+            ) VALUES (?, ?, ?, ?)
+        """, (
+            (
                 policy_name,
                 policy_info.get('type', ''),
                 policy_info.get('description', ''),
                 json.dumps(policy_info.get('requirements', []))
-            ))
+            )
+            for policy_name, policy_info in policies_data.items()
+        ))
     
     def _migrate_course_load_guidelines(self, cursor, guidelines_data):
         """Migrate course load guidelines data"""
         print("  📊 Migrating course load guidelines...")
         
-        for level, guidelines in guidelines_data.items():
-            cursor.execute("""
-                INSERT OR REPLACE INTO course_load_guidelines (
-                    student_level, total_credits_max, cs_courses_max,
-                    cs_courses_recommended, rationale
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
+        cursor.executemany("""
+            INSERT OR REPLACE INTO course_load_guidelines (
+                student_level, total_credits_max, cs_courses_max,
+                cs_courses_recommended, rationale
+            ) VALUES (?, ?, ?, ?, ?)
+        """, (
+            (
                 level,
                 guidelines.get('total_credits_max', 0),
                 guidelines.get('cs_courses_max', 0),
                 guidelines.get('cs_courses_recommended', 0),
                 guidelines.get('rationale', '')
-            ))
+            )
+            for level, guidelines in guidelines_data.items()
+        ))
     
     def _migrate_graduation_timelines(self, cursor, timelines_data):
         """Migrate graduation timelines data"""
         print("  🎓 Migrating graduation timelines...")
         
+        rows = []
         for timeline_type, timeline_info in timelines_data.items():
             # Handle different data structures (dict vs list)
             if isinstance(timeline_info, dict):
@@ -396,12 +411,7 @@ class SQLKnowledgeSchema:
                 total_semesters = timeline_info.get('total_semesters', 8)
                 total_years = total_semesters / 2.0  # 2 semesters per year
                 
-                cursor.execute("""
-                    INSERT OR REPLACE INTO graduation_timelines (
-                        timeline_type, total_years, success_probability,
-                        description, requirements, semester_plan
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
+                rows.append((
                     timeline_type,
                     total_years,
                     timeline_info.get('success_probability', 0.0),
@@ -411,12 +421,7 @@ class SQLKnowledgeSchema:
                 ))
             elif isinstance(timeline_info, list):
                 # Handle list of tips/requirements
-                cursor.execute("""
-                    INSERT OR REPLACE INTO graduation_timelines (
-                        timeline_type, total_years, success_probability,
-                        description, requirements, semester_plan
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
+                rows.append((
                     timeline_type,
                     0.0,  # No specific timeline
                     0.0,  # No specific probability
@@ -424,30 +429,37 @@ class SQLKnowledgeSchema:
                     json.dumps(timeline_info),
                     json.dumps({})
                 ))
+        
+        cursor.executemany("""
+            INSERT OR REPLACE INTO graduation_timelines (
+                timeline_type, total_years, success_probability,
+                description, requirements, semester_plan
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
     
     def _migrate_failure_recovery(self, cursor, recovery_data):
         """Migrate failure recovery scenarios data"""
         print("  🚨 Migrating failure recovery scenarios...")
         
-        for scenario_key, scenario_data in recovery_data.items():
-            # Extract course code from scenario key (e.g., "CS 18000_failure" -> "CS 18000")
-            course_code = scenario_key.replace('_failure', '')
-            
-            if isinstance(scenario_data, dict):
-                cursor.execute("""
-                    INSERT OR REPLACE INTO failure_recovery (
-                        failed_course_code, semester_failed, delay_semesters,
-                        affected_courses, recovery_strategy, summer_option, graduation_impact
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    course_code,
-                    'general',  # Default semester
-                    scenario_data.get('delay_semesters', 0),
-                    json.dumps(scenario_data.get('affected_courses', [])),
-                    scenario_data.get('recovery_strategy', ''),
-                    scenario_data.get('summer_option', False),
-                    scenario_data.get('graduation_impact', '')
-                ))
+        # Course code comes from the scenario key (e.g., "CS 18000_failure" -> "CS 18000")
+        cursor.executemany("""
+            INSERT OR REPLACE INTO failure_recovery (
+                failed_course_code, semester_failed, delay_semesters,
+                affected_courses, recovery_strategy, summer_option, graduation_impact
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (
+                scenario_key.replace('_failure', ''),
+                'general',  # Default semester
+                scenario_data.get('delay_semesters', 0),
+                json.dumps(scenario_data.get('affected_courses', [])),
+                scenario_data.get('recovery_strategy', ''),
+                scenario_data.get('summer_option', False),
+                scenario_data.get('graduation_impact', '')
+            )
+            for scenario_key, scenario_data in recovery_data.items()
+            if isinstance(scenario_data, dict)
+        ))
     
     def _migrate_codo_requirements(self, cursor, codo_data):
         """Migrate CODO requirements data"""
@@ -462,26 +474,30 @@ class SQLKnowledgeSchema:
             'space_availability': ('general', 'space_availability')
         }
         
-        for req_key, (req_type, req_name) in simple_reqs.items():
-            if req_key in codo_data:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO codo_requirements (
-                        requirement_type, requirement_key, requirement_value
-                    ) VALUES (?, ?, ?)
-                """, (req_type, req_name, str(codo_data[req_key])))
+        cursor.executemany("""
+            INSERT OR REPLACE INTO codo_requirements (
+                requirement_type, requirement_key, requirement_value
+            ) VALUES (?, ?, ?)
+        """, (
+            (req_type, req_name, str(codo_data[req_key]))
+            for req_key, (req_type, req_name) in simple_reqs.items()
+            if req_key in codo_data
+        ))
         
         # Required courses
-        for course in codo_data.get('required_courses', []):
-            cursor.execute("""
-                INSERT OR REPLACE INTO codo_requirements (
-                    requirement_type, requirement_key, requirement_value, description
-                ) VALUES (?, ?, ?, ?)
-            """, (
+        cursor.executemany("""
+            INSERT OR REPLACE INTO codo_requirements (
+                requirement_type, requirement_key, requirement_value, description
+            ) VALUES (?, ?, ?, ?)
+        """, (
+            (
                 'course',
                 course.get('code', ''),
                 course.get('minimum_grade', ''),
                 f"{course.get('title', '')} - {course.get('credits', 0)} credits"
-            ))
+            )
+            for course in codo_data.get('required_courses', [])
+        ))
     
     def verify_migration(self):
         """Verify the migration was successful"""
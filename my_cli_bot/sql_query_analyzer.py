@@ -6,8 +6,25 @@ Demonstrates how natural language could be converted to SQL for more efficient d
 
 import re
 import sqlite3
+import threading
+import time
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from performance.ttl_cache import TTLCache
+
+# Course codes are the slots of a query shape; everything else in the text is part of the shape
+COURSE_SLOT_PATTERN = re.compile(r"\b(CS|MA|ECE|PHYS|CHEM|ENGL|MATH)\s*(\d{3,5})\b", re.IGNORECASE)
+_CTE_NAME = re.compile(r"(\w+)\s+AS\s*\(", re.IGNORECASE)
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SCAN_TARGET = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# Punctuation other than decimal points (GPAs) carries no meaning for intent, filters or entities
+_PUNCTUATION = re.compile(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)")
+
+def normalize_query(query: str) -> str:
+    """Lowercased query without punctuation or repeated whitespace, course codes as 'CS 25000'"""
+    text = " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+    return COURSE_SLOT_PATTERN.sub(lambda m: f"{m.group(1).upper()} {m.group(2)}", text)
 
 @dataclass
 class QueryPlan:
@@ -19,17 +36,50 @@ class QueryPlan:
     parameters: List[Any]
     complexity_score: float
 
+@dataclass
+class PlanTemplate:
+    """Everything about a query shape that does not depend on its course code slots"""
+    intent: str
+    intent_data: Dict
+    filters: Dict[str, Any]
+    static_entities: List[str]
+
+@dataclass
+class SQLPlanCacheStats:
+    """Query plan cache counters"""
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+@dataclass
+class TemplateExplain:
+    """EXPLAIN QUERY PLAN of one SQL template, captured on its first execution"""
+    intent: str
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+
 class NaturalLanguageToSQL:
     """
     Converts natural language academic queries to SQL queries
     for more efficient and precise data retrieval
     """
     
-    def __init__(self, db_path: str = "purdue_cs_knowledge.db"):
+    def __init__(self, db_path: str = "purdue_cs_knowledge.db", plan_cache_size: int = 1024):
         self.db_path = db_path
         self.intent_patterns = self._initialize_intent_patterns()
         self.entity_patterns = self._initialize_entity_patterns()
         
+        # Query shape -> PlanTemplate (False marks shapes whose slots cannot be rebound safely)
+        self.plan_cache = TTLCache(max_entries=plan_cache_size, default_ttl=None, name="nl_sql_plan_cache")
+        self.plan_cache_stats = SQLPlanCacheStats()
+        self.template_explains: Dict[str, TemplateExplain] = {}
+        self._local = threading.local()
+        
     def _initialize_intent_patterns(self) -> Dict[str, Dict]:
         """Define query intent patterns and their SQL templates"""
         return {
@@ -129,6 +179,66 @@ class NaturalLanguageToSQL:
         }
     
     def parse_query(self, query: str) -> QueryPlan:
+        """Query plan for a query; repeat shapes only bind their course code slots"""
+        # Case, punctuation and spacing variants of a question share one normalized shape
+        query = normalize_query(query)
+        shape, slots = self._query_shape(query)
+        template = self.plan_cache.get(shape)
+        if template:
+            self.plan_cache_stats.hits += 1
+            return self._bind_template(template, slots)
+        
+        plan = self._parse_query_uncached(query)
+        if template is None:
+            self.plan_cache_stats.misses += 1
+            self.plan_cache.set(shape, self._compile_template(shape, slots, plan))
+        else:
+            self.plan_cache_stats.uncacheable += 1
+        return plan
+    
+    def _query_shape(self, query: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Query text with course numbers replaced by slots, and the slot values in order"""
+        slots: List[Tuple[str, str]] = []
+        
+        def to_slot(match):
+            slots.append((match.group(1), match.group(2)))
+            return f"{match.group(1)} {{slot{len(match.group(2))}}}"
+        
+        return COURSE_SLOT_PATTERN.sub(to_slot, query), slots
+    
+    def _slot_entities(self, slots: List[Tuple[str, str]]) -> List[str]:
+        """Entities the course code slots contribute (4-digit numbers also read as years)"""
+        entities = []
+        for subject, number in slots:
+            entities.append(f"{subject} {number}")
+            if len(number) == 4:
+                entities.append(number)
+        return entities
+    
+    def _compile_template(self, shape: str, slots: List[Tuple[str, str]], plan: QueryPlan):
+        """Template for a freshly parsed shape, or False when rebinding would not reproduce the plan"""
+        intent, intent_data = self._classify_intent(shape.lower())
+        template = PlanTemplate(
+            intent=intent,
+            intent_data=intent_data,
+            filters=self._build_filters(shape.lower(), []),
+            static_entities=self._extract_entities(shape)
+        )
+        return template if self._bind_template(template, slots) == plan else False
+    
+    def _bind_template(self, template: PlanTemplate, slots: List[Tuple[str, str]]) -> QueryPlan:
+        entities = sorted(set(template.static_entities + self._slot_entities(slots)))
+        sql_query, parameters = self._generate_sql(template.intent, template.intent_data, entities, template.filters)
+        return QueryPlan(
+            intent=template.intent,
+            entities=entities,
+            filters=dict(template.filters),
+            sql_query=sql_query,
+            parameters=parameters,
+            complexity_score=self._calculate_complexity(template.intent_data, entities, template.filters)
+        )
+    
+    def _parse_query_uncached(self, query: str) -> QueryPlan:
         """Parse natural language query into SQL query plan"""
         
         query_lower = query.lower()
@@ -169,7 +279,7 @@ class NaturalLanguageToSQL:
                 else:
                     entities.append(match)
         
-        return list(set(entities))
+        return sorted(set(entities))
     
     def _classify_intent(self, query_lower: str) -> Tuple[str, Dict]:
         """Classify query intent based on keywords"""
@@ -255,22 +365,89 @@ class NaturalLanguageToSQL:
         
         return min(base_complexity + entity_factor + filter_factor, 1.0)
     
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection; its statement cache keeps template SQL prepared across calls"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+    
+    def _explain_template(self, conn: sqlite3.Connection, query_plan: QueryPlan):
+        """Record EXPLAIN QUERY PLAN for a template once and flag full table scans"""
+        if query_plan.sql_query in self.template_explains:
+            return
+        sql = query_plan.sql_query
+        ctes = {name.lower() for name in _CTE_NAME.findall(sql)} | {"constant"}
+        aliases = {(alias or table).lower(): table.lower() for table, alias in _TABLE_ALIAS.findall(sql)}
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, query_plan.parameters).fetchall()
+        explain = TemplateExplain(intent=query_plan.intent, plan=[row[-1] for row in rows])
+        for detail in explain.plan:
+            match = _SCAN_TARGET.match(detail)
+            if not match or "USING" in detail:
+                continue
+            target = match.group(1).lower()
+            # Scans of CTE results are inherent to the query; only base tables count
+            if aliases.get(target, target) not in ctes:
+                explain.full_scans.append(detail)
+        self.template_explains[query_plan.sql_query] = explain
+        if explain.full_scans:
+            print(f"Warning: {query_plan.intent} query plan scans full tables: {'; '.join(explain.full_scans)}")
+    
     def execute_query(self, query_plan: QueryPlan) -> List[Dict[str, Any]]:
         """Execute SQL query and return results"""
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute(query_plan.sql_query, query_plan.parameters)
-                results = [dict(row) for row in cursor.fetchall()]
-                
-                return results
+            conn = self._connection()
+            self._explain_template(conn, query_plan)
+            cursor = conn.execute(query_plan.sql_query, query_plan.parameters)
+            return [dict(row) for row in cursor.fetchall()]
         
         except Exception as e:
             print(f"SQL execution error: {e}")
             return []
+    
+    def get_plan_cache_stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.plan_cache_stats.hits,
+            'misses': self.plan_cache_stats.misses,
+            'uncacheable': self.plan_cache_stats.uncacheable,
+            'hit_ratio': self.plan_cache_stats.hit_ratio,
+            'templates': len(self.plan_cache),
+            'full_scan_templates': {explain.intent: explain.full_scans
+                                    for explain in self.template_explains.values() if explain.full_scans}
+        }
+
+def benchmark_query_planning(queries: Optional[List[str]] = None, iterations: int = 20000) -> Dict[str, float]:
+    """Plans per second with the plan cache cold-parsing every call versus binding cached shapes"""
+    queries = queries or [
+        "What are the prerequisites for CS 25100?",
+        "What are the prerequisites for CS 38100?",
+        "Show me all Machine Intelligence track courses",
+        "I failed CS 18000, what courses will be affected?",
+        "I failed CS 24000, what courses will be affected?",
+        "How long does it take to graduate with SE track?",
+        "Tell me about MA 26100"
+    ]
+    analyzer = NaturalLanguageToSQL()
+    
+    start = time.perf_counter()
+    for i in range(iterations):
+        analyzer._parse_query_uncached(queries[i % len(queries)])
+    uncached = iterations / (time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    for i in range(iterations):
+        analyzer.parse_query(queries[i % len(queries)])
+    cached = iterations / (time.perf_counter() - start)
+    
+    return {
+        'uncached_plans_per_second': round(uncached),
+        'cached_plans_per_second': round(cached),
+        'speedup': round(cached / uncached, 2),
+        'hit_ratio': round(analyzer.plan_cache_stats.hit_ratio, 3)
+    }
 
 # Example usage and comparison
 def demonstrate_sql_approach():
@@ -301,4 +478,8 @@ def demonstrate_sql_approach():
         print(f"   Parameters: {query_plan.parameters}")
 
 if __name__ == "__main__":
-    demonstrate_sql_approach()
\ No newline at end of file
+    import sys
+    if "--benchmark" in sys.argv:
+        print(benchmark_query_planning())
+    else:
+        demonstrate_sql_approach()
\ No newline at end of file
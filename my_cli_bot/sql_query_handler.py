@@ -10,6 +10,9 @@ import re
 from typing import Dict, List, Any, Optional, Tuple
 from contextlib import contextmanager
 
+from course_code_resolver import get_course_resolver
+from metrics import STAGE_SQL, stage_timer
+
 class SQLQueryHandler:
     """
     Handles natural language to SQL query conversion and execution
@@ -31,11 +34,7 @@ class SQLQueryHandler:
     
     def _normalize_course_code(self, course_code: str) -> str:
         """Normalize course code to match database format (e.g., 'CS18000' -> 'CS 18000')"""
-        if not course_code:
-            return ''
-        # Handle both "CS18000" and "CS 18000" formats
-        import re
-        return re.sub(r'([A-Z]+)(\d+)', r'\1 \2', course_code.upper().replace(' ', ''))
+        return get_course_resolver().normalize(course_code)
     
     def _initialize_query_patterns(self) -> Dict[str, Dict]:
         """Initialize query patterns for natural language parsing"""
@@ -231,7 +230,7 @@ class SQLQueryHandler:
             config = self.query_patterns[query_type]
             sql_query, params = config['query_builder'](param)
             
-            with self.get_connection() as conn:
+            with self.get_connection() as conn, stage_timer(STAGE_SQL):
                 cursor = conn.cursor()
                 cursor.execute(sql_query, params)
                 results = cursor.fetchall()
@@ -3,6 +3,7 @@ Summer Acceleration Calculator - Strategic summer course planning for CS student
 """
 from typing import Dict, List, Tuple, Optional
 from degree_progression_engine import DegreeProgressionEngine
+from plan_cache import get_plan_cache
 
 class SummerAccelerationCalculator:
     def __init__(self):
@@ -42,6 +43,18 @@ class SummerAccelerationCalculator:
         
     def calculate_acceleration_plan(self, student_profile: Dict) -> Dict:
         """Calculate optimal summer acceleration strategy"""
+        plan_fields = {
+            "year_level": student_profile.get("year_level", "freshman"),
+            "gpa": student_profile.get("gpa", 3.0),
+            "graduation_goal": student_profile.get("graduation_goal", "4_year")
+        }
+        return get_plan_cache().get_or_compute(
+            "summer_acceleration", plan_fields, student_profile.get("completed_courses", []),
+            lambda: self._build_acceleration_plan(student_profile)
+        )
+    
+    def _build_acceleration_plan(self, student_profile: Dict) -> Dict:
+        """Plan from scratch; calculate_acceleration_plan serves repeats from the plan cache"""
         current_year = student_profile.get("year_level", "freshman")
         current_semester = student_profile.get("current_semester", "spring")
         completed_courses = student_profile.get("completed_courses", [])
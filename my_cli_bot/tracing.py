@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Low-overhead span tracing
+Monotonic-clock spans around query stages (intent analysis, knowledge lookup,
+planner, LLM calls) with head sampling. Finished traces are queued in a bounded
+ring buffer and written as compact JSONL by a background thread; an optional
+console renderer replaces the old tracker-mode banners. When tracing is off,
+span() returns a shared no-op object.
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_TRACE_FILE = "logs/traces.jsonl"
+# Off unless BOILERAI_TRACE_SAMPLE_RATE asks for it
+DEFAULT_SAMPLE_RATE = 0.0
+DEFAULT_BUFFER_SIZE = 10000
+
+_MAX_INLINE_ITEMS = 8
+_MAX_INLINE_CHARS = 200
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def _compact(value: Any) -> Any:
+    """Keep attributes small: large containers and strings are summarized, not copied"""
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= _MAX_INLINE_CHARS else value[:_MAX_INLINE_CHARS] + "..."
+    if isinstance(value, (list, tuple, set, dict)):
+        if len(value) > _MAX_INLINE_ITEMS:
+            return f"{type(value).__name__}[{len(value)}]"
+        if isinstance(value, dict):
+            return {str(k): _compact(v) for k, v in value.items()}
+        return [_compact(v) for v in value]
+    return str(value)[:_MAX_INLINE_CHARS]
+
+
+class _NoopSpan:
+    """Returned when a trace is not sampled; every method is a no-op"""
+
+    __slots__ = ()
+    sampled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def event(self, name: str, /, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed unit of work inside a trace"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attrs",
+                 "events", "start_ns", "duration_ms", "error", "_token", "_root", "_finished")
+    sampled = True
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = next(_span_ids)
+        self.attrs = {k: _compact(v) for k, v in attrs.items()}
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = 0
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+        self._root = parent._root if parent else self
+        self._finished: List["Span"] = parent._root._finished if parent else []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter_ns() - self.start_ns) / 1e6
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self._finished.append(self)
+        if self._root is self:
+            self.tracer._export(self._finished)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes discovered while the span is running"""
+        for key, value in attrs.items():
+            self.attrs[key] = _compact(value)
+
+    def event(self, name: str, /, **attrs):
+        """Record a point-in-time event on this span"""
+        self.events.append({
+            **{k: _compact(v) for k, v in attrs.items()},
+            "name": name,
+            "offset_ms": round((time.perf_counter_ns() - self.start_ns) / 1e6, 3)
+        })
+
+    def to_record(self) -> Dict[str, Any]:
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "ms": round(self.duration_ms, 3),
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.events:
+            record["events"] = self.events
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class JsonlSpanWriter:
+    """Background JSONL writer fed through a bounded ring buffer (oldest records dropped)"""
+
+    def __init__(self, path: str = DEFAULT_TRACE_FILE, capacity: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer: "deque[Dict[str, Any]]" = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        """Start the writer thread with the first sampled trace, not at construction"""
+        if self._thread is None and not self._stop.is_set():
+            self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._thread.start()
+
+    def __call__(self, records: List[Dict[str, Any]]):
+        with self._lock:
+            self._ensure_thread()
+            overflow = len(self._buffer) + len(records) - self._buffer.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self._buffer.extend(records)
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+        return records
+
+    def flush(self):
+        records = self._drain()
+        if not records:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, separators=(",", ":"), default=str) + "\n"
+                                for record in records))
+        except OSError as e:
+            print(f"Warning: failed to write traces to {self.path}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        else:
+            self.flush()
+
+
+class ConsoleSpanRenderer:
+    """Compact one-line-per-span output for the CLI tracker mode"""
+
+    def __call__(self, records: List[Dict[str, Any]]):
+        for record in sorted(records, key=lambda r: r["span"]):
+            indent = "    " if record["parent"] else ""
+            status = f" ❌ {record['error']}" if "error" in record else ""
+            attrs = " ".join(f"{k}={v}" for k, v in record.get("attrs", {}).items())
+            print(f"{indent}🔍 [TRACE] {record['name']} {record['ms']:.1f}ms {attrs}{status}".rstrip())
+            for event in record.get("events", ()):
+                details = " ".join(f"{k}={v}" for k, v in event.items() if k not in ("name", "offset_ms"))
+                print(f"{indent}    • +{event['offset_ms']:.1f}ms {event['name']} {details}".rstrip())
+
+
+class Tracer:
+    """Creates spans; sampling is decided once per trace at the root span"""
+
+    def __init__(self, sample_rate: float = DEFAULT_SAMPLE_RATE,
+                 sinks: Optional[List[Callable[[List[Dict[str, Any]]], None]]] = None):
+        self.sample_rate = sample_rate
+        self.sinks = list(sinks or [])
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and bool(self.sinks)
+
+    def span(self, name: str, **attrs):
+        """Context manager for a span; child of the active span, or a new (sampled) root"""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _UnsampledRoot()
+            return Span(self, name, None, attrs)
+        if not parent.sampled:
+            return NOOP_SPAN
+        return Span(self, name, parent, attrs)
+
+    def event(self, name: str, /, **attrs):
+        """Add an event to the active span, if any"""
+        current = _current_span.get()
+        if current is not None:
+            current.event(name, **attrs)
+
+    def add_sink(self, sink: Callable[[List[Dict[str, Any]]], None]):
+        self.sinks.append(sink)
+
+    def _export(self, spans: List[Span]):
+        records = [span.to_record() for span in spans]
+        for sink in self.sinks:
+            try:
+                sink(records)
+            except Exception as e:
+                print(f"Warning: trace sink failed: {e}")
+
+
+class _UnsampledRoot:
+    """Marks the rest of an unsampled trace as no-op so children skip the sampling draw"""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current_span.set(NOOP_SPAN)
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from BOILERAI_TRACE_SAMPLE_RATE / BOILERAI_TRACE_FILE"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                sample_rate = float(os.getenv("BOILERAI_TRACE_SAMPLE_RATE", DEFAULT_SAMPLE_RATE))
+                sinks = []
+                if sample_rate > 0:
+                    sinks.append(JsonlSpanWriter(os.getenv("BOILERAI_TRACE_FILE", DEFAULT_TRACE_FILE)))
+                _tracer = Tracer(sample_rate, sinks)
+    return _tracer
+
+
+def enable_console_tracing():
+    """Tracker mode: trace every query and render spans on the console"""
+    tracer = get_tracer()
+    tracer.sample_rate = 1.0
+    if not any(isinstance(sink, ConsoleSpanRenderer) for sink in tracer.sinks):
+        tracer.add_sink(ConsoleSpanRenderer())
+    return tracer
+
+
+def traced(name: str):
+    """Decorator that wraps a function call in a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
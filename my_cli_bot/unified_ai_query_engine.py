@@ -22,6 +22,22 @@ from smart_ai_engine import SmartAIEngine
 from simple_nlp_solver import SimpleNLPSolver
 from comprehensive_failure_analyzer import ComprehensiveFailureAnalyzer
 from ai_training_prompts import get_comprehensive_system_prompt
+from fast_path_router import get_fast_path_router
+from speculative_executor import get_speculative_executor
+
+EXECUTION_SEQUENTIAL = "sequential"
+EXECUTION_SPECULATIVE = "speculative"
+
+# Knowledge-graph answers trusted enough to beat the LLM path, by solver intent
+KG_INTENT_CONFIDENCE = {
+    "prerequisites": 0.85,
+    "course_difficulty": 0.8,
+    "dual_track_planning": 0.75,
+    "course_planning": 0.7,
+    "career_guidance": 0.6,
+    "foundation_planning": 0.6,
+    "general_advice": 0.4
+}
 
 class QueryComplexity(Enum):
     SIMPLE = "simple"
@@ -49,14 +65,18 @@ class UnifiedAIQueryEngine:
     Single point of entry for all query processing with intelligent routing
     """
     
-    def __init__(self):
+    def __init__(self, execution_mode: Optional[str] = None):
         self.logger = self._setup_logging()
+        # Speculative racing is opt-in: losing branches run to completion and still spend LLM tokens
+        self.execution_mode = execution_mode or os.getenv("BOILERAI_EXECUTION_MODE", EXECUTION_SEQUENTIAL)
         
         # Initialize all components
         self.enhanced_n8n = EnhancedN8NIntegration()
         self.smart_ai = SmartAIEngine()
         self.nlp_solver = SimpleNLPSolver()
         self.failure_analyzer = ComprehensiveFailureAnalyzer()
+        self.fast_path = get_fast_path_router()
+        self.speculative = get_speculative_executor()
         
         # Gemini client for advanced processing
         self.gemini_model = None
@@ -220,8 +240,8 @@ class UnifiedAIQueryEngine:
         else:
             return QueryComplexity.SIMPLE
     
-    def determine_best_method(self, query: str, complexity: QueryComplexity) -> str:
-        """Determine the best processing method for the query"""
+    def _rank_routing_rules(self, query: str) -> List[Tuple[str, int, str, int]]:
+        """Matching routing rules as (name, score, method, priority), best first"""
         query_lower = query.lower()
         
         # Check routing rules by priority
@@ -243,6 +263,16 @@ class UnifiedAIQueryEngine:
         
         # Sort by score and priority
         matching_rules.sort(key=lambda x: (-x[1], x[3]))
+        return matching_rules
+    
+    def determine_intent(self, query: str) -> str:
+        """Name of the best matching routing rule, used to key speculative win statistics"""
+        matching_rules = self._rank_routing_rules(query)
+        return matching_rules[0][0] if matching_rules else "general"
+    
+    def determine_best_method(self, query: str, complexity: QueryComplexity) -> str:
+        """Determine the best processing method for the query"""
+        matching_rules = self._rank_routing_rules(query)
         
         if matching_rules:
             return matching_rules[0][2]
@@ -279,8 +309,11 @@ class UnifiedAIQueryEngine:
             # Step 3: Extract entities using all available methods
             entities = self._extract_comprehensive_entities(query)
             
-            # Step 4: Process query using selected method
-            response, knowledge_sources = self._process_with_method(query, method, entities, context)
+            # Step 4: Process query using selected method, racing the cheap paths against it
+            if self.execution_mode == EXECUTION_SPECULATIVE:
+                response, method, knowledge_sources = self._process_speculatively(query, method, entities, context)
+            else:
+                response, knowledge_sources = self._process_with_method(query, method, entities, context)
             
             # Step 5: Post-process and enhance response
             response = self._enhance_response(response, query, entities, method)
@@ -418,6 +451,46 @@ class UnifiedAIQueryEngine:
         
         return response, knowledge_sources
     
+    def _process_speculatively(self, 
+                               query: str, 
+                               method: str, 
+                               entities: Dict[str, Any], 
+                               context: Dict[str, Any]) -> Tuple[str, str, List[str]]:
+        """Run the fast path and knowledge graph alongside the selected method; first confident answer wins"""
+        sources = {
+            "fast_path": ["lookup_tables", "sql_database"],
+            "knowledge_graph": ["knowledge_graph", "semantic_analysis"]
+        }
+        primary_sources: List[str] = []
+        
+        def fast_path(cancel):
+            answer = self.fast_path.route(query)
+            return (answer.response, answer.confidence) if answer else None
+        
+        def knowledge_graph(cancel):
+            semantic_query = self.nlp_solver.understand_query_semantically(query)
+            confidence = KG_INTENT_CONFIDENCE.get(semantic_query.intent, 0.5)
+            if not semantic_query.entities:
+                confidence -= 0.1
+            return self.nlp_solver.solve_using_knowledge_graph(semantic_query), confidence
+        
+        def primary(cancel):
+            response, knowledge_sources = self._process_with_method(query, method, entities, context)
+            primary_sources.extend(knowledge_sources)
+            return response, self._calculate_confidence(method, entities, len(response))
+        
+        deterministic = {"fast_path": fast_path}
+        if method != "nlp_solver_enhanced":
+            deterministic["knowledge_graph"] = knowledge_graph
+        
+        outcome = self.speculative.run(self.determine_intent(query), deterministic, (method, primary))
+        if outcome.response is None:
+            self.logger.warning(f"All speculative paths failed ({outcome.error})")
+            return self._fallback_to_nlp(query), "nlp_fallback", ["nlp_fallback"]
+        
+        self.logger.info(f"Speculative winner: {outcome.path} ({outcome.elapsed_ms:.1f}ms)")
+        return outcome.response, outcome.path, sources.get(outcome.path, primary_sources)
+    
     def _process_with_comprehensive_ai(self, 
                                      query: str, 
                                      entities: Dict[str, Any], 
@@ -563,6 +636,7 @@ class UnifiedAIQueryEngine:
                 "total_nodes": sum(len(v) if isinstance(v, dict) else 1 
                                  for v in self.unified_knowledge.values())
             },
+            "speculative_wins": self.speculative.get_win_stats(),
             "components": {
                 "enhanced_n8n": "active",
                 "smart_ai": "active",
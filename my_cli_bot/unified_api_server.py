@@ -12,11 +12,15 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 import uvicorn
 
+from metrics import (
+    PROMETHEUS_CONTENT_TYPE, STAGE_SERIALIZATION, record_request_latency, render_metrics, stage_timer
+)
+
 # Import unified pipeline
 from unified_langchain_n8n_pipeline import (
     UnifiedPipelineOrchestrator, 
@@ -127,6 +131,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(record_request_latency)
+
 # Security
 security = HTTPBearer(auto_error=False)
 
@@ -150,7 +156,9 @@ async def startup_event():
             default_mode=PipelineMode.HYBRID,
             enable_caching=True,
             cache_ttl_minutes=15,
-            enable_monitoring=True
+            enable_monitoring=True,
+            hybrid_token_budget=int(os.getenv("HYBRID_TOKEN_BUDGET", "6000")),
+            hybrid_accept_score=float(os.getenv("HYBRID_ACCEPT_SCORE", "0.75"))
         )
         
         logger.info("Unified pipeline orchestrator initialized successfully")
@@ -190,6 +198,10 @@ def validate_mode(mode: str) -> PipelineMode:
 
 def create_query_response(result: UnifiedQueryResult, session_id: str) -> QueryResponse:
     """Create API response from pipeline result"""
+    with stage_timer(STAGE_SERIALIZATION):
+        return _build_query_response(result, session_id)
+
+def _build_query_response(result: UnifiedQueryResult, session_id: str) -> QueryResponse:
     return QueryResponse(
         success=result.success,
         query=result.query,
@@ -246,6 +258,11 @@ async def health_check():
             }
         )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of stage, provider and HTTP latency histograms"""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/status", response_model=SystemStatus)
 async def get_system_status():
     """Get detailed system status"""
@@ -36,6 +36,9 @@ from n8n_style_pipeline import N8NStylePipeline, WorkflowData, WorkflowNode, Nod
 from enhanced_n8n_integration import EnhancedN8NIntegration, EnhancedQueryContext
 from langchain_advisor_pipeline import EnhancedLangChainPipeline
 from intelligent_conversation_manager import IntelligentConversationManager
+from budgeted_hybrid import BudgetedHybridExecutor, estimate_tokens
+from plan_cache import knowledge_version
+from result_cache import get_result_cache
 
 class PipelineMode(Enum):
     """Pipeline execution modes"""
@@ -56,6 +59,8 @@ class UnifiedPipelineConfig:
     timeout_seconds: int = 30
     enable_monitoring: bool = True
     fallback_enabled: bool = True
+    hybrid_token_budget: int = 6000
+    hybrid_accept_score: float = 0.75
 
 @dataclass
 class UnifiedQueryResult:
@@ -159,8 +164,18 @@ class UnifiedPipelineOrchestrator:
         # Initialize components
         self._initialize_components()
         
-        # Monitoring and caching
-        self.query_cache = {}
+        # Hybrid mode: cheaper pipeline first, second one only when worth its cost
+        # Priors are (estimated tokens, seconds) until real calls are observed
+        self.hybrid_executor = BudgetedHybridExecutor(
+            cost_priors={"n8n": (1500, 4.0), "langchain": (3000, 6.0)},
+            latency_budget=config.timeout_seconds,
+            token_budget=config.hybrid_token_budget,
+            accept_score=config.hybrid_accept_score
+        )
+        
+        # Monitoring and caching (shared with other workers and the N8N integration)
+        self.query_cache = get_result_cache()
+        self.knowledge_file = "data/cs_knowledge_graph.json"
         self.performance_metrics = {
             "n8n_calls": 0,
             "langchain_calls": 0,
@@ -231,32 +246,6 @@ class UnifiedPipelineOrchestrator:
         self.n8n_pipeline.nodes = enhanced_nodes
         self.logger.info("Enhanced N8N pipeline with LangChain integration created")
     
-    def _generate_cache_key(self, query: str, mode: PipelineMode) -> str:
-        """Generate cache key"""
-        cache_input = f"{query}_{mode.value}"
-        return hashlib.md5(cache_input.encode()).hexdigest()
-    
-    def _should_use_cache(self, cache_key: str) -> Tuple[bool, Optional[UnifiedQueryResult]]:
-        """Check if cached result should be used"""
-        if not self.config.enable_caching:
-            return False, None
-        
-        if cache_key in self.query_cache:
-            result, timestamp = self.query_cache[cache_key]
-            if datetime.now() - timestamp < timedelta(minutes=self.config.cache_ttl_minutes):
-                self.performance_metrics["cache_hits"] += 1
-                return True, result
-            else:
-                # Remove expired cache entry
-                del self.query_cache[cache_key]
-        
-        return False, None
-    
-    def _cache_result(self, cache_key: str, result: UnifiedQueryResult):
-        """Cache query result"""
-        if self.config.enable_caching:
-            self.query_cache[cache_key] = (result, datetime.now())
-    
     def _determine_optimal_pipeline(self, query: str) -> PipelineMode:
         """Intelligently determine which pipeline to use"""
         
@@ -302,13 +291,33 @@ class UnifiedPipelineOrchestrator:
         session_id = session_id or f"unified_{int(time.time())}"
         mode = mode or self._determine_optimal_pipeline(query)
         
-        # Check cache
-        cache_key = self._generate_cache_key(query, mode)
-        use_cache, cached_result = self._should_use_cache(cache_key)
-        if use_cache:
-            self.logger.info(f"Returning cached result for: {query[:50]}...")
-            return cached_result
+        if not self.config.enable_caching:
+            return await self._process_mode(query, session_id, mode, start_time)
+        
+        async def process_shared() -> UnifiedQueryResult:
+            result = await self._process_mode(query, session_id, mode, start_time)
+            # Entries are shared by every caller of the same query: keep no session or user identity
+            enhanced = (result.metadata or {}).get("enhanced_context")
+            if isinstance(enhanced, dict):
+                enhanced.update(session_id="", user_id=None)
+            return result
         
+        # Canonical-query cache; concurrent identical queries wait for one computation
+        result, from_cache = await self.query_cache.aget_or_compute(
+            "unified_pipeline", query, process_shared,
+            context={"mode": mode.value},
+            version=knowledge_version(self.knowledge_file),
+            ttl=self.config.cache_ttl_minutes * 60,
+            cacheable=lambda result: result.success
+        )
+        if from_cache:
+            self.performance_metrics["cache_hits"] += 1
+            self.logger.info(f"Returning cached result for: {query[:50]}...")
+        return result
+    
+    async def _process_mode(self, query: str, session_id: str, mode: PipelineMode,
+                            start_time: float) -> UnifiedQueryResult:
+        """Run the selected pipeline mode; failures become an error result"""
         self.performance_metrics["total_queries"] += 1
         self.logger.info(f"Processing query with mode {mode.value}: {query[:50]}...")
         
@@ -327,10 +336,6 @@ class UnifiedPipelineOrchestrator:
             result.execution_time = execution_time
             self._update_performance_metrics(mode, execution_time)
             
-            # Cache successful result
-            if result.success:
-                self._cache_result(cache_key, result)
-            
             self.logger.info(f"Query processed successfully in {execution_time:.2f}s using {result.pipeline_used}")
             return result
             
@@ -361,8 +366,8 @@ class UnifiedPipelineOrchestrator:
             session_id=session_id
         )
         
-        # Get response using N8N pipeline
-        n8n_result = self.n8n_pipeline.execute_workflow(query)
+        # Get response using N8N pipeline (off the event loop so hybrid budgets can time it out)
+        n8n_result = await asyncio.to_thread(self.n8n_pipeline.execute_workflow, query)
         
         return UnifiedQueryResult(
             query=query,
@@ -387,7 +392,7 @@ class UnifiedPipelineOrchestrator:
             raise Exception("LangChain not available - Gemini API key required")
         
         # Process with LangChain
-        langchain_result = self.langchain_pipeline.process_query(query, session_id)
+        langchain_result = await asyncio.to_thread(self.langchain_pipeline.process_query, query, session_id)
         
         return UnifiedQueryResult(
             query=query,
@@ -405,27 +410,32 @@ class UnifiedPipelineOrchestrator:
         )
     
     async def _process_hybrid(self, query: str, session_id: str) -> UnifiedQueryResult:
-        """Process using both pipelines with intelligent combination"""
+        """Process with the cheaper pipeline first, adding the other only when budget and win rate justify it"""
         self.performance_metrics["hybrid_calls"] += 1
         
-        # Run both pipelines in parallel
-        tasks = []
+        async def run_n8n():
+            result = await self._process_n8n_only(query, session_id)
+            tokens = estimate_tokens(query) + estimate_tokens(result.response)
+            return result, result.response, result.confidence, tokens
         
-        # N8N processing
-        tasks.append(self._process_n8n_only(query, session_id))
+        async def run_langchain():
+            result = await self._process_langchain_only(query, session_id)
+            context = result.langchain_result.get("context", "") if result.langchain_result else ""
+            tokens = estimate_tokens(query) + estimate_tokens(str(context)) + estimate_tokens(result.response)
+            return result, result.response, result.confidence, tokens
         
-        # LangChain processing (if available)
+        runners = {"n8n": run_n8n}
         if self.langchain_available:
-            tasks.append(self._process_langchain_only(query, session_id))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            runners["langchain"] = run_langchain
         
-        # Combine results intelligently
-        n8n_result = results[0] if not isinstance(results[0], Exception) else None
-        langchain_result = results[1] if len(results) > 1 and not isinstance(results[1], Exception) else None
+        outcome = await self.hybrid_executor.run(query, runners, intent_of=lambda result: result.intent)
+        n8n_result = outcome.results.get("n8n")
+        langchain_result = outcome.results.get("langchain")
         
-        # Choose best response
-        best_response = self._choose_best_response(n8n_result, langchain_result)
+        if outcome.winner is None:
+            best_response = "I'm unable to process your query right now. Please try again."
+        else:
+            best_response = outcome.results[outcome.winner].response
         
         # Combine entities
         combined_entities = {}
@@ -457,7 +467,13 @@ class UnifiedPipelineOrchestrator:
             metadata={
                 "n8n_available": n8n_result is not None,
                 "langchain_available": langchain_result is not None,
-                "response_source": "langchain" if langchain_result and len(langchain_result.response) > len(best_response) * 0.8 else "n8n"
+                "response_source": outcome.winner or "none",
+                "pipeline_order": [name for name in (outcome.first, outcome.second) if name],
+                "second_pipeline": outcome.decision,
+                "scores": outcome.scores,
+                "errors": outcome.errors,
+                "tokens_used": outcome.tokens_used,
+                "tokens_saved": outcome.tokens_saved
             }
         )
     
@@ -497,29 +513,6 @@ class UnifiedPipelineOrchestrator:
                 self.logger.error(f"Fallback method also failed: {e2}")
                 raise Exception(f"Both primary ({e}) and fallback ({e2}) methods failed")
     
-    def _choose_best_response(self, n8n_result: Optional[UnifiedQueryResult], langchain_result: Optional[UnifiedQueryResult]) -> str:
-        """Choose the best response from available results"""
-        
-        if not n8n_result and not langchain_result:
-            return "I'm unable to process your query right now. Please try again."
-        
-        if not n8n_result:
-            return langchain_result.response
-        
-        if not langchain_result:
-            return n8n_result.response
-        
-        # Prefer LangChain for structured responses
-        if langchain_result.confidence > 0.7 and len(langchain_result.response) > 50:
-            return langchain_result.response
-        
-        # Prefer N8N for detailed conversational responses
-        if len(n8n_result.response) > len(langchain_result.response) * 1.2:
-            return n8n_result.response
-        
-        # Default to LangChain if available
-        return langchain_result.response
-    
     def _update_performance_metrics(self, mode: PipelineMode, execution_time: float):
         """Update performance metrics"""
         total_queries = self.performance_metrics["total_queries"]
@@ -555,7 +548,9 @@ class UnifiedPipelineOrchestrator:
                 "fallback_enabled": self.config.fallback_enabled
             },
             "performance_metrics": self.performance_metrics,
+            "hybrid_budget": self.hybrid_executor.get_stats(),
             "cache_stats": {
+                **self.query_cache.get_stats(),
                 "cache_size": len(self.query_cache),
                 "cache_hit_rate": self.performance_metrics["cache_hits"] / max(1, self.performance_metrics["total_queries"])
             }
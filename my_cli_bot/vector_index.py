@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Shared FAISS vector index: build, save and zero-copy load
+One on-disk layout and one loader used by build_vector.py, chat.py and the
+LangChain pipeline. Embeddings are memory-mapped and chunk text lives in an
+offset-indexed JSONL file that is read on demand, so load time and RSS stay
+flat as the corpus grows.
+"""
+
+import json
+import math
+import mmap
+import os
+from typing import Dict, List, Any, Optional, Sequence
+
+import faiss
+import numpy as np
+
+
+INDEX_FLAT = "flat"
+INDEX_IVFPQ = "ivfpq"
+INDEX_HNSW = "hnsw"
+INDEX_AUTO = "auto"
+INDEX_TYPES = (INDEX_FLAT, INDEX_IVFPQ, INDEX_HNSW, INDEX_AUTO)
+
+METRIC_COSINE = "cosine"
+METRIC_L2 = "l2"
+
+# Exact search is fast enough below this many vectors
+FLAT_MAX_VECTORS = 50_000
+# HNSW keeps full vectors in RAM; past this, compress with IVF-PQ
+HNSW_MAX_VECTORS = 1_000_000
+
+DEFAULT_VECTOR_STORE_DIR = "data/vector_store"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "chunks.offsets.npy"
+CHUNK_IDS_FILE = "chunk_ids.jsonl"
+CHUNK_IDS_OFFSETS_FILE = "chunk_ids.offsets.npy"
+
+
+def choose_index_type(num_vectors: int) -> str:
+    """Pick an index type from corpus size"""
+    if num_vectors <= FLAT_MAX_VECTORS:
+        return INDEX_FLAT
+    if num_vectors <= HNSW_MAX_VECTORS:
+        return INDEX_HNSW
+    return INDEX_IVFPQ
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest common PQ sub-quantizer count that divides the dimension"""
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+        if dimension % m == 0 and m <= dimension:
+            return m
+    return 1
+
+
+def build_faiss_index(embeddings: np.ndarray, index_type: str = INDEX_AUTO,
+                      metric: str = METRIC_COSINE, hnsw_m: int = 32,
+                      ivf_nprobe: int = 16) -> Any:
+    """Build a FAISS index over row-aligned embeddings; returns (index, resolved index type)"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+    num_vectors, dimension = vectors.shape
+    if index_type == INDEX_AUTO:
+        index_type = choose_index_type(num_vectors)
+
+    if metric == METRIC_COSINE:
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+        faiss_metric = faiss.METRIC_INNER_PRODUCT
+    else:
+        faiss_metric = faiss.METRIC_L2
+
+    if index_type == INDEX_HNSW:
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss_metric)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+    elif index_type == INDEX_IVFPQ:
+        # Rule of thumb: ~4*sqrt(n) lists, with at least 39 training points per list
+        nlist = max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+        if faiss_metric == faiss.METRIC_INNER_PRODUCT:
+            quantizer = faiss.IndexFlatIP(dimension)
+        else:
+            quantizer = faiss.IndexFlatL2(dimension)
+        # 8-bit codes need 256 * 39 training points; use fewer bits on small corpora
+        nbits = int(max(1, min(8, math.log2(max(2, num_vectors // 39)))))
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist,
+                                 _pq_subquantizers(dimension), nbits, faiss_metric)
+        index.train(vectors)
+        index.nprobe = min(ivf_nprobe, nlist)
+    elif faiss_metric == faiss.METRIC_INNER_PRODUCT:
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    index.add(vectors)
+    return index, index_type
+
+
+class ChunkStore:
+    """Read-only, offset-indexed chunk file; each chunk is decoded only when accessed"""
+
+    def __init__(self, chunks_path: str, offsets_path: str):
+        self.chunks_path = chunks_path
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(chunks_path, "rb")
+        if os.path.getsize(chunks_path) > 0:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b""
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError(row)
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(self._data[start:end])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def close(self):
+        """Release the mapping and file handle; safe to call more than once"""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._file.close()
+
+    def __enter__(self) -> "ChunkStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChunkIdStore(ChunkStore):
+    """Row-aligned chunk ids in the same offset-indexed layout, decoded on access"""
+
+    def __getitem__(self, row: int) -> str:
+        return str(super().__getitem__(row))
+
+
+def _write_offset_indexed(path: str, offsets_path: str, values: Sequence[Any]):
+    """Write values as JSONL plus an int64 offsets array (n + 1 entries)"""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(path, "wb") as f:
+        for row, value in enumerate(values):
+            line = json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets[row + 1] = offsets[row] + len(line)
+    np.save(offsets_path, offsets)
+
+
+def write_chunk_store(directory: str, chunks: Sequence[Dict[str, Any]]):
+    """Write chunks as JSONL plus an int64 offsets array (n + 1 entries)"""
+    _write_offset_indexed(os.path.join(directory, CHUNKS_FILE),
+                          os.path.join(directory, OFFSETS_FILE), chunks)
+
+
+def write_chunk_ids(directory: str, chunk_ids: Sequence[str]):
+    """Write chunk ids to a sidecar next to the chunk store, so the manifest stays small"""
+    _write_offset_indexed(os.path.join(directory, CHUNK_IDS_FILE),
+                          os.path.join(directory, CHUNK_IDS_OFFSETS_FILE), list(chunk_ids))
+
+
+class VectorIndex:
+    """A loaded vector store: FAISS index, lazy chunks and memory-mapped embeddings"""
+
+    def __init__(self, index: Any, chunks: Sequence[Dict[str, Any]],
+                 chunk_ids: Optional[Sequence[str]] = None, embeddings: Optional[np.ndarray] = None,
+                 manifest: Optional[Dict[str, Any]] = None, embedder: Any = None):
+        self.index = index
+        self.chunks = chunks
+        self.chunk_ids = chunk_ids if chunk_ids is not None else []
+        self.embeddings = embeddings
+        self.manifest = manifest or {}
+        self.metric = self.manifest.get("metric", METRIC_L2)
+        self.embedder = embedder
+
+    def __len__(self) -> int:
+        return self.index.ntotal if self.index is not None else 0
+
+    def close(self):
+        """Close the file-backed chunk and chunk id stores"""
+        for store in (self.chunks, self.chunk_ids):
+            if isinstance(store, ChunkStore):
+                store.close()
+
+    def __enter__(self) -> "VectorIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def dimension(self) -> int:
+        return self.index.d
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Search one or more query vectors; returns one ranked result list per query"""
+        queries = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+        if self.metric == METRIC_COSINE:
+            queries = queries.copy()
+            faiss.normalize_L2(queries)
+
+        scores, indices = self.index.search(queries, k)
+        all_results = []
+        for query_scores, query_indices in zip(scores, indices):
+            results = []
+            for score, row in zip(query_scores, query_indices):
+                if row < 0 or row >= len(self.chunks):
+                    continue
+                result = dict(self.chunks[int(row)])
+                if row < len(self.chunk_ids):
+                    result["chunk_id"] = self.chunk_ids[row]
+                if self.metric == METRIC_COSINE:
+                    result["score"] = float(score)
+                    result["distance"] = 1.0 - float(score)
+                else:
+                    result["score"] = -float(score)
+                    result["distance"] = float(score)
+                result["rank"] = len(results) + 1
+                results.append(result)
+            all_results.append(results)
+        return all_results
+
+    def search_vector(self, query_vector: Any, k: int = 5) -> List[Dict[str, Any]]:
+        """Search a single query vector"""
+        return self.search_vectors(np.asarray(query_vector, dtype=np.float32), k)[0]
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Embed a text query with the attached embedder and search"""
+        if self.embedder is None:
+            raise ValueError("No embedder attached to this vector index")
+        query_vector = self.embedder.embed_batch([query])[0]
+        return self.search_vector(query_vector, k)
+
+    def search_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Embed several text queries in one call and search them together"""
+        if self.embedder is None:
+            raise ValueError("No embedder attached to this vector index")
+        if not queries:
+            return []
+        return self.search_vectors(np.asarray(self.embedder.embed_batch(queries), dtype=np.float32), k)
+
+
+def save_vector_index(directory: str, index: Any, embeddings: np.ndarray,
+                      chunks: Sequence[Dict[str, Any]], chunk_ids: Optional[Sequence[str]] = None,
+                      index_type: str = INDEX_FLAT, metric: str = METRIC_COSINE,
+                      embedder_name: str = ""):
+    """Save index, embeddings, chunk store and manifest in the shared layout"""
+    os.makedirs(directory, exist_ok=True)
+    faiss.write_index(index, os.path.join(directory, INDEX_FILE))
+    np.save(os.path.join(directory, EMBEDDINGS_FILE), np.asarray(embeddings, dtype=np.float32))
+    write_chunk_store(directory, chunks)
+    chunk_ids = list(chunk_ids or [])
+    write_chunk_ids(directory, chunk_ids)
+
+    manifest = {
+        "format_version": 3,
+        "index_type": index_type,
+        "metric": metric,
+        "dimension": int(index.d),
+        "total_vectors": int(index.ntotal),
+        "embedder": embedder_name,
+        "chunk_id_count": len(chunk_ids),
+    }
+    # Manifest last: its presence marks a complete store
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+
+def _read_index(path: str, index_type: str) -> Any:
+    """Read an index, memory-mapping the inverted lists for IVF indexes"""
+    if index_type == INDEX_IVFPQ:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+
+def load_vector_index(directory: str = DEFAULT_VECTOR_STORE_DIR,
+                      embedder: Any = None) -> VectorIndex:
+    """
+    Load a vector store from any of the layouts this project has written:
+    the shared manifest layout, build_vector's old faiss_index.idx + metadata.json,
+    or setup_vector_store's data/vector_store.faiss + data/chunks.json.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        index = _read_index(os.path.join(directory, INDEX_FILE), manifest.get("index_type", INDEX_FLAT))
+        chunks = ChunkStore(os.path.join(directory, CHUNKS_FILE), os.path.join(directory, OFFSETS_FILE))
+        embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        embeddings = np.load(embeddings_path, mmap_mode="r") if os.path.exists(embeddings_path) else None
+        ids_path = os.path.join(directory, CHUNK_IDS_FILE)
+        if os.path.exists(ids_path):
+            chunk_ids = ChunkIdStore(ids_path, os.path.join(directory, CHUNK_IDS_OFFSETS_FILE))
+        else:
+            # format_version 2 stores inlined the ids in the manifest
+            chunk_ids = manifest.pop("chunk_ids", [])
+        return VectorIndex(index, chunks, chunk_ids, embeddings, manifest, embedder)
+
+    legacy_index = os.path.join(directory, "faiss_index.idx")
+    if os.path.exists(legacy_index):
+        with open(os.path.join(directory, "metadata.json"), "r") as f:
+            metadata = json.load(f)
+        embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        embeddings = np.load(embeddings_path, mmap_mode="r") if os.path.exists(embeddings_path) else None
+        manifest = {"index_type": INDEX_FLAT, "metric": METRIC_L2,
+                    "embedder": metadata.get("embedder", "")}
+        return VectorIndex(faiss.read_index(legacy_index), metadata["chunks"],
+                           metadata.get("chunk_ids", []), embeddings, manifest, embedder)
+
+    parent = os.path.dirname(directory.rstrip(os.sep)) or "."
+    flat_index = directory.rstrip(os.sep) + ".faiss"
+    flat_chunks = os.path.join(parent, "chunks.json")
+    if os.path.exists(flat_index) and os.path.exists(flat_chunks):
+        with open(flat_chunks, "r") as f:
+            chunks = json.load(f)
+        manifest = {"index_type": INDEX_FLAT, "metric": METRIC_L2, "embedder": ""}
+        return VectorIndex(faiss.read_index(flat_index), chunks, None, None, manifest, embedder)
+
+    raise FileNotFoundError(f"No vector store found at {directory}")
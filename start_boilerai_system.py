@@ -33,6 +33,8 @@ class BoilerAISystemStarter:
         # Paths
         self.frontend_path = Path(r"C:\Users\raoro\OneDrive\Desktop\bfrontend-main")
         self.cli_path = Path(r"C:\Users\raoro\OneDrive\Desktop\clitest1-main\my_cli_bot")
+        self.cli_port = 8001
+        self.cli_ready_timeout = 120
         
     def print_banner(self):
         """Print startup banner"""
@@ -95,109 +97,25 @@ class BoilerAISystemStarter:
         print("-" * 30)
         
         try:
-            # Change to frontend directory
-            os.chdir(self.frontend_path)
-            
-            # Create CLI server script with API key
-            cli_script = f'''
-import sys
-import os
-sys.path.insert(0, r"{self.cli_path}")
-
-from simple_boiler_ai import SimpleBoilerAI
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
-import threading
-
-class CLIServer:
-    def __init__(self):
-        self.api_key = "{self.api_key}"
-        self.provider = "{self.provider}"
-        self.cli_agent = SimpleBoilerAI(api_key=self.api_key)
-        self.initialized = True
-        
-    def process_query(self, query):
-        try:
-            result = self.cli_agent.process_query(query)
-            return {{
-                "success": True,
-                "response": result.get("response", str(result)),
-                "thinking": result.get("thinking", ""),
-                "sources": result.get("sources", []),
-                "confidence": result.get("confidence", 0.8),
-                "provider": self.provider
-            }}
-        except Exception as e:
-            return {{
-                "success": False,
-                "error": str(e),
-                "response": f"CLI processing error: {{str(e)}}",
-                "provider": self.provider
-            }}
-
-class CLIRequestHandler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        if self.path == '/query':
-            try:
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
-                query = data.get('query', '')
-                
-                result = cli_server.process_query(query)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-                self.end_headers()
-                
-                response = json.dumps(result)
-                self.wfile.write(response.encode('utf-8'))
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                error_response = json.dumps({{"error": str(e)}})
-                self.wfile.write(error_response.encode('utf-8'))
-    
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-    
-    def log_message(self, format, *args):
-        pass
-
-cli_server = CLIServer()
-server_address = ('localhost', 8001)
-httpd = HTTPServer(server_address, CLIRequestHandler)
-
-print("CLI Server Started!")
-print(f"Server running on: http://localhost:8001")
-print(f"Provider: {self.provider}")
-print("Ready to serve AI requests!")
-
-httpd.serve_forever()
-'''
-            
-            # Write and run CLI server script
-            with open("temp_cli_server.py", "w") as f:
-                f.write(cli_script)
-            
-            # Start CLI server
+            # The API key goes through the environment, not the command line
+            env = dict(os.environ, BOILERAI_API_KEY=self.api_key, LLM_PROVIDER=self.provider)
             self.cli_process = subprocess.Popen([
-                sys.executable, "temp_cli_server.py"
-            ], cwd=self.frontend_path)
-            
-            # Wait for server to start
-            time.sleep(3)
+                sys.executable, str(self.cli_path / "cli_http_server.py"),
+                "--port", str(self.cli_port),
+                "--provider", self.provider
+            ], cwd=self.cli_path, env=env)
+            
+            # Wait until the engine is loaded and the server answers its readiness probe
+            sys.path.insert(0, str(self.cli_path))
+            from cli_http_server import wait_until_ready
+            ready = wait_until_ready(f"http://localhost:{self.cli_port}/ready",
+                                     timeout=self.cli_ready_timeout,
+                                     alive=lambda: self.cli_process.poll() is None)
+            if not ready:
+                print(f"[ERROR] CLI server did not become ready within {self.cli_ready_timeout}s")
+                return False
             
-            print("[OK] CLI Server started on port 8001")
+            print(f"[OK] CLI Server started on port {self.cli_port}")
             return True
             
         except Exception as e:
@@ -267,7 +185,7 @@ httpd.serve_forever()
         print("=" * 60)
     
     def cleanup(self):
-        """Cleanup processes and temp files"""
+        """Cleanup processes"""
         print("\n[INFO] Cleaning up...")
         
         if self.cli_process:
@@ -277,12 +195,6 @@ httpd.serve_forever()
         if self.frontend_process:
             self.frontend_process.terminate()
             print("[OK] Frontend stopped")
-        
-        # Remove temp file
-        temp_file = self.frontend_path / "temp_cli_server.py"
-        if temp_file.exists():
-            temp_file.unlink()
-            print("[OK] Temp files cleaned")
     
     def start_system(self):
         """Start the complete BoilerAI system"""
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Fast-path router tests
+======================
+
+Questions the templates cannot answer must fall through to the LLM pipeline.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_cli_bot"))
+
+from fast_path_router import FastPathRouter  # noqa: E402
+
+COURSES = {
+    "CS 18200": ("Foundations of Computer Science", []),
+    "CS 24000": ("Programming in C", []),
+    "CS 25100": ("Data Structures and Algorithms", ["CS 18200", "CS 24000"]),
+    "CS 25200": ("Systems Programming", ["CS 25100"]),
+}
+
+
+@pytest.fixture(scope="module")
+def router(tmp_path_factory):
+    missing = tmp_path_factory.mktemp("fast_path")
+    tables = {"course_info": {
+        code: {"title": title, "credits": 3, "description": f"{title}.", "prerequisites": prereqs}
+        for code, (title, prereqs) in COURSES.items()
+    }}
+    return FastPathRouter(knowledge_file=str(missing / "knowledge.json"), lookup_tables=tables,
+                          sql_db_path=str(missing / "advisor.db"))
+
+
+@pytest.mark.parametrize("query", [
+    "what is the hardest part of cs 251",
+    "best professor for cs 252",
+    "how many hours per week does cs 251 take",
+    "what courses need cs 251 as a prereq",
+    "what requires cs 251",
+])
+def test_falls_through(router, query):
+    assert router.route(query) is None
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("what are the prereqs for cs 251?", "prerequisites"),
+    ("prerequisites for data structures", "prerequisites"),
+    ("how many credits is cs 252", "credits"),
+    ("tell me about CS 25100", "course_info"),
+])
+def test_answers_template_questions(router, query, intent):
+    answer = router.route(query)
+    assert answer is not None and answer.intent == intent
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Shared result cache tests
+=========================
+
+Queries that differ in meaningful symbols must not share a cache key.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_cli_bot"))
+
+from result_cache import SharedResultCache, canonical_query  # noqa: E402
+
+
+def test_symbols_do_not_collide():
+    queries = ["what is c++", "what is c#", "what is c"]
+    assert len({canonical_query(query) for query in queries}) == len(queries)
+
+    cache = SharedResultCache()
+    for query in queries:
+        cache.set("chat", query, f"answer for {query}")
+    for query in queries:
+        assert cache.get("chat", query) == f"answer for {query}"
+
+
+def test_case_whitespace_and_trailing_punctuation_fold():
+    assert canonical_query("  What is  C++?! ") == canonical_query("what is c++")
+    assert canonical_query("What are the prereqs for CS 25100.") == "what are the prereqs for cs 25100"